@@ -1,6 +1,15 @@
 from fastapi import APIRouter
 
-from app.api.routes import users, login, signup, datasets, images, classifiers, health
+from app.api.routes import (
+    users,
+    login,
+    signup,
+    datasets,
+    images,
+    classifiers,
+    predictions,
+    health,
+)
 
 api_router = APIRouter()
 
@@ -10,4 +19,5 @@ api_router.include_router(users.router)
 api_router.include_router(datasets.router)
 api_router.include_router(images.router)
 api_router.include_router(classifiers.router)
+api_router.include_router(predictions.router)
 api_router.include_router(health.router)
@@ -1,31 +1,61 @@
 import os
+import json
 import uuid
+import asyncio
 import logging
 import zipfile
 import tempfile
-from typing import Optional
-
-from fastapi.responses import FileResponse
-from fastapi import APIRouter, HTTPException, status, File, UploadFile, BackgroundTasks
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Request,
+    status,
+    File,
+    UploadFile,
+    BackgroundTasks,
+    Depends,
+)
 
 from app.models.classifiers import (
+    Classifier,
     ClassifierCreate,
     ClassifierReturn,
     ClassifierDetailReturn,
     ClassifiersReturn,
     ClassifierUpdate,
+    ClassifierRetrain,
+    ClassifierDistill,
     ClassifierTrainingStatus,
     ClassifierPredictionBatchResult,
+    ClassifierTrainingProgress,
 )
 from app.models.messages import Message
 from app.crud.users import (
     SessionDep,
     CurrentUser,
     get_user_by_id,
+    get_current_admin,
 )
 import app.crud.classifiers as crud_classifiers
 import app.crud.datasets as crud_datasets
 from app.ml.models import AVAILABLE_MODELS
+from app.ml.model_cache import model_cache
+from app.ml.prediction_cache import prediction_cache
+from app.ml.model_utils import TFLITE_QUANTIZATION_MODES
+from app.ml.feature_cache import FEATURE_CACHE_ARCHITECTURES, MAX_FEATURE_VARIANTS
+from app.ml.hyperparameter_search import validate_search
+from app.ml.distributed import DISTRIBUTED_MAX_WORKERS
+from app.ml.training_progress import training_progress
+from app.core.micro_batcher import micro_batcher
+from app.core.warmup import warmup_state
+from app.core.inference_pool import (
+    inference_pool,
+    InferencePoolSaturatedError,
+    InferenceTimeoutError,
+)
 
 router = APIRouter(prefix="/classifiers", tags=["classifiers"])
 logger = logging.getLogger(__name__)
@@ -33,6 +63,14 @@ logger = logging.getLogger(__name__)
 
 MEDIA_ROOT = os.environ.get("MEDIA_ROOT", "/app/media")
 
+# Frecuencia de lectura del progreso y de los mensajes para mantener la conexión.
+TRAINING_PROGRESS_POLL_SECONDS = float(
+    os.environ.get("TRAINING_PROGRESS_POLL_SECONDS", "1")
+)
+TRAINING_PROGRESS_HEARTBEAT_SECONDS = float(
+    os.environ.get("TRAINING_PROGRESS_HEARTBEAT_SECONDS", "15")
+)
+
 
 @router.get("/architectures", response_model=list[str])
 async def get_available_architectures(current_user: CurrentUser) -> list[str]:
@@ -48,6 +86,28 @@ async def get_available_architectures(current_user: CurrentUser) -> list[str]:
     return list(AVAILABLE_MODELS.keys())
 
 
+@router.get(
+    "/inference/stats",
+    dependencies=[Depends(get_current_admin)],
+    response_model=dict[str, Any],
+)
+async def get_inference_stats() -> dict[str, Any]:
+    """Devuelve estadísticas del servicio de inferencia del proceso actual (solo administradores).
+
+    Returns:
+        dict: Estadísticas de la caché de modelos, de la caché de predicciones, del
+        pool de inferencia, de las colas de micro-batching y de la precarga de modelos.
+    """
+
+    return {
+        "model_cache": model_cache.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "inference_pool": inference_pool.stats(),
+        "micro_batcher": micro_batcher.stats(),
+        "warmup": warmup_state.snapshot(include_models=True),
+    }
+
+
 @router.post("/", response_model=ClassifierReturn)
 async def create_classifier(
     *,
@@ -67,6 +127,11 @@ async def create_classifier(
         HTTPException[409]: Si ya existe un clasificador con el mismo nombre para este usuario.
         HTTPException[404]: Si el dataset no existe.
         HTTPException[400]: Si la arquitectura seleccionada no es válida.
+        HTTPException[400]: Si el modo de cuantización TFLite no es válido.
+        HTTPException[400]: Si la caché de características no es válida para el modelo.
+        HTTPException[400]: Si la búsqueda de hiperparámetros no es válida.
+        HTTPException[400]: Si el número de procesos del entrenamiento distribuido no es válido.
+        HTTPException[400]: Si el tiempo máximo de entrenamiento no es válido.
 
     Returns:
         ClassifierReturn: Datos del clasificador creado.
@@ -78,6 +143,68 @@ async def create_classifier(
             detail=f"Invalid architecture. Must be one of: {', '.join(AVAILABLE_MODELS.keys())}",
         )
 
+    model_parameters = classifier_in.model_parameters or {}
+    tflite_quantization = model_parameters.get("tflite_quantization")
+    if tflite_quantization and tflite_quantization not in TFLITE_QUANTIZATION_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid TFLite quantization. Must be one of: {', '.join(TFLITE_QUANTIZATION_MODES)}",
+        )
+
+    if model_parameters.get("feature_cache"):
+        if classifier_in.architecture not in FEATURE_CACHE_ARCHITECTURES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Feature caching is only available for: {', '.join(FEATURE_CACHE_ARCHITECTURES)}",
+            )
+        feature_variants = model_parameters.get("feature_variants", 1)
+        if (
+            not isinstance(feature_variants, int)
+            or not 1 <= feature_variants <= MAX_FEATURE_VARIANTS
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid feature variants. Must be between 1 and {MAX_FEATURE_VARIANTS}",
+            )
+
+    distributed_workers = model_parameters.get("distributed_workers", 1)
+    if (
+        not isinstance(distributed_workers, int)
+        or not 1 <= distributed_workers <= DISTRIBUTED_MAX_WORKERS
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid distributed workers. Must be between 1 and {DISTRIBUTED_MAX_WORKERS}",
+        )
+    if distributed_workers > 1 and model_parameters.get("feature_cache"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Feature caching is not available for distributed training",
+        )
+
+    max_training_seconds = model_parameters.get("max_training_seconds")
+    if max_training_seconds is not None:
+        if (
+            isinstance(max_training_seconds, bool)
+            or not isinstance(max_training_seconds, (int, float))
+            or max_training_seconds <= 0
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid max training seconds. Must be a positive number",
+            )
+        if distributed_workers > 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A training time limit is not available for distributed training",
+            )
+
+    if "search" in model_parameters:
+        try:
+            model_parameters["search"] = validate_search(model_parameters["search"])
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     dataset = await crud_datasets.get_dataset_by_userid_and_name(
         session=session,
         user_id=current_user.id,
@@ -293,6 +420,193 @@ async def read_classifier_detail(
     return ClassifierDetailReturn(**classifier_dict)
 
 
+@router.get("/{classifier_id}/progress", response_model=ClassifierTrainingProgress)
+async def read_training_progress(
+    session: SessionDep, current_user: CurrentUser, classifier_id: uuid.UUID
+) -> ClassifierTrainingProgress:
+    """Obtiene el progreso del entrenamiento de un clasificador.
+
+    Args:
+        session (SessionDep): Sesión de la base de datos.
+        current_user (CurrentUser): Usuario actual.
+        classifier_id (uuid.UUID): ID del clasificador.
+
+    Raises:
+        HTTPException[404]: Si el clasificador no existe.
+        HTTPException[403]: Si el usuario no tiene privilegios suficientes.
+
+    Returns:
+        ClassifierTrainingProgress: Última época completada, métricas y tiempo estimado.
+    """
+
+    classifier = await get_accessible_classifier(session, current_user, classifier_id)
+
+    return ClassifierTrainingProgress(**get_progress_snapshot(classifier))
+
+
+@router.get("/{classifier_id}/progress/stream", response_class=StreamingResponse)
+async def stream_training_progress(
+    request: Request,
+    session: SessionDep,
+    current_user: CurrentUser,
+    classifier_id: uuid.UUID,
+) -> StreamingResponse:
+    """Envía el progreso del entrenamiento con Server-Sent Events.
+
+    Se envía un evento "progress" al conectarse, tras cada época y en cada cambio de
+    estado. La conexión se cierra cuando el entrenamiento termina.
+
+    Args:
+        request (Request): Petición, para detectar la desconexión del cliente.
+        session (SessionDep): Sesión de la base de datos.
+        current_user (CurrentUser): Usuario actual.
+        classifier_id (uuid.UUID): ID del clasificador.
+
+    Raises:
+        HTTPException[404]: Si el clasificador no existe.
+        HTTPException[403]: Si el usuario no tiene privilegios suficientes.
+
+    Returns:
+        StreamingResponse: Flujo de eventos en formato text/event-stream.
+    """
+
+    classifier = await get_accessible_classifier(session, current_user, classifier_id)
+    snapshot = get_progress_snapshot(classifier)
+
+    return StreamingResponse(
+        progress_events(request, classifier.id, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{classifier_id}/cancel")
+async def cancel_training(
+    session: SessionDep, current_user: CurrentUser, classifier_id: uuid.UUID
+) -> Message:
+    """Cancela el entrenamiento en curso de un clasificador.
+
+    El worker detiene el entrenamiento en pocos segundos, libera su plaza, elimina
+    los archivos parciales y marca el clasificador como cancelado.
+
+    Args:
+        session (SessionDep): Sesión de la base de datos.
+        current_user (CurrentUser): Usuario actual.
+        classifier_id (uuid.UUID): ID del clasificador.
+
+    Raises:
+        HTTPException[404]: Si el clasificador no existe.
+        HTTPException[403]: Si el usuario no tiene privilegios suficientes.
+        HTTPException[400]: Si el clasificador no se está entrenando.
+
+    Returns:
+        Message: Mensaje de éxito.
+    """
+
+    classifier = await get_accessible_classifier(session, current_user, classifier_id)
+
+    try:
+        await crud_classifiers.cancel_training(classifier=classifier)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return Message(message="Training cancellation requested")
+
+
+@router.post("/{classifier_id}/retrain", response_model=ClassifierReturn)
+async def retrain_classifier(
+    *,
+    session: SessionDep,
+    current_user: CurrentUser,
+    classifier_id: uuid.UUID,
+    retrain_in: ClassifierRetrain,
+) -> ClassifierReturn:
+    """Continúa el entrenamiento de un clasificador con su dataset actualizado.
+
+    Parte del modelo ya entrenado y lo ajusta durante unas pocas épocas, añadiendo
+    las clases nuevas del dataset. Las métricas guardan también las del modelo
+    anterior.
+
+    Args:
+        session (SessionDep): Sesión de la base de datos.
+        current_user (CurrentUser): Usuario actual.
+        classifier_id (uuid.UUID): ID del clasificador.
+        retrain_in (ClassifierRetrain): Parámetros del entrenamiento continuado.
+
+    Raises:
+        HTTPException[404]: Si el clasificador no existe.
+        HTTPException[403]: Si el usuario no tiene privilegios suficientes.
+        HTTPException[400]: Si no se puede continuar el entrenamiento del clasificador.
+
+    Returns:
+        ClassifierReturn: Datos del clasificador en entrenamiento.
+    """
+
+    classifier = await get_accessible_classifier(session, current_user, classifier_id)
+
+    try:
+        classifier = await crud_classifiers.retrain_classifier(
+            session=session, classifier=classifier, retrain_in=retrain_in
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return ClassifierReturn(**classifier.model_dump())
+
+
+@router.post("/{classifier_id}/distill", response_model=ClassifierReturn)
+async def distill_classifier(
+    *,
+    session: SessionDep,
+    current_user: CurrentUser,
+    classifier_id: uuid.UUID,
+    distill_in: ClassifierDistill,
+) -> ClassifierReturn:
+    """Destila un clasificador entrenado en un nuevo clasificador Xception Mini.
+
+    El nuevo clasificador aprende de las predicciones del original con su mismo
+    dataset, y sus métricas comparan la exactitud y la latencia de ambos.
+
+    Args:
+        session (SessionDep): Sesión de la base de datos.
+        current_user (CurrentUser): Usuario actual.
+        classifier_id (uuid.UUID): ID del clasificador profesor.
+        distill_in (ClassifierDistill): Datos del nuevo clasificador.
+
+    Raises:
+        HTTPException[404]: Si el clasificador no existe.
+        HTTPException[403]: Si el usuario no tiene privilegios suficientes.
+        HTTPException[409]: Si ya existe un clasificador con el mismo nombre para este usuario.
+        HTTPException[400]: Si no se puede destilar el clasificador.
+
+    Returns:
+        ClassifierReturn: Datos del clasificador creado.
+    """
+
+    teacher = await get_accessible_classifier(session, current_user, classifier_id)
+
+    existing_classifier = await crud_classifiers.get_classifier_by_userid_and_name(
+        session=session, user_id=current_user.id, name=distill_in.name
+    )
+    if existing_classifier:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The user already has a classifier with that name",
+        )
+
+    try:
+        classifier = await crud_classifiers.distill_classifier(
+            session=session,
+            teacher=teacher,
+            user_id=current_user.id,
+            distill_in=distill_in,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return ClassifierReturn(**classifier.model_dump())
+
+
 @router.patch("/{classifier_id}", response_model=ClassifierReturn)
 async def update_classifier(
     *,
@@ -470,6 +784,11 @@ async def download_model(
             zipf.write(model_file, "model/model.keras")
             zipf.write(metadata_file, "model/metadata.json")
 
+            # Incluir el modelo TFLite cuantizado si se exportó.
+            tflite_file = os.path.join(model_dir, "model.tflite")
+            if os.path.exists(tflite_file):
+                zipf.write(tflite_file, "model/model.tflite")
+
         # Definir una función para eliminar el archivo.
         def remove_temp_file(file_path: str):
             if os.path.exists(file_path):
@@ -500,6 +819,7 @@ async def predict_images(
     current_user: CurrentUser,
     classifier_id: uuid.UUID,
     files: list[UploadFile] = File(...),
+    include_thumbnails: bool = True,
 ):
     """Realiza inferencia en imágenes utilizando un modelo entrenado.
 
@@ -508,11 +828,14 @@ async def predict_images(
         current_user: Usuario actual.
         classifier_id: ID del clasificador a utilizar.
         files: Archivos de imágenes para realizar inferencia.
+        include_thumbnails: Indica si se incluye una miniatura de cada imagen.
 
     Raises:
         HTTPException[404]: Si el clasificador no existe.
         HTTPException[403]: Si el usuario no tiene privilegios suficientes.
         HTTPException[400]: Si el modelo no está entrenado o no es válido.
+        HTTPException[503]: Si el servicio de inferencia está saturado.
+        HTTPException[504]: Si la inferencia supera el tiempo máximo.
 
     Returns:
         ClassifierPredictionBatchResult: Resultados de la inferencia.
@@ -556,16 +879,106 @@ async def predict_images(
 
         # Realizar inferencia.
         results = await crud_classifiers.perform_inference(
-            classifier=classifier, image_files=image_files, filenames=filenames
+            classifier=classifier,
+            image_files=image_files,
+            filenames=filenames,
+            include_thumbnails=include_thumbnails,
         )
 
         return results
 
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except InferencePoolSaturatedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"},
+        )
+    except InferenceTimeoutError as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
     except Exception as e:
         logger.error(f"Error during inference: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error during inference: {str(e)}",
         )
+
+
+async def get_accessible_classifier(
+    session: SessionDep, current_user: CurrentUser, classifier_id: uuid.UUID
+) -> Classifier:
+    """Obtiene un clasificador comprobando que el usuario puede acceder a él."""
+
+    classifier = await crud_classifiers.get_classifier_by_id(
+        session=session, id=classifier_id
+    )
+    if not classifier:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Classifier not found"
+        )
+    if not current_user.is_admin and (classifier.user_id != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges",
+        )
+
+    return classifier
+
+
+def get_progress_snapshot(classifier: Classifier) -> Dict[str, Any]:
+    """Combina el progreso publicado por el worker con el estado en la base de datos."""
+
+    progress = training_progress.read(classifier.id) or {}
+    snapshot = {**progress, "classifier_id": str(classifier.id)}
+
+    # El estado de la base de datos prevalece si el progreso quedó desactualizado.
+    db_status = ClassifierTrainingStatus(classifier.status)
+    if db_status != ClassifierTrainingStatus.TRAINING:
+        snapshot["status"] = db_status.value
+    else:
+        snapshot.setdefault("status", db_status.value)
+
+    return snapshot
+
+
+def format_event(data: Dict[str, Any], event: str = "progress") -> str:
+    """Da formato de Server-Sent Event a un mensaje."""
+
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def progress_events(
+    request: Request, classifier_id: uuid.UUID, snapshot: Dict[str, Any]
+) -> AsyncIterator[str]:
+    """Genera los eventos de progreso hasta que el entrenamiento termina.
+
+    Solo se consulta el archivo de progreso compartido, nunca la base de datos.
+    """
+
+    yield format_event(snapshot)
+    if snapshot["status"] != ClassifierTrainingStatus.TRAINING.value:
+        return
+
+    last_version = training_progress.version(classifier_id)
+    idle_seconds = 0.0
+    while not await request.is_disconnected():
+        await asyncio.sleep(TRAINING_PROGRESS_POLL_SECONDS)
+
+        version = training_progress.version(classifier_id)
+        if version == last_version:
+            idle_seconds += TRAINING_PROGRESS_POLL_SECONDS
+            if idle_seconds >= TRAINING_PROGRESS_HEARTBEAT_SECONDS:
+                idle_seconds = 0.0
+                yield ": keep-alive\n\n"
+            continue
+
+        last_version = version
+        idle_seconds = 0.0
+        progress = training_progress.read(classifier_id)
+        if progress is None:
+            continue
+
+        yield format_event(progress)
+        if progress.get("status") != ClassifierTrainingStatus.TRAINING.value:
+            return
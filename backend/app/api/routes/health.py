@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 
+from app.core.warmup import warmup_state
+
 router = APIRouter()
 
 
 @router.get("/health", status_code=200)
 def health_check():
-    return {"status": "ok"}
+    return {"status": "ok", "warmup": warmup_state.snapshot()}
@@ -0,0 +1,180 @@
+import uuid
+
+from fastapi import APIRouter, HTTPException, status
+
+from app.models.classifiers import ClassifierTrainingStatus
+from app.models.predictions import (
+    PredictionJob,
+    PredictionJobCreate,
+    PredictionJobReturn,
+    PredictionResultReturn,
+    PredictionResultsReturn,
+)
+from app.models.users import User
+from app.crud.users import SessionDep, CurrentUser
+from app.crud.classifiers import get_classifier_by_id
+from app.crud.datasets import get_dataset_by_id
+import app.crud.predictions as crud_predictions
+
+router = APIRouter(prefix="/predictions", tags=["predictions"])
+
+
+@router.post(
+    "/",
+    response_model=PredictionJobReturn,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_prediction_job(
+    session: SessionDep, current_user: CurrentUser, job_in: PredictionJobCreate
+) -> PredictionJobReturn:
+    """Lanza la inferencia de un clasificador sobre todas las imágenes de un dataset.
+
+    Args:
+        session (SessionDep): Sesión de la base de datos.
+        current_user (CurrentUser): Usuario actual.
+        job_in (PredictionJobCreate): Clasificador, dataset y número de clases a guardar.
+
+    Raises:
+        HTTPException[404]: Si el clasificador o el dataset no existen.
+        HTTPException[403]: Si el usuario no tiene privilegios suficientes.
+        HTTPException[400]: Si el clasificador no está entrenado.
+        HTTPException[500]: Si no se pudo iniciar el trabajo.
+
+    Returns:
+        PredictionJobReturn: Trabajo creado.
+    """
+
+    classifier = await get_classifier_by_id(session=session, id=job_in.classifier_id)
+    if not classifier:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Classifier not found"
+        )
+    if not current_user.is_admin and (classifier.user_id != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges",
+        )
+    if (
+        classifier.status != ClassifierTrainingStatus.TRAINED
+        or not classifier.file_path
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Classifier is not trained yet",
+        )
+
+    dataset = await get_dataset_by_id(session=session, id=job_in.dataset_id)
+    if not dataset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Dataset not found"
+        )
+    if not dataset.is_public and not (
+        current_user.is_admin or dataset.user_id == current_user.id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges",
+        )
+
+    try:
+        job = await crud_predictions.create_prediction_job(
+            session=session,
+            user_id=current_user.id,
+            classifier_id=classifier.id,
+            dataset_id=dataset.id,
+            top_k=job_in.top_k,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+    return to_job_return(job)
+
+
+@router.get("/{job_id}", response_model=PredictionJobReturn)
+async def read_prediction_job(
+    session: SessionDep, current_user: CurrentUser, job_id: uuid.UUID
+) -> PredictionJobReturn:
+    """Obtiene el estado y el progreso de un trabajo de inferencia masiva.
+
+    Args:
+        session (SessionDep): Sesión de la base de datos.
+        current_user (CurrentUser): Usuario actual.
+        job_id (uuid.UUID): ID del trabajo.
+
+    Raises:
+        HTTPException[404]: Si el trabajo no existe.
+        HTTPException[403]: Si el usuario no tiene privilegios suficientes.
+
+    Returns:
+        PredictionJobReturn: Estado y progreso del trabajo.
+    """
+
+    job = await get_accessible_job(session, current_user, job_id)
+
+    return to_job_return(job)
+
+
+@router.get("/{job_id}/results", response_model=PredictionResultsReturn)
+async def read_prediction_results(
+    session: SessionDep,
+    current_user: CurrentUser,
+    job_id: uuid.UUID,
+    skip: int = 0,
+    limit: int = 100,
+) -> PredictionResultsReturn:
+    """Obtiene los resultados de un trabajo de inferencia masiva con paginación.
+
+    Args:
+        session (SessionDep): Sesión de la base de datos.
+        current_user (CurrentUser): Usuario actual.
+        job_id (uuid.UUID): ID del trabajo.
+        skip (int): Cantidad de resultados a omitir (paginación).
+        limit (int): Cantidad de resultados a devolver (paginación).
+
+    Raises:
+        HTTPException[404]: Si el trabajo no existe.
+        HTTPException[403]: Si el usuario no tiene privilegios suficientes.
+
+    Returns:
+        PredictionResultsReturn: Resultados de la página y su conteo total.
+    """
+
+    await get_accessible_job(session, current_user, job_id)
+
+    results, count = await crud_predictions.get_prediction_results(
+        session=session, job_id=job_id, skip=skip, limit=limit
+    )
+
+    return PredictionResultsReturn(
+        results=[PredictionResultReturn(**r.model_dump()) for r in results],
+        count=count,
+    )
+
+
+async def get_accessible_job(
+    session: SessionDep, current_user: User, job_id: uuid.UUID
+) -> PredictionJob:
+    """Obtiene un trabajo comprobando que el usuario puede acceder a él."""
+
+    job = await crud_predictions.get_prediction_job_by_id(session=session, id=job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Prediction job not found"
+        )
+    if not current_user.is_admin and (job.user_id != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges",
+        )
+
+    return job
+
+
+def to_job_return(job: PredictionJob) -> PredictionJobReturn:
+    """Convierte un trabajo en su modelo de respuesta con el progreso calculado."""
+
+    return PredictionJobReturn(
+        **job.model_dump(), progress=crud_predictions.get_job_progress(job)
+    )
@@ -1,6 +1,7 @@
 import os
 
 from sqlmodel import SQLModel, select
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 import sqlalchemy.exc
@@ -29,6 +30,15 @@ async def init_db():
         )
         pass
 
+    # create_all no modifica los tipos ENUM ya existentes: añadir los valores nuevos.
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(
+            text(
+                "ALTER TYPE classifiertrainingstatus ADD VALUE IF NOT EXISTS 'CANCELLED'"
+            )
+        )
+
 
 async def get_session():
     """Genera una nueva sesión asíncrona de la base de datos."""
@@ -0,0 +1,142 @@
+import os
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Configuración del pool de inferencia (por proceso).
+INFERENCE_POOL_SIZE = int(os.environ.get("INFERENCE_POOL_SIZE", "2"))
+INFERENCE_MAX_PENDING = int(os.environ.get("INFERENCE_MAX_PENDING", "8"))
+INFERENCE_TIMEOUT_SECONDS = float(os.environ.get("INFERENCE_TIMEOUT_SECONDS", "120"))
+
+
+class InferencePoolSaturatedError(Exception):
+    """Se lanza cuando el pool de inferencia no admite más trabajos pendientes."""
+
+
+class InferenceTimeoutError(Exception):
+    """Se lanza cuando un trabajo de inferencia supera el tiempo máximo permitido."""
+
+
+class InferencePool:
+    """Pool de hilos acotado para ejecutar la inferencia fuera del bucle de eventos.
+
+    Limita el número de trabajos en curso o en cola; un trabajo solo libera su
+    plaza cuando termina realmente, aunque la petición que lo lanzó haya expirado.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, timeout: float):
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Ejecuta una función bloqueante en el pool y espera su resultado.
+
+        Args:
+            func: Función a ejecutar.
+            *args: Argumentos posicionales de la función.
+            timeout: Tiempo máximo de espera en segundos (por defecto el del pool).
+            **kwargs: Argumentos con nombre de la función.
+
+        Raises:
+            InferencePoolSaturatedError: Si se ha alcanzado el límite de trabajos pendientes.
+            InferenceTimeoutError: Si el trabajo no termina dentro del tiempo máximo.
+
+        Returns:
+            Any: Resultado de la función.
+        """
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise InferencePoolSaturatedError(
+                    "The inference service is busy, please try again later"
+                )
+            self._pending += 1
+            self.submitted += 1
+
+        try:
+            future = self._get_executor().submit(
+                functools.partial(func, *args, **kwargs)
+            )
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout=timeout or self.timeout
+            )
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise InferenceTimeoutError("The inference request took too long")
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve estadísticas de uso del pool.
+
+        Returns:
+            Dict: Configuración, trabajos pendientes y contadores.
+        """
+
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "timeout_seconds": self.timeout,
+                "pending": self._pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+    def shutdown(self) -> None:
+        """Detiene el pool sin esperar a los trabajos en curso."""
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Crea el executor de forma perezosa (tras el fork de los workers)."""
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="inference"
+                )
+            return self._executor
+
+    def _release(self, future: Optional[Future]) -> None:
+        """Libera la plaza de un trabajo terminado."""
+
+        with self._lock:
+            self._pending -= 1
+            if future is not None:
+                self.completed += 1
+
+
+# Pool compartido por todas las peticiones del proceso.
+inference_pool = InferencePool(
+    max_workers=INFERENCE_POOL_SIZE,
+    max_pending=INFERENCE_MAX_PENDING,
+    timeout=INFERENCE_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,263 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from app.core.inference_pool import InferencePool, inference_pool
+
+# Configuración del micro-batching de peticiones concurrentes.
+MICRO_BATCH_ENABLED = os.environ.get("MICRO_BATCH_ENABLED", "true").lower() == "true"
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+
+class _PendingRequest:
+    """Imágenes de una petición a la espera de ser incluidas en un lote."""
+
+    def __init__(
+        self,
+        version: str,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        images: np.ndarray,
+        future: asyncio.Future,
+    ):
+        self.version = version
+        self.predict_fn = predict_fn
+        self.images = images
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class _BatchStats:
+    """Contadores de las peticiones y los lotes ejecutados."""
+
+    def __init__(self):
+        self.requests = 0
+        self.images = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.total_wait_seconds = 0.0
+
+    def record(self, requests: List[_PendingRequest], batch_size: int) -> None:
+        now = time.monotonic()
+        self.requests += len(requests)
+        self.images += batch_size
+        self.batches += 1
+        self.max_batch_seen = max(self.max_batch_seen, batch_size)
+        self.total_wait_seconds += sum(now - r.enqueued_at for r in requests)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "images": self.images,
+            "batches": self.batches,
+            "avg_batch_size": self.images / self.batches if self.batches else 0.0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "avg_wait_ms": (
+                1000 * self.total_wait_seconds / self.requests if self.requests else 0.0
+            ),
+        }
+
+
+class _ModelQueue:
+    """Cola de peticiones pendientes y estadísticas de un clasificador.
+
+    La cola se elimina cuando se vacía, de modo que los clasificadores reentrenados
+    o borrados no dejan colas sin uso.
+    """
+
+    def __init__(self):
+        self.pending: Deque[_PendingRequest] = deque()
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup = asyncio.Event()
+        self.stats = _BatchStats()
+
+    def queued_images(self) -> int:
+        return sum(len(request.images) for request in self.pending)
+
+
+class MicroBatcher:
+    """Agrupa las imágenes de peticiones concurrentes a un mismo clasificador.
+
+    Las peticiones se acumulan brevemente por clasificador hasta alcanzar el tamaño
+    máximo de lote o el tiempo máximo de espera; entonces se ejecuta una única
+    pasada del modelo en el pool de inferencia y se reparten los resultados.
+    """
+
+    def __init__(
+        self,
+        pool: InferencePool,
+        max_batch_size: int,
+        max_wait_ms: float,
+        enabled: bool = True,
+    ):
+        self.pool = pool
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.enabled = enabled
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._totals = _BatchStats()
+
+    async def predict(
+        self,
+        classifier_id: Any,
+        version: str,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        images: np.ndarray,
+    ) -> np.ndarray:
+        """Obtiene las predicciones de un lote de imágenes de un clasificador.
+
+        Args:
+            classifier_id: ID del clasificador.
+            version: Versión de los artefactos del modelo.
+            predict_fn: Función que ejecuta el modelo sobre un lote de imágenes.
+            images: Lote de imágenes de forma (n, alto, ancho, 3).
+
+        Raises:
+            InferencePoolSaturatedError: Si el pool de inferencia está saturado.
+            InferenceTimeoutError: Si la inferencia supera el tiempo máximo.
+
+        Returns:
+            np.ndarray: Salidas del modelo para cada imagen.
+        """
+
+        # Las peticiones grandes ya forman un lote completo por sí mismas.
+        if not self.enabled or len(images) >= self.max_batch_size:
+            return await self.pool.run(predict_fn, images)
+
+        key = str(classifier_id)
+        queue = self._queues.setdefault(key, _ModelQueue())
+        future = asyncio.get_running_loop().create_future()
+        queue.pending.append(_PendingRequest(version, predict_fn, images, future))
+
+        if queue.task is None or queue.task.done():
+            queue.wakeup = asyncio.Event()
+            queue.task = asyncio.create_task(self._process(key, queue))
+        else:
+            queue.wakeup.set()
+
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve la configuración, los totales y las estadísticas de cada cola activa.
+
+        Returns:
+            Dict: Configuración, totales del proceso y estadísticas de las colas con
+                peticiones en curso.
+        """
+
+        models = {}
+        for key, queue in self._queues.items():
+            models[key] = {
+                "queued_requests": len(queue.pending),
+                "queued_images": queue.queued_images(),
+                **queue.stats.as_dict(),
+            }
+
+        return {
+            "enabled": self.enabled,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "totals": self._totals.as_dict(),
+            "models": models,
+        }
+
+    async def _process(self, key: str, queue: _ModelQueue) -> None:
+        """Forma y ejecuta lotes mientras haya peticiones pendientes en la cola.
+
+        Al vaciarse, la cola se elimina; la siguiente petición crea una nueva.
+        """
+
+        try:
+            await self._process_pending(queue)
+        finally:
+            # Sin esperas entre la comprobación y el borrado: ninguna petición puede
+            # añadirse a la cola después de que el bucle la haya visto vacía.
+            if self._queues.get(key) is queue and not queue.pending:
+                del self._queues[key]
+
+    async def _process_pending(self, queue: _ModelQueue) -> None:
+        """Ejecuta los lotes de una cola hasta que no queden peticiones."""
+
+        while queue.pending:
+            # Esperar a que lleguen más imágenes o venza el plazo de la más antigua.
+            deadline = queue.pending[0].enqueued_at + self.max_wait_ms / 1000
+            while queue.queued_images() < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                queue.wakeup.clear()
+                try:
+                    await asyncio.wait_for(queue.wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            requests = self._take_batch(queue)
+            if not requests:
+                continue
+
+            batch = np.concatenate([request.images for request in requests])
+            queue.stats.record(requests, len(batch))
+            self._totals.record(requests, len(batch))
+
+            try:
+                outputs = await self.pool.run(requests[0].predict_fn, batch)
+            except Exception as e:
+                for request in requests:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+
+            # Repartir las salidas entre las peticiones en el mismo orden.
+            start = 0
+            for request in requests:
+                end = start + len(request.images)
+                if not request.future.done():
+                    request.future.set_result(outputs[start:end])
+                start = end
+
+    def _take_batch(self, queue: _ModelQueue) -> List[_PendingRequest]:
+        """Extrae de la cola las peticiones que forman el siguiente lote.
+
+        Solo se agrupan peticiones de la misma versión del modelo que la primera y
+        sin superar el tamaño máximo de lote (salvo que la primera ya lo supere).
+        """
+
+        # Descartar peticiones canceladas por el cliente.
+        while queue.pending and queue.pending[0].future.done():
+            queue.pending.popleft()
+        if not queue.pending:
+            return []
+
+        head = queue.pending.popleft()
+        batch = [head]
+        batch_images = len(head.images)
+        remaining: Deque[_PendingRequest] = deque()
+
+        while queue.pending:
+            request = queue.pending.popleft()
+            if request.future.done():
+                continue
+            if (
+                request.version == head.version
+                and batch_images + len(request.images) <= self.max_batch_size
+            ):
+                batch.append(request)
+                batch_images += len(request.images)
+            else:
+                remaining.append(request)
+
+        queue.pending = remaining
+        return batch
+
+
+# Micro-batcher compartido por todas las peticiones del proceso.
+micro_batcher = MicroBatcher(
+    pool=inference_pool,
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+    enabled=MICRO_BATCH_ENABLED,
+)
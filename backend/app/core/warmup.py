@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import asyncio
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import load_only
+from sqlmodel import select
+
+from app.models.classifiers import Classifier, ClassifierTrainingStatus
+from app.core.inference_pool import inference_pool
+from app.ml.model_cache import model_cache, MODEL_CACHE_MAX_ENTRIES
+from app.ml.inference_utils import predict_in_batches
+from app.ml.model_utils import CompiledPredictor
+
+logger = logging.getLogger(__name__)
+
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", "/app/media")
+
+# Clasificadores a precargar al arrancar: "recent", "frequent", "none" o lista de IDs.
+WARMUP_CLASSIFIERS = os.environ.get("WARMUP_CLASSIFIERS", "recent")
+WARMUP_MAX_MODELS = min(
+    int(os.environ.get("WARMUP_MAX_MODELS", "3")), MODEL_CACHE_MAX_ENTRIES
+)
+
+# Registro de uso de los clasificadores compartido entre reinicios.
+CLASSIFIER_USAGE_PATH = os.path.join(MEDIA_ROOT, "cache", "classifier_usage.json")
+
+# Segundos entre escrituras del registro de uso (también se escribe al apagar).
+CLASSIFIER_USAGE_FLUSH_SECONDS = float(
+    os.environ.get("CLASSIFIER_USAGE_FLUSH_SECONDS", "60")
+)
+
+
+class ClassifierUsage:
+    """Registro de cuántas veces y cuándo se ha usado cada clasificador para predecir."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._counts: Counter = Counter()
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, classifier_id: Any) -> None:
+        """Registra una predicción con un clasificador."""
+
+        key = str(classifier_id)
+        with self._lock:
+            self._counts[key] += 1
+            self._last_used[key] = time.time()
+
+    def load(self) -> Dict[str, Dict[str, float]]:
+        """Lee el registro persistido junto con el uso de este proceso."""
+
+        usage = self._read()
+        with self._lock:
+            self._merge(usage, self._counts, self._last_used)
+        return usage
+
+    def save(self) -> None:
+        """Añade el uso de este proceso al registro persistido.
+
+        Varios procesos pueden escribir a la vez: la lectura, la mezcla y la
+        escritura se hacen bajo un lock de fichero para no perder el uso de ninguno.
+        """
+
+        # Retirar el uso pendiente; las predicciones posteriores se guardan en la
+        # siguiente escritura.
+        with self._lock:
+            counts, last_used = self._counts, self._last_used
+            self._counts, self._last_used = Counter(), {}
+        if not counts:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(f"{self.path}.lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                usage = self._read()
+                self._merge(usage, counts, last_used)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(usage, f)
+                os.replace(tmp_path, self.path)
+        except Exception:
+            # Conservar el uso no guardado para el siguiente intento.
+            with self._lock:
+                self._merge_counts(counts, last_used)
+            raise
+
+    def _read(self) -> Dict[str, Dict[str, float]]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _merge_counts(self, counts: Counter, last_used: Dict[str, float]) -> None:
+        self._counts.update(counts)
+        for key, timestamp in last_used.items():
+            self._last_used[key] = max(self._last_used.get(key, 0.0), timestamp)
+
+    @staticmethod
+    def _merge(
+        usage: Dict[str, Dict[str, float]],
+        counts: Counter,
+        last_used: Dict[str, float],
+    ) -> None:
+        for key, count in counts.items():
+            entry = usage.setdefault(key, {"count": 0, "last_used": 0.0})
+            entry["count"] += count
+            entry["last_used"] = max(entry["last_used"], last_used[key])
+
+
+class WarmupState:
+    """Progreso de la precarga de modelos.
+
+    El endpoint de salud muestra el estado y los contadores; el detalle por
+    clasificador solo aparece en las estadísticas de inferencia de administración.
+    """
+
+    def __init__(self):
+        self.status = "pending"
+        self.strategy = WARMUP_CLASSIFIERS
+        self.models: List[Dict[str, Any]] = []
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    def snapshot(self, include_models: bool = False) -> Dict[str, Any]:
+        """Devuelve el estado actual de la precarga.
+
+        Args:
+            include_models: Incluir el detalle de cada clasificador (solo para
+                administradores, ya que contiene sus IDs).
+
+        Returns:
+            Dict: Estado y contadores de la precarga.
+        """
+
+        snapshot = {
+            "status": self.status,
+            "strategy": self.strategy,
+            "total": len(self.models),
+            "warmed": sum(1 for m in self.models if m["status"] == "warmed"),
+            "failed": sum(1 for m in self.models if m["status"] == "failed"),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_models:
+            snapshot["models"] = list(self.models)
+        return snapshot
+
+
+classifier_usage = ClassifierUsage(CLASSIFIER_USAGE_PATH)
+warmup_state = WarmupState()
+
+
+async def flush_classifier_usage() -> None:
+    """Escribe periódicamente el uso registrado para no perderlo si el proceso muere."""
+
+    while True:
+        await asyncio.sleep(CLASSIFIER_USAGE_FLUSH_SECONDS)
+        try:
+            await asyncio.to_thread(classifier_usage.save)
+        except Exception as e:
+            logger.warning(f"Error saving classifier usage: {str(e)}")
+
+
+async def select_warmup_classifiers(
+    session, strategy: str, limit: int
+) -> List[Classifier]:
+    """Selecciona los clasificadores entrenados que se deben precargar.
+
+    Args:
+        session: Sesión de base de datos.
+        strategy: "recent", "frequent" o lista de IDs separados por comas.
+        limit: Número máximo de clasificadores.
+
+    Returns:
+        List[Classifier]: Clasificadores a precargar, por orden de prioridad.
+    """
+
+    # Solo se leen las columnas necesarias para cargar el modelo (sin las métricas).
+    stmt = (
+        select(Classifier)
+        .options(
+            load_only(
+                Classifier.id,
+                Classifier.file_path,
+                Classifier.trained_at,
+                Classifier.architecture,
+            )
+        )
+        .where(
+            Classifier.status == ClassifierTrainingStatus.TRAINED,
+            Classifier.file_path.is_not(None),
+        )
+    )
+
+    if strategy not in ("recent", "frequent"):
+        ids = []
+        for value in strategy.split(","):
+            try:
+                ids.append(uuid.UUID(value.strip()))
+            except ValueError:
+                logger.warning(f"Ignoring invalid classifier ID in warm-up: {value}")
+        result = await session.execute(stmt.where(Classifier.id.in_(ids)))
+        by_id = {c.id: c for c in result.scalars().all()}
+        return [by_id[i] for i in ids if i in by_id][:limit]
+
+    # Candidatos: los clasificadores con uso registrado y los entrenados más
+    # recientemente, sin leer todos los clasificadores de la base de datos.
+    usage = classifier_usage.load()
+    usage_field = "count" if strategy == "frequent" else "last_used"
+    used_ids = []
+    for key, entry in usage.items():
+        try:
+            if entry.get(usage_field, 0) > 0:
+                used_ids.append(uuid.UUID(key))
+        except ValueError:
+            continue
+
+    candidates: Dict[uuid.UUID, Classifier] = {}
+    if used_ids:
+        result = await session.execute(stmt.where(Classifier.id.in_(used_ids)))
+        candidates.update((c.id, c) for c in result.scalars().all())
+    result = await session.execute(
+        stmt.order_by(Classifier.trained_at.desc().nulls_last()).limit(limit)
+    )
+    candidates.update((c.id, c) for c in result.scalars().all())
+    classifiers = list(candidates.values())
+
+    # Ordenar por uso registrado y, sin él, por fecha de entrenamiento.
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+    classifiers.sort(
+        key=lambda c: (
+            usage.get(str(c.id), {}).get(usage_field, 0),
+            c.trained_at or epoch,
+        ),
+        reverse=True,
+    )
+
+    return classifiers[:limit]
+
+
+def warm_up_classifier(classifier: Classifier) -> None:
+    """Carga el modelo de un clasificador y ejecuta una pasada con una imagen vacía.
+
+    Args:
+        classifier: Clasificador entrenado.
+    """
+
+    cached_model = model_cache.get(
+        classifier.id, os.path.join(MEDIA_ROOT, classifier.file_path)
+    )
+    image_size = cached_model.metadata.get("train_params", {}).get(
+        "image_size", [180, 180]
+    )
+    dummy = np.zeros((1, image_size[1], image_size[0], 3), dtype=np.uint8)
+    predict_in_batches(cached_model.model, dummy, architecture=classifier.architecture)
+
+    # Compilar también el resto de tamaños de lote de la función compilada.
+    if isinstance(cached_model.model, CompiledPredictor):
+        cached_model.model.warm_up()
+
+
+async def warm_up_models(session_factory) -> None:
+    """Precarga los clasificadores configurados sin bloquear el arranque.
+
+    Args:
+        session_factory: Generador asíncrono de sesiones de base de datos.
+    """
+
+    if WARMUP_CLASSIFIERS == "none" or WARMUP_MAX_MODELS <= 0:
+        warmup_state.status = "disabled"
+        return
+
+    warmup_state.status = "running"
+    warmup_state.started_at = datetime.now(timezone.utc)
+
+    try:
+        async for session in session_factory():
+            classifiers = await select_warmup_classifiers(
+                session, WARMUP_CLASSIFIERS, WARMUP_MAX_MODELS
+            )
+
+        warmup_state.models = [
+            {"classifier_id": str(c.id), "status": "pending", "seconds": None}
+            for c in classifiers
+        ]
+
+        for classifier, entry in zip(classifiers, warmup_state.models):
+            entry["status"] = "warming"
+            start = time.perf_counter()
+            try:
+                await inference_pool.run(warm_up_classifier, classifier)
+                entry["status"] = "warmed"
+            except Exception as e:
+                logger.warning(f"Error warming up classifier {classifier.id}: {str(e)}")
+                entry["status"] = "failed"
+            entry["seconds"] = round(time.perf_counter() - start, 3)
+
+        warmup_state.status = "completed"
+    except asyncio.CancelledError:
+        warmup_state.status = "cancelled"
+        raise
+    except Exception as e:
+        logger.error(f"Error during model warm-up: {str(e)}", exc_info=True)
+        warmup_state.status = "failed"
+    finally:
+        warmup_state.finished_at = datetime.now(timezone.utc)
@@ -1,13 +1,12 @@
 import uuid
+import asyncio
 from datetime import datetime, timezone
 import logging
 import os
+import shutil
 from typing import Tuple, List, Optional, Dict, Any
-import base64
-import io
+import functools
 import numpy as np
-from PIL import Image as PILImage
-import tensorflow as tf
 
 from sqlalchemy import or_, desc, asc, func
 from sqlmodel import select
@@ -17,11 +16,39 @@ from app.models.classifiers import (
     Classifier,
     ClassifierCreate,
     ClassifierUpdate,
+    ClassifierRetrain,
+    ClassifierDistill,
     ClassifierTrainingStatus,
 )
 from app.models.users import User
-from app.tasks.celery_app import train_model
-from app.ml.model_utils import load_model, load_model_metadata
+from app.tasks.celery_app import train_model, search_hyperparameters
+from app.core.inference_pool import inference_pool
+from app.core.micro_batcher import micro_batcher
+from app.core.warmup import classifier_usage
+from app.ml.model_cache import CachedModel, model_cache, get_model_version
+from app.ml.training_progress import training_progress
+from app.ml.checkpoints import CHECKPOINT_DIR_NAME
+from app.ml.hyperparameter_search import SEARCH_TRIALS_DIR_NAME
+from app.ml.model_utils import MODEL_STAGING_DIR_NAME
+from app.ml.warm_start import (
+    WARM_START_EPOCHS,
+    WARM_START_EXCLUDED_PARAMETERS,
+    WARM_START_HEAD_MODES,
+    WARM_START_LEARNING_RATE_FACTOR,
+)
+from app.ml.distillation import (
+    DISTILLATION_ALPHA,
+    DISTILLATION_IMAGE_SIZE,
+    DISTILLATION_STUDENT_ARCHITECTURE,
+    DISTILLATION_TEMPERATURE,
+)
+from app.ml.prediction_cache import prediction_cache, hash_image
+from app.ml.inference_utils import (
+    decode_image,
+    THUMBNAIL_SIZE,
+    predict_in_batches,
+    format_predictions,
+)
 
 logger = logging.getLogger(__name__)
 MEDIA_ROOT = os.environ.get("MEDIA_ROOT", "/app/media")
@@ -199,6 +226,11 @@ async def update_classifier_training_status(
     await session.commit()
     await session.refresh(classifier)
 
+    # Descartar el modelo y sus predicciones en caché, ya que puede haber sido reentrenado
+    # (el almacén compartido de predicciones se modifica fuera del bucle de eventos).
+    model_cache.invalidate(classifier_id)
+    await asyncio.to_thread(prediction_cache.invalidate, classifier_id)
+
     return classifier
 
 
@@ -213,6 +245,26 @@ async def delete_classifier(*, session: AsyncSession, classifier: Classifier) ->
         None
     """
 
+    # Descartar el modelo cargado en memoria y sus predicciones.
+    model_cache.invalidate(classifier.id)
+    await asyncio.to_thread(prediction_cache.invalidate, classifier.id)
+    training_progress.clear(classifier.id)
+
+    # Detener el entrenamiento en curso para que no siga consumiendo el worker.
+    if classifier.status == ClassifierTrainingStatus.TRAINING:
+        training_progress.request_cancel(classifier.id)
+
+    # Eliminar los checkpoints y los artefactos sin publicar de un entrenamiento o
+    # una búsqueda sin terminar.
+    training_dir = os.path.join(MODELS_DIR, str(classifier.id))
+    for name in (CHECKPOINT_DIR_NAME, SEARCH_TRIALS_DIR_NAME, MODEL_STAGING_DIR_NAME):
+        shutil.rmtree(os.path.join(training_dir, name), ignore_errors=True)
+    if not classifier.file_path and os.path.isdir(training_dir):
+        try:
+            os.rmdir(training_dir)
+        except OSError as e:
+            logger.warning(f"Error deleting directory at {training_dir}: {str(e)}")
+
     # Eliminar archivos del modelo si existen.
     if classifier.file_path:
         try:
@@ -229,6 +281,11 @@ async def delete_classifier(*, session: AsyncSession, classifier: Classifier) ->
                 if os.path.exists(metadata_file):
                     os.remove(metadata_file)
 
+                # Eliminar el modelo TFLite cuantizado.
+                tflite_file = os.path.join(model_dir, "model.tflite")
+                if os.path.exists(tflite_file):
+                    os.remove(tflite_file)
+
                 # Eliminar el directorio.
                 try:
                     os.rmdir(model_dir)
@@ -244,6 +301,170 @@ async def delete_classifier(*, session: AsyncSession, classifier: Classifier) ->
     await session.commit()
 
 
+async def cancel_training(*, classifier: Classifier) -> None:
+    """Pide al worker que detenga el entrenamiento de un clasificador.
+
+    El worker comprueba la petición tras cada lote, elimina los archivos parciales y
+    marca el clasificador como cancelado.
+
+    Args:
+        classifier: Clasificador en entrenamiento.
+
+    Raises:
+        ValueError: Si el clasificador no se está entrenando.
+    """
+
+    if classifier.status != ClassifierTrainingStatus.TRAINING:
+        raise ValueError("Classifier is not training")
+
+    training_progress.request_cancel(classifier.id)
+
+
+async def retrain_classifier(
+    *, session: AsyncSession, classifier: Classifier, retrain_in: ClassifierRetrain
+) -> Classifier:
+    """Continúa el entrenamiento de un clasificador con su dataset actualizado.
+
+    El worker parte del modelo guardado en lugar de entrenar desde cero, adapta la
+    capa de salida a las clases nuevas y lo ajusta durante unas pocas épocas.
+
+    Args:
+        session: Sesión de base de datos.
+        classifier: Clasificador a entrenar de nuevo.
+        retrain_in: Parámetros del entrenamiento continuado.
+
+    Raises:
+        ValueError: Si el modo de la capa de salida no es válido, si el clasificador
+            se está entrenando, si su dataset ya no existe o si no tiene un modelo
+            entrenado del que partir.
+
+    Returns:
+        Classifier: Clasificador en entrenamiento.
+    """
+
+    if retrain_in.head not in WARM_START_HEAD_MODES:
+        raise ValueError(
+            f"Invalid head mode. Must be one of: {', '.join(WARM_START_HEAD_MODES)}"
+        )
+    if classifier.status == ClassifierTrainingStatus.TRAINING:
+        raise ValueError("Classifier is already training")
+    if classifier.dataset_id is None:
+        raise ValueError("The dataset used to train the classifier no longer exists")
+    if not classifier.file_path or not os.path.exists(
+        os.path.join(MEDIA_ROOT, classifier.file_path, "model.keras")
+    ):
+        raise ValueError("Classifier has no trained model to continue from")
+
+    model_parameters = {
+        key: value
+        for key, value in (classifier.model_parameters or {}).items()
+        if key not in WARM_START_EXCLUDED_PARAMETERS
+    }
+    model_parameters["epochs"] = retrain_in.epochs or WARM_START_EPOCHS
+    model_parameters["learning_rate"] = retrain_in.learning_rate or (
+        model_parameters.get("learning_rate", 0.001) * WARM_START_LEARNING_RATE_FACTOR
+    )
+    model_parameters["warm_start"] = {"head": retrain_in.head}
+
+    # El error de un intento anterior no corresponde al nuevo entrenamiento.
+    if classifier.metrics and "error_message" in classifier.metrics:
+        classifier.metrics = {
+            key: value
+            for key, value in classifier.metrics.items()
+            if key != "error_message"
+        }
+    classifier.status = ClassifierTrainingStatus.TRAINING
+    session.add(classifier)
+    await session.commit()
+    await session.refresh(classifier)
+
+    await start_training_task(
+        classifier_id=classifier.id,
+        dataset_id=classifier.dataset_id,
+        classifier_architecture=classifier.architecture,
+        model_parameters=model_parameters,
+    )
+
+    return classifier
+
+
+async def distill_classifier(
+    *,
+    session: AsyncSession,
+    teacher: Classifier,
+    user_id: uuid.UUID,
+    distill_in: ClassifierDistill,
+) -> Classifier:
+    """Crea un clasificador Xception Mini que aprende de otro ya entrenado.
+
+    El nuevo clasificador (el alumno) usa el dataset del profesor y se entrena con
+    sus etiquetas y con los logits del modelo del profesor.
+
+    Args:
+        session: Sesión de base de datos.
+        teacher: Clasificador entrenado del que aprender.
+        user_id: ID del usuario propietario del nuevo clasificador.
+        distill_in: Datos del nuevo clasificador y parámetros de la destilación.
+
+    Raises:
+        ValueError: Si el profesor no está entrenado, si su dataset ya no existe o
+            si no tiene un modelo guardado.
+
+    Returns:
+        Classifier: Clasificador creado.
+    """
+
+    if teacher.status != ClassifierTrainingStatus.TRAINED:
+        raise ValueError("Only a trained classifier can be distilled")
+    if teacher.dataset_id is None:
+        raise ValueError("The dataset used to train the classifier no longer exists")
+    if not teacher.file_path or not os.path.exists(
+        os.path.join(MEDIA_ROOT, teacher.file_path, "model.keras")
+    ):
+        raise ValueError("Classifier has no trained model to distill")
+
+    # Misma división que el profesor para comparar ambos sobre las mismas imágenes.
+    teacher_parameters = teacher.model_parameters or {}
+    model_parameters = {
+        "learning_rate": distill_in.learning_rate or 0.001,
+        "epochs": distill_in.epochs or 20,
+        "batch_size": teacher_parameters.get("batch_size", 32),
+        "validation_split": teacher_parameters.get("validation_split", 0.2),
+        "image_size": list(DISTILLATION_IMAGE_SIZE),
+        "distillation": {
+            "teacher_id": str(teacher.id),
+            "temperature": distill_in.temperature or DISTILLATION_TEMPERATURE,
+            "alpha": (
+                distill_in.alpha if distill_in.alpha is not None else DISTILLATION_ALPHA
+            ),
+        },
+    }
+
+    classifier = Classifier(
+        name=distill_in.name,
+        description=distill_in.description,
+        user_id=user_id,
+        dataset_id=teacher.dataset_id,
+        architecture=DISTILLATION_STUDENT_ARCHITECTURE,
+        status=ClassifierTrainingStatus.TRAINING,
+        metrics=None,
+        model_parameters=model_parameters,
+    )
+
+    session.add(classifier)
+    await session.commit()
+    await session.refresh(classifier)
+
+    await start_training_task(
+        classifier_id=classifier.id,
+        dataset_id=classifier.dataset_id,
+        classifier_architecture=classifier.architecture,
+        model_parameters=model_parameters,
+    )
+
+    return classifier
+
+
 async def get_classifiers_sorted(
     *,
     session: AsyncSession,
@@ -372,6 +593,9 @@ async def start_training_task(
 ) -> bool:
     """Inicia una tarea para entrenar un clasificador.
 
+    Si los parámetros incluyen una búsqueda de hiperparámetros, se inicia la búsqueda,
+    que termina entrenando el clasificador con la mejor configuración.
+
     Args:
         classifier_id: ID del clasificador.
         dataset_id: ID del dataset.
@@ -383,7 +607,11 @@ async def start_training_task(
     """
 
     try:
-        train_model.delay(
+        # Descartar una petición de cancelación de un entrenamiento anterior.
+        training_progress.clear_cancel(classifier_id)
+
+        task = search_hyperparameters if "search" in model_parameters else train_model
+        task.delay(
             classifier_id=str(classifier_id),
             dataset_id=str(dataset_id),
             classifier_architecture=classifier_architecture,
@@ -396,14 +624,30 @@ async def start_training_task(
 
 
 async def perform_inference(
-    *, classifier: Classifier, image_files: List[bytes], filenames: List[str]
+    *,
+    classifier: Classifier,
+    image_files: List[bytes],
+    filenames: List[str],
+    include_thumbnails: bool = True,
 ) -> Dict[str, Any]:
     """Realiza inferencia usando un modelo entrenado en un lote de imágenes.
 
+    La decodificación y la predicción se ejecutan en el pool de inferencia para no
+    bloquear el bucle de eventos. Las peticiones pequeñas y concurrentes a un mismo
+    clasificador se agrupan en una única pasada del modelo. Las imágenes ya
+    clasificadas por la misma versión del modelo se sirven desde la caché de
+    predicciones sin decodificarlas.
+
     Args:
         classifier: Clasificador con modelo entrenado.
         image_files: Lista con los datos binarios de las imágenes.
         filenames: Lista con los nombres de los archivos de imagen.
+        include_thumbnails: Indica si se incluye una miniatura de cada imagen.
+
+    Raises:
+        ValueError: Si el modelo no está entrenado o no se puede cargar.
+        InferencePoolSaturatedError: Si el pool de inferencia está saturado.
+        InferenceTimeoutError: Si la inferencia supera el tiempo máximo.
 
     Returns:
         Dict: Resultados de la inferencia para cada imagen.
@@ -415,127 +659,186 @@ async def perform_inference(
     ):
         raise ValueError("Model is not trained or file path is missing")
 
-    # Preparar rutas de archivos.
-    model_dir = os.path.join(MEDIA_ROOT, classifier.file_path)
-    model_path = os.path.join(model_dir, "model.keras")
+    # Registrar el uso para precargar los clasificadores más usados al arrancar.
+    classifier_usage.record(classifier.id)
+
+    # Cargar el modelo y decodificar las imágenes que no estén en caché.
+    cached_model, batch, decoded_positions, thumbnails, results, image_hashes = (
+        await inference_pool.run(
+            prepare_inference,
+            classifier=classifier,
+            image_files=image_files,
+            filenames=filenames,
+            include_thumbnails=include_thumbnails,
+        )
+    )
 
-    # Cargar metadatos del modelo.
-    try:
-        metadata = load_model_metadata(model_dir)
-    except Exception as e:
-        logger.error(f"Error loading model metadata: {str(e)}", exc_info=True)
-        raise ValueError(f"Error loading model metadata: {str(e)}")
+    # Realizar la predicción de todas las imágenes válidas.
+    if decoded_positions:
+        predict_fn = functools.partial(
+            predict_in_batches,
+            cached_model.model,
+            architecture=classifier.architecture,
+        )
+        predictions = await micro_batcher.predict(
+            classifier.id, cached_model.version, predict_fn, batch
+        )
+        class_mapping = cached_model.metadata.get("class_mapping", {})
+
+        cache_items = []
+        for i, thumbnail, prediction in zip(
+            decoded_positions,
+            thumbnails,
+            format_predictions(predictions, class_mapping),
+        ):
+            results[i] = {
+                "filename": get_inference_filename(filenames, i),
+                **prediction,
+                "status": "success",
+            }
+            if include_thumbnails:
+                results[i]["thumbnail"] = thumbnail
+            cache_items.append(
+                (image_hashes[i], {**prediction, "thumbnail": thumbnail})
+            )
 
-    # Obtener mapping de clases y parámetros de entrenamiento.
-    class_mapping = metadata.get("class_mapping", {})
-    image_size = metadata.get("train_params", {}).get("image_size", [180, 180])
-    num_classes = len(class_mapping)
+        # Guardar las predicciones fuera del bucle de eventos: el almacén compartido
+        # escribe en disco.
+        await asyncio.to_thread(
+            prediction_cache.put_many, classifier.id, cached_model.version, cache_items
+        )
 
-    # Cargar el modelo.
-    try:
-        tf.keras.backend.clear_session()  # Limpiar sesión para evitar problemas.
-        model = load_model(model_path)
-    except Exception as e:
-        logger.error(f"Error loading model: {str(e)}", exc_info=True)
-        raise ValueError(f"Error loading model: {str(e)}")
+    return {
+        "results": results,
+        "model_name": classifier.name,
+        "processed_images": len(results),
+        "classifier_id": str(classifier.id),
+    }
 
-    # Definir preprocesamiento específico según arquitectura.
-    def get_preprocessor(architecture):
-        # Función identidad para modelos que ya incluyen normalización.
-        def preprocess_identity(img_array):
-            return img_array
 
-        # Para modelos sin normalización interna.
-        def preprocess_default(img_array):
-            return img_array / 255.0
+def get_inference_filename(filenames: List[str], index: int) -> str:
+    """Devuelve el nombre de archivo de una imagen o uno genérico si no se conoce.
 
-        # Seleccionar el preprocesador adecuado según el modelo.
-        if architecture in ["xception_mini", "efficientnetb3", "resnet50"]:
-            return preprocess_identity
-        else:
-            return preprocess_default
+    Args:
+        filenames: Lista con los nombres de los archivos de imagen.
+        index: Posición de la imagen.
 
-    # Seleccionar el preprocesador adecuado.
-    preprocessor = get_preprocessor(classifier.architecture)
+    Returns:
+        str: Nombre del archivo.
+    """
+
+    return filenames[index] if index < len(filenames) else f"image_{index}.jpg"
+
+
+def prepare_inference(
+    *,
+    classifier: Classifier,
+    image_files: List[bytes],
+    filenames: List[str],
+    include_thumbnails: bool = True,
+) -> Tuple[
+    Optional[CachedModel],
+    np.ndarray,
+    List[int],
+    List[str],
+    List[Optional[Dict]],
+    List[Optional[str]],
+]:
+    """Resuelve desde caché o decodifica las imágenes de una petición de inferencia.
+
+    Args:
+        classifier: Clasificador con modelo entrenado.
+        image_files: Lista con los datos binarios de las imágenes.
+        filenames: Lista con los nombres de los archivos de imagen.
+        include_thumbnails: Indica si se genera una miniatura de cada imagen.
+
+    Raises:
+        ValueError: Si no se puede cargar el modelo.
+
+    Returns:
+        cached_model: Modelo cargado y sus metadatos (None si todo estaba en caché).
+        batch: Array contiguo con las imágenes decodificadas correctamente.
+        decoded_positions: Posición original de cada imagen del lote.
+        thumbnails: Miniatura en base64 (o None) de cada imagen del lote.
+        results: Resultados por posición (rellenos para aciertos de caché y fallos).
+        image_hashes: Hash del contenido de cada imagen (None si la caché está desactivada).
+    """
+
+    # Preparar rutas de archivos.
+    model_dir = os.path.join(MEDIA_ROOT, classifier.file_path)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(image_files)
 
-    # Función para preprocesar imágenes.
-    def preprocess_image(img_data: bytes) -> np.ndarray:
+    # Servir desde la caché las imágenes ya clasificadas por esta versión del modelo.
+    image_hashes: List[Optional[str]] = [None] * len(image_files)
+    if prediction_cache.enabled:
+        image_hashes = [hash_image(img_data) for img_data in image_files]
         try:
-            img = PILImage.open(io.BytesIO(img_data))
-            img = img.convert("RGB")  # Asegurar que sea RGB.
-            img = img.resize(tuple(image_size))
-            img_array = np.array(img)
-            img_array = preprocessor(
-                img_array
-            )  # Aplicar el preprocesamiento específico del modelo.
-            return img_array
-        except Exception as e:
-            logger.error(f"Error preprocessing image: {str(e)}", exc_info=True)
-            raise ValueError(f"Error preprocessing image: {str(e)}")
+            version = get_model_version(model_dir)
+        except FileNotFoundError:
+            # Sin artefactos no hay nada que consultar: el error se notifica al cargar el modelo.
+            cached_predictions = {}
+        else:
+            cached_predictions = prediction_cache.get_many(
+                classifier.id,
+                version,
+                image_hashes,
+                require_thumbnail=include_thumbnails,
+            )
+        for i, image_hash in enumerate(image_hashes):
+            cached = cached_predictions.get(image_hash)
+            if cached is None:
+                continue
+            results[i] = {
+                "filename": get_inference_filename(filenames, i),
+                "predicted_class": cached["predicted_class"],
+                "confidence": cached["confidence"],
+                "all_predictions": cached["all_predictions"],
+                "status": "success",
+            }
+            if include_thumbnails:
+                results[i]["thumbnail"] = cached["thumbnail"]
+
+    pending = [i for i in range(len(image_files)) if results[i] is None]
+    if not pending:
+        return None, np.empty((0,), dtype=np.uint8), [], [], results, image_hashes
+
+    # Obtener el modelo y sus metadatos (desde la caché si ya están cargados).
+    try:
+        cached_model = model_cache.get(classifier.id, model_dir)
+    except Exception as e:
+        logger.error(f"Error loading model: {str(e)}", exc_info=True)
+        raise ValueError(f"Error loading model: {str(e)}")
 
-    # Procesar cada imagen.
-    results = []
-    for i, img_data in enumerate(image_files):
-        filename = filenames[i] if i < len(filenames) else f"image_{i}.jpg"
+    image_size = cached_model.metadata.get("train_params", {}).get(
+        "image_size", [180, 180]
+    )
 
+    # Decodificar cada imagen una sola vez en un array contiguo, registrando las que fallen.
+    batch = np.empty((len(pending), image_size[1], image_size[0], 3), dtype=np.uint8)
+    decoded_positions = []
+    thumbnails = []
+    for i in pending:
         try:
-            # Preprocesar imagen.
-            img_array = preprocess_image(img_data)
-
-            # Añadir batch dimension.
-            img_batch = np.expand_dims(img_array, 0)
-
-            # Realizar predicción.
-            predictions = model.predict(img_batch, verbose=0)
-
-            # Formatear resultados según tipo de modelo (binario o multiclase).
-            if num_classes == 2:
-                score = float(predictions[0][0])
-                class_predictions = {
-                    class_mapping["0"]: float(1 - score),
-                    class_mapping["1"]: float(score),
-                }
-                predicted_class = (
-                    class_mapping["1"] if score > 0.5 else class_mapping["0"]
-                )
-                confidence = max(score, 1 - score)
-            else:
-                # Modelo multiclase.
-                probabilities = predictions[0]
-                class_predictions = {
-                    class_mapping[str(i)]: float(prob)
-                    for i, prob in enumerate(probabilities)
-                }
-                predicted_idx = np.argmax(probabilities)
-                predicted_class = class_mapping[str(predicted_idx)]
-                confidence = float(probabilities[predicted_idx])
-
-            # Generar miniatura para incluir en resultados.
-            img = PILImage.open(io.BytesIO(img_data))
-            img.thumbnail((100, 100))
-            img = img.convert("RGB")
-            buffered = io.BytesIO()
-            img.save(buffered, format="JPEG")
-            thumbnail = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-            # Añadir resultado.
-            results.append(
-                {
-                    "filename": filename,
-                    "predicted_class": predicted_class,
-                    "confidence": confidence,
-                    "all_predictions": class_predictions,
-                    "thumbnail": thumbnail,
-                    "status": "success",
-                }
+            img_array, thumbnail = decode_image(
+                image_files[i],
+                image_size,
+                thumbnail_size=THUMBNAIL_SIZE if include_thumbnails else None,
             )
         except Exception as e:
+            filename = get_inference_filename(filenames, i)
             logger.error(f"Error processing image {filename}: {str(e)}", exc_info=True)
-            results.append({"filename": filename, "error": str(e), "status": "failed"})
-
-    return {
-        "results": results,
-        "model_name": classifier.name,
-        "processed_images": len(results),
-        "classifier_id": str(classifier.id),
-    }
+            results[i] = {"filename": filename, "error": str(e), "status": "failed"}
+            continue
+
+        batch[len(decoded_positions)] = img_array
+        decoded_positions.append(i)
+        thumbnails.append(thumbnail)
+
+    return (
+        cached_model,
+        batch[: len(decoded_positions)],
+        decoded_positions,
+        thumbnails,
+        results,
+        image_hashes,
+    )
@@ -0,0 +1,131 @@
+import uuid
+import logging
+from typing import List, Optional, Tuple
+
+from sqlmodel import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.predictions import (
+    PredictionJob,
+    PredictionJobStatus,
+    PredictionResult,
+)
+from app.tasks.celery_app import predict_dataset
+
+logger = logging.getLogger(__name__)
+
+
+async def get_prediction_job_by_id(
+    *, session: AsyncSession, id: uuid.UUID
+) -> Optional[PredictionJob]:
+    """Obtiene un trabajo de inferencia masiva por su ID.
+
+    Args:
+        session: Sesión de base de datos.
+        id: ID del trabajo.
+
+    Returns:
+        PredictionJob: Trabajo encontrado o None si no existe.
+    """
+
+    return await session.get(PredictionJob, id)
+
+
+async def create_prediction_job(
+    *,
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    classifier_id: uuid.UUID,
+    dataset_id: uuid.UUID,
+    top_k: int,
+) -> PredictionJob:
+    """Crea un trabajo de inferencia masiva y lanza su tarea de procesamiento.
+
+    Args:
+        session: Sesión de base de datos.
+        user_id: ID del usuario que lanza el trabajo.
+        classifier_id: ID del clasificador a utilizar.
+        dataset_id: ID del dataset sobre el que predecir.
+        top_k: Número de clases más probables a guardar por imagen.
+
+    Raises:
+        ValueError: Si no se pudo iniciar la tarea de procesamiento.
+
+    Returns:
+        PredictionJob: Trabajo creado.
+    """
+
+    job = PredictionJob(
+        user_id=user_id,
+        classifier_id=classifier_id,
+        dataset_id=dataset_id,
+        top_k=top_k,
+    )
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+
+    try:
+        predict_dataset.delay(job_id=str(job.id))
+    except Exception as e:
+        logger.error(f"Error while starting prediction job {job.id}: {str(e)}")
+        job.status = PredictionJobStatus.FAILED
+        job.error_message = "Failed to start the prediction job"
+        session.add(job)
+        await session.commit()
+        raise ValueError("Failed to start the prediction job")
+
+    return job
+
+
+async def get_prediction_results(
+    *, session: AsyncSession, job_id: uuid.UUID, skip: int = 0, limit: int = 100
+) -> Tuple[List[PredictionResult], int]:
+    """Obtiene los resultados de un trabajo de inferencia masiva con paginación.
+
+    Args:
+        session: Sesión de base de datos.
+        job_id: ID del trabajo.
+        skip: Número de resultados a omitir.
+        limit: Número máximo de resultados a devolver.
+
+    Returns:
+        results: Resultados de la página solicitada, ordenados por nombre de imagen.
+        count: Número total de resultados del trabajo.
+    """
+
+    count_query = (
+        select(func.count())
+        .select_from(PredictionResult)
+        .where(PredictionResult.job_id == job_id)
+    )
+    count_result = await session.execute(count_query)
+    total_count = count_result.scalar_one() or 0
+
+    query = (
+        select(PredictionResult)
+        .where(PredictionResult.job_id == job_id)
+        .order_by(PredictionResult.image_name, PredictionResult.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    result = await session.execute(query)
+
+    return list(result.scalars().all()), total_count
+
+
+def get_job_progress(job: PredictionJob) -> float:
+    """Calcula el progreso de un trabajo de inferencia masiva.
+
+    Args:
+        job: Trabajo de inferencia masiva.
+
+    Returns:
+        float: Fracción de imágenes procesadas (entre 0 y 1).
+    """
+
+    if job.status == PredictionJobStatus.COMPLETED:
+        return 1.0
+    if not job.total_images:
+        return 0.0
+    return min(job.processed_images / job.total_images, 1.0)
@@ -1,10 +1,18 @@
 import os
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
 from app.start import start
+from app.core import db
+from app.core.inference_pool import inference_pool
+from app.core.warmup import (
+    classifier_usage,
+    flush_classifier_usage,
+    warm_up_models,
+)
 
 MEDIA_ROOT = os.environ.get("MEDIA_ROOT", "/app/media")
 os.makedirs(MEDIA_ROOT, exist_ok=True)
@@ -14,10 +22,16 @@ os.makedirs(os.path.join(MEDIA_ROOT, "models"), exist_ok=True)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Llama a la función de inicialización de la base de datos de manera asíncrona."""
+    """Inicializa la base de datos y precarga en segundo plano los modelos más usados."""
 
     await start()
+    warmup_task = asyncio.create_task(warm_up_models(db.get_session))
+    usage_task = asyncio.create_task(flush_classifier_usage())
     yield
+    warmup_task.cancel()
+    usage_task.cancel()
+    classifier_usage.save()
+    inference_pool.shutdown()
 
 
 app = FastAPI(
@@ -0,0 +1,270 @@
+"""Mide la latencia de las distintas formas de ejecutar la inferencia.
+
+Uso:
+    python -m app.ml.benchmark [--architectures resnet50 ...] [--batch-sizes 1 4 16]
+    python -m app.ml.benchmark --augmentation [--num-images 512]
+    python -m app.ml.benchmark --input-pipeline [--image-dir fotos/] [--num-images 512]
+"""
+
+import os
+import json
+import argparse
+import resource
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+from app.ml.models import AVAILABLE_MODELS
+from app.ml.timing import time_call
+from app.ml.model_utils import CompiledPredictor
+from app.ml.data_utils import (
+    apply_data_augmentation,
+    create_augmentation_layers,
+    prepare_dataset,
+)
+
+DEFAULT_BATCH_SIZES = (1, 4, 16)
+DEFAULT_IMAGE_SIZE = (180, 180)
+DEFAULT_SOURCE_SIZE = (3000, 2000)
+
+
+def benchmark_model(
+    model,
+    image_size=DEFAULT_IMAGE_SIZE,
+    batch_sizes=DEFAULT_BATCH_SIZES,
+    repeats: int = 20,
+) -> List[Dict]:
+    """Compara model.predict con la función compilada para un modelo.
+
+    Args:
+        model: Modelo de Keras.
+        image_size: Tamaño de entrada (ancho, alto).
+        batch_sizes: Tamaños de lote a medir.
+        repeats: Número de ejecuciones medidas por combinación.
+
+    Returns:
+        List[Dict]: Latencias por tamaño de lote y método.
+    """
+
+    predictors = {
+        "predict": lambda batch: model.predict(batch, verbose=0),
+        "predict_on_batch": model.predict_on_batch,
+        "compiled": CompiledPredictor(model).predict_on_batch,
+        "compiled_xla": CompiledPredictor(model, jit_compile=True).predict_on_batch,
+    }
+
+    results = []
+    for batch_size in batch_sizes:
+        batch = np.random.default_rng(0).random(
+            (batch_size, image_size[1], image_size[0], 3), dtype=np.float32
+        )
+        for name, predict in predictors.items():
+            timing = time_call(lambda: predict(batch), repeats)
+            results.append({"method": name, "batch_size": batch_size, **timing})
+
+    return results
+
+
+def benchmark_augmentation(
+    architecture: str = None,
+    image_size=DEFAULT_IMAGE_SIZE,
+    batch_size: int = 32,
+    num_images: int = 512,
+    repeats: int = 3,
+) -> List[Dict]:
+    """Compara la aumentación imagen a imagen con la aumentación por lotes.
+
+    Args:
+        architecture: Arquitectura del modelo para aumentación específica.
+        image_size: Tamaño de las imágenes (ancho, alto).
+        batch_size: Tamaño de lote.
+        num_images: Número de imágenes por recorrido del dataset.
+        repeats: Número de recorridos medidos por método.
+
+    Returns:
+        List[Dict]: Latencia de un recorrido e imágenes por segundo de cada método.
+    """
+
+    images = np.random.default_rng(0).uniform(
+        0, 255, (num_images, image_size[1], image_size[0], 3)
+    )
+    base = tf.data.Dataset.from_tensor_slices(
+        (images.astype(np.float32), np.zeros(num_images, dtype=np.int32))
+    )
+    data_augmentation = create_augmentation_layers(architecture)
+
+    pipelines = {
+        "per_example": base.map(
+            lambda image, label: (data_augmentation(image, training=True), label),
+            num_parallel_calls=tf.data.AUTOTUNE,
+        ).batch(batch_size),
+        "batched": apply_data_augmentation(base.batch(batch_size), architecture),
+    }
+
+    results = []
+    for name, dataset in pipelines.items():
+        timing = time_call(lambda: [None for _ in dataset], repeats, warmup=1)
+        results.append(
+            {
+                "method": name,
+                "batch_size": batch_size,
+                "images_per_sec": num_images / (timing["mean_ms"] / 1000),
+                **timing,
+            }
+        )
+
+    return results
+
+
+def benchmark_input_pipeline(
+    image_paths: List[str],
+    architecture: str = None,
+    image_size=DEFAULT_IMAGE_SIZE,
+    batch_size: int = 32,
+    repeats: int = 3,
+) -> Dict:
+    """Mide el rendimiento del dataset de entrenamiento de prepare_dataset.
+
+    El pico de memoria es el del proceso completo, así que para comparar
+    arquitecturas conviene medir cada una en un proceso distinto.
+
+    Args:
+        image_paths: Rutas de las imágenes a decodificar.
+        architecture: Arquitectura del modelo para aumentación específica.
+        image_size: Tamaño de entrada (ancho, alto).
+        batch_size: Tamaño de lote.
+        repeats: Número de recorridos medidos del dataset.
+
+    Returns:
+        Dict: Latencia de un recorrido, imágenes por segundo y pico de memoria (MB).
+    """
+
+    train_ds, _, dataset_info = prepare_dataset(
+        image_paths,
+        ["image"] * len(image_paths),
+        {"image": 0},
+        batch_size,
+        tuple(image_size),
+        architecture=architecture,
+    )
+
+    timing = time_call(lambda: [None for _ in train_ds], repeats, warmup=1)
+
+    return {
+        "batch_size": batch_size,
+        "images_per_sec": dataset_info["train_size"] / (timing["mean_ms"] / 1000),
+        **timing,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def write_sample_images(directory: str, num_images: int, size=DEFAULT_SOURCE_SIZE):
+    """Genera fotos JPEG sintéticas del tamaño de una cámara para el benchmark.
+
+    Args:
+        directory: Directorio donde escribir las imágenes.
+        num_images: Número de imágenes.
+        size: Tamaño de las imágenes (ancho, alto).
+
+    Returns:
+        List[str]: Rutas de las imágenes generadas.
+    """
+
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(num_images):
+        # Imagen suave (ampliada desde muy baja resolución) con algo de ruido.
+        small = rng.integers(0, 256, (size[1] // 100, size[0] // 100, 3), np.uint8)
+        image = np.asarray(Image.fromarray(small).resize(size, Image.BILINEAR))
+        noise = rng.integers(-8, 9, image.shape)
+        image = np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+        path = os.path.join(directory, f"sample_{i}.jpg")
+        Image.fromarray(image).save(path, quality=90)
+        paths.append(path)
+
+    return paths
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--architectures", nargs="+", default=list(AVAILABLE_MODELS.keys())
+    )
+    parser.add_argument(
+        "--batch-sizes", nargs="+", type=int, default=list(DEFAULT_BATCH_SIZES)
+    )
+    parser.add_argument(
+        "--image-size", nargs=2, type=int, default=list(DEFAULT_IMAGE_SIZE)
+    )
+    parser.add_argument("--num-classes", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--augmentation", action="store_true")
+    parser.add_argument("--num-images", type=int, default=512)
+    parser.add_argument("--input-pipeline", action="store_true")
+    parser.add_argument("--image-dir")
+    parser.add_argument(
+        "--source-size", nargs=2, type=int, default=list(DEFAULT_SOURCE_SIZE)
+    )
+    args = parser.parse_args(argv)
+
+    report = {}
+    if args.input_pipeline:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if args.image_dir:
+                image_paths = [
+                    os.path.join(args.image_dir, name)
+                    for name in sorted(os.listdir(args.image_dir))
+                ][: args.num_images]
+            else:
+                image_paths = write_sample_images(
+                    tmp_dir, args.num_images, tuple(args.source_size)
+                )
+            for architecture in args.architectures:
+                report[architecture] = [
+                    benchmark_input_pipeline(
+                        image_paths,
+                        architecture,
+                        image_size=tuple(args.image_size),
+                        batch_size=batch_size,
+                    )
+                    for batch_size in args.batch_sizes
+                ]
+        print(json.dumps(report, indent=2))
+        return
+
+    if args.augmentation:
+        for architecture in args.architectures:
+            report[architecture] = [
+                result
+                for batch_size in args.batch_sizes
+                for result in benchmark_augmentation(
+                    architecture,
+                    image_size=tuple(args.image_size),
+                    batch_size=batch_size,
+                    num_images=args.num_images,
+                )
+            ]
+        print(json.dumps(report, indent=2))
+        return
+
+    for architecture in args.architectures:
+        model = AVAILABLE_MODELS[architecture].create_model(
+            input_shape=(args.image_size[1], args.image_size[0], 3),
+            num_classes=args.num_classes,
+        )
+        report[architecture] = benchmark_model(
+            model,
+            image_size=tuple(args.image_size),
+            batch_sizes=args.batch_sizes,
+            repeats=args.repeats,
+        )
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from tensorflow import keras
+
+from app.ml.training_progress import TrainingProgressStore, training_progress
+
+# Segundos mínimos entre dos comprobaciones de la petición de cancelación.
+TRAINING_CANCEL_CHECK_SECONDS = float(
+    os.environ.get("TRAINING_CANCEL_CHECK_SECONDS", "1")
+)
+
+
+class TrainingCancelled(Exception):
+    """El usuario ha cancelado el entrenamiento."""
+
+
+class TrainingProgressCallback(keras.callbacks.Callback):
+    """Publica el progreso del entrenamiento al terminar cada época."""
+
+    def __init__(
+        self,
+        classifier_id: Any,
+        epochs: int,
+        train_size: int,
+        store: TrainingProgressStore = training_progress,
+    ):
+        super().__init__()
+        self.classifier_id = classifier_id
+        self.epochs = epochs
+        self.train_size = train_size
+        self.store = store
+        self.epoch_seconds: List[float] = []
+        self._epoch_start: Optional[float] = None
+
+    def on_epoch_begin(self, epoch: int, logs: Optional[Dict] = None) -> None:
+        self._epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch: int, logs: Optional[Dict] = None) -> None:
+        seconds = time.perf_counter() - (self._epoch_start or time.perf_counter())
+        self.epoch_seconds.append(seconds)
+
+        # La época llega numerada de forma global aunque el entrenamiento tenga fases.
+        completed = epoch + 1
+        mean_seconds = sum(self.epoch_seconds) / len(self.epoch_seconds)
+        remaining = max(self.epochs - completed, 0)
+
+        self.store.update(
+            self.classifier_id,
+            status="training",
+            epoch=completed,
+            epochs=self.epochs,
+            metrics={k: float(v) for k, v in (logs or {}).items()},
+            epoch_seconds=round(seconds, 3),
+            images_per_second=(
+                round(self.train_size / seconds, 2) if seconds > 0 else None
+            ),
+            eta_seconds=round(mean_seconds * remaining, 1),
+        )
+
+
+class CancellationCallback(keras.callbacks.Callback):
+    """Detiene el entrenamiento en cuanto se pide cancelarlo.
+
+    Se comprueba tras cada lote de entrenamiento y de validación (como mucho una vez
+    cada check_seconds) para detenerse en segundos aunque las épocas sean largas.
+    """
+
+    def __init__(
+        self,
+        classifier_id: Any,
+        store: TrainingProgressStore = training_progress,
+        check_seconds: float = TRAINING_CANCEL_CHECK_SECONDS,
+    ):
+        super().__init__()
+        self.classifier_id = classifier_id
+        self.store = store
+        self.check_seconds = check_seconds
+        self._last_check = 0.0
+
+    def on_train_batch_end(self, batch: int, logs: Optional[Dict] = None) -> None:
+        self.check()
+
+    def on_test_batch_end(self, batch: int, logs: Optional[Dict] = None) -> None:
+        self.check()
+
+    def check(self) -> None:
+        """Lanza TrainingCancelled si se ha pedido cancelar el entrenamiento."""
+
+        now = time.monotonic()
+        if now - self._last_check < self.check_seconds:
+            return
+        self._last_check = now
+
+        if self.store.cancel_requested(self.classifier_id):
+            raise TrainingCancelled(f"Training of {self.classifier_id} was cancelled")
+
+
+class TrainingTimeBudget:
+    """Tiempo máximo de un entrenamiento, repartido entre sus fases.
+
+    El tiempo empieza a contar al comenzar la primera fase. Cada fase recibe una
+    parte del tiempo que queda y se detiene antes de agotarla, de modo que lo que no
+    usa una fase queda para la siguiente.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.started_at: Optional[float] = None
+        self.stopped = False
+
+    @property
+    def elapsed(self) -> float:
+        """Segundos transcurridos desde el comienzo de la primera fase."""
+
+        if self.started_at is None:
+            return 0.0
+        return time.monotonic() - self.started_at
+
+    @property
+    def remaining(self) -> float:
+        """Segundos que quedan del presupuesto."""
+
+        return max(self.seconds - self.elapsed, 0.0)
+
+    def callback(self, share: float = 1.0) -> "TimeBudgetCallback":
+        """Crea el callback que limita una fase del entrenamiento.
+
+        Args:
+            share: Fracción del tiempo restante al empezar la fase que puede usar.
+
+        Returns:
+            TimeBudgetCallback: Callback para model.fit.
+        """
+
+        return TimeBudgetCallback(self, share)
+
+    def report(self) -> Dict[str, Any]:
+        """Resume el uso del presupuesto para guardarlo en las métricas."""
+
+        return {
+            "max_training_seconds": self.seconds,
+            "training_seconds": round(self.elapsed, 3),
+            "stopped_early": self.stopped,
+        }
+
+
+class TimeBudgetCallback(keras.callbacks.Callback):
+    """Detiene una fase al agotar su parte del presupuesto y conserva los mejores pesos.
+
+    La fase termina tras la época en la que ya no cabe otra de la misma duración, o
+    tras el lote en el que se agota el tiempo si una época se alarga más de lo
+    previsto. Si se detiene por tiempo, el modelo recupera los pesos de la época con
+    mejor métrica monitorizada.
+    """
+
+    def __init__(
+        self, budget: TrainingTimeBudget, share: float = 1.0, monitor: str = "val_loss"
+    ):
+        super().__init__()
+        self.budget = budget
+        self.share = share
+        self.monitor = monitor
+        self.deadline: Optional[float] = None
+        self.stopped = False
+        self.best: Optional[float] = None
+        self.best_weights: Optional[List] = None
+        self._epoch_start: Optional[float] = None
+
+    def on_train_begin(self, logs: Optional[Dict] = None) -> None:
+        if self.budget.started_at is None:
+            self.budget.started_at = time.monotonic()
+        self.deadline = time.monotonic() + self.budget.remaining * self.share
+
+    def on_epoch_begin(self, epoch: int, logs: Optional[Dict] = None) -> None:
+        self._epoch_start = time.monotonic()
+
+    def on_train_batch_end(self, batch: int, logs: Optional[Dict] = None) -> None:
+        if time.monotonic() >= self.deadline:
+            self.stop()
+
+    def on_epoch_end(self, epoch: int, logs: Optional[Dict] = None) -> None:
+        logs = logs or {}
+        value = logs.get(self.monitor, logs.get("loss"))
+        if value is not None and (self.best is None or value < self.best):
+            self.best = float(value)
+            self.best_weights = self.model.get_weights()
+
+        # Detenerse si quedan épocas pero no cabe otra como la última.
+        now = time.monotonic()
+        last_epoch = epoch + 1 >= self.params.get("epochs", epoch + 1)
+        if not last_epoch and now + (now - self._epoch_start) > self.deadline:
+            self.stop()
+
+    def on_train_end(self, logs: Optional[Dict] = None) -> None:
+        if self.stopped and self.best_weights is not None:
+            self.model.set_weights(self.best_weights)
+        self.best_weights = None
+
+    def stop(self) -> None:
+        self.stopped = True
+        self.budget.stopped = True
+        self.model.stop_training = True
@@ -0,0 +1,299 @@
+import os
+import json
+import shutil
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from tensorflow import keras
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántas épocas se guarda un checkpoint del entrenamiento (0 lo desactiva).
+TRAINING_CHECKPOINT_INTERVAL = int(os.environ.get("TRAINING_CHECKPOINT_INTERVAL", "1"))
+
+CHECKPOINT_DIR_NAME = "checkpoints"
+STATE_FILE = "state.json"
+SPLIT_FILE = "split.json"
+WEIGHTS_FILE = "model.weights.h5"
+OPTIMIZER_FILE = "optimizer.npz"
+
+# Orden de las fases de entrenamiento (EfficientNetB3 entrena en dos fases, y
+# continuar un entrenamiento y destilar un modelo tienen su propia fase).
+TRAINING_PHASES = ("train", "head", "fine_tune", "warm_start", "distillation")
+
+
+class TrainingCheckpoint:
+    """Checkpoints periódicos de un entrenamiento para poder reanudarlo.
+
+    Se guardan en el directorio del modelo del clasificador: los pesos, el estado
+    del optimizador, la última época completada, la fase y el historial, además de
+    la división en entrenamiento y validación usada al empezar.
+    """
+
+    def __init__(self, model_dir: str, interval: int = TRAINING_CHECKPOINT_INTERVAL):
+        self.directory = os.path.join(model_dir, CHECKPOINT_DIR_NAME)
+        self.interval = interval
+        self.state: Optional[Dict[str, Any]] = self._read_json(STATE_FILE)
+        self.history: Dict[str, List[float]] = dict(
+            (self.state or {}).get("history", {})
+        )
+
+    @property
+    def resumed(self) -> bool:
+        """Indica si hay un checkpoint del que reanudar."""
+
+        return self.state is not None
+
+    def load_split(
+        self, label_to_index: Dict[str, int], config: Dict[str, Any]
+    ) -> Optional[Tuple[List[str], List[str]]]:
+        """Devuelve la división guardada si el checkpoint es de este mismo entrenamiento.
+
+        Si las clases o la configuración han cambiado, se descarta el checkpoint.
+
+        Args:
+            label_to_index: Mapeo actual de etiquetas a índices.
+            config: Configuración del entrenamiento (arquitectura y parámetros).
+
+        Returns:
+            Rutas de entrenamiento y de validación, o None si no hay división guardada.
+        """
+
+        split = self._read_json(SPLIT_FILE)
+        if split is None:
+            self.clear()
+            return None
+
+        # Con otras clases u otros parámetros el checkpoint no es compatible.
+        if split.get("label_to_index") != label_to_index or split.get(
+            "config"
+        ) != json.loads(json.dumps(config)):
+            logger.warning("Discarding training checkpoint: training has changed")
+            self.clear()
+            return None
+
+        return split["train"], split["val"]
+
+    def save_split(
+        self,
+        train_paths: List[str],
+        val_paths: List[str],
+        label_to_index: Dict[str, int],
+        config: Dict[str, Any],
+    ) -> None:
+        """Guarda la división en entrenamiento y validación de este entrenamiento."""
+
+        self._write_json(
+            SPLIT_FILE,
+            {
+                "train": train_paths,
+                "val": val_paths,
+                "label_to_index": label_to_index,
+                "config": config,
+            },
+        )
+
+    def skip_phase(self, phase: str) -> bool:
+        """Indica si una fase ya terminó según el checkpoint (hay uno de una fase posterior).
+
+        Args:
+            phase: Fase del entrenamiento.
+
+        Returns:
+            bool: True si la fase se debe omitir.
+        """
+
+        if self.state is None:
+            return False
+
+        return TRAINING_PHASES.index(self.state["phase"]) > TRAINING_PHASES.index(phase)
+
+    def restore(self, model: keras.Model, phase: str) -> Optional[int]:
+        """Restaura los pesos guardados durante una fase.
+
+        Args:
+            model: Modelo ya creado.
+            phase: Fase del entrenamiento que va a comenzar.
+
+        Returns:
+            int: Época desde la que continuar, o None si no hay checkpoint de la fase.
+        """
+
+        if self.state is None or self.state["phase"] != phase:
+            return None
+
+        model.load_weights(os.path.join(self.directory, WEIGHTS_FILE))
+        logger.info(f"Resuming training at epoch {self.state['epoch']} ({phase})")
+        return self.state["epoch"]
+
+    def callback(
+        self, model: keras.Model, phase: str, **extra: Any
+    ) -> keras.callbacks.Callback:
+        """Crea el callback que guarda los checkpoints de una fase.
+
+        Args:
+            model: Modelo completo cuyos pesos se guardan.
+            phase: Fase del entrenamiento.
+            **extra: Datos adicionales a guardar en el estado (p. ej. head_epoch).
+
+        Returns:
+            keras.callbacks.Callback: Callback para model.fit.
+        """
+
+        return CheckpointCallback(self, model, phase, **extra)
+
+    def save(
+        self,
+        model: keras.Model,
+        optimizer: keras.optimizers.Optimizer,
+        epoch: int,
+        phase: str,
+        **extra: Any,
+    ) -> None:
+        """Guarda un checkpoint (el estado se escribe el último, de forma atómica).
+
+        Args:
+            model: Modelo completo cuyos pesos se guardan.
+            optimizer: Optimizador en uso.
+            epoch: Número de épocas completadas.
+            phase: Fase del entrenamiento.
+            **extra: Datos adicionales a guardar en el estado.
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        weights_tmp = os.path.join(self.directory, f"tmp.{WEIGHTS_FILE}")
+        model.save_weights(weights_tmp)
+        os.replace(weights_tmp, os.path.join(self.directory, WEIGHTS_FILE))
+
+        optimizer_tmp = os.path.join(self.directory, f"tmp.{OPTIMIZER_FILE}")
+        with open(optimizer_tmp, "wb") as f:
+            np.savez(f, *[np.asarray(v) for v in optimizer.variables])
+        os.replace(optimizer_tmp, os.path.join(self.directory, OPTIMIZER_FILE))
+
+        self.state = {
+            "epoch": epoch,
+            "phase": phase,
+            "history": self.history,
+            "saved_at": datetime.now(timezone.utc).isoformat(),
+            **extra,
+        }
+        self._write_json(STATE_FILE, self.state)
+
+    def restore_optimizer(
+        self, optimizer: keras.optimizers.Optimizer, variables: List, phase: str
+    ) -> bool:
+        """Restaura el estado del optimizador guardado para una fase.
+
+        Args:
+            optimizer: Optimizador recién compilado.
+            variables: Variables entrenables que optimiza.
+            phase: Fase del entrenamiento.
+
+        Returns:
+            bool: True si se restauró el estado.
+        """
+
+        if self.state is None or self.state["phase"] != phase:
+            return False
+
+        with np.load(os.path.join(self.directory, OPTIMIZER_FILE)) as saved:
+            values = [saved[f"arr_{i}"] for i in range(len(saved.files))]
+
+        optimizer.build(variables)
+        if len(values) != len(optimizer.variables) or any(
+            tuple(v.shape) != value.shape
+            for v, value in zip(optimizer.variables, values)
+        ):
+            logger.warning("Optimizer checkpoint does not match, starting it anew")
+            return False
+
+        for variable, value in zip(optimizer.variables, values):
+            variable.assign(value)
+        return True
+
+    def copy_to(self, model_dir: str, config: Dict[str, Any]) -> "TrainingCheckpoint":
+        """Copia el checkpoint a otro directorio de modelo para continuar desde él.
+
+        Args:
+            model_dir: Directorio del modelo de destino.
+            config: Configuración con la que se reanudará el entrenamiento.
+
+        Returns:
+            TrainingCheckpoint: Checkpoint copiado.
+        """
+
+        target = TrainingCheckpoint(model_dir, self.interval)
+        shutil.rmtree(target.directory, ignore_errors=True)
+        shutil.copytree(self.directory, target.directory)
+
+        split = self._read_json(SPLIT_FILE)
+        split["config"] = config
+        target._write_json(SPLIT_FILE, split)
+
+        return TrainingCheckpoint(model_dir, self.interval)
+
+    def record_epoch(self, logs: Optional[Dict[str, Any]]) -> None:
+        """Añade las métricas de una época al historial acumulado."""
+
+        for key, value in (logs or {}).items():
+            self.history.setdefault(key, []).append(float(value))
+
+    def clear(self) -> None:
+        """Elimina los checkpoints (al terminar o al fallar el entrenamiento)."""
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.state = None
+        self.history = {}
+
+    def _read_json(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, name), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_json(self, name: str, data: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(f"{path}.tmp", path)
+
+
+class CheckpointCallback(keras.callbacks.Callback):
+    """Guarda un checkpoint cada cierto número de épocas y restaura el optimizador."""
+
+    def __init__(
+        self,
+        checkpoint: TrainingCheckpoint,
+        model: keras.Model,
+        phase: str,
+        **extra: Any,
+    ):
+        super().__init__()
+        self.checkpoint = checkpoint
+        self.full_model = model
+        self.phase = phase
+        self.extra = extra
+
+    def on_train_begin(self, logs: Optional[Dict] = None) -> None:
+        # El optimizador solo existe tras compilar, justo antes de entrenar.
+        self.checkpoint.restore_optimizer(
+            self.model.optimizer, self.model.trainable_variables, self.phase
+        )
+
+    def on_epoch_end(self, epoch: int, logs: Optional[Dict] = None) -> None:
+        self.checkpoint.record_epoch(logs)
+
+        completed = epoch + 1
+        if self.checkpoint.interval > 0 and completed % self.checkpoint.interval == 0:
+            self.checkpoint.save(
+                self.full_model,
+                self.model.optimizer,
+                completed,
+                self.phase,
+                **self.extra,
+            )
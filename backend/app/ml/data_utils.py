@@ -1,12 +1,20 @@
 import os
 import numpy as np
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Iterator, Optional
 
 import tensorflow as tf
 from tensorflow import keras
 
+from app.ml.shard_cache import shard_cache, Shard
+
 AUTOTUNE = tf.data.AUTOTUNE
 
+# Número de imágenes decodificadas por lote al construir la caché de shards.
+SHARD_BUILD_BATCH_SIZE = 64
+
+# Factores de reducción que admite el escalado DCT al decodificar JPEG, de mayor a menor.
+JPEG_DCT_RATIOS = (8, 4, 2)
+
 
 def prepare_dataset(
     image_paths: List[str],
@@ -17,6 +25,8 @@ def prepare_dataset(
     validation_split: float = 0.2,
     seed: int = 42,
     architecture: str = None,
+    cache_namespace: Optional[str] = None,
+    split: Optional[Tuple[List[str], List[str]]] = None,
 ) -> Tuple[tf.data.Dataset, tf.data.Dataset, Dict[str, Any]]:
     """Prepara datasets de entrenamiento y validación a partir de rutas de imágenes.
 
@@ -29,6 +39,10 @@ def prepare_dataset(
         validation_split: Proporción de datos para validación.
         seed: Semilla para reproducibilidad.
         architecture: Arquitectura del modelo para normalización específica.
+        cache_namespace: Espacio de nombres en la caché de shards (ID del dataset) o
+            None para decodificar las imágenes en cada época.
+        split: Rutas de entrenamiento y de validación de un entrenamiento anterior
+            que se quiere reanudar o continuar, o None para dividir aleatoriamente.
 
     Returns:
         train_ds: Dataset de entrenamiento.
@@ -43,28 +57,34 @@ def prepare_dataset(
     num_classes = len(label_to_index)
 
     # Dividir en conjuntos de entrenamiento y validación.
-    indices = np.arange(len(image_paths))
-    np.random.seed(seed)
-    np.random.shuffle(indices)
-
-    val_size = int(validation_split * len(indices))
-    train_indices = indices[val_size:]
-    val_indices = indices[:val_size]
+    train_paths, train_labels, val_paths, val_labels = split_dataset(
+        image_paths, numeric_labels, validation_split, seed, split
+    )
 
-    train_paths = [image_paths[i] for i in train_indices]
-    train_labels = [numeric_labels[i] for i in train_indices]
-    val_paths = [image_paths[i] for i in val_indices]
-    val_labels = [numeric_labels[i] for i in val_indices]
+    # Leer las imágenes ya decodificadas de la caché de shards si está disponible.
+    shard = None
+    if cache_namespace is not None:
+        shard = shard_cache.get_or_build(
+            cache_namespace,
+            image_paths,
+            image_size,
+            lambda paths: decode_image_batches(paths, image_size),
+        )
 
     # Crear datasets de TensorFlow.
-    train_ds = create_dataset(train_paths, train_labels, image_size, architecture)
-    val_ds = create_dataset(val_paths, val_labels, image_size, architecture)
+    if shard is not None:
+        train_ds = create_dataset_from_shard(shard, train_paths, train_labels)
+        val_ds = create_dataset_from_shard(shard, val_paths, val_labels)
+    else:
+        train_ds = create_dataset(train_paths, train_labels, image_size, architecture)
+        val_ds = create_dataset(val_paths, val_labels, image_size, architecture)
 
-    # Aplicar aumentación de datos al conjunto de entrenamiento.
-    train_ds = apply_data_augmentation(train_ds, architecture)
+    # Agrupar en lotes y aplicar la aumentación de datos a lotes completos del
+    # conjunto de entrenamiento.
+    train_ds = apply_data_augmentation(train_ds.batch(batch_size), architecture)
 
     # Optimizar rendimiento de los datasets.
-    train_ds = train_ds.batch(batch_size).prefetch(AUTOTUNE)
+    train_ds = train_ds.prefetch(AUTOTUNE)
     val_ds = val_ds.batch(batch_size).prefetch(AUTOTUNE)
 
     # Información del dataset.
@@ -79,6 +99,73 @@ def prepare_dataset(
     return train_ds, val_ds, dataset_info
 
 
+def split_dataset(
+    image_paths: List[str],
+    numeric_labels: List[int],
+    validation_split: float = 0.2,
+    seed: int = 42,
+    split: Optional[Tuple[List[str], List[str]]] = None,
+) -> Tuple[List[str], List[int], List[str], List[int]]:
+    """Divide las imágenes en entrenamiento y validación de forma reproducible.
+
+    Args:
+        image_paths: Lista de rutas a las imágenes.
+        numeric_labels: Lista de etiquetas numéricas.
+        validation_split: Proporción de datos para validación.
+        seed: Semilla para reproducibilidad.
+        split: División guardada (rutas de entrenamiento y de validación) a respetar,
+            o None para dividir aleatoriamente. Las imágenes que no están en ella se
+            reparten por clase en la proporción validation_split.
+
+    Returns:
+        Rutas y etiquetas de entrenamiento y de validación.
+    """
+
+    # Respetar una división anterior y repartir las imágenes nuevas por clase.
+    if split is not None:
+        label_by_path = dict(zip(image_paths, numeric_labels))
+        train_paths = [p for p in split[0] if p in label_by_path]
+        val_paths = [p for p in split[1] if p in label_by_path]
+        known = set(split[0]) | set(split[1])
+
+        new_by_label = {}
+        for path in sorted(p for p in image_paths if p not in known):
+            new_by_label.setdefault(label_by_path[path], []).append(path)
+
+        rng = np.random.RandomState(seed)
+        val_labels_present = {label_by_path[p] for p in val_paths}
+        for label, paths in sorted(new_by_label.items()):
+            paths = [paths[i] for i in rng.permutation(len(paths))]
+            val_size = int(validation_split * len(paths))
+            # Una clase nueva necesita al menos una imagen de validación.
+            if val_size == 0 and label not in val_labels_present and len(paths) > 1:
+                val_size = 1
+            val_paths += paths[:val_size]
+            train_paths += paths[val_size:]
+
+        return (
+            train_paths,
+            [label_by_path[p] for p in train_paths],
+            val_paths,
+            [label_by_path[p] for p in val_paths],
+        )
+
+    indices = np.arange(len(image_paths))
+    np.random.seed(seed)
+    np.random.shuffle(indices)
+
+    val_size = int(validation_split * len(indices))
+    train_indices = indices[val_size:]
+    val_indices = indices[:val_size]
+
+    train_paths = [image_paths[i] for i in train_indices]
+    train_labels = [numeric_labels[i] for i in train_indices]
+    val_paths = [image_paths[i] for i in val_indices]
+    val_labels = [numeric_labels[i] for i in val_indices]
+
+    return train_paths, train_labels, val_paths, val_labels
+
+
 def create_dataset(
     image_paths: List[str],
     labels: List[int],
@@ -117,37 +204,160 @@ def create_dataset(
     return tf.data.Dataset.zip((images_ds, labels_ds))
 
 
+def create_dataset_from_shard(
+    shard: Shard, image_paths: List[str], labels: List[int]
+) -> tf.data.Dataset:
+    """Crea un dataset de TensorFlow leyendo las imágenes de un shard en caché.
+
+    Args:
+        shard: Imágenes decodificadas y empaquetadas.
+        image_paths: Lista de rutas a las imágenes.
+        labels: Lista de etiquetas numéricas.
+
+    Returns:
+        Dataset de TensorFlow con las mismas imágenes que create_dataset.
+    """
+
+    images = shard.array
+    image_shape = images.shape[1:]
+
+    def read_row(row):
+        image = tf.numpy_function(lambda r: images[r], [row], tf.uint8)
+        image.set_shape(image_shape)
+        return image
+
+    rows_ds = tf.data.Dataset.from_tensor_slices(shard.rows_for(image_paths))
+    images_ds = rows_ds.map(read_row, num_parallel_calls=AUTOTUNE)
+    labels_ds = tf.data.Dataset.from_tensor_slices(labels)
+
+    return tf.data.Dataset.zip((images_ds, labels_ds))
+
+
+def decode_image_batches(
+    image_paths: List[str], image_size: Tuple[int, int]
+) -> Iterator[np.ndarray]:
+    """Decodifica y redimensiona imágenes por lotes como arrays uint8.
+
+    Args:
+        image_paths: Lista de rutas a las imágenes (se respeta su orden).
+        image_size: Dimensiones a las que redimensionar las imágenes (ancho, alto).
+
+    Returns:
+        Iterador de lotes de forma (n, alto, ancho, 3).
+    """
+
+    def load(path):
+        return load_and_preprocess_image(path, image_size)
+
+    dataset = (
+        tf.data.Dataset.from_tensor_slices(tf.constant(image_paths, dtype=tf.string))
+        .map(load, num_parallel_calls=AUTOTUNE, deterministic=True)
+        .batch(SHARD_BUILD_BATCH_SIZE)
+        .prefetch(AUTOTUNE)
+    )
+
+    for batch in dataset:
+        yield batch.numpy()
+
+
 def load_and_preprocess_image(path, image_size: Tuple[int, int], architecture=None):
     """Carga y preprocesa una imagen desde su ruta.
 
+    La imagen se mantiene en uint8: el modelo la convierte a float32 en su entrada.
+
     Args:
         path: Ruta de la imagen.
         image_size: Dimensiones a las que redimensionar la imagen (ancho, alto).
         architecture: Arquitectura del modelo para normalización específica.
 
     Returns:
-        Imagen preprocesada como tensor.
+        Imagen preprocesada como tensor uint8.
     """
 
     img = tf.io.read_file(path)
-    img = tf.image.decode_jpeg(img, channels=3)
-    img = tf.image.resize(img, image_size)
-    img = tf.cast(img, tf.float32)
+    img = decode_image_scaled(img, image_size)
+    img = tf.image.resize(img, (image_size[1], image_size[0]))
+
+    return to_uint8(img)
+
+
+def decode_image_scaled(contents, image_size: Tuple[int, int]):
+    """Decodifica una imagen reduciéndola ya en la decodificación si es un JPEG grande.
 
-    return img
+    Con escalado DCT, libjpeg decodifica directamente a 1/2, 1/4 u 1/8 del tamaño
+    original, sin llegar a reconstruir la imagen completa. Se elige el mayor factor
+    que no deja la imagen por debajo del tamaño de destino. El resto de formatos
+    (PNG, GIF) se decodifican a tamaño completo.
+
+    Args:
+        contents: Contenido del archivo de imagen.
+        image_size: Dimensiones a las que se va a redimensionar la imagen (ancho, alto).
+
+    Returns:
+        Imagen decodificada como tensor uint8 de forma (alto, ancho, 3).
+    """
+
+    def decode_full():
+        return tf.image.decode_jpeg(contents, channels=3)
+
+    def decode_jpeg_scaled():
+        shape = tf.image.extract_jpeg_shape(contents)
+        scale = tf.minimum(shape[0] // image_size[1], shape[1] // image_size[0])
+        branches = [
+            (
+                scale >= ratio,
+                lambda ratio=ratio: tf.image.decode_jpeg(
+                    contents, channels=3, ratio=ratio
+                ),
+            )
+            for ratio in JPEG_DCT_RATIOS
+        ]
+        return tf.case(branches, default=decode_full)
+
+    return tf.cond(tf.io.is_jpeg(contents), decode_jpeg_scaled, decode_full)
+
+
+def to_uint8(images):
+    """Redondea y recorta imágenes en float al rango [0, 255] como uint8."""
+
+    return tf.cast(tf.clip_by_value(tf.round(images), 0, 255), tf.uint8)
 
 
 def apply_data_augmentation(dataset, architecture=None):
-    """Aplica aumentación de datos al dataset de entrenamiento.
+    """Aplica aumentación de datos al dataset de entrenamiento ya agrupado en lotes.
+
+    Las capas aleatorias generan una transformación distinta para cada imagen del
+    lote, así que el resultado equivale a aumentar las imágenes una a una, pero con
+    una sola llamada vectorizada por lote. Las imágenes aumentadas vuelven a uint8.
 
     Args:
-        dataset: Dataset de TensorFlow.
+        dataset: Dataset de TensorFlow con lotes de imágenes y etiquetas.
         architecture: Arquitectura del modelo para aumentación específica.
 
     Returns:
         Dataset aumentado.
     """
 
+    data_augmentation = create_augmentation_layers(architecture)
+
+    # Función para aplicar aumentación a un lote.
+    def apply_augmentation(images, labels):
+        images = data_augmentation(images, training=True)
+        return to_uint8(images), labels
+
+    return dataset.map(apply_augmentation, num_parallel_calls=AUTOTUNE)
+
+
+def create_augmentation_layers(architecture=None) -> keras.Sequential:
+    """Crea las capas de aumentación de datos de una arquitectura.
+
+    Args:
+        architecture: Arquitectura del modelo para aumentación específica.
+
+    Returns:
+        Modelo secuencial con las capas de aumentación.
+    """
+
     # Definir capas de aumentación de datos.
     if architecture == "efficientnetb3":
         # Aumentación específica para EfficientNetB3 más conservadora.
@@ -171,12 +381,7 @@ def apply_data_augmentation(dataset, architecture=None):
             ]
         )
 
-    # Función para aplicar aumentación.
-    def apply_augmentation(image, label):
-        image = data_augmentation(image, training=True)
-        return image, label
-
-    return dataset.map(apply_augmentation, num_parallel_calls=AUTOTUNE)
+    return data_augmentation
 
 
 def extract_dataset_from_db(images, media_root):
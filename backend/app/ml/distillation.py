@@ -0,0 +1,426 @@
+"""Destilación de un clasificador entrenado en un modelo Xception Mini.
+
+Un modelo grande (el profesor, p. ej. EfficientNetB3 o ResNet50) enseña a uno
+pequeño y rápido de servir en CPU (el alumno). Los logits del profesor se
+calculan una sola vez sobre las imágenes del dataset y se guardan en la caché de
+shards, y el alumno se entrena con una combinación de las etiquetas reales y las
+probabilidades suavizadas del profesor.
+"""
+
+import os
+import time
+import hashlib
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+from app.ml.data_utils import AUTOTUNE, decode_image_batches
+from app.ml.model_utils import CompiledPredictor
+from app.ml.models import xception_mini
+from app.ml.shard_cache import shard_cache
+from app.ml.timing import time_call
+
+logger = logging.getLogger(__name__)
+
+# Arquitectura e imágenes del alumno.
+DISTILLATION_STUDENT_ARCHITECTURE = "xception_mini"
+DISTILLATION_IMAGE_SIZE = [180, 180]
+
+# Temperatura con la que se suavizan las probabilidades del profesor y del alumno.
+DISTILLATION_TEMPERATURE = float(os.environ.get("DISTILLATION_TEMPERATURE", "4.0"))
+
+# Peso de las etiquetas reales en la pérdida (el resto corresponde al profesor).
+DISTILLATION_ALPHA = float(os.environ.get("DISTILLATION_ALPHA", "0.1"))
+
+# Ejecuciones medidas al comparar la latencia del profesor y del alumno.
+DISTILLATION_LATENCY_REPEATS = int(os.environ.get("DISTILLATION_LATENCY_REPEATS", "20"))
+
+# Límite inferior de las probabilidades al tomar logaritmos.
+PROBABILITY_EPSILON = 1e-7
+
+
+def teacher_label_mapping(
+    class_mapping: Dict[str, str], labels: List[str]
+) -> Dict[str, int]:
+    """Usa los índices de las clases del profesor para entrenar al alumno.
+
+    Args:
+        class_mapping: Mapeo de índices a etiquetas del profesor.
+        labels: Etiquetas de las imágenes del dataset.
+
+    Raises:
+        ValueError: Si las clases del dataset no coinciden con las del profesor.
+
+    Returns:
+        Dict[str, int]: Mapeo de etiquetas a índices.
+    """
+
+    label_to_index = {label: int(i) for i, label in class_mapping.items()}
+    if set(labels) != set(label_to_index):
+        raise ValueError(
+            "The dataset classes changed since the teacher was trained. "
+            "Retrain the teacher before distilling it"
+        )
+
+    return label_to_index
+
+
+def teacher_version(metadata: Dict[str, Any]) -> str:
+    """Identifica el modelo guardado del profesor (cambia al volver a entrenarlo)."""
+
+    return hashlib.sha256(str(metadata.get("training_date")).encode()).hexdigest()[:8]
+
+
+def compute_teacher_logits(
+    teacher: keras.Model, image_paths: List[str], image_size: Tuple[int, int]
+) -> Iterator[np.ndarray]:
+    """Calcula los logits del profesor sobre las imágenes por lotes.
+
+    Los logits se obtienen de la entrada de la capa de salida. La salida sigmoide de
+    un modelo binario (logit z) equivale a una softmax de logits [0, z], de modo que
+    siempre hay un logit por clase.
+
+    Args:
+        teacher: Modelo del profesor, cuya última capa es la de salida.
+        image_paths: Lista de rutas a las imágenes (se respeta su orden).
+        image_size: Dimensiones de entrada del profesor (ancho, alto).
+
+    Returns:
+        Iterador de lotes float32 de forma (n, clases).
+    """
+
+    head = teacher.layers[-1]
+    kernel, bias = head.get_weights()
+    features = CompiledPredictor(keras.Model(teacher.input, head.input))
+
+    for images in decode_image_batches(image_paths, image_size):
+        logits = features.predict_on_batch(images) @ kernel + bias
+        if logits.shape[-1] == 1:
+            logits = np.concatenate([np.zeros_like(logits), logits], axis=1)
+        yield logits.astype(np.float32)
+
+
+class TeacherLogits:
+    """Logits del profesor por imagen, calculados una sola vez."""
+
+    def __init__(self, logits: np.ndarray, rows: Dict[str, int], seconds: float):
+        self.logits = logits
+        self.rows = rows
+        self.seconds = seconds
+
+    def for_paths(self, image_paths: List[str]) -> np.ndarray:
+        """Devuelve los logits de las imágenes en el orden indicado."""
+
+        rows = np.array([self.rows[path] for path in image_paths], dtype=np.int64)
+        return np.asarray(self.logits[rows], dtype=np.float32)
+
+    def attach(
+        self, dataset: tf.data.Dataset, image_paths: List[str], batch_size: int
+    ) -> tf.data.Dataset:
+        """Añade los logits del profesor a las etiquetas de un dataset por lotes.
+
+        Args:
+            dataset: Dataset por lotes de pares (imágenes, etiquetas) sin barajar,
+                con las imágenes en el orden de image_paths.
+            image_paths: Rutas de las imágenes del dataset.
+            batch_size: Tamaño de lote del dataset.
+
+        Returns:
+            Dataset de pares (imágenes, objetivos), donde cada objetivo es la etiqueta
+            seguida de los logits del profesor.
+        """
+
+        logits_ds = tf.data.Dataset.from_tensor_slices(
+            self.for_paths(image_paths)
+        ).batch(batch_size)
+
+        def merge(batch, logits):
+            images, labels = batch
+            targets = tf.concat([tf.cast(labels, tf.float32)[:, None], logits], axis=1)
+            return images, targets
+
+        return (
+            tf.data.Dataset.zip((dataset, logits_ds))
+            .map(merge, num_parallel_calls=AUTOTUNE)
+            .prefetch(AUTOTUNE)
+        )
+
+    def accuracy(self, image_paths: List[str], labels: List[int]) -> float:
+        """Calcula la exactitud del profesor sobre unas imágenes etiquetadas."""
+
+        if not image_paths:
+            return 0.0
+        predicted = np.argmax(self.for_paths(image_paths), axis=1)
+        return float(np.mean(predicted == np.asarray(labels)))
+
+
+def load_teacher_logits(
+    teacher: keras.Model,
+    image_paths: List[str],
+    version: str,
+    cache_namespace: Optional[str] = None,
+) -> TeacherLogits:
+    """Obtiene los logits del profesor de la caché o los calcula.
+
+    Args:
+        teacher: Modelo del profesor.
+        image_paths: Rutas de todas las imágenes del dataset.
+        version: Identificador del modelo guardado del profesor.
+        cache_namespace: Espacio de nombres en la caché (ID del dataset) o None para
+            calcular los logits en memoria.
+
+    Returns:
+        TeacherLogits: Logits de cada imagen.
+    """
+
+    image_size = (teacher.input_shape[2], teacher.input_shape[1])
+    num_classes = max(int(teacher.output_shape[-1]), 2)
+
+    def compute(paths):
+        return compute_teacher_logits(teacher, paths, image_size)
+
+    start = time.perf_counter()
+    if cache_namespace is not None:
+        shard = shard_cache.get_or_build_array(
+            cache_namespace,
+            image_paths,
+            variant=f"teacher_{version}_{image_size[0]}x{image_size[1]}",
+            item_shape=(num_classes,),
+            dtype=np.float32,
+            compute_batches=compute,
+        )
+        if shard is not None:
+            return TeacherLogits(shard.array, shard.rows, time.perf_counter() - start)
+
+    logits = np.concatenate(list(compute(image_paths)))
+    rows = {path: row for row, path in enumerate(image_paths)}
+    return TeacherLogits(logits, rows, time.perf_counter() - start)
+
+
+def student_log_probabilities(y_pred):
+    """Convierte las salidas del alumno en log-probabilidades, una por clase.
+
+    Las log-probabilidades difieren de los logits en una constante por imagen, que
+    no cambia la softmax, por lo que sirven como logits del alumno.
+    """
+
+    if y_pred.shape[-1] == 1:
+        y_pred = tf.concat([1.0 - y_pred, y_pred], axis=1)
+    return tf.math.log(tf.clip_by_value(y_pred, PROBABILITY_EPSILON, 1.0))
+
+
+def distillation_loss(
+    temperature: float = DISTILLATION_TEMPERATURE, alpha: float = DISTILLATION_ALPHA
+):
+    """Crea la pérdida de destilación.
+
+    Combina la entropía cruzada con las etiquetas reales y la divergencia KL entre
+    las probabilidades del profesor y del alumno suavizadas con la temperatura
+    (multiplicada por su cuadrado para mantener la escala de los gradientes).
+
+    Args:
+        temperature: Temperatura de suavizado.
+        alpha: Peso de las etiquetas reales.
+
+    Returns:
+        Función de pérdida sobre objetivos (etiqueta, logits del profesor...).
+    """
+
+    def loss(y_true, y_pred):
+        labels = tf.cast(y_true[:, 0], tf.int32)
+        teacher_logits = y_true[:, 1:]
+        student_logits = student_log_probabilities(y_pred)
+
+        hard = -tf.gather(student_logits, labels, axis=1, batch_dims=1)
+        teacher_log_probabilities = tf.nn.log_softmax(teacher_logits / temperature)
+        soft = tf.reduce_sum(
+            tf.exp(teacher_log_probabilities)
+            * (
+                teacher_log_probabilities
+                - tf.nn.log_softmax(student_logits / temperature)
+            ),
+            axis=1,
+        )
+
+        return alpha * hard + (1.0 - alpha) * temperature**2 * soft
+
+    return loss
+
+
+def distillation_accuracy(y_true, y_pred):
+    """Exactitud del alumno respecto a las etiquetas reales."""
+
+    labels = tf.cast(y_true[:, 0], tf.int64)
+    predicted = tf.argmax(student_log_probabilities(y_pred), axis=1)
+    return tf.cast(tf.equal(predicted, labels), tf.float32)
+
+
+def train_student(
+    train_ds,
+    val_ds,
+    num_classes: int,
+    epochs: int = 20,
+    learning_rate: float = 0.001,
+    temperature: float = DISTILLATION_TEMPERATURE,
+    alpha: float = DISTILLATION_ALPHA,
+    callbacks: Optional[List[keras.callbacks.Callback]] = None,
+    checkpoint=None,
+    time_budget=None,
+):
+    """Entrena un alumno Xception Mini con los logits del profesor.
+
+    Al terminar, el modelo se compila de nuevo con la pérdida habitual de Xception
+    Mini para evaluarlo y guardarlo sin funciones personalizadas.
+
+    Args:
+        train_ds: Dataset de entrenamiento con los logits del profesor.
+        val_ds: Dataset de validación con los logits del profesor.
+        num_classes: Número de clases.
+        epochs: Número máximo de épocas.
+        learning_rate: Tasa de aprendizaje para el optimizador.
+        temperature: Temperatura de suavizado.
+        alpha: Peso de las etiquetas reales en la pérdida.
+        callbacks: Callbacks adicionales para el entrenamiento (progreso...), o None.
+        checkpoint: Checkpoints del entrenamiento (TrainingCheckpoint) para guardarlo
+            periódicamente y reanudarlo tras una interrupción, o None.
+        time_budget: Tiempo máximo del entrenamiento (TrainingTimeBudget), o None.
+
+    Returns:
+        model: Modelo entrenado.
+        history: Historial del entrenamiento.
+    """
+
+    # Obtener la forma de entrada de las imágenes del primer lote.
+    for images, _ in train_ds.take(1):
+        input_shape = images[0].shape
+        break
+
+    model = xception_mini.create_model(input_shape=input_shape, num_classes=num_classes)
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate),
+        loss=distillation_loss(temperature, alpha),
+        metrics=[
+            keras.metrics.MeanMetricWrapper(distillation_accuracy, name="accuracy")
+        ],
+    )
+
+    callbacks = [
+        keras.callbacks.EarlyStopping(
+            monitor="val_loss", patience=5, restore_best_weights=True
+        ),
+        *(callbacks or []),
+    ]
+
+    # Reanudar desde el último checkpoint si lo hay.
+    initial_epoch = 0
+    if checkpoint is not None:
+        initial_epoch = checkpoint.restore(model, "distillation") or 0
+        callbacks.append(checkpoint.callback(model, "distillation"))
+
+    # Detener el entrenamiento al agotar el tiempo disponible.
+    if time_budget is not None:
+        callbacks.append(time_budget.callback())
+
+    history = model.fit(
+        train_ds,
+        validation_data=val_ds,
+        epochs=epochs,
+        initial_epoch=initial_epoch,
+        callbacks=callbacks,
+    )
+
+    if num_classes == 2:
+        loss = tf.keras.losses.BinaryCrossentropy(from_logits=False)
+        metrics = [tf.keras.metrics.BinaryAccuracy(name="accuracy")]
+    else:
+        loss = tf.keras.losses.SparseCategoricalCrossentropy(from_logits=False)
+        metrics = [tf.keras.metrics.SparseCategoricalAccuracy(name="accuracy")]
+    model.compile(optimizer=model.optimizer, loss=loss, metrics=metrics)
+
+    return model, history
+
+
+def measure_latency(
+    model: keras.Model, batch_size: int = 1, repeats: int = DISTILLATION_LATENCY_REPEATS
+) -> Dict[str, Any]:
+    """Mide la latencia de la función de predicción compilada de un modelo.
+
+    Args:
+        model: Modelo de Keras.
+        batch_size: Número de imágenes por llamada.
+        repeats: Número de ejecuciones medidas.
+
+    Returns:
+        Dict: Tamaño de lote y latencia media, mediana y p95 en milisegundos.
+    """
+
+    predictor = CompiledPredictor(model)
+    batch = np.zeros((batch_size,) + tuple(model.input_shape[1:]), dtype=np.float32)
+    timing = time_call(lambda: predictor.predict_on_batch(batch), repeats)
+
+    return {"batch_size": batch_size, **timing}
+
+
+def distillation_report(
+    teacher_id: str,
+    teacher_metadata: Dict[str, Any],
+    teacher_accuracy: float,
+    student_accuracy: float,
+    teacher_latency: Dict[str, Any],
+    student_latency: Dict[str, Any],
+    temperature: float,
+    alpha: float,
+    teacher_logits_seconds: Optional[float] = None,
+    validation_images: Optional[int] = None,
+    teacher_split: bool = False,
+) -> Dict[str, Any]:
+    """Compara el alumno con su profesor para guardarlo junto a las métricas.
+
+    Las exactitudes se miden sobre las mismas imágenes de validación. Solo son
+    comparables si el alumno respeta la división del profesor (teacher_split); si
+    no, la validación puede incluir imágenes con las que se entrenó el profesor.
+
+    Args:
+        teacher_id: ID del clasificador profesor.
+        teacher_metadata: Metadatos del modelo del profesor.
+        teacher_accuracy: Exactitud del profesor.
+        student_accuracy: Exactitud del alumno.
+        teacher_latency: Latencia del profesor (measure_latency).
+        student_latency: Latencia del alumno (measure_latency).
+        temperature: Temperatura de suavizado.
+        alpha: Peso de las etiquetas reales en la pérdida.
+        teacher_logits_seconds: Segundos empleados en obtener los logits del profesor.
+        validation_images: Número de imágenes de validación.
+        teacher_split: Si la validación son las imágenes de validación del profesor
+            y las añadidas después de su entrenamiento.
+
+    Returns:
+        Dict: Exactitud y latencia del profesor y del alumno.
+    """
+
+    return {
+        "teacher_id": teacher_id,
+        "teacher_architecture": teacher_metadata.get("architecture"),
+        "teacher_training_date": teacher_metadata.get("training_date"),
+        "temperature": temperature,
+        "alpha": alpha,
+        "teacher_accuracy": round(float(teacher_accuracy), 4),
+        "student_accuracy": round(float(student_accuracy), 4),
+        "teacher_latency": teacher_latency,
+        "student_latency": student_latency,
+        "speedup": (
+            round(teacher_latency["p50_ms"] / student_latency["p50_ms"], 2)
+            if student_latency["p50_ms"] > 0
+            else None
+        ),
+        "teacher_logits_seconds": (
+            round(teacher_logits_seconds, 3)
+            if teacher_logits_seconds is not None
+            else None
+        ),
+        "validation_images": validation_images,
+        "teacher_split": teacher_split,
+    }
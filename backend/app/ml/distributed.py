@@ -0,0 +1,501 @@
+"""Entrenamiento data-parallel en varios procesos locales de CPU.
+
+El worker de Celery lanza varios procesos de este módulo que entrenan el mismo
+modelo con MultiWorkerMirroredStrategy, cada uno con una parte de los núcleos, y
+sincronizan los gradientes en cada paso. El proceso principal (chief) guarda el
+modelo y los resultados para que la tarea continúe con la evaluación.
+
+Uso interno:
+    python -m app.ml.distributed <spec.json> <índice del worker>
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import logging
+import tempfile
+import subprocess
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+from app.ml.callbacks import TrainingCancelled
+
+logger = logging.getLogger(__name__)
+
+# Número máximo de procesos de un entrenamiento distribuido.
+DISTRIBUTED_MAX_WORKERS = int(os.environ.get("DISTRIBUTED_MAX_WORKERS", "8"))
+
+# Pasos de entrenamiento medidos en un solo proceso para calcular la aceleración. La
+# medida crea y entrena una segunda copia del modelo en el worker de Celery, por lo
+# que solo se hace si se activa (0 la desactiva y la aceleración no se informa).
+DISTRIBUTED_CALIBRATION_STEPS = int(
+    os.environ.get("DISTRIBUTED_CALIBRATION_STEPS", "0")
+)
+
+# Sincronizaciones de gradientes medidas al terminar el entrenamiento.
+DISTRIBUTED_SYNC_STEPS = int(os.environ.get("DISTRIBUTED_SYNC_STEPS", "10"))
+
+# Tiempo máximo de un entrenamiento distribuido (igual que la visibilidad de Celery).
+DISTRIBUTED_TIMEOUT_SECONDS = int(
+    os.environ.get("DISTRIBUTED_TIMEOUT_SECONDS", "21600")
+)
+
+# Directorio para la configuración y los resultados de cada entrenamiento (por
+# defecto, el temporal del sistema).
+DISTRIBUTED_WORK_DIR = os.environ.get("DISTRIBUTED_WORK_DIR") or None
+
+SPEC_FILE = "spec.json"
+RESULT_FILE = "result.json"
+MODEL_FILE = "model.keras"
+
+
+class MultiWorkerStrategy(tf.distribute.MultiWorkerMirroredStrategy):
+    """MultiWorkerMirroredStrategy compatible con el entrenamiento de Keras 3.
+
+    Keras reduce estructuras anidadas (el primer lote al construir el modelo) y
+    métricas escalares con axis=0, y la estrategia multi-worker no admite ninguna de
+    las dos cosas. Aquí se reduce cada valor por separado.
+    """
+
+    def reduce(self, reduce_op, value, axis):
+        def reduce_value(v):
+            local = self.experimental_local_results(v)[0]
+            value_axis = None if local.shape.rank == 0 else axis
+            return super(MultiWorkerStrategy, self).reduce(reduce_op, v, value_axis)
+
+        return tf.nest.map_structure(reduce_value, value)
+
+
+def find_free_ports(count: int) -> List[int]:
+    """Reserva temporalmente puertos libres en localhost para el clúster."""
+
+    sockets = []
+    try:
+        for _ in range(count):
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.bind(("localhost", 0))
+            sockets.append(s)
+        return [s.getsockname()[1] for s in sockets]
+    finally:
+        for s in sockets:
+            s.close()
+
+
+def worker_environment(
+    ports: List[int], index: int, threads: int, base_env: Optional[Dict] = None
+) -> Dict[str, str]:
+    """Crea las variables de entorno de un proceso del clúster.
+
+    Args:
+        ports: Puerto de cada proceso.
+        index: Índice del proceso (0 es el chief).
+        threads: Hilos de cálculo asignados al proceso.
+        base_env: Entorno del que partir (por defecto el del proceso actual).
+
+    Returns:
+        Dict: Entorno con TF_CONFIG y los límites de hilos.
+    """
+
+    env = dict(os.environ if base_env is None else base_env)
+    env["TF_CONFIG"] = json.dumps(
+        {
+            "cluster": {"worker": [f"localhost:{port}" for port in ports]},
+            "task": {"type": "worker", "index": index},
+        }
+    )
+    env["CUDA_VISIBLE_DEVICES"] = ""
+    env["OMP_NUM_THREADS"] = str(threads)
+    env["TF_NUM_INTRAOP_THREADS"] = str(threads)
+    env["TF_NUM_INTEROP_THREADS"] = "2"
+    env["TF_CPP_MIN_LOG_LEVEL"] = env.get("TF_CPP_MIN_LOG_LEVEL", "2")
+
+    # Los procesos importan la aplicación desde el mismo directorio que el worker.
+    backend_dir = os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (backend_dir, env.get("PYTHONPATH")) if p
+    )
+
+    return env
+
+
+def measure_single_process_throughput(
+    model_module, train_ds: tf.data.Dataset, num_classes: int, steps: int
+) -> Optional[float]:
+    """Mide las imágenes por segundo de unos pasos de entrenamiento en este proceso.
+
+    Args:
+        model_module: Módulo de la arquitectura (con create_model).
+        train_ds: Dataset de entrenamiento.
+        num_classes: Número de clases.
+        steps: Número de pasos medidos (tras uno de calentamiento).
+
+    Returns:
+        float: Imágenes por segundo, o None si la calibración está desactivada o no
+            hay lotes suficientes.
+    """
+
+    if steps <= 0:
+        return None
+
+    for images, _ in train_ds.take(1):
+        input_shape = images.shape[1:]
+
+    model = model_module.create_model(input_shape=input_shape, num_classes=num_classes)
+    if model.output_shape[-1] == 1:
+        loss = keras.losses.BinaryCrossentropy()
+    else:
+        loss = keras.losses.SparseCategoricalCrossentropy()
+    model.compile(optimizer=keras.optimizers.Adam(), loss=loss)
+
+    seconds = 0.0
+    images_seen = 0
+    for step, (images, labels) in enumerate(train_ds.repeat().take(steps + 1)):
+        start = time.perf_counter()
+        model.train_on_batch(images, labels)
+        # El primer paso incluye la compilación de la función de entrenamiento.
+        if step > 0:
+            seconds += time.perf_counter() - start
+            images_seen += int(images.shape[0])
+
+    return images_seen / seconds if seconds > 0 else None
+
+
+def train_distributed(
+    model_module,
+    train_ds: tf.data.Dataset,
+    dataset_spec: Dict[str, Any],
+    num_classes: int,
+    epochs: int,
+    learning_rate: float,
+    num_workers: int,
+    classifier_id: Optional[str] = None,
+    threads: Optional[int] = None,
+    should_cancel: Optional[Callable[[], bool]] = None,
+) -> Tuple[keras.Model, keras.callbacks.History, Dict[str, Any]]:
+    """Entrena un modelo en varios procesos locales y devuelve el modelo del chief.
+
+    Args:
+        model_module: Módulo de la arquitectura.
+        train_ds: Dataset de entrenamiento de este proceso (para la calibración).
+        dataset_spec: Argumentos de prepare_dataset (rutas, etiquetas, división...).
+        num_classes: Número de clases.
+        epochs: Número de épocas.
+        learning_rate: Tasa de aprendizaje.
+        num_workers: Número de procesos.
+        classifier_id: ID del clasificador para publicar el progreso, o None.
+        threads: Hilos de cálculo a repartir entre los procesos (por defecto, los
+            núcleos del nodo).
+        should_cancel: Función que indica si se ha cancelado el entrenamiento.
+
+    Raises:
+        RuntimeError: Si algún proceso falla o se supera el tiempo máximo.
+        TrainingCancelled: Si se cancela el entrenamiento.
+
+    Returns:
+        model: Modelo entrenado.
+        history: Historial del entrenamiento.
+        info: Procesos, coste de sincronización y aceleración conseguida.
+    """
+
+    single_ips = measure_single_process_throughput(
+        model_module, train_ds, num_classes, DISTRIBUTED_CALIBRATION_STEPS
+    )
+
+    work_dir = tempfile.mkdtemp(prefix="distributed-", dir=DISTRIBUTED_WORK_DIR)
+    threads = max(1, (threads or os.cpu_count() or 1) // num_workers)
+    spec = {
+        **dataset_spec,
+        "architecture": model_module.__name__.rsplit(".", 1)[-1],
+        "num_classes": num_classes,
+        "epochs": epochs,
+        "learning_rate": learning_rate,
+        "classifier_id": classifier_id,
+        "threads": threads,
+        "output_dir": work_dir,
+    }
+    spec_path = os.path.join(work_dir, SPEC_FILE)
+    with open(spec_path, "w") as f:
+        json.dump(spec, f)
+
+    try:
+        run_workers(spec_path, num_workers, threads, should_cancel)
+
+        with open(os.path.join(work_dir, RESULT_FILE), "r") as f:
+            result = json.load(f)
+        model = keras.models.load_model(os.path.join(work_dir, MODEL_FILE))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    history = keras.callbacks.History()
+    history.set_model(model)
+    history.history = result["history"]
+
+    return model, history, summarize_distributed_run(result, num_workers, single_ips)
+
+
+def run_workers(
+    spec_path: str,
+    num_workers: int,
+    threads: int,
+    should_cancel: Optional[Callable[[], bool]] = None,
+) -> None:
+    """Lanza los procesos del clúster y espera a que terminen todos.
+
+    Si uno falla se detienen los demás, que quedarían esperando la sincronización.
+
+    Args:
+        spec_path: Ruta a la configuración del entrenamiento.
+        num_workers: Número de procesos.
+        threads: Hilos de cálculo por proceso.
+        should_cancel: Función que indica si se ha cancelado el entrenamiento.
+
+    Raises:
+        RuntimeError: Si algún proceso falla o se supera el tiempo máximo.
+        TrainingCancelled: Si se cancela el entrenamiento (se detienen los procesos).
+    """
+
+    ports = find_free_ports(num_workers)
+    log_paths = [
+        os.path.join(os.path.dirname(spec_path), f"worker_{index}.log")
+        for index in range(num_workers)
+    ]
+    processes = []
+    for index, log_path in enumerate(log_paths):
+        with open(log_path, "w") as log:
+            processes.append(
+                subprocess.Popen(
+                    [sys.executable, "-m", "app.ml.distributed", spec_path, str(index)],
+                    env=worker_environment(ports, index, threads),
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                )
+            )
+
+    deadline = time.monotonic() + DISTRIBUTED_TIMEOUT_SECONDS
+    try:
+        while any(p.poll() is None for p in processes):
+            failed = [i for i, p in enumerate(processes) if p.poll() not in (None, 0)]
+            if failed:
+                raise RuntimeError(
+                    f"Distributed training worker failed: {_log_tail(log_paths[failed[0]])}"
+                )
+            if time.monotonic() > deadline:
+                raise RuntimeError("Distributed training timed out")
+            if should_cancel is not None and should_cancel():
+                raise TrainingCancelled("Distributed training was cancelled")
+            time.sleep(1)
+
+        failed = [i for i, p in enumerate(processes) if p.returncode != 0]
+        if failed:
+            raise RuntimeError(
+                f"Distributed training worker failed: {_log_tail(log_paths[failed[0]])}"
+            )
+    finally:
+        for p in processes:
+            if p.poll() is None:
+                p.kill()
+            p.wait()
+
+
+def summarize_distributed_run(
+    result: Dict[str, Any], num_workers: int, single_ips: Optional[float]
+) -> Dict[str, Any]:
+    """Resume el coste de sincronización y la aceleración de un entrenamiento.
+
+    Args:
+        result: Resultados del chief (tiempos, pasos y sincronización medida).
+        num_workers: Número de procesos.
+        single_ips: Imágenes por segundo de un solo proceso, o None.
+
+    Returns:
+        Dict: Métricas del entrenamiento distribuido.
+    """
+
+    fit_seconds = result["fit_seconds"]
+    epoch_seconds = result["epoch_seconds"]
+    sync_epoch_seconds = result["sync_seconds_per_step"] * result["steps_per_epoch"]
+    sync_seconds = sync_epoch_seconds * len(epoch_seconds)
+
+    # La primera época incluye el trazado de las funciones; se descarta si hay más.
+    steady = epoch_seconds[1:] or epoch_seconds
+    steady_seconds = sum(steady)
+    images_per_second = (
+        result["train_size"] * len(steady) / steady_seconds
+        if steady_seconds > 0
+        else None
+    )
+    speedup = (
+        images_per_second / single_ips if images_per_second and single_ips else None
+    )
+
+    return {
+        "workers": num_workers,
+        "threads_per_worker": result["threads"],
+        "fit_seconds": round(fit_seconds, 3),
+        "sync_seconds_per_step": round(result["sync_seconds_per_step"], 6),
+        "sync_seconds": round(sync_seconds, 3),
+        "sync_fraction": (
+            round(sync_epoch_seconds * len(steady) / steady_seconds, 4)
+            if steady_seconds > 0
+            else None
+        ),
+        "images_per_second": _round(images_per_second),
+        "single_process_images_per_second": _round(single_ips),
+        "speedup": _round(speedup),
+        "efficiency": _round(speedup / num_workers if speedup else None),
+    }
+
+
+def measure_sync_seconds(
+    strategy: tf.distribute.Strategy, variables: List[tf.Variable], steps: int
+) -> float:
+    """Mide lo que tarda la suma entre procesos de unos gradientes del tamaño del modelo.
+
+    Todos los procesos deben llamarla a la vez.
+
+    Args:
+        strategy: Estrategia distribuida.
+        variables: Variables entrenables del modelo.
+        steps: Número de sincronizaciones medidas.
+
+    Returns:
+        float: Segundos por sincronización.
+    """
+
+    @tf.function
+    def sync():
+        def replica_fn():
+            gradients = [tf.ones_like(v) for v in variables]
+            reduced = tf.distribute.get_replica_context().all_reduce(
+                tf.distribute.ReduceOp.SUM, gradients
+            )
+            return tf.add_n([tf.reduce_sum(g) for g in reduced])
+
+        return strategy.run(replica_fn)
+
+    # La primera llamada traza la función e inicializa los colectivos.
+    sync()
+    start = time.perf_counter()
+    for _ in range(max(steps, 1)):
+        outputs = sync()
+    strategy.experimental_local_results(outputs)[0].numpy()
+
+    return (time.perf_counter() - start) / max(steps, 1)
+
+
+def run_worker(spec: Dict[str, Any], index: int) -> None:
+    """Entrena la parte de un proceso del clúster (ejecutado en cada subproceso)."""
+
+    from app.ml.models import AVAILABLE_MODELS
+    from app.ml.data_utils import prepare_dataset
+    from app.ml.callbacks import TrainingProgressCallback
+
+    tf.config.threading.set_intra_op_parallelism_threads(spec["threads"])
+    tf.config.threading.set_inter_op_parallelism_threads(2)
+
+    strategy = MultiWorkerStrategy(
+        communication_options=tf.distribute.experimental.CommunicationOptions(
+            implementation=tf.distribute.experimental.CommunicationImplementation.RING
+        )
+    )
+
+    # El lote es global: cada proceso entrena con batch_size / procesos imágenes.
+    train_ds, val_ds, dataset_info = prepare_dataset(
+        spec["image_paths"],
+        spec["labels"],
+        spec["label_to_index"],
+        batch_size=spec["batch_size"],
+        image_size=tuple(spec["image_size"]),
+        validation_split=spec["validation_split"],
+        architecture=spec["architecture"],
+        cache_namespace=spec["cache_namespace"],
+        split=spec["split"],
+    )
+
+    epoch_seconds: List[float] = []
+    epoch_start: List[float] = []
+    callbacks = [
+        keras.callbacks.LambdaCallback(
+            on_epoch_begin=lambda epoch, logs: epoch_start.append(time.perf_counter()),
+            on_epoch_end=lambda epoch, logs: epoch_seconds.append(
+                time.perf_counter() - epoch_start[-1]
+            ),
+        )
+    ]
+    if index == 0 and spec["classifier_id"]:
+        callbacks.append(
+            TrainingProgressCallback(
+                spec["classifier_id"], spec["epochs"], dataset_info["train_size"]
+            )
+        )
+
+    with strategy.scope():
+        start = time.perf_counter()
+        model, history = AVAILABLE_MODELS[spec["architecture"]].train(
+            train_ds,
+            val_ds,
+            spec["num_classes"],
+            epochs=spec["epochs"],
+            learning_rate=spec["learning_rate"],
+            callbacks=callbacks,
+        )
+        fit_seconds = time.perf_counter() - start
+
+        sync_seconds = measure_sync_seconds(
+            strategy, model.trainable_variables, DISTRIBUTED_SYNC_STEPS
+        )
+
+    # Todos los procesos guardan el modelo, pero solo se conserva el del chief.
+    if index == 0:
+        model_path = os.path.join(spec["output_dir"], MODEL_FILE)
+    else:
+        model_path = os.path.join(spec["output_dir"], f"worker_{index}.keras")
+    model.save(model_path)
+    if index != 0:
+        os.remove(model_path)
+        return
+
+    result = {
+        "history": {
+            k: [float(v) for v in values] for k, values in history.history.items()
+        },
+        "fit_seconds": fit_seconds,
+        "epoch_seconds": epoch_seconds,
+        "sync_seconds_per_step": sync_seconds,
+        "steps_per_epoch": int(
+            np.ceil(dataset_info["train_size"] / spec["batch_size"])
+        ),
+        "train_size": dataset_info["train_size"],
+        "threads": spec["threads"],
+    }
+    result_path = os.path.join(spec["output_dir"], RESULT_FILE)
+    with open(f"{result_path}.tmp", "w") as f:
+        json.dump(result, f)
+    os.replace(f"{result_path}.tmp", result_path)
+
+
+def _log_tail(log_path: str, lines: int = 20) -> str:
+    try:
+        with open(log_path, "r", errors="replace") as f:
+            return "\n".join(f.read().strip().splitlines()[-lines:])
+    except OSError:
+        return "no output"
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    with open(sys.argv[1], "r") as f:
+        worker_spec = json.load(f)
+    run_worker(worker_spec, int(sys.argv[2]))
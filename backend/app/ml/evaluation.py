@@ -0,0 +1,197 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from sklearn.metrics import (
+    confusion_matrix,
+    classification_report,
+    precision_recall_fscore_support,
+)
+
+
+def collect_predictions(
+    model, dataset: tf.data.Dataset, num_samples: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Recorre un dataset una sola vez y guarda las salidas y etiquetas del modelo.
+
+    Args:
+        model: Modelo con método predict_on_batch.
+        dataset: Dataset por lotes de pares (imágenes, etiquetas).
+        num_samples: Número de imágenes del dataset, para reservar los arrays de
+            antemano (si es None se amplían según se necesite).
+
+    Returns:
+        y_prob: Salidas del modelo, de forma (n, salidas).
+        y_true: Etiquetas numéricas, de forma (n,).
+    """
+
+    capacity = num_samples or 0
+    y_prob: Optional[np.ndarray] = None
+    y_true = np.empty(capacity, dtype=np.int64)
+    count = 0
+
+    for images, labels in dataset:
+        predictions = np.asarray(model.predict_on_batch(images))
+        end = count + len(predictions)
+
+        if y_prob is None:
+            y_prob = np.empty((capacity,) + predictions.shape[1:], dtype=np.float32)
+        if end > len(y_prob):
+            capacity = max(end, 2 * len(y_prob))
+            y_prob = np.resize(y_prob, (capacity,) + y_prob.shape[1:])
+            y_true = np.resize(y_true, capacity)
+
+        y_prob[count:end] = predictions
+        y_true[count:end] = labels.numpy()
+        count = end
+
+    if y_prob is None:
+        return np.empty((0, 1), dtype=np.float32), y_true[:0]
+
+    return y_prob[:count], y_true[:count]
+
+
+def predicted_classes(y_prob: np.ndarray) -> np.ndarray:
+    """Convierte las salidas del modelo en clases predichas.
+
+    Args:
+        y_prob: Salidas del modelo.
+
+    Returns:
+        np.ndarray: Índice de la clase predicha por imagen.
+    """
+
+    # Una única salida sigmoide indica un modelo binario.
+    if y_prob.shape[-1] == 1:
+        return (y_prob[:, 0] > 0.5).astype(np.int64)
+
+    return np.argmax(y_prob, axis=1)
+
+
+def compiled_metrics(model, y_true: np.ndarray, y_prob: np.ndarray) -> Dict[str, float]:
+    """Calcula la pérdida y las métricas compiladas del modelo sin volver a predecir.
+
+    Equivale a model.evaluate sobre las mismas imágenes.
+
+    Args:
+        model: Modelo de Keras compilado.
+        y_true: Etiquetas numéricas.
+        y_prob: Salidas del modelo.
+
+    Returns:
+        Dict[str, float]: Valor de la pérdida y de cada métrica.
+    """
+
+    model.reset_metrics()
+    loss = model.compute_loss(x=None, y=y_true, y_pred=y_prob)
+    results = model.compute_metrics(None, y_true, y_prob, sample_weight=None)
+
+    metrics = {name: float(value) for name, value in results.items()}
+    metrics["loss"] = float(loss)
+
+    return metrics
+
+
+def classification_metrics(
+    y_true: np.ndarray, y_pred: np.ndarray, index_to_label: Dict[int, str]
+) -> Dict[str, Any]:
+    """Calcula la matriz de confusión y las métricas por clase y promedio.
+
+    Args:
+        y_true: Etiquetas numéricas.
+        y_pred: Clases predichas.
+        index_to_label: Mapeo de índices a etiquetas.
+
+    Returns:
+        Dict[str, Any]: Métricas con el mismo formato que se guarda en el clasificador.
+    """
+
+    num_classes = len(index_to_label)
+    class_indices = list(range(num_classes))
+    metrics: Dict[str, Any] = {}
+
+    cm = confusion_matrix(y_true, y_pred, labels=class_indices)
+    total = np.sum(cm)
+    metrics["accuracy_from_confusion_matrix"] = float(
+        np.sum(np.diag(cm)) / total if total > 0 else 0.0
+    )
+    metrics["confusion_matrix"] = cm.tolist()
+
+    metrics["classification_report"] = classification_report(
+        y_true,
+        y_pred,
+        labels=class_indices,
+        target_names=[index_to_label[i] for i in class_indices],
+        output_dict=True,
+        zero_division=0,
+    )
+
+    # Métricas por clase.
+    precision, recall, f1, _ = precision_recall_fscore_support(
+        y_true, y_pred, labels=class_indices, average=None, zero_division=0
+    )
+    for i in class_indices:
+        class_name = index_to_label[i]
+        metrics[f"precision_{class_name}"] = float(precision[i])
+        metrics[f"recall_{class_name}"] = float(recall[i])
+        metrics[f"f1_{class_name}"] = float(f1[i])
+
+    # Métricas promedio.
+    metrics["precision_macro"] = float(np.mean(precision))
+    metrics["recall_macro"] = float(np.mean(recall))
+    metrics["f1_macro"] = float(np.mean(f1))
+
+    precision_weighted, recall_weighted, f1_weighted, _ = (
+        precision_recall_fscore_support(
+            y_true, y_pred, labels=class_indices, average="weighted", zero_division=0
+        )
+    )
+    metrics["precision_weighted"] = float(precision_weighted)
+    metrics["recall_weighted"] = float(recall_weighted)
+    metrics["f1_weighted"] = float(f1_weighted)
+
+    # Distribución de las clases en el conjunto evaluado.
+    counts = np.bincount(y_true, minlength=num_classes)
+    metrics["num_samples_per_class"] = {
+        label: int(counts[idx]) for idx, label in index_to_label.items()
+    }
+
+    return metrics
+
+
+def evaluate_model(
+    model,
+    dataset: tf.data.Dataset,
+    index_to_label: Dict[int, str],
+    num_samples: Optional[int] = None,
+) -> Tuple[Dict[str, float], Dict[str, Any], Dict[str, float]]:
+    """Evalúa un modelo con una única pasada sobre el dataset de validación.
+
+    Args:
+        model: Modelo de Keras compilado.
+        dataset: Dataset por lotes de pares (imágenes, etiquetas).
+        index_to_label: Mapeo de índices a etiquetas.
+        num_samples: Número de imágenes del dataset, si se conoce.
+
+    Returns:
+        eval_results: Pérdida y métricas compiladas (como model.evaluate).
+        report: Matriz de confusión y métricas por clase.
+        timings: Segundos empleados en cada etapa.
+    """
+
+    start = time.perf_counter()
+    y_prob, y_true = collect_predictions(model, dataset, num_samples)
+    predict_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    eval_results = compiled_metrics(model, y_true, y_prob) if len(y_true) else {}
+    report = classification_metrics(y_true, predicted_classes(y_prob), index_to_label)
+    metrics_seconds = time.perf_counter() - start
+
+    timings = {
+        "evaluation_predict_seconds": round(predict_seconds, 3),
+        "evaluation_metrics_seconds": round(metrics_seconds, 3),
+    }
+
+    return eval_results, report, timings
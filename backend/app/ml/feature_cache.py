@@ -0,0 +1,306 @@
+import time
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+from app.ml.shard_cache import shard_cache
+from app.ml.data_utils import (
+    AUTOTUNE,
+    create_augmentation_layers,
+    decode_image_batches,
+    split_dataset,
+)
+
+logger = logging.getLogger(__name__)
+
+# Arquitecturas con el modelo base congelado cuya cabeza puede entrenarse sobre
+# características precalculadas.
+FEATURE_CACHE_ARCHITECTURES = ("resnet50", "efficientnetb3")
+
+# Número máximo de variantes aumentadas precalculadas por imagen.
+MAX_FEATURE_VARIANTS = 8
+
+
+def split_frozen_backbone(model: keras.Model) -> Tuple[keras.Model, keras.Model]:
+    """Separa un modelo de transfer learning en extractor de características y cabeza.
+
+    Ambos modelos comparten las capas con el modelo original, por lo que entrenar
+    la cabeza actualiza directamente los pesos del modelo completo.
+
+    Args:
+        model: Modelo con un modelo base anidado seguido de capas en cadena.
+
+    Raises:
+        ValueError: Si el modelo no contiene un modelo base anidado.
+
+    Returns:
+        extractor: Modelo que devuelve las características agrupadas de una imagen.
+        head: Modelo que clasifica las características.
+    """
+
+    position = next(
+        (i for i, layer in enumerate(model.layers) if isinstance(layer, keras.Model)),
+        None,
+    )
+    if position is None:
+        raise ValueError("Model has no nested backbone")
+
+    backbone = model.layers[position]
+    head_layers = model.layers[position + 1 :]
+
+    inputs = keras.Input(shape=model.input_shape[1:])
+    x = backbone(inputs, training=False)
+    # El agrupamiento global forma parte del extractor para guardar vectores.
+    if head_layers and isinstance(head_layers[0], keras.layers.GlobalAveragePooling2D):
+        x = head_layers[0](x)
+        head_layers = head_layers[1:]
+    extractor = keras.Model(inputs, x)
+
+    head_inputs = keras.Input(shape=(x.shape[-1],))
+    y = head_inputs
+    for layer in head_layers:
+        y = layer(y)
+    head = keras.Model(head_inputs, y)
+
+    return extractor, head
+
+
+def compute_feature_batches(
+    extractor: keras.Model,
+    image_paths: List[str],
+    image_size: Tuple[int, int],
+    variants: int = 1,
+    architecture: str = None,
+) -> Iterator[np.ndarray]:
+    """Calcula las características de las imágenes por lotes.
+
+    La variante 0 es la imagen original y el resto, versiones aumentadas.
+
+    Args:
+        extractor: Extractor de características.
+        image_paths: Lista de rutas a las imágenes (se respeta su orden).
+        image_size: Dimensiones de las imágenes (ancho, alto).
+        variants: Número de variantes por imagen.
+        architecture: Arquitectura del modelo para aumentación específica.
+
+    Returns:
+        Iterador de lotes float16 de forma (n, variantes, dimensión).
+    """
+
+    data_augmentation = create_augmentation_layers(architecture)
+
+    for images in decode_image_batches(image_paths, image_size):
+        images = tf.cast(images, tf.float32)
+        bank = [extractor(images, training=False)]
+        for _ in range(1, variants):
+            augmented = data_augmentation(images, training=True)
+            bank.append(extractor(augmented, training=False))
+        yield np.stack([b.numpy() for b in bank], axis=1).astype(np.float16)
+
+
+class TrainingFeatures:
+    """Imágenes de entrenamiento y validación cuyas características se precalculan."""
+
+    def __init__(
+        self,
+        train_paths: List[str],
+        train_labels: List[int],
+        val_paths: List[str],
+        val_labels: List[int],
+        batch_size: int,
+        image_size: Tuple[int, int],
+        architecture: str,
+        variants: int = 1,
+        cache_namespace: Optional[str] = None,
+    ):
+        self.train_paths = train_paths
+        self.train_labels = train_labels
+        self.val_paths = val_paths
+        self.val_labels = val_labels
+        self.batch_size = batch_size
+        self.image_size = image_size
+        self.architecture = architecture
+        self.variants = variants
+        self.cache_namespace = cache_namespace
+        self.seconds: Optional[float] = None
+
+    def datasets(
+        self, extractor: keras.Model
+    ) -> Tuple[tf.data.Dataset, tf.data.Dataset]:
+        """Crea los datasets de características, calculándolas si no están en caché.
+
+        Cada época el entrenamiento usa una variante aleatoria de cada imagen y la
+        validación siempre la imagen original.
+
+        Args:
+            extractor: Extractor de características del modelo.
+
+        Returns:
+            train_ds: Dataset de entrenamiento con lotes de (características, etiqueta).
+            val_ds: Dataset de validación con lotes de (características, etiqueta).
+        """
+
+        start = time.perf_counter()
+        features, rows = self._load_features(extractor)
+        self.seconds = time.perf_counter() - start
+        variants = self.variants
+
+        def gather(batch_rows, batch_labels, random_variant):
+            if random_variant:
+                batch_variants = tf.random.uniform(
+                    tf.shape(batch_rows), 0, variants, dtype=tf.int64
+                )
+            else:
+                batch_variants = tf.zeros_like(batch_rows)
+            batch = tf.numpy_function(
+                lambda r, v: features[r, v].astype(np.float32),
+                [batch_rows, batch_variants],
+                tf.float32,
+            )
+            batch.set_shape((None, features.shape[-1]))
+            return batch, batch_labels
+
+        train_ds = (
+            self._rows_dataset(rows, self.train_paths, self.train_labels)
+            .shuffle(max(len(self.train_paths), 1), reshuffle_each_iteration=True)
+            .batch(self.batch_size)
+            .map(lambda r, y: gather(r, y, True), num_parallel_calls=AUTOTUNE)
+            .prefetch(AUTOTUNE)
+        )
+        val_ds = (
+            self._rows_dataset(rows, self.val_paths, self.val_labels)
+            .batch(self.batch_size)
+            .map(lambda r, y: gather(r, y, False), num_parallel_calls=AUTOTUNE)
+            .prefetch(AUTOTUNE)
+        )
+
+        return train_ds, val_ds
+
+    def _load_features(self, extractor: keras.Model) -> Tuple[np.ndarray, Dict]:
+        """Obtiene las características de la caché o las calcula en memoria."""
+
+        image_paths = self.train_paths + self.val_paths
+        dimension = int(extractor.output_shape[-1])
+
+        def compute(paths):
+            return compute_feature_batches(
+                extractor, paths, self.image_size, self.variants, self.architecture
+            )
+
+        if self.cache_namespace is not None:
+            shard = shard_cache.get_or_build_array(
+                self.cache_namespace,
+                image_paths,
+                variant=(
+                    f"features_{self.architecture}_{self.image_size[0]}x"
+                    f"{self.image_size[1]}_v{self.variants}"
+                ),
+                item_shape=(self.variants, dimension),
+                dtype=np.float16,
+                compute_batches=compute,
+            )
+            if shard is not None:
+                return shard.array, shard.rows
+
+        features = np.concatenate(list(compute(image_paths)))
+        return features, {path: row for row, path in enumerate(image_paths)}
+
+    @staticmethod
+    def _rows_dataset(
+        rows: Dict[str, int], image_paths: List[str], labels: List[int]
+    ) -> tf.data.Dataset:
+        image_rows = np.array([rows[path] for path in image_paths], dtype=np.int64)
+        return tf.data.Dataset.from_tensor_slices(
+            (image_rows, np.array(labels, dtype=np.int64))
+        )
+
+
+def prepare_training_features(
+    image_paths: List[str],
+    labels: List[str],
+    label_to_index: Dict[str, int],
+    batch_size: int,
+    image_size: Tuple[int, int],
+    architecture: str,
+    validation_split: float = 0.2,
+    seed: int = 42,
+    variants: int = 1,
+    cache_namespace: Optional[str] = None,
+    split: Optional[Tuple[List[str], List[str]]] = None,
+) -> TrainingFeatures:
+    """Prepara el entrenamiento de la cabeza sobre características precalculadas.
+
+    Usa la misma división que prepare_dataset, de modo que la validación final del
+    modelo completo se hace con las mismas imágenes.
+
+    Args:
+        image_paths: Lista de rutas a las imágenes.
+        labels: Lista de etiquetas correspondientes.
+        label_to_index: Mapeo de etiquetas a índices.
+        batch_size: Tamaño del lote para entrenamiento.
+        image_size: Tamaño de las imágenes (ancho, alto).
+        architecture: Arquitectura del modelo.
+        validation_split: Proporción de datos para validación.
+        seed: Semilla para reproducibilidad.
+        variants: Número de variantes precalculadas por imagen (la primera sin aumentar).
+        cache_namespace: Espacio de nombres en la caché (ID del dataset) o None para
+            calcular las características en memoria.
+        split: División guardada a respetar, o None para dividir aleatoriamente.
+
+    Returns:
+        TrainingFeatures: Datos para crear los datasets de características.
+    """
+
+    numeric_labels = [label_to_index[label] for label in labels]
+    train_paths, train_labels, val_paths, val_labels = split_dataset(
+        image_paths, numeric_labels, validation_split, seed, split
+    )
+
+    return TrainingFeatures(
+        train_paths,
+        train_labels,
+        val_paths,
+        val_labels,
+        batch_size=batch_size,
+        image_size=image_size,
+        architecture=architecture,
+        variants=variants,
+        cache_namespace=cache_namespace,
+    )
+
+
+def fit_head_on_features(
+    model: keras.Model,
+    features: TrainingFeatures,
+    optimizer,
+    loss,
+    metrics,
+    **fit_kwargs,
+):
+    """Entrena solo la cabeza de un modelo sobre las características precalculadas.
+
+    Args:
+        model: Modelo completo con el modelo base congelado.
+        features: Imágenes cuyas características se usan para entrenar.
+        optimizer: Optimizador.
+        loss: Función de pérdida.
+        metrics: Métricas.
+        **fit_kwargs: Argumentos adicionales de fit (épocas, callbacks...).
+
+    Returns:
+        Historial del entrenamiento de la cabeza.
+    """
+
+    extractor, head = split_frozen_backbone(model)
+    train_ds, val_ds = features.datasets(extractor)
+    logger.info(
+        f"Training head on cached features ({features.variants} variants, "
+        f"{features.seconds:.1f}s to load)"
+    )
+
+    head.compile(optimizer=optimizer, loss=loss, metrics=metrics)
+
+    return head.fit(train_ds, validation_data=val_ds, **fit_kwargs)
@@ -0,0 +1,241 @@
+import os
+import math
+import random
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+# Número máximo de pruebas de una búsqueda de hiperparámetros.
+SEARCH_MAX_TRIALS = int(os.environ.get("SEARCH_MAX_TRIALS", "27"))
+
+# Parámetros que se pueden buscar. Las épocas no se buscan: son el presupuesto máximo
+# que las rondas de successive halving reparten entre las pruebas.
+SEARCH_PARAMETERS = ("learning_rate", "batch_size", "image_size")
+
+# Directorio (dentro del del clasificador) con los checkpoints de cada prueba.
+SEARCH_TRIALS_DIR_NAME = "trials"
+
+DEFAULT_SEARCH = {
+    "num_trials": 9,
+    "min_epochs": 2,
+    "reduction_factor": 3,
+    "seed": 42,
+}
+
+
+def validate_search(search: Any) -> Dict[str, Any]:
+    """Valida y completa la configuración de una búsqueda de hiperparámetros.
+
+    El espacio de búsqueda asigna a cada parámetro una lista de valores posibles o,
+    para learning_rate y batch_size, un rango {"min", "max", "log"}.
+
+    Args:
+        search: Configuración recibida en model_parameters["search"].
+
+    Raises:
+        ValueError: Si la configuración no es válida.
+
+    Returns:
+        Dict: Configuración con los valores por defecto completados.
+    """
+
+    if not isinstance(search, dict) or not isinstance(search.get("space"), dict):
+        raise ValueError("Search must define a parameter space")
+
+    space = search["space"]
+    if not space:
+        raise ValueError("Search space is empty")
+
+    for name, values in space.items():
+        if name not in SEARCH_PARAMETERS:
+            raise ValueError(
+                f"Invalid search parameter '{name}'. Must be one of: {', '.join(SEARCH_PARAMETERS)}"
+            )
+        if isinstance(values, list):
+            if not values:
+                raise ValueError(f"Search parameter '{name}' has no values")
+            if name == "image_size" and not all(
+                isinstance(v, list) and len(v) == 2 for v in values
+            ):
+                raise ValueError("Search image sizes must be [width, height] pairs")
+        elif isinstance(values, dict) and name != "image_size":
+            low, high = values.get("min"), values.get("max")
+            if not isinstance(low, (int, float)) or not isinstance(high, (int, float)):
+                raise ValueError(f"Search range for '{name}' needs numeric min and max")
+            if not 0 < low <= high:
+                raise ValueError(f"Invalid search range for '{name}'")
+        else:
+            raise ValueError(f"Invalid values for search parameter '{name}'")
+
+    config = {**DEFAULT_SEARCH, **{k: v for k, v in search.items() if k != "trials"}}
+    for key in ("num_trials", "min_epochs", "reduction_factor", "seed"):
+        if not isinstance(config[key], int):
+            raise ValueError(f"Search '{key}' must be an integer")
+    if not 1 <= config["num_trials"] <= SEARCH_MAX_TRIALS:
+        raise ValueError(f"Search trials must be between 1 and {SEARCH_MAX_TRIALS}")
+    if config["min_epochs"] < 1:
+        raise ValueError("Search min_epochs must be at least 1")
+    if config["reduction_factor"] < 2:
+        raise ValueError("Search reduction_factor must be at least 2")
+
+    return config
+
+
+def sample_trials(search: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Elige los parámetros de cada prueba.
+
+    Si el espacio es una rejilla que cabe en el número de pruebas se prueba entera;
+    si no, se muestrea de forma reproducible con la semilla de la búsqueda.
+
+    Args:
+        search: Configuración validada de la búsqueda.
+
+    Returns:
+        Lista de parámetros de cada prueba.
+    """
+
+    space = search["space"]
+    rng = random.Random(search["seed"])
+    names = sorted(space)
+
+    if all(isinstance(space[name], list) for name in names):
+        grid = [
+            dict(zip(names, values))
+            for values in itertools.product(*(space[name] for name in names))
+        ]
+        if len(grid) <= search["num_trials"]:
+            return grid
+        return rng.sample(grid, search["num_trials"])
+
+    return [
+        {name: _sample_value(name, space[name], rng) for name in names}
+        for _ in range(search["num_trials"])
+    ]
+
+
+def rung_budgets(min_epochs: int, max_epochs: int, reduction_factor: int) -> List[int]:
+    """Calcula las épocas acumuladas al final de cada ronda de successive halving.
+
+    La última ronda no aparece: la mejor prueba se entrena hasta max_epochs como un
+    clasificador normal.
+
+    Args:
+        min_epochs: Épocas de la primera ronda.
+        max_epochs: Épocas del entrenamiento final.
+        reduction_factor: Factor por el que crece el presupuesto en cada ronda.
+
+    Returns:
+        Lista de presupuestos en épocas, de menor a mayor.
+    """
+
+    budgets = []
+    budget = min_epochs
+    while budget < max_epochs:
+        budgets.append(budget)
+        budget *= reduction_factor
+
+    return budgets or [max_epochs]
+
+
+def start_search(search: Dict[str, Any], max_epochs: int) -> Dict[str, Any]:
+    """Crea el estado inicial de una búsqueda.
+
+    Args:
+        search: Configuración validada de la búsqueda.
+        max_epochs: Épocas del entrenamiento final.
+
+    Returns:
+        Dict: Estado de la búsqueda con todas las pruebas en la primera ronda.
+    """
+
+    return {
+        **search,
+        "budgets": rung_budgets(
+            search["min_epochs"], max_epochs, search["reduction_factor"]
+        ),
+        "rung": 0,
+        "best_trial": None,
+        "trials": [
+            {"index": i, "parameters": parameters, "rung": 0, "results": []}
+            for i, parameters in enumerate(sample_trials(search))
+        ],
+    }
+
+
+def record_trial(
+    state: Dict[str, Any], index: int, rung: int, val_loss: Optional[float]
+) -> Tuple[str, List[int]]:
+    """Registra el resultado de una prueba y decide cómo sigue la búsqueda.
+
+    Cuando terminan todas las pruebas de la ronda, continúa la mejor fracción
+    1/reduction_factor según val_loss. Tras la última ronda se elige la mejor prueba.
+    Debe llamarse con el estado bloqueado para que solo una prueba cierre cada ronda.
+
+    Args:
+        state: Estado de la búsqueda (se modifica).
+        index: Índice de la prueba.
+        rung: Ronda en la que se ha entrenado.
+        val_loss: Menor pérdida de validación alcanzada, o None si la prueba falló.
+
+    Returns:
+        Tuple: Acción ("wait", "continue", "finish" o "fail") y los índices de las
+            pruebas a entrenar en la siguiente ronda o de la mejor prueba.
+    """
+
+    trial = state["trials"][index]
+    if rung != state["rung"] or len(trial["results"]) > rung:
+        # Resultado repetido de una tarea reentregada.
+        return "wait", []
+    trial["results"].append(val_loss)
+
+    current = [t for t in state["trials"] if t["rung"] == rung]
+    if any(len(t["results"]) <= rung for t in current):
+        return "wait", []
+
+    ranked = sorted(
+        (t for t in current if t["results"][rung] is not None),
+        key=lambda t: t["results"][rung],
+    )
+    if not ranked:
+        return "fail", []
+
+    if rung + 1 >= len(state["budgets"]):
+        state["best_trial"] = ranked[0]["index"]
+        return "finish", [ranked[0]["index"]]
+
+    survivors = max(1, len(current) // state["reduction_factor"])
+    promoted = [t["index"] for t in ranked[:survivors]]
+    for i in promoted:
+        state["trials"][i]["rung"] = rung + 1
+    state["rung"] = rung + 1
+
+    return "continue", promoted
+
+
+def trial_parameters(model_parameters: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """Devuelve los parámetros de entrenamiento de una prueba (sin el estado de búsqueda).
+
+    Args:
+        model_parameters: Parámetros del clasificador con el estado de la búsqueda.
+        index: Índice de la prueba.
+
+    Returns:
+        Dict: Parámetros base sobrescritos por los de la prueba.
+    """
+
+    parameters = {k: v for k, v in model_parameters.items() if k != "search"}
+    parameters.update(model_parameters["search"]["trials"][index]["parameters"])
+
+    return parameters
+
+
+def _sample_value(name: str, values: Any, rng: random.Random) -> Any:
+    if isinstance(values, list):
+        return rng.choice(values)
+
+    low, high = values["min"], values["max"]
+    if values.get("log", name == "learning_rate"):
+        value = math.exp(rng.uniform(math.log(low), math.log(high)))
+    else:
+        value = rng.uniform(low, high)
+
+    return int(round(value)) if name == "batch_size" else value
@@ -0,0 +1,176 @@
+import io
+import os
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image as PILImage
+
+# Número máximo de imágenes por llamada al modelo durante la inferencia.
+INFERENCE_BATCH_SIZE = int(os.environ.get("INFERENCE_BATCH_SIZE", "32"))
+
+# Tamaño máximo de las miniaturas incluidas en los resultados.
+THUMBNAIL_SIZE = (100, 100)
+
+# Arquitecturas que incluyen su propia normalización de la entrada.
+SELF_NORMALIZING_ARCHITECTURES = ("xception_mini", "efficientnetb3", "resnet50")
+
+
+def decode_image(
+    img_data: bytes,
+    image_size: Tuple[int, int],
+    thumbnail_size: Optional[Tuple[int, int]] = THUMBNAIL_SIZE,
+) -> Tuple[np.ndarray, Optional[str]]:
+    """Decodifica una imagen una sola vez para obtener la entrada del modelo y su miniatura.
+
+    Si la imagen es un JPEG mucho mayor que el tamaño de entrada, se decodifica a
+    resolución reducida (modo draft) en lugar de a resolución completa.
+
+    Args:
+        img_data: Datos binarios de la imagen.
+        image_size: Tamaño de entrada del modelo (ancho, alto).
+        thumbnail_size: Tamaño máximo de la miniatura o None para no generarla.
+
+    Raises:
+        ValueError: Si la imagen no se puede decodificar.
+
+    Returns:
+        img_array: Imagen RGB como array uint8 de forma (alto, ancho, 3).
+        thumbnail: Miniatura JPEG en base64 o None si no se ha solicitado.
+    """
+
+    try:
+        img = PILImage.open(io.BytesIO(img_data))
+
+        # La reducción DCT nunca baja del tamaño solicitado en ninguna dimensión.
+        if img.format == "JPEG":
+            img.draft("RGB", tuple(image_size))
+
+        img = img.convert("RGB")  # Asegurar que sea RGB.
+        img_array = np.asarray(img.resize(tuple(image_size)), dtype=np.uint8)
+    except Exception as e:
+        raise ValueError(f"Error preprocessing image: {str(e)}")
+
+    thumbnail = None
+    if thumbnail_size is not None:
+        img.thumbnail(thumbnail_size)
+        buffered = io.BytesIO()
+        img.save(buffered, format="JPEG")
+        thumbnail = base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+    return img_array, thumbnail
+
+
+def normalize_batch(images: np.ndarray, architecture: str) -> np.ndarray:
+    """Convierte un lote de imágenes uint8 a la entrada esperada por el modelo.
+
+    Args:
+        images: Lote de imágenes uint8 de forma (n, alto, ancho, 3).
+        architecture: Arquitectura del modelo.
+
+    Returns:
+        np.ndarray: Lote en float32 con la normalización de la arquitectura.
+    """
+
+    batch = images.astype(np.float32)
+
+    # Los modelos sin normalización interna esperan valores en [0, 1].
+    if architecture not in SELF_NORMALIZING_ARCHITECTURES:
+        batch /= 255.0
+
+    return batch
+
+
+def predict_in_batches(
+    model,
+    images: np.ndarray,
+    architecture: str,
+    batch_size: int = INFERENCE_BATCH_SIZE,
+) -> np.ndarray:
+    """Ejecuta el modelo sobre un lote de imágenes en bloques de tamaño fijo.
+
+    Args:
+        model: Modelo de Keras cargado.
+        images: Lote contiguo de imágenes uint8 de forma (n, alto, ancho, 3).
+        architecture: Arquitectura del modelo.
+        batch_size: Número máximo de imágenes por llamada al modelo.
+
+    Returns:
+        np.ndarray: Salidas del modelo de forma (n, salidas).
+    """
+
+    outputs = None
+    num_images = len(images)
+
+    for start in range(0, num_images, batch_size):
+        chunk = normalize_batch(images[start : start + batch_size], architecture)
+        predictions = np.asarray(model.predict_on_batch(chunk))
+
+        # Reservar la salida completa una vez conocida su forma.
+        if outputs is None:
+            outputs = np.empty((num_images,) + predictions.shape[1:], dtype=np.float32)
+        outputs[start : start + len(chunk)] = predictions
+
+    if outputs is None:
+        return np.empty((0, 1), dtype=np.float32)
+
+    return outputs
+
+
+def format_predictions(
+    predictions: np.ndarray, class_mapping: Dict[str, str]
+) -> List[Dict[str, Any]]:
+    """Convierte las salidas del modelo en clases y probabilidades por imagen.
+
+    Args:
+        predictions: Salidas del modelo de forma (n, salidas).
+        class_mapping: Mapeo de índices (como string) a nombres de clase.
+
+    Returns:
+        List[Dict]: Clase predicha, confianza y probabilidades de cada imagen.
+    """
+
+    if len(predictions) == 0:
+        return []
+
+    class_names = [class_mapping[str(i)] for i in range(len(class_mapping))]
+
+    # Modelo binario con una única neurona sigmoide: construir ambas probabilidades.
+    if len(class_names) == 2:
+        scores = predictions[:, 0].astype(np.float64)
+        probabilities = np.stack([1 - scores, scores], axis=1)
+        predicted_indices = (scores > 0.5).astype(np.int64)
+    else:
+        probabilities = predictions.astype(np.float64)
+        predicted_indices = np.argmax(probabilities, axis=1)
+
+    confidences = probabilities[np.arange(len(probabilities)), predicted_indices]
+
+    return [
+        {
+            "predicted_class": class_names[predicted_idx],
+            "confidence": confidence,
+            "all_predictions": dict(zip(class_names, row)),
+        }
+        for predicted_idx, confidence, row in zip(
+            predicted_indices.tolist(), confidences.tolist(), probabilities.tolist()
+        )
+    ]
+
+
+def select_top_k(all_predictions: Dict[str, float], k: int) -> List[Dict[str, Any]]:
+    """Selecciona las k clases más probables de una predicción.
+
+    Args:
+        all_predictions: Probabilidad de cada clase.
+        k: Número de clases a devolver.
+
+    Returns:
+        List[Dict]: Clases ordenadas de mayor a menor confianza.
+    """
+
+    ranked = sorted(all_predictions.items(), key=lambda item: item[1], reverse=True)
+    return [
+        {"class": class_name, "confidence": confidence}
+        for class_name, confidence in ranked[:k]
+    ]
@@ -0,0 +1,338 @@
+import os
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.ml.model_utils import (
+    load_model,
+    load_model_metadata,
+    TFLiteModel,
+    CompiledPredictor,
+    DEFAULT_BATCH_BUCKETS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Límites de la caché de modelos (por proceso).
+MODEL_CACHE_MAX_BYTES = int(
+    os.environ.get("MODEL_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024))
+)
+MODEL_CACHE_MAX_ENTRIES = int(os.environ.get("MODEL_CACHE_MAX_ENTRIES", "8"))
+
+# Servir desde el artefacto TFLite cuantizado cuando exista.
+INFERENCE_USE_TFLITE = os.environ.get("INFERENCE_USE_TFLITE", "true").lower() == "true"
+TFLITE_NUM_THREADS = int(os.environ.get("TFLITE_NUM_THREADS", str(os.cpu_count() or 1)))
+
+# Servir los modelos de Keras con una función compilada de firma fija.
+INFERENCE_COMPILED = os.environ.get("INFERENCE_COMPILED", "true").lower() == "true"
+INFERENCE_JIT_COMPILE = (
+    os.environ.get("INFERENCE_JIT_COMPILE", "false").lower() == "true"
+)
+INFERENCE_BATCH_BUCKETS = tuple(
+    int(size)
+    for size in os.environ.get(
+        "INFERENCE_BATCH_BUCKETS", ",".join(map(str, DEFAULT_BATCH_BUCKETS))
+    ).split(",")
+)
+
+# Archivos cuya modificación implica una nueva versión del modelo.
+MODEL_VERSION_FILES = ("model.keras", "metadata.json", "model.tflite")
+
+
+def get_model_version(model_dir: str) -> str:
+    """Calcula la versión de los artefactos de un modelo a partir de sus archivos.
+
+    Args:
+        model_dir: Directorio donde está guardado el modelo.
+
+    Raises:
+        FileNotFoundError: Si el archivo del modelo no existe.
+
+    Returns:
+        str: Identificador de versión (fecha de modificación y tamaño de los archivos).
+    """
+
+    parts = []
+    for filename in MODEL_VERSION_FILES:
+        path = os.path.join(model_dir, filename)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if filename == "model.keras":
+                raise
+            continue
+        parts.append(f"{filename}:{stat.st_mtime_ns}:{stat.st_size}")
+
+    return "|".join(parts)
+
+
+def estimate_model_size(model, model_dir: Optional[str] = None) -> int:
+    """Estima la memoria ocupada por los pesos de un modelo.
+
+    Args:
+        model: Modelo de Keras cargado.
+        model_dir: Directorio del modelo (para usar el tamaño del archivo si falla).
+
+    Returns:
+        int: Tamaño estimado en bytes.
+    """
+
+    if isinstance(model, TFLiteModel):
+        return model.size_bytes
+
+    try:
+        return int(
+            sum(
+                int(np.prod(weight.shape)) * np.dtype(weight.dtype).itemsize
+                for weight in model.weights
+            )
+        )
+    except Exception:
+        if model_dir:
+            return os.path.getsize(os.path.join(model_dir, "model.keras"))
+        return 0
+
+
+class CachedModel:
+    """Modelo cargado en memoria junto con sus metadatos."""
+
+    def __init__(
+        self,
+        classifier_id: str,
+        version: str,
+        model: Any,
+        metadata: Dict[str, Any],
+        size_bytes: int,
+        backend: str = "keras",
+    ):
+        self.classifier_id = classifier_id
+        self.version = version
+        self.model = model
+        self.metadata = metadata
+        self.size_bytes = size_bytes
+        self.backend = backend
+
+
+class ModelCache:
+    """Caché LRU de modelos cargados, con límite de memoria y de entradas.
+
+    Las entradas se identifican por el ID del clasificador y se recargan cuando
+    cambia la versión de sus artefactos (por ejemplo, tras un reentrenamiento).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_entries: int,
+        use_tflite: bool = False,
+        compiled: bool = False,
+        jit_compile: bool = False,
+        buckets: tuple = DEFAULT_BATCH_BUCKETS,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.use_tflite = use_tflite
+        self.compiled = compiled
+        self.jit_compile = jit_compile
+        self.buckets = buckets
+        self._entries: "OrderedDict[str, CachedModel]" = OrderedDict()
+        # Lock de carga de cada clasificador y número de hilos que lo usan (se
+        # elimina cuando ninguno lo necesita).
+        self._loading_locks: Dict[str, threading.Lock] = {}
+        self._loading_users: Counter = Counter()
+        self._lock = threading.Lock()
+        self._size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, classifier_id: Any, model_dir: str) -> CachedModel:
+        """Devuelve el modelo de un clasificador, cargándolo si no está en caché.
+
+        Args:
+            classifier_id: ID del clasificador.
+            model_dir: Directorio donde está guardado el modelo.
+
+        Raises:
+            FileNotFoundError: Si el archivo del modelo no existe.
+
+        Returns:
+            CachedModel: Modelo cargado y sus metadatos.
+        """
+
+        key = str(classifier_id)
+        version = get_model_version(model_dir)
+
+        with self._lock:
+            entry = self._lookup(key, version)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            loading_lock = self._loading_locks.setdefault(key, threading.Lock())
+            self._loading_users[key] += 1
+
+        try:
+            return self._load(key, version, model_dir, loading_lock)
+        finally:
+            with self._lock:
+                self._loading_users[key] -= 1
+                if self._loading_users[key] == 0:
+                    del self._loading_users[key]
+                    del self._loading_locks[key]
+
+    def invalidate(self, classifier_id: Any) -> bool:
+        """Elimina de la caché el modelo de un clasificador.
+
+        Args:
+            classifier_id: ID del clasificador.
+
+        Returns:
+            bool: True si el modelo estaba en caché, False en caso contrario.
+        """
+
+        with self._lock:
+            entry = self._entries.pop(str(classifier_id), None)
+            if entry is None:
+                return False
+            self._size_bytes -= entry.size_bytes
+            self.invalidations += 1
+            return True
+
+    def clear(self) -> None:
+        """Vacía la caché y reinicia los contadores."""
+
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve estadísticas de uso de la caché.
+
+        Returns:
+            Dict: Contadores, ocupación y modelos actualmente en caché.
+        """
+
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "models": [
+                    {
+                        "classifier_id": entry.classifier_id,
+                        "version": entry.version,
+                        "backend": entry.backend,
+                        "size_bytes": entry.size_bytes,
+                    }
+                    for entry in self._entries.values()
+                ],
+            }
+
+    def _load(
+        self, key: str, version: str, model_dir: str, loading_lock: threading.Lock
+    ) -> CachedModel:
+        """Carga el modelo de un clasificador si otro hilo no lo ha cargado ya."""
+
+        # Evitar que varios hilos carguen el mismo modelo a la vez.
+        with loading_lock:
+            with self._lock:
+                entry = self._lookup(key, version)
+            if entry is not None:
+                return entry
+
+            # Preferir el artefacto TFLite cuantizado si existe.
+            tflite_path = os.path.join(model_dir, "model.tflite")
+            if self.use_tflite and os.path.exists(tflite_path):
+                model = TFLiteModel(tflite_path, num_threads=TFLITE_NUM_THREADS)
+                backend = "tflite"
+            else:
+                model = load_model(os.path.join(model_dir, "model.keras"))
+                backend = "keras"
+                if self.compiled:
+                    model = CompiledPredictor(
+                        model, jit_compile=self.jit_compile, buckets=self.buckets
+                    )
+                    backend = "keras_xla" if self.jit_compile else "keras_compiled"
+
+            metadata = load_model_metadata(model_dir)
+            entry = CachedModel(
+                classifier_id=key,
+                version=version,
+                model=model,
+                metadata=metadata,
+                size_bytes=estimate_model_size(model, model_dir),
+                backend=backend,
+            )
+
+            with self._lock:
+                self._store(entry)
+
+        return entry
+
+    def _lookup(self, key: str, version: str) -> Optional[CachedModel]:
+        """Busca una entrada vigente y la marca como usada recientemente."""
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.version != version:
+            # Los artefactos cambiaron: descartar la versión antigua.
+            self._entries.pop(key)
+            self._size_bytes -= entry.size_bytes
+            self.invalidations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, entry: CachedModel) -> None:
+        """Guarda una entrada y expulsa las menos usadas si se superan los límites."""
+
+        if entry.size_bytes > self.max_bytes:
+            logger.warning(
+                f"Model {entry.classifier_id} ({entry.size_bytes} bytes) exceeds the "
+                f"model cache budget ({self.max_bytes} bytes), not caching it"
+            )
+            return
+
+        previous = self._entries.pop(entry.classifier_id, None)
+        if previous is not None:
+            self._size_bytes -= previous.size_bytes
+
+        self._entries[entry.classifier_id] = entry
+        self._size_bytes += entry.size_bytes
+
+        while self._entries and (
+            self._size_bytes > self.max_bytes or len(self._entries) > self.max_entries
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._size_bytes -= evicted.size_bytes
+            self.evictions += 1
+
+
+# Caché compartida por todas las peticiones del proceso.
+model_cache = ModelCache(
+    max_bytes=MODEL_CACHE_MAX_BYTES,
+    max_entries=MODEL_CACHE_MAX_ENTRIES,
+    use_tflite=INFERENCE_USE_TFLITE,
+    compiled=INFERENCE_COMPILED,
+    jit_compile=INFERENCE_JIT_COMPILE,
+    buckets=INFERENCE_BATCH_BUCKETS,
+)
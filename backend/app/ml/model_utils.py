@@ -1,42 +1,115 @@
 import os
 import json
-from typing import Dict, Any
+import shutil
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 
+import numpy as np
+import tensorflow as tf
 from tensorflow import keras
 
+# Modos de cuantización soportados para el artefacto TFLite.
+TFLITE_QUANTIZATION_MODES = ("dynamic", "float16", "int8")
+
+# Número de imágenes de entrenamiento usadas para calibrar la cuantización int8.
+TFLITE_REPRESENTATIVE_SAMPLES = 100
+
+# Subdirectorio donde se escriben los artefactos de un entrenamiento antes de
+# sustituir los del modelo servido.
+MODEL_STAGING_DIR_NAME = "staging"
+
+# Artefactos de un modelo entrenado, en el orden en que se publican.
+MODEL_ARTIFACT_FILES = ("model.keras", "model.tflite", "split.json", "metadata.json")
+
+# Tamaños de lote a los que se rellenan las peticiones en la función compilada.
+DEFAULT_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32)
+
 
 def save_trained_model(
-    model, models_dir: str, metadata: Dict[str, Any], classifier_id: str
+    model,
+    models_dir: str,
+    metadata: Dict[str, Any],
+    classifier_id: str,
+    split: Optional[Tuple[List[str], List[str]]] = None,
 ) -> str:
     """Guarda un modelo entrenado.
 
+    Los artefactos se escriben primero en el directorio de preparación (donde ya
+    puede estar el modelo TFLite del mismo entrenamiento) y solo se publican cuando
+    están todos, de modo que un fallo no deja mezclados archivos de dos
+    entrenamientos.
+
     Args:
         model: Modelo entrenado de TensorFlow/Keras.
         models_dir: Directorio donde guardar los modelos.
         metadata: Metadatos del modelo (clases, métricas, etc.).
         classifier_id: ID del clasificador (para usar como nombre del directorio).
+        split: Rutas de entrenamiento y de validación del modelo (para que un
+            entrenamiento posterior las respete), o None.
 
     Returns:
         str: Ruta relativa donde se guardó el modelo.
     """
 
     model_dir = os.path.join(models_dir, classifier_id)
-    os.makedirs(model_dir, exist_ok=True)
+    staging_dir = get_staging_dir(model_dir)
+    os.makedirs(staging_dir, exist_ok=True)
 
-    model_path = os.path.join(model_dir, "model.keras")
+    model_path = os.path.join(staging_dir, "model.keras")
     model.save(model_path)
 
     # Guardar metadatos en formato JSON.
-    metadata_path = os.path.join(model_dir, "metadata.json")
+    metadata_path = os.path.join(staging_dir, "metadata.json")
     with open(metadata_path, "w") as f:
         json.dump(metadata, f, indent=2)
 
+    if split is not None:
+        with open(os.path.join(staging_dir, "split.json"), "w") as f:
+            json.dump({"train": list(split[0]), "val": list(split[1])}, f)
+
+    publish_staged_model(model_dir)
+
     # Ruta relativa desde el directorio de medios.
     relative_path = os.path.join("models", classifier_id)
 
     return relative_path
 
 
+def get_staging_dir(model_dir: str) -> str:
+    """Devuelve el directorio de preparación de los artefactos de un modelo.
+
+    Args:
+        model_dir: Directorio del modelo.
+
+    Returns:
+        str: Ruta del directorio de preparación.
+    """
+
+    return os.path.join(model_dir, MODEL_STAGING_DIR_NAME)
+
+
+def publish_staged_model(model_dir: str) -> None:
+    """Sustituye los artefactos de un modelo por los del directorio de preparación.
+
+    Un artefacto que el nuevo entrenamiento no ha generado (el modelo TFLite) se
+    elimina para no servirlo junto a los archivos del nuevo modelo.
+
+    Args:
+        model_dir: Directorio del modelo.
+    """
+
+    staging_dir = get_staging_dir(model_dir)
+    for filename in MODEL_ARTIFACT_FILES:
+        staged_path = os.path.join(staging_dir, filename)
+        path = os.path.join(model_dir, filename)
+        if os.path.exists(staged_path):
+            os.replace(staged_path, path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+
 def load_model(model_path: str):
     """Carga un modelo guardado.
 
@@ -63,3 +136,219 @@ def load_model_metadata(model_dir: str) -> Dict[str, Any]:
     metadata_path = os.path.join(model_dir, "metadata.json")
     with open(metadata_path, "r") as f:
         return json.load(f)
+
+
+def load_model_split(model_dir: str) -> Optional[Tuple[List[str], List[str]]]:
+    """Carga la división en entrenamiento y validación de un modelo.
+
+    Args:
+        model_dir: Directorio donde está guardado el modelo.
+
+    Returns:
+        Rutas de entrenamiento y de validación, o None si el modelo no la guardó.
+    """
+
+    split_path = os.path.join(model_dir, "split.json")
+    if not os.path.exists(split_path):
+        return None
+    with open(split_path, "r") as f:
+        split = json.load(f)
+    return split["train"], split["val"]
+
+
+def export_tflite_model(
+    model,
+    model_dir: str,
+    quantization: str = "dynamic",
+    representative_ds: Optional[tf.data.Dataset] = None,
+) -> str:
+    """Exporta un modelo de Keras a TFLite cuantizado para inferencia en CPU.
+
+    Args:
+        model: Modelo entrenado de TensorFlow/Keras.
+        model_dir: Directorio donde guardar el modelo.
+        quantization: Modo de cuantización ("dynamic", "float16" o "int8").
+        representative_ds: Dataset por lotes con imágenes de entrenamiento (requerido para int8).
+
+    Raises:
+        ValueError: Si el modo de cuantización no es válido o falta el dataset representativo.
+
+    Returns:
+        str: Ruta del archivo TFLite generado.
+    """
+
+    if quantization not in TFLITE_QUANTIZATION_MODES:
+        raise ValueError(f"Invalid TFLite quantization mode: {quantization}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if representative_ds is None:
+            raise ValueError("int8 quantization requires a representative dataset")
+
+        # Calibrar los rangos de activación con una muestra del entrenamiento.
+        def representative_dataset():
+            for image in representative_ds.unbatch().take(
+                TFLITE_REPRESENTATIVE_SAMPLES
+            ):
+                image = image[0] if isinstance(image, tuple) else image
+                yield [tf.expand_dims(tf.cast(image, tf.float32), 0)]
+
+        converter.representative_dataset = representative_dataset
+
+    tflite_model = converter.convert()
+
+    os.makedirs(model_dir, exist_ok=True)
+    tflite_path = os.path.join(model_dir, "model.tflite")
+    with open(tflite_path, "wb") as f:
+        f.write(tflite_model)
+
+    return tflite_path
+
+
+class TFLiteModel:
+    """Modelo TFLite con la misma interfaz de predicción por lotes que Keras."""
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None):
+        self.model_path = model_path
+        self.size_bytes = os.path.getsize(model_path)
+        self._interpreter = tf.lite.Interpreter(
+            model_path=model_path, num_threads=num_threads or os.cpu_count()
+        )
+        self._input = self._interpreter.get_input_details()[0]
+        self._output_index = self._interpreter.get_output_details()[0]["index"]
+        self._input_shape = None
+        # El intérprete no es seguro entre hilos.
+        self._lock = threading.Lock()
+
+    def predict_on_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Ejecuta el modelo sobre un lote de imágenes.
+
+        Args:
+            batch: Lote de imágenes de forma (n, alto, ancho, 3).
+
+        Returns:
+            np.ndarray: Salidas del modelo de forma (n, salidas).
+        """
+
+        batch = np.ascontiguousarray(batch, dtype=self._input["dtype"])
+
+        with self._lock:
+            # Redimensionar la entrada solo cuando cambia el tamaño del lote.
+            if self._input_shape != batch.shape:
+                self._interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self._interpreter.allocate_tensors()
+                self._input_shape = batch.shape
+
+            self._interpreter.set_tensor(self._input["index"], batch)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output_index).copy()
+
+
+class CompiledPredictor:
+    """Función de predicción compilada con firma fija para un modelo de Keras.
+
+    Evita la sobrecarga por llamada de predict (adaptadores de datos y callbacks) y
+    el retrazado al cambiar el tamaño del lote. Los lotes se rellenan hasta el
+    siguiente tamaño de la lista de buckets para que, con XLA, solo se compile un
+    número acotado de formas.
+    """
+
+    def __init__(
+        self,
+        model,
+        jit_compile: bool = False,
+        buckets: tuple = DEFAULT_BATCH_BUCKETS,
+    ):
+        self.model = model
+        self.jit_compile = jit_compile
+        self.buckets = tuple(sorted(buckets))
+
+        input_shape = tuple(model.inputs[0].shape[1:])
+        self._input_shape = input_shape
+        self._predict = tf.function(
+            lambda images: model(images, training=False),
+            input_signature=[tf.TensorSpec((None,) + input_shape, tf.float32)],
+            jit_compile=jit_compile,
+        )
+
+    @property
+    def weights(self):
+        return self.model.weights
+
+    def bucket_size(self, batch_size: int) -> int:
+        """Devuelve el tamaño de lote rellenado que corresponde a un lote.
+
+        Args:
+            batch_size: Número de imágenes del lote.
+
+        Returns:
+            int: Menor bucket que admite el lote (o múltiplo del mayor).
+        """
+
+        for bucket in self.buckets:
+            if batch_size <= bucket:
+                return bucket
+        largest = self.buckets[-1]
+        return -(-batch_size // largest) * largest
+
+    def predict_on_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Ejecuta el modelo sobre un lote de imágenes.
+
+        Args:
+            batch: Lote de imágenes de forma (n, alto, ancho, 3).
+
+        Returns:
+            np.ndarray: Salidas del modelo de forma (n, salidas).
+        """
+
+        batch = np.asarray(batch, dtype=np.float32)
+        num_images = len(batch)
+        padded_size = self.bucket_size(num_images)
+
+        if padded_size != num_images:
+            padding = np.zeros(
+                (padded_size - num_images,) + batch.shape[1:], dtype=np.float32
+            )
+            batch = np.concatenate([batch, padding])
+
+        outputs = self._predict(tf.convert_to_tensor(batch))
+        return outputs.numpy()[:num_images]
+
+    def warm_up(self) -> None:
+        """Traza (y compila con XLA) la función para cada bucket."""
+
+        sizes = self.buckets if self.jit_compile else self.buckets[:1]
+        for size in sizes:
+            self.predict_on_batch(np.zeros((size,) + self._input_shape, np.float32))
+
+
+def evaluate_classification_accuracy(model, dataset: tf.data.Dataset) -> float:
+    """Calcula la exactitud de un modelo (Keras o TFLite) sobre un dataset etiquetado.
+
+    Args:
+        model: Modelo con método predict_on_batch.
+        dataset: Dataset por lotes de pares (imágenes, etiquetas).
+
+    Returns:
+        float: Proporción de aciertos.
+    """
+
+    correct = 0
+    total = 0
+    for images, labels in dataset:
+        predictions = np.asarray(model.predict_on_batch(images.numpy()))
+
+        # Una única salida sigmoide indica un modelo binario.
+        if predictions.shape[-1] == 1:
+            predicted = (predictions[:, 0] > 0.5).astype(np.int64)
+        else:
+            predicted = np.argmax(predictions, axis=1)
+
+        correct += int(np.sum(predicted == labels.numpy()))
+        total += len(predicted)
+
+    return correct / total if total else 0.0
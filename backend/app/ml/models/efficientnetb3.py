@@ -1,8 +1,15 @@
 from tensorflow import keras
-from keras.applications import EfficientNetB3  # type: ignore[import]
 from keras import layers
 import tensorflow as tf
 
+from app.ml.callbacks import TrainingCancelled
+from app.ml.feature_cache import fit_head_on_features
+from app.ml.pretrained_weights import create_base_model
+
+# Parte del tiempo máximo de entrenamiento que puede usar la primera fase (el resto
+# queda para el fine-tuning, cuyas épocas son más lentas).
+HEAD_PHASE_BUDGET_SHARE = 1 / 3
+
 
 def create_model(input_shape, num_classes):
     """Crea un modelo EfficientNetB3 con transfer learning.
@@ -15,10 +22,9 @@ def create_model(input_shape, num_classes):
         Modelo de Keras sin compilar.
     """
 
-    # Cargar modelo base preentrenado con pesos de ImageNet (sin la capa superior).
-    base_model = EfficientNetB3(
-        include_top=False, weights="imagenet", input_shape=input_shape
-    )
+    # Cargar modelo base preentrenado con pesos de ImageNet (sin la capa superior)
+    # del registro local.
+    base_model = create_base_model("efficientnetb3", input_shape=input_shape)
 
     # Congelar el modelo base para el transfer learning.
     base_model.trainable = False
@@ -54,7 +60,15 @@ def create_model(input_shape, num_classes):
 
 
 def train(
-    train_ds, val_ds, num_classes, epochs: int = 40, learning_rate: float = 0.001
+    train_ds,
+    val_ds,
+    num_classes,
+    epochs: int = 40,
+    learning_rate: float = 0.001,
+    features=None,
+    callbacks=None,
+    checkpoint=None,
+    time_budget=None,
 ):
     """Entrena el modelo EfficientNetB3 con transfer learning en dos fases.
 
@@ -64,6 +78,13 @@ def train(
         num_classes: Número de clases.
         epochs: Número de épocas de entrenamiento (por defecto más épocas para imágenes médicas).
         learning_rate: Tasa de aprendizaje para el optimizador.
+        features: Características precalculadas (TrainingFeatures) para entrenar la
+            cabeza en la primera fase sin ejecutar el modelo base, o None.
+        callbacks: Callbacks adicionales para el entrenamiento (progreso...), o None.
+        checkpoint: Checkpoints del entrenamiento (TrainingCheckpoint) para guardarlo
+            periódicamente y reanudarlo tras una interrupción, o None.
+        time_budget: Tiempo máximo del entrenamiento (TrainingTimeBudget), repartido
+            entre las dos fases, o None.
 
     Returns:
         modelo entrenado, historial de entrenamiento.
@@ -112,15 +133,48 @@ def train(
         keras.callbacks.ReduceLROnPlateau(
             monitor="val_loss", factor=0.2, patience=4, min_lr=learning_rate / 100
         ),
+        *(callbacks or []),
     ]
 
-    # Entrenar el modelo (fase 1 - solo la cabeza clasificadora).
-    history_head = model.fit(
-        train_ds,
-        epochs=epochs // 2,  # Usar la mitad de las épocas para la primera fase.
-        validation_data=val_ds,
-        callbacks=callbacks,
-    )
+    # Al reanudar, la primera fase se omite si el checkpoint es ya de la segunda.
+    history_head = None
+    head_epoch = 0
+    if checkpoint is not None and checkpoint.skip_phase("head"):
+        head_epoch = checkpoint.state["head_epoch"]
+    else:
+        head_callbacks = list(callbacks)
+        initial_epoch = 0
+        if checkpoint is not None:
+            initial_epoch = checkpoint.restore(model, "head") or 0
+            head_callbacks.append(checkpoint.callback(model, "head"))
+        if time_budget is not None:
+            head_callbacks.append(time_budget.callback(share=HEAD_PHASE_BUDGET_SHARE))
+
+        # Entrenar el modelo (fase 1 - solo la cabeza clasificadora).
+        if features is not None:
+            history_head = fit_head_on_features(
+                model,
+                features,
+                optimizer=tf.keras.optimizers.Adam(learning_rate),
+                loss=loss,
+                metrics=metrics,
+                epochs=epochs // 2,
+                initial_epoch=initial_epoch,
+                callbacks=head_callbacks,
+            )
+        else:
+            history_head = model.fit(
+                train_ds,
+                epochs=epochs // 2,  # Usar la mitad de las épocas para la primera fase.
+                initial_epoch=initial_epoch,
+                validation_data=val_ds,
+                callbacks=head_callbacks,
+            )
+        head_epoch = history_head.epoch[-1] + 1 if history_head.epoch else initial_epoch
+
+    # Sin tiempo para la segunda fase se conserva el modelo de la primera.
+    if time_budget is not None and time_budget.remaining <= 0:
+        return model, history_head
 
     # Encontrar la capa que contiene el modelo base (EfficientNetB3).
     base_model = None
@@ -148,16 +202,31 @@ def train(
         metrics=metrics,
     )
 
+    fine_tune_callbacks = list(callbacks)
+    initial_epoch = head_epoch
+    if checkpoint is not None:
+        restored_epoch = checkpoint.restore(model, "fine_tune")
+        if restored_epoch is not None:
+            initial_epoch = restored_epoch
+        fine_tune_callbacks.append(
+            checkpoint.callback(model, "fine_tune", head_epoch=head_epoch)
+        )
+    if time_budget is not None:
+        fine_tune_callbacks.append(time_budget.callback())
+
     # Entrenar con fine-tuning.
     try:
         history_full = model.fit(
             train_ds,
             epochs=epochs // 2,  # Usar la otra mitad de las épocas para fine-tuning.
-            initial_epoch=history_head.epoch[-1] + 1,
+            initial_epoch=initial_epoch,
             validation_data=val_ds,
-            callbacks=callbacks,
+            callbacks=fine_tune_callbacks,
         )
 
+        if history_head is None:
+            return model, history_full
+
         # Combinar historiales.
         combined_history = {}
         for key in history_head.history.keys():
@@ -173,8 +242,13 @@ def train(
             if key not in combined_history:
                 combined_history[key] = history_full.history[key]
 
+    except (TrainingCancelled, MemoryError):
+        # La cancelación y el límite de memoria detienen todo el entrenamiento.
+        raise
     except Exception as e:
         # Si hay un error en la segunda fase, devolver solo la primera fase.
+        if history_head is None:
+            raise
         print(f"Error en fine-tuning: {str(e)}. Devolviendo modelo de primera fase.")
         return model, history_head
 
@@ -1,9 +1,11 @@
 from tensorflow import keras
-from keras.applications import ResNet50  # type: ignore[import]
 from keras import layers
 import tensorflow as tf
 import numpy as np
 
+from app.ml.feature_cache import fit_head_on_features
+from app.ml.pretrained_weights import create_base_model
+
 
 def create_model(input_shape, num_classes):
     """Crea un modelo ResNet50 con transfer learning.
@@ -19,10 +21,8 @@ def create_model(input_shape, num_classes):
     # Entrada del modelo.
     inputs = keras.Input(shape=input_shape)
 
-    # Modelo base.
-    base_model = ResNet50(
-        include_top=False, weights="imagenet", input_shape=input_shape, pooling="avg"
-    )
+    # Modelo base con los pesos de ImageNet del registro local.
+    base_model = create_base_model("resnet50", input_shape=input_shape, pooling="avg")
 
     # Congelar todas las capas del modelo base.
     base_model.trainable = False
@@ -43,7 +43,17 @@ def create_model(input_shape, num_classes):
     return model
 
 
-def train(train_ds, val_ds, num_classes, epochs=20, learning_rate=0.001):
+def train(
+    train_ds,
+    val_ds,
+    num_classes,
+    epochs=20,
+    learning_rate=0.001,
+    features=None,
+    callbacks=None,
+    checkpoint=None,
+    time_budget=None,
+):
     """Entrena el modelo ResNet50 con transfer learning.
 
     Args:
@@ -52,6 +62,12 @@ def train(train_ds, val_ds, num_classes, epochs=20, learning_rate=0.001):
         num_classes: Número de clases.
         epochs: Número de épocas para el entrenamiento.
         learning_rate: Tasa de aprendizaje para el optimizador.
+        features: Características precalculadas (TrainingFeatures) para entrenar solo
+            la cabeza sin ejecutar el modelo base en cada época, o None.
+        callbacks: Callbacks adicionales para el entrenamiento (progreso...), o None.
+        checkpoint: Checkpoints del entrenamiento (TrainingCheckpoint) para guardarlo
+            periódicamente y reanudarlo tras una interrupción, o None.
+        time_budget: Tiempo máximo del entrenamiento (TrainingTimeBudget), o None.
 
     Returns:
         model: Modelo entrenado.
@@ -84,11 +100,40 @@ def train(train_ds, val_ds, num_classes, epochs=20, learning_rate=0.001):
         keras.callbacks.EarlyStopping(
             monitor="val_loss", patience=5, restore_best_weights=True
         ),
+        *(callbacks or []),
     ]
 
+    # Reanudar desde el último checkpoint si lo hay.
+    initial_epoch = 0
+    if checkpoint is not None:
+        initial_epoch = checkpoint.restore(model, "train") or 0
+        callbacks.append(checkpoint.callback(model, "train"))
+
+    # Detener el entrenamiento al agotar el tiempo disponible.
+    if time_budget is not None:
+        callbacks.append(time_budget.callback())
+
+    # Con el modelo base congelado basta con entrenar la cabeza sobre las características.
+    if features is not None:
+        history = fit_head_on_features(
+            model,
+            features,
+            optimizer=tf.keras.optimizers.Adam(learning_rate),
+            loss=loss,
+            metrics=metrics,
+            epochs=epochs,
+            initial_epoch=initial_epoch,
+            callbacks=callbacks,
+        )
+        return model, history
+
     # Entrenamiento completo.
     history = model.fit(
-        train_ds, validation_data=val_ds, epochs=epochs, callbacks=callbacks
+        train_ds,
+        validation_data=val_ds,
+        epochs=epochs,
+        initial_epoch=initial_epoch,
+        callbacks=callbacks,
     )
 
     return model, history
@@ -61,7 +61,14 @@ def create_model(input_shape, num_classes):
 
 
 def train(
-    train_ds, val_ds, num_classes, epochs: int = 20, learning_rate: float = 0.001
+    train_ds,
+    val_ds,
+    num_classes,
+    epochs: int = 20,
+    learning_rate: float = 0.001,
+    callbacks=None,
+    checkpoint=None,
+    time_budget=None,
 ):
     """Entrena el modelo Xception Mini con parámetros personalizables.
 
@@ -71,6 +78,10 @@ def train(
         num_classes: Número de clases.
         epochs: Número de épocas de entrenamiento.
         learning_rate: Tasa de aprendizaje para el optimizador.
+        callbacks: Callbacks adicionales para el entrenamiento (progreso...), o None.
+        checkpoint: Checkpoints del entrenamiento (TrainingCheckpoint) para guardarlo
+            periódicamente y reanudarlo tras una interrupción, o None.
+        time_budget: Tiempo máximo del entrenamiento (TrainingTimeBudget), o None.
 
     Returns:
         modelo entrenado, historial de entrenamiento.
@@ -105,10 +116,25 @@ def train(
         keras.callbacks.EarlyStopping(
             monitor="val_loss", patience=5, restore_best_weights=True
         ),
+        *(callbacks or []),
     ]
 
+    # Reanudar desde el último checkpoint si lo hay.
+    initial_epoch = 0
+    if checkpoint is not None:
+        initial_epoch = checkpoint.restore(model, "train") or 0
+        callbacks.append(checkpoint.callback(model, "train"))
+
+    # Detener el entrenamiento al agotar el tiempo disponible.
+    if time_budget is not None:
+        callbacks.append(time_budget.callback())
+
     history = model.fit(
-        train_ds, epochs=epochs, validation_data=val_ds, callbacks=callbacks
+        train_ds,
+        epochs=epochs,
+        initial_epoch=initial_epoch,
+        validation_data=val_ds,
+        callbacks=callbacks,
     )
 
     return model, history
@@ -0,0 +1,367 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", "/app/media")
+
+# Configuración de la caché de predicciones (por contenido de la imagen).
+PREDICTION_CACHE_ENABLED = (
+    os.environ.get("PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+)
+PREDICTION_CACHE_MAX_ENTRIES = int(
+    os.environ.get("PREDICTION_CACHE_MAX_ENTRIES", "5000")
+)
+PREDICTION_CACHE_TTL_SECONDS = float(
+    os.environ.get("PREDICTION_CACHE_TTL_SECONDS", "3600")
+)
+
+# Almacén local compartido entre los workers del servidor (opcional).
+PREDICTION_CACHE_SHARED = (
+    os.environ.get("PREDICTION_CACHE_SHARED", "false").lower() == "true"
+)
+PREDICTION_CACHE_PATH = os.environ.get(
+    "PREDICTION_CACHE_PATH", os.path.join(MEDIA_ROOT, "cache", "predictions.sqlite3")
+)
+
+
+def hash_image(img_data: bytes) -> str:
+    """Calcula el hash SHA-256 del contenido de una imagen.
+
+    Args:
+        img_data: Datos binarios de la imagen.
+
+    Returns:
+        str: Hash en hexadecimal.
+    """
+
+    return hashlib.sha256(img_data).hexdigest()
+
+
+class SharedPredictionStore:
+    """Almacén SQLite de predicciones compartido por todos los procesos de la máquina."""
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, classifier_id TEXT NOT NULL, "
+                "value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_predictions_classifier "
+                "ON predictions (classifier_id)"
+            )
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Obtiene las predicciones vigentes de una lista de claves."""
+
+        if not keys:
+            return {}
+
+        now = time.time()
+        placeholders = ",".join("?" for _ in keys)
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT key, value FROM predictions "
+                f"WHERE key IN ({placeholders}) AND expires_at > ?",
+                (*keys, now),
+            ).fetchall()
+            if rows:
+                conn.execute(
+                    f"UPDATE predictions SET last_access = ? "
+                    f"WHERE key IN ({','.join('?' for _ in rows)})",
+                    (now, *(key for key, _ in rows)),
+                )
+
+        return {key: json.loads(value) for key, value in rows}
+
+    def put_many(self, classifier_id: str, items: List[Tuple[str, Dict]]) -> None:
+        """Guarda predicciones y recorta el almacén si supera su tamaño máximo."""
+
+        if not items:
+            return
+
+        now = time.time()
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO predictions "
+                "(key, classifier_id, value, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, classifier_id, json.dumps(value), now + self.ttl_seconds, now)
+                    for key, value in items
+                ],
+            )
+
+            # Recortar de vez en cuando para no contar filas en cada escritura.
+            self._writes += 1
+            if self._writes % 50 == 1:
+                conn.execute("DELETE FROM predictions WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    "DELETE FROM predictions WHERE key IN ("
+                    "SELECT key FROM predictions ORDER BY last_access DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def invalidate(self, classifier_id: str) -> int:
+        """Elimina las predicciones de un clasificador."""
+
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM predictions WHERE classifier_id = ?", (classifier_id,)
+            )
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        """Elimina todas las predicciones."""
+
+        with self._connection() as conn:
+            conn.execute("DELETE FROM predictions")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Devuelve la conexión del hilo actual (SQLite no comparte conexiones)."""
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+class PredictionCache:
+    """Caché LRU con caducidad de predicciones por contenido de la imagen.
+
+    Las entradas se identifican por el clasificador, la versión de sus artefactos y
+    el hash SHA-256 de la imagen, por lo que un reentrenamiento nunca devuelve
+    predicciones del modelo anterior. Opcionalmente se apoya en un almacén SQLite
+    compartido para que todos los workers aprovechen las predicciones de los demás.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        enabled: bool = True,
+        shared_store: Optional[SharedPredictionStore] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.shared_store = shared_store
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_many(
+        self,
+        classifier_id: Any,
+        version: str,
+        image_hashes: List[str],
+        require_thumbnail: bool = False,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Busca las predicciones guardadas de un conjunto de imágenes.
+
+        Args:
+            classifier_id: ID del clasificador.
+            version: Versión de los artefactos del modelo.
+            image_hashes: Hash del contenido de cada imagen.
+            require_thumbnail: Si solo valen las entradas que incluyen miniatura.
+
+        Returns:
+            Dict: Predicción guardada por hash (solo para los aciertos).
+        """
+
+        if not self.enabled or not image_hashes:
+            return {}
+
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        now = time.monotonic()
+
+        with self._lock:
+            for image_hash in dict.fromkeys(image_hashes):
+                key = self._key(classifier_id, version, image_hash)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] <= now:
+                    self._entries.pop(key)
+                    entry = None
+                if entry is not None and self._usable(entry[1], require_thumbnail):
+                    self._entries.move_to_end(key)
+                    found[image_hash] = entry[1]
+                else:
+                    missing.append(image_hash)
+
+        # Consultar el almacén compartido para los fallos locales.
+        if missing and self.shared_store is not None:
+            try:
+                keys = {self._key(classifier_id, version, h): h for h in missing}
+                shared = self.shared_store.get_many(list(keys))
+            except Exception as e:
+                logger.warning(f"Error reading the shared prediction cache: {str(e)}")
+                shared = {}
+
+            with self._lock:
+                for key, value in shared.items():
+                    if self._usable(value, require_thumbnail):
+                        found[keys[key]] = value
+                        self.shared_hits += 1
+                        self._store(key, value)
+
+        with self._lock:
+            self.hits += sum(1 for h in image_hashes if h in found)
+            self.misses += sum(1 for h in image_hashes if h not in found)
+
+        return found
+
+    def put_many(
+        self,
+        classifier_id: Any,
+        version: str,
+        items: List[Tuple[str, Dict[str, Any]]],
+    ) -> None:
+        """Guarda las predicciones de un conjunto de imágenes.
+
+        Args:
+            classifier_id: ID del clasificador.
+            version: Versión de los artefactos del modelo.
+            items: Pares (hash de la imagen, predicción).
+        """
+
+        if not self.enabled or not items:
+            return
+
+        keyed = [(self._key(classifier_id, version, h), value) for h, value in items]
+        with self._lock:
+            for key, value in keyed:
+                self._store(key, value)
+
+        if self.shared_store is not None:
+            try:
+                self.shared_store.put_many(str(classifier_id), keyed)
+            except Exception as e:
+                logger.warning(f"Error writing the shared prediction cache: {str(e)}")
+
+    def invalidate(self, classifier_id: Any) -> int:
+        """Elimina las predicciones guardadas de un clasificador.
+
+        Args:
+            classifier_id: ID del clasificador.
+
+        Returns:
+            int: Número de entradas eliminadas de la caché del proceso.
+        """
+
+        prefix = f"{classifier_id}:"
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                self._entries.pop(key)
+            self.invalidations += len(keys)
+
+        if self.shared_store is not None:
+            try:
+                self.shared_store.invalidate(str(classifier_id))
+            except Exception as e:
+                logger.warning(
+                    f"Error invalidating the shared prediction cache: {str(e)}"
+                )
+
+        return len(keys)
+
+    def clear(self) -> None:
+        """Vacía la caché y reinicia los contadores."""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve estadísticas de uso de la caché.
+
+        Returns:
+            Dict: Configuración, ocupación y contadores.
+        """
+
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "shared": self.shared_store is not None,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    @staticmethod
+    def _key(classifier_id: Any, version: str, image_hash: str) -> str:
+        return f"{classifier_id}:{version}:{image_hash}"
+
+    @staticmethod
+    def _usable(value: Dict[str, Any], require_thumbnail: bool) -> bool:
+        return not require_thumbnail or value.get("thumbnail") is not None
+
+    def _store(self, key: str, value: Dict[str, Any]) -> None:
+        """Guarda una entrada y expulsa las menos usadas si se supera el límite."""
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+def _create_shared_store() -> Optional[SharedPredictionStore]:
+    """Crea el almacén compartido si está habilitado y es accesible."""
+
+    if not (PREDICTION_CACHE_ENABLED and PREDICTION_CACHE_SHARED):
+        return None
+    try:
+        return SharedPredictionStore(
+            PREDICTION_CACHE_PATH,
+            max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+            ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+        )
+    except Exception as e:
+        logger.warning(f"Shared prediction cache disabled: {str(e)}")
+        return None
+
+
+# Caché compartida por todas las peticiones del proceso.
+prediction_cache = PredictionCache(
+    max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+    enabled=PREDICTION_CACHE_ENABLED,
+    shared_store=_create_shared_store(),
+)
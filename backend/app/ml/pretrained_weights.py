@@ -0,0 +1,330 @@
+"""Registro local de los pesos preentrenados de los modelos base.
+
+Los pesos de ImageNet de ResNet50 y EfficientNetB3 se leen de un directorio local
+(PRETRAINED_WEIGHTS_DIR) en lugar de descargarse en la caché de Keras de cada
+contenedor. Cada archivo se verifica con la suma publicada por Keras antes de
+usarse, y los pesos ya leídos se guardan en memoria para que los siguientes modelos
+del mismo proceso no vuelvan a leer el h5.
+
+Uso:
+    python -m app.ml.pretrained_weights [--source pesos/] [--verify] [resnet50 ...]
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from tensorflow import keras
+from keras.applications import EfficientNetB3, ResNet50  # type: ignore[import]
+
+logger = logging.getLogger(__name__)
+
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", "/app/media")
+
+# Directorio con los archivos de pesos preentrenados.
+PRETRAINED_WEIGHTS_DIR = os.environ.get(
+    "PRETRAINED_WEIGHTS_DIR", os.path.join(MEDIA_ROOT, "weights")
+)
+
+# Descargar los pesos que falten en el registro (desactivar en entornos sin internet).
+PRETRAINED_WEIGHTS_DOWNLOAD = (
+    os.environ.get("PRETRAINED_WEIGHTS_DOWNLOAD", "true").lower() == "true"
+)
+
+# Mantener en memoria los pesos ya leídos (por proceso).
+PRETRAINED_WEIGHTS_MEMORY_CACHE = (
+    os.environ.get("PRETRAINED_WEIGHTS_MEMORY_CACHE", "true").lower() == "true"
+)
+
+# Desviación típica de ImageNet por canal que EfficientNet aplica tras normalizar
+# cuando se construye con weights="imagenet".
+IMAGENET_STDDEV_RGB = (0.229, 0.224, 0.225)
+
+
+@dataclass
+class BackboneWeights:
+    """Pesos preentrenados (sin la capa superior) de un modelo base."""
+
+    builder: Callable[..., keras.Model]
+    file_name: str
+    origin: str
+    md5: str
+    input_stddev: Optional[Sequence[float]] = None
+
+
+BACKBONES: Dict[str, BackboneWeights] = {
+    "resnet50": BackboneWeights(
+        builder=ResNet50,
+        file_name="resnet50_weights_tf_dim_ordering_tf_kernels_notop.h5",
+        origin="https://storage.googleapis.com/tensorflow/keras-applications/"
+        "resnet/resnet50_weights_tf_dim_ordering_tf_kernels_notop.h5",
+        md5="4d473c1dd8becc155b73f8504c6f6626",
+    ),
+    "efficientnetb3": BackboneWeights(
+        builder=EfficientNetB3,
+        file_name="efficientnetb3_notop.h5",
+        origin="https://storage.googleapis.com/keras-applications/"
+        "efficientnetb3_notop.h5",
+        md5="af6d107764bb5b1abb91932881670226",
+        input_stddev=IMAGENET_STDDEV_RGB,
+    ),
+}
+
+_weights_cache: Dict[str, List[np.ndarray]] = {}
+_weights_lock = threading.Lock()
+
+
+def file_md5(path: str) -> str:
+    """Calcula la suma MD5 de un archivo leyéndolo por bloques."""
+
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_weights(name: str, path: str) -> None:
+    """Comprueba que un archivo de pesos coincide con la suma publicada.
+
+    Args:
+        name: Nombre del modelo base.
+        path: Ruta del archivo.
+
+    Raises:
+        ValueError: Si el archivo está corrupto o no corresponde al modelo.
+    """
+
+    checksum = file_md5(path)
+    if checksum != BACKBONES[name].md5:
+        raise ValueError(
+            f"Pretrained weights for {name} at {path} failed checksum verification "
+            f"(md5 {checksum}, expected {BACKBONES[name].md5})"
+        )
+
+
+def install_weights(
+    name: str, source: Optional[str] = None, directory: str = PRETRAINED_WEIGHTS_DIR
+) -> str:
+    """Añade al registro los pesos de un modelo base.
+
+    Los pesos se copian de un directorio local o, si no se indica, se descargan. El
+    archivo solo se mueve al registro una vez verificado, y no se vuelve a instalar
+    si el registro ya tiene una copia válida.
+
+    Args:
+        name: Nombre del modelo base.
+        source: Directorio con el archivo de pesos ya descargado, o None para
+            descargarlo.
+        directory: Directorio del registro.
+
+    Raises:
+        FileNotFoundError: Si el archivo no está en el directorio de origen.
+        ValueError: Si el archivo no supera la verificación.
+
+    Returns:
+        str: Ruta del archivo en el registro.
+    """
+
+    backbone = BACKBONES[name]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, backbone.file_name)
+    if os.path.exists(path) and file_md5(path) == backbone.md5:
+        return path
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp_dir:
+        if source is not None:
+            tmp_path = os.path.join(tmp_dir, backbone.file_name)
+            shutil.copyfile(os.path.join(source, backbone.file_name), tmp_path)
+        else:
+            logger.info(f"Downloading pretrained weights for {name}")
+            tmp_path = keras.utils.get_file(
+                backbone.file_name,
+                backbone.origin,
+                cache_dir=tmp_dir,
+                cache_subdir="",
+            )
+        verify_weights(name, tmp_path)
+        os.replace(tmp_path, path)
+
+    logger.info(f"Pretrained weights for {name} installed in {path}")
+    return path
+
+
+def weights_path(
+    name: str,
+    directory: str = PRETRAINED_WEIGHTS_DIR,
+    download: bool = PRETRAINED_WEIGHTS_DOWNLOAD,
+) -> str:
+    """Devuelve la ruta verificada de los pesos de un modelo base en el registro.
+
+    Args:
+        name: Nombre del modelo base.
+        directory: Directorio del registro.
+        download: Descargar los pesos si no están en el registro.
+
+    Raises:
+        FileNotFoundError: Si los pesos no están en el registro y no se descargan.
+        ValueError: Si el archivo no supera la verificación.
+
+    Returns:
+        str: Ruta del archivo de pesos.
+    """
+
+    path = os.path.join(directory, BACKBONES[name].file_name)
+    if not os.path.exists(path):
+        if not download:
+            raise FileNotFoundError(
+                f"Pretrained weights for {name} not found in {directory}. "
+                "Populate the registry with `python -m app.ml.pretrained_weights`"
+            )
+        return install_weights(name, directory=directory)
+
+    verify_weights(name, path)
+    return path
+
+
+def fold_input_stddev(model: keras.Model, stddev: Sequence[float]) -> None:
+    """Incorpora a la capa de normalización la división por la desviación típica.
+
+    EfficientNet construido con weights="imagenet" divide la entrada normalizada por
+    la raíz de la desviación típica de ImageNet en una capa Rescaling que no existe
+    al construirlo sin pesos. Multiplicar la varianza de la normalización por esa
+    desviación da el mismo resultado.
+
+    Args:
+        model: Modelo base con los pesos ya cargados.
+        stddev: Desviación típica por canal.
+    """
+
+    for layer in model.layers:
+        if isinstance(layer, keras.layers.Normalization):
+            mean, variance, count = layer.get_weights()
+            layer.set_weights([mean, variance * np.asarray(stddev), count])
+            layer.finalize_state()
+            return
+
+
+def set_base_model_weights(model: keras.Model, weights: List[np.ndarray]) -> None:
+    """Asigna los pesos a un modelo base.
+
+    Las capas de normalización usan una copia de su media y varianza que solo se
+    actualiza al cargar un archivo, así que hay que actualizarla también aquí.
+
+    Args:
+        model: Modelo base.
+        weights: Pesos en el orden de model.get_weights().
+    """
+
+    model.set_weights(weights)
+    for layer in model.layers:
+        if isinstance(layer, keras.layers.Normalization):
+            layer.finalize_state()
+
+
+def load_backbone_weights(
+    name: str,
+    input_shape,
+    directory: str = PRETRAINED_WEIGHTS_DIR,
+    download: bool = PRETRAINED_WEIGHTS_DOWNLOAD,
+) -> List[np.ndarray]:
+    """Lee los pesos preentrenados de un modelo base, o los toma de la memoria.
+
+    Args:
+        name: Nombre del modelo base.
+        input_shape: Forma de la entrada del modelo que los leerá.
+        directory: Directorio del registro.
+        download: Descargar los pesos si no están en el registro.
+
+    Returns:
+        List[np.ndarray]: Pesos en el orden de model.get_weights().
+    """
+
+    with _weights_lock:
+        weights = _weights_cache.get(name)
+        if weights is not None:
+            return weights
+
+        backbone = BACKBONES[name]
+        path = weights_path(name, directory=directory, download=download)
+        model = backbone.builder(
+            include_top=False, weights=None, input_shape=input_shape
+        )
+        model.load_weights(path)
+        if backbone.input_stddev is not None:
+            fold_input_stddev(model, backbone.input_stddev)
+
+        weights = model.get_weights()
+        if PRETRAINED_WEIGHTS_MEMORY_CACHE:
+            _weights_cache[name] = weights
+        logger.info(f"Pretrained weights for {name} loaded from {path}")
+        return weights
+
+
+def create_base_model(
+    name: str, input_shape, directory: str = PRETRAINED_WEIGHTS_DIR, **kwargs
+) -> keras.Model:
+    """Crea un modelo base con sus pesos preentrenados del registro local.
+
+    Cada llamada devuelve un modelo nuevo con su propia copia de los pesos, que se
+    puede ajustar sin afectar a otros modelos del proceso.
+
+    Args:
+        name: Nombre del modelo base ("resnet50", "efficientnetb3").
+        input_shape: Forma de la entrada (alto, ancho, canales).
+        directory: Directorio del registro.
+        **kwargs: Argumentos adicionales del constructor de Keras (pooling...).
+
+    Returns:
+        Modelo base de Keras sin la capa superior.
+    """
+
+    weights = load_backbone_weights(name, input_shape, directory=directory)
+    model = BACKBONES[name].builder(
+        include_top=False, weights=None, input_shape=input_shape, **kwargs
+    )
+    set_base_model_weights(model, weights)
+    return model
+
+
+def clear_memory_cache() -> None:
+    """Libera los pesos guardados en memoria."""
+
+    with _weights_lock:
+        _weights_cache.clear()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", default=list(BACKBONES.keys()))
+    parser.add_argument("--directory", default=PRETRAINED_WEIGHTS_DIR)
+    parser.add_argument("--source")
+    parser.add_argument("--verify", action="store_true")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name in args.names:
+        try:
+            if args.verify:
+                path = weights_path(name, directory=args.directory, download=False)
+            else:
+                path = install_weights(name, args.source, directory=args.directory)
+            print(f"{name}: {path}")
+        except (OSError, ValueError) as e:
+            print(f"{name}: {e}", file=sys.stderr)
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", "/app/media")
+
+# Caché en disco de imágenes ya decodificadas y redimensionadas para entrenar.
+SHARD_CACHE_ENABLED = os.environ.get("SHARD_CACHE_ENABLED", "true").lower() == "true"
+SHARD_CACHE_DIR = os.environ.get(
+    "SHARD_CACHE_DIR", os.path.join(MEDIA_ROOT, "cache", "shards")
+)
+SHARD_CACHE_MAX_BYTES = int(
+    os.environ.get("SHARD_CACHE_MAX_BYTES", str(20 * 1024 * 1024 * 1024))
+)
+
+ARRAY_FILE = "array.npy"
+INDEX_FILE = "index.json"
+
+
+def compute_content_key(image_paths: List[str], variant: str) -> str:
+    """Calcula la versión del contenido de un conjunto de imágenes.
+
+    La clave cambia si se añade, elimina o modifica cualquier imagen.
+
+    Args:
+        image_paths: Rutas de las imágenes.
+        variant: Identificador de lo que se guarda (p. ej. el tamaño "180x180").
+
+    Returns:
+        str: Clave de la versión.
+    """
+
+    digest = hashlib.sha256()
+    for path in sorted(image_paths):
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+
+    return f"{digest.hexdigest()[:32]}_{variant}"
+
+
+class Shard:
+    """Datos por imagen empaquetados en un único array mapeado en memoria."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE), "r") as f:
+            self.index: Dict[str, Any] = json.load(f)
+        self.rows: Dict[str, int] = {
+            path: row for row, path in enumerate(self.index["paths"])
+        }
+        self.array = np.load(os.path.join(directory, ARRAY_FILE), mmap_mode="r")
+
+    def rows_for(self, image_paths: List[str]) -> np.ndarray:
+        """Devuelve la fila del array correspondiente a cada imagen."""
+
+        return np.array([self.rows[path] for path in image_paths], dtype=np.int64)
+
+
+class ShardCache:
+    """Caché LRU en disco de datos precalculados por imagen, limitada por espacio.
+
+    Cada entrada se guarda bajo el espacio de nombres de su dataset y se identifica
+    por la versión del contenido de las imágenes y por lo que se guarda (imágenes
+    de un tamaño, características de un modelo...), de modo que un cambio en las
+    imágenes nunca reutiliza datos antiguos.
+    """
+
+    def __init__(self, root: str, max_bytes: int, enabled: bool = True):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+    def get_or_build(
+        self,
+        namespace: str,
+        image_paths: List[str],
+        image_size: Tuple[int, int],
+        decode_batches: Callable[[List[str]], Iterable[np.ndarray]],
+    ) -> Optional[Shard]:
+        """Devuelve las imágenes empaquetadas, construyéndolas si no existen.
+
+        Args:
+            namespace: Espacio de nombres (normalmente el ID del dataset).
+            image_paths: Rutas de las imágenes.
+            image_size: Tamaño de las imágenes (ancho, alto).
+            decode_batches: Función que decodifica las rutas en lotes uint8 en orden.
+
+        Returns:
+            Shard: Imágenes empaquetadas o None si la caché no está disponible.
+        """
+
+        return self.get_or_build_array(
+            namespace,
+            image_paths,
+            variant=f"{image_size[0]}x{image_size[1]}",
+            item_shape=(image_size[1], image_size[0], 3),
+            dtype=np.uint8,
+            compute_batches=decode_batches,
+        )
+
+    def get_or_build_array(
+        self,
+        namespace: str,
+        image_paths: List[str],
+        variant: str,
+        item_shape: Tuple[int, ...],
+        dtype: Any,
+        compute_batches: Callable[[List[str]], Iterable[np.ndarray]],
+    ) -> Optional[Shard]:
+        """Devuelve un array de datos por imagen, calculándolo si no existe.
+
+        Args:
+            namespace: Espacio de nombres (normalmente el ID del dataset).
+            image_paths: Rutas de las imágenes.
+            variant: Identificador de lo que se guarda para cada imagen.
+            item_shape: Forma de los datos de una imagen.
+            dtype: Tipo de datos del array.
+            compute_batches: Función que calcula los datos de las rutas en lotes en orden.
+
+        Returns:
+            Shard: Datos empaquetados o None si la caché no está disponible.
+        """
+
+        if not self.enabled or not image_paths:
+            return None
+
+        try:
+            key = compute_content_key(image_paths, variant)
+            directory = os.path.join(self.root, namespace, key)
+
+            if not os.path.exists(os.path.join(directory, INDEX_FILE)):
+                self._drop_stale_versions(namespace, keep=key)
+                self._build(directory, image_paths, item_shape, dtype, compute_batches)
+
+            # Marcar la entrada como usada recientemente para la expulsión LRU.
+            os.utime(os.path.join(directory, INDEX_FILE))
+            return Shard(directory)
+        except Exception as e:
+            logger.warning(f"Training shard cache unavailable: {str(e)}")
+            return None
+
+    def invalidate(self, namespace: str) -> None:
+        """Elimina todas las entradas de un espacio de nombres.
+
+        Args:
+            namespace: Espacio de nombres (normalmente el ID del dataset).
+        """
+
+        shutil.rmtree(os.path.join(self.root, namespace), ignore_errors=True)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Lista las entradas completas con su tamaño y último uso."""
+
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+
+        for namespace in os.listdir(self.root):
+            namespace_dir = os.path.join(self.root, namespace)
+            if not os.path.isdir(namespace_dir):
+                continue
+            for key in os.listdir(namespace_dir):
+                index_path = os.path.join(namespace_dir, key, INDEX_FILE)
+                try:
+                    with open(index_path, "r") as f:
+                        size_bytes = json.load(f)["size_bytes"]
+                    last_used = os.stat(index_path).st_mtime
+                except (OSError, ValueError, KeyError):
+                    continue
+                entries.append(
+                    {
+                        "namespace": namespace,
+                        "key": key,
+                        "path": os.path.join(namespace_dir, key),
+                        "size_bytes": size_bytes,
+                        "last_used": last_used,
+                    }
+                )
+
+        return entries
+
+    def _build(
+        self,
+        directory: str,
+        image_paths: List[str],
+        item_shape: Tuple[int, ...],
+        dtype: Any,
+        compute_batches: Callable[[List[str]], Iterable[np.ndarray]],
+    ) -> None:
+        """Calcula los datos de las imágenes una vez y los escribe en disco."""
+
+        paths = sorted(image_paths)
+        shape = (len(paths), *item_shape)
+        size_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self._evict(size_bytes)
+
+        tmp_dir = f"{directory}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(tmp_dir)
+        try:
+            start = time.perf_counter()
+            array = np.lib.format.open_memmap(
+                os.path.join(tmp_dir, ARRAY_FILE), mode="w+", dtype=dtype, shape=shape
+            )
+            row = 0
+            for batch in compute_batches(paths):
+                array[row : row + len(batch)] = batch
+                row += len(batch)
+            if row != len(paths):
+                raise ValueError(f"Computed {row} rows, expected {len(paths)}")
+            array.flush()
+            del array
+
+            with open(os.path.join(tmp_dir, INDEX_FILE), "w") as f:
+                json.dump({"paths": paths, "size_bytes": size_bytes}, f)
+
+            # Publicar la entrada de forma atómica (otro worker pudo crearla antes).
+            try:
+                os.rename(tmp_dir, directory)
+            except OSError:
+                if not os.path.exists(os.path.join(directory, INDEX_FILE)):
+                    raise
+            logger.info(
+                f"Built training shard {directory} with {len(paths)} rows "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _drop_stale_versions(self, namespace: str, keep: str) -> None:
+        """Elimina las versiones de un dataset cuyo contenido ya no coincide."""
+
+        content_hash = keep.split("_", 1)[0]
+        namespace_dir = os.path.join(self.root, namespace)
+        if not os.path.isdir(namespace_dir):
+            return
+
+        for key in os.listdir(namespace_dir):
+            if not key.startswith(content_hash) and ".tmp-" not in key:
+                shutil.rmtree(os.path.join(namespace_dir, key), ignore_errors=True)
+
+    def _evict(self, required_bytes: int) -> None:
+        """Expulsa las entradas menos usadas hasta que quepa una nueva."""
+
+        if required_bytes > self.max_bytes:
+            raise ValueError(
+                f"Shard of {required_bytes} bytes exceeds the cache budget "
+                f"({self.max_bytes} bytes)"
+            )
+
+        entries = sorted(self.entries(), key=lambda entry: entry["last_used"])
+        used = sum(entry["size_bytes"] for entry in entries)
+
+        while entries and used + required_bytes > self.max_bytes:
+            entry = entries.pop(0)
+            shutil.rmtree(entry["path"], ignore_errors=True)
+            used -= entry["size_bytes"]
+
+
+# Caché compartida por todos los entrenamientos de la máquina.
+shard_cache = ShardCache(
+    root=SHARD_CACHE_DIR, max_bytes=SHARD_CACHE_MAX_BYTES, enabled=SHARD_CACHE_ENABLED
+)
@@ -0,0 +1,34 @@
+"""Medición de la latencia de las operaciones de inferencia."""
+
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+
+def time_call(func: Callable[[], object], repeats: int, warmup: int = 2) -> Dict:
+    """Mide la latencia de una función tras unas ejecuciones de calentamiento.
+
+    Args:
+        func: Función a medir.
+        repeats: Número de ejecuciones medidas.
+        warmup: Número de ejecuciones previas no medidas.
+
+    Returns:
+        Dict: Latencia media, mediana y p95 en milisegundos.
+    """
+
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(1000 * (time.perf_counter() - start))
+
+    return {
+        "mean_ms": float(np.mean(timings)),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+    }
@@ -0,0 +1,143 @@
+import os
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", "/app/media")
+
+# Directorio compartido por los workers de entrenamiento y el servidor de la API.
+TRAINING_PROGRESS_DIR = os.environ.get(
+    "TRAINING_PROGRESS_DIR", os.path.join(MEDIA_ROOT, "cache", "progress")
+)
+
+
+class TrainingProgressStore:
+    """Progreso del entrenamiento de cada clasificador en un pequeño archivo JSON.
+
+    El worker escribe el archivo al terminar cada época y en cada cambio de estado,
+    y el servidor lo lee para enviar las novedades sin consultar la base de datos.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def start(self, classifier_id: Any, epochs: int) -> Dict[str, Any]:
+        """Reinicia el progreso al comenzar un entrenamiento.
+
+        Args:
+            classifier_id: ID del clasificador.
+            epochs: Número máximo de épocas.
+
+        Returns:
+            Dict: Progreso inicial.
+        """
+
+        progress = {
+            "classifier_id": str(classifier_id),
+            "status": "training",
+            "epoch": 0,
+            "epochs": epochs,
+            "metrics": {},
+            "epoch_seconds": None,
+            "images_per_second": None,
+            "eta_seconds": None,
+            "error_message": None,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        }
+        return self._write(classifier_id, progress)
+
+    def update(self, classifier_id: Any, **fields: Any) -> Dict[str, Any]:
+        """Actualiza campos del progreso de un clasificador.
+
+        Args:
+            classifier_id: ID del clasificador.
+            **fields: Campos a actualizar (status, epoch, metrics...).
+
+        Returns:
+            Dict: Progreso actualizado.
+        """
+
+        progress = self.read(classifier_id) or {"classifier_id": str(classifier_id)}
+        progress.update(fields)
+        return self._write(classifier_id, progress)
+
+    def read(self, classifier_id: Any) -> Optional[Dict[str, Any]]:
+        """Lee el progreso de un clasificador.
+
+        Args:
+            classifier_id: ID del clasificador.
+
+        Returns:
+            Dict: Progreso guardado o None si no hay ninguno.
+        """
+
+        try:
+            with open(self.path(classifier_id), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def version(self, classifier_id: Any) -> Optional[int]:
+        """Devuelve un identificador que cambia con cada escritura del progreso."""
+
+        try:
+            return os.stat(self.path(classifier_id)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def clear(self, classifier_id: Any) -> None:
+        """Elimina el progreso de un clasificador."""
+
+        try:
+            os.remove(self.path(classifier_id))
+        except FileNotFoundError:
+            pass
+
+    def request_cancel(self, classifier_id: Any) -> None:
+        """Marca el entrenamiento de un clasificador para que el worker lo detenga."""
+
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.cancel_path(classifier_id), "w"):
+            pass
+
+    def cancel_requested(self, classifier_id: Any) -> bool:
+        """Indica si se ha pedido cancelar el entrenamiento de un clasificador."""
+
+        return os.path.exists(self.cancel_path(classifier_id))
+
+    def clear_cancel(self, classifier_id: Any) -> None:
+        """Retira la petición de cancelación de un clasificador."""
+
+        try:
+            os.remove(self.cancel_path(classifier_id))
+        except FileNotFoundError:
+            pass
+
+    def path(self, classifier_id: Any) -> str:
+        return os.path.join(self.root, f"{classifier_id}.json")
+
+    def cancel_path(self, classifier_id: Any) -> str:
+        return os.path.join(self.root, f"{classifier_id}.cancel")
+
+    def _write(self, classifier_id: Any, progress: Dict[str, Any]) -> Dict[str, Any]:
+        """Guarda el progreso de forma atómica para no servir archivos a medias."""
+
+        progress["updated_at"] = datetime.now(timezone.utc).isoformat()
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            path = self.path(classifier_id)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(progress, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Error writing training progress: {str(e)}")
+
+        return progress
+
+
+# Almacén compartido por el worker y el servidor.
+training_progress = TrainingProgressStore(TRAINING_PROGRESS_DIR)
@@ -0,0 +1,273 @@
+"""Plazas de entrenamiento por nodo con un presupuesto fijo de CPU y memoria.
+
+Cada entrenamiento ocupa una de las TRAINING_SLOTS plazas del nodo, que se
+reparten entre los procesos del worker de Celery con locks de fichero. Cada
+proceso configura al arrancar sus pools de hilos de TensorFlow al tamaño de una
+plaza; al ocuparla se fijan opcionalmente sus núcleos y se vigila su memoria, de
+modo que varios entrenamientos simultáneos no compiten por los mismos núcleos.
+"""
+
+import os
+import time
+import fcntl
+import logging
+import resource
+import tempfile
+from typing import Callable, List, Optional
+
+import tensorflow as tf
+from tensorflow import keras
+
+from app.ml.callbacks import TrainingCancelled
+
+logger = logging.getLogger(__name__)
+
+# Número de entrenamientos simultáneos por nodo.
+TRAINING_SLOTS = int(os.environ.get("TRAINING_SLOTS", "1"))
+
+# Hilos de cálculo por plaza (0 reparte los núcleos del nodo entre las plazas).
+TRAINING_SLOT_THREADS = int(os.environ.get("TRAINING_SLOT_THREADS", "0"))
+
+# Hilos para ejecutar operaciones independientes en paralelo dentro de una plaza.
+TRAINING_SLOT_INTER_OP_THREADS = int(
+    os.environ.get("TRAINING_SLOT_INTER_OP_THREADS", "2")
+)
+
+# Fijar cada plaza a sus propios núcleos.
+TRAINING_SLOT_PIN_CORES = (
+    os.environ.get("TRAINING_SLOT_PIN_CORES", "false").lower() == "true"
+)
+
+# Memoria residente máxima de un entrenamiento en MB (0 sin límite).
+TRAINING_SLOT_MEMORY_MB = int(os.environ.get("TRAINING_SLOT_MEMORY_MB", "0"))
+
+# Tiempo máximo de espera por una plaza libre antes de reintentar la tarea (0 no
+# espera, para no ocupar un proceso del worker mientras el entrenamiento está en cola).
+TRAINING_SLOT_WAIT_SECONDS = int(os.environ.get("TRAINING_SLOT_WAIT_SECONDS", "0"))
+
+# Segundos hasta el siguiente intento de una tarea que no ha encontrado plaza libre.
+TRAINING_SLOT_RETRY_SECONDS = int(os.environ.get("TRAINING_SLOT_RETRY_SECONDS", "30"))
+
+# Directorio local del nodo con los locks de las plazas.
+TRAINING_SLOTS_DIR = os.environ.get("TRAINING_SLOTS_DIR") or os.path.join(
+    tempfile.gettempdir(), "entrenia-training-slots"
+)
+
+SLOT_POLL_SECONDS = 2
+
+
+def available_cpus() -> List[int]:
+    """Devuelve los núcleos en los que puede ejecutarse este proceso."""
+
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+# Núcleos del nodo antes de fijar ninguna plaza.
+NODE_CPUS = available_cpus()
+
+
+def slot_threads(
+    slots: int = TRAINING_SLOTS,
+    threads: int = TRAINING_SLOT_THREADS,
+    cpu_count: Optional[int] = None,
+) -> int:
+    """Calcula los hilos de cálculo de una plaza.
+
+    Args:
+        slots: Número de plazas del nodo.
+        threads: Hilos configurados por plaza (0 para repartir los núcleos).
+        cpu_count: Núcleos del nodo (por defecto los disponibles).
+
+    Returns:
+        int: Hilos de cálculo por plaza.
+    """
+
+    if threads > 0:
+        return threads
+
+    cpu_count = cpu_count or len(NODE_CPUS)
+    return max(1, cpu_count // max(1, slots))
+
+
+def slot_cores(index: int, threads: int, cpus: Optional[List[int]] = None) -> List[int]:
+    """Elige los núcleos de una plaza: bloques consecutivos, sin solaparse mientras
+    haya núcleos suficientes.
+
+    Args:
+        index: Índice de la plaza.
+        threads: Hilos de cálculo de la plaza.
+        cpus: Núcleos del nodo (por defecto los disponibles al importar el módulo).
+
+    Returns:
+        List[int]: Núcleos asignados a la plaza.
+    """
+
+    cpus = cpus or NODE_CPUS
+    count = min(threads, len(cpus))
+    start = index * count
+    return sorted({cpus[(start + i) % len(cpus)] for i in range(count)})
+
+
+def configure_threads(
+    intra_op_threads: int, inter_op_threads: int = TRAINING_SLOT_INTER_OP_THREADS
+) -> bool:
+    """Fija los pools de hilos de TensorFlow de este proceso.
+
+    Solo tiene efecto antes de que TensorFlow ejecute su primera operación, por eso
+    se llama al arrancar cada proceso del worker.
+
+    Args:
+        intra_op_threads: Hilos para paralelizar una operación.
+        inter_op_threads: Hilos para ejecutar operaciones independientes.
+
+    Returns:
+        bool: True si se aplicó la configuración.
+    """
+
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    except RuntimeError:
+        logger.warning("TensorFlow is already initialized, keeping its thread pools")
+        return False
+
+    return True
+
+
+def set_process_affinity(cpus: List[int]) -> None:
+    """Fija todos los hilos del proceso (y los que creen después) a unos núcleos."""
+
+    os.sched_setaffinity(0, cpus)
+    for tid in os.listdir("/proc/self/task"):
+        try:
+            os.sched_setaffinity(int(tid), cpus)
+        except OSError:
+            # El hilo ya ha terminado.
+            pass
+
+
+def current_rss_mb() -> float:
+    """Devuelve la memoria residente actual del proceso en MB."""
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # Sin /proc se usa el pico de memoria del proceso.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SlotUnavailable(TimeoutError):
+    """No ha quedado libre ninguna plaza de entrenamiento en el tiempo de espera."""
+
+
+class TrainingSlot:
+    """Plaza de entrenamiento del nodo, ocupada mientras dura el bloque with.
+
+    Espera a que haya una plaza libre (hasta wait_seconds, o hasta que should_cancel
+    indique que el entrenamiento se ha cancelado) y, si se pide, fija el proceso a
+    los núcleos de la plaza hasta liberarla. El lock de la plaza se libera también
+    si el proceso muere.
+    """
+
+    def __init__(
+        self,
+        slots: int = TRAINING_SLOTS,
+        pin_cores: bool = TRAINING_SLOT_PIN_CORES,
+        memory_mb: int = TRAINING_SLOT_MEMORY_MB,
+        wait_seconds: int = TRAINING_SLOT_WAIT_SECONDS,
+        directory: str = TRAINING_SLOTS_DIR,
+        should_cancel: Optional[Callable[[], bool]] = None,
+    ):
+        self.slots = max(1, slots)
+        self.pin_cores = pin_cores and hasattr(os, "sched_setaffinity")
+        self.memory_mb = memory_mb
+        self.wait_seconds = wait_seconds
+        self.directory = directory
+        self.should_cancel = should_cancel
+        self.threads = slot_threads(self.slots)
+        self.index: Optional[int] = None
+        self.cores: Optional[List[int]] = None
+        self._lock_file = None
+        self._previous_cpus: Optional[List[int]] = None
+
+    def __enter__(self) -> "TrainingSlot":
+        os.makedirs(self.directory, exist_ok=True)
+        deadline = time.monotonic() + self.wait_seconds
+        waiting = False
+
+        while True:
+            if self.should_cancel is not None and self.should_cancel():
+                raise TrainingCancelled("Training was cancelled before it started")
+            if self._try_acquire():
+                break
+            if time.monotonic() >= deadline:
+                raise SlotUnavailable(
+                    f"No free training slot after {self.wait_seconds} seconds"
+                )
+            if not waiting:
+                logger.info(f"Waiting for one of {self.slots} training slots")
+                waiting = True
+            time.sleep(SLOT_POLL_SECONDS)
+
+        if self.pin_cores:
+            self._previous_cpus = available_cpus()
+            self.cores = slot_cores(self.index, self.threads)
+            set_process_affinity(self.cores)
+
+        logger.info(
+            f"Training slot {self.index} acquired ({self.threads} threads, "
+            f"cores {self.cores or 'not pinned'})"
+        )
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._previous_cpus is not None:
+            set_process_affinity(self._previous_cpus)
+            self._previous_cpus = None
+
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+        self.index = None
+
+    def callbacks(self) -> List[keras.callbacks.Callback]:
+        """Callbacks de entrenamiento que aplican el límite de memoria de la plaza."""
+
+        if self.memory_mb <= 0:
+            return []
+        return [MemoryLimitCallback(self.memory_mb)]
+
+    def _try_acquire(self) -> bool:
+        for index in range(self.slots):
+            lock_file = open(os.path.join(self.directory, f"slot-{index}.lock"), "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            self._lock_file = lock_file
+            self.index = index
+            return True
+
+        return False
+
+
+class MemoryLimitCallback(keras.callbacks.Callback):
+    """Detiene el entrenamiento si la memoria residente supera el límite de la plaza."""
+
+    def __init__(self, memory_mb: int):
+        super().__init__()
+        self.memory_mb = memory_mb
+
+    def on_train_batch_end(self, batch: int, logs=None) -> None:
+        rss_mb = current_rss_mb()
+        if rss_mb > self.memory_mb:
+            raise MemoryError(
+                f"Training exceeded the slot memory limit ({rss_mb:.0f} MB > "
+                f"{self.memory_mb} MB)"
+            )
@@ -0,0 +1,250 @@
+"""Continuación del entrenamiento de un clasificador ya entrenado.
+
+En lugar de entrenar desde cero cuando el dataset crece, se carga el modelo
+guardado, se adapta la capa de salida si hay clases nuevas y se ajusta durante
+unas pocas épocas sobre el dataset actualizado.
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from keras import layers
+
+from app.ml.model_utils import load_model, load_model_metadata
+
+# Modos de tratar la capa de salida: "expand" conserva las clases aprendidas y añade
+# las nuevas, "replace" crea una capa nueva con las clases actuales del dataset.
+WARM_START_HEAD_MODES = ("expand", "replace")
+
+# Épocas por defecto al continuar un entrenamiento.
+WARM_START_EPOCHS = int(os.environ.get("WARM_START_EPOCHS", "5"))
+
+# Fracción de la tasa de aprendizaje original usada por defecto al continuar.
+WARM_START_LEARNING_RATE_FACTOR = float(
+    os.environ.get("WARM_START_LEARNING_RATE_FACTOR", "0.1")
+)
+
+# Parámetros del entrenamiento original que no se aplican al continuarlo.
+WARM_START_EXCLUDED_PARAMETERS = (
+    "search",
+    "feature_cache",
+    "distributed_workers",
+    "distillation",
+)
+
+
+def load_previous_model(model_dir: str) -> Tuple[keras.Model, Dict[str, Any]]:
+    """Carga el modelo guardado de un clasificador y sus metadatos.
+
+    Args:
+        model_dir: Directorio del modelo.
+
+    Returns:
+        El modelo de Keras y sus metadatos.
+    """
+
+    model = load_model(os.path.join(model_dir, "model.keras"))
+    return model, load_model_metadata(model_dir)
+
+
+def merge_class_mapping(
+    class_mapping: Dict[str, str], labels: Iterable[str], head: str = "expand"
+) -> Dict[str, int]:
+    """Calcula el mapeo de etiquetas a índices del entrenamiento continuado.
+
+    Con "expand" las clases ya aprendidas conservan su índice y las nuevas se añaden
+    al final; con "replace" se usa el orden alfabético de las clases actuales.
+
+    Args:
+        class_mapping: Mapeo de índices a etiquetas del modelo guardado.
+        labels: Etiquetas de las imágenes del dataset actualizado.
+        head: Modo de tratar la capa de salida.
+
+    Raises:
+        ValueError: Si el modo no es válido o, con "expand", si alguna clase aprendida
+            ya no está en el dataset.
+
+    Returns:
+        Dict[str, int]: Mapeo de etiquetas a índices.
+    """
+
+    if head not in WARM_START_HEAD_MODES:
+        raise ValueError(f"Invalid head mode: {head}")
+
+    current = sorted(set(labels))
+    if head == "replace":
+        return {label: i for i, label in enumerate(current)}
+
+    previous = [class_mapping[str(i)] for i in range(len(class_mapping))]
+    missing = sorted(set(previous) - set(current))
+    if missing:
+        raise ValueError(
+            f"Classes no longer in the dataset: {', '.join(missing)}. "
+            "Continue training with head 'replace' instead"
+        )
+
+    new = [label for label in current if label not in previous]
+    return {label: i for i, label in enumerate(previous + new)}
+
+
+def output_layer(num_classes: int) -> layers.Dense:
+    """Crea la capa de salida usada por las arquitecturas del proyecto."""
+
+    if num_classes == 2:
+        return layers.Dense(1, activation="sigmoid")
+    return layers.Dense(num_classes, activation="softmax")
+
+
+def adapt_head(
+    model: keras.Model, previous_classes: int, num_classes: int, head: str = "expand"
+) -> keras.Model:
+    """Adapta la capa de salida de un modelo guardado a las clases actuales.
+
+    Con "expand" se copian los pesos de las clases aprendidas y solo las nuevas
+    empiezan desde cero. Un modelo binario (una salida sigmoide de logit z) equivale
+    a una softmax de logits [0, z], de modo que sus predicciones se conservan al
+    pasar a varias clases.
+
+    Args:
+        model: Modelo guardado, cuya última capa es la de salida.
+        previous_classes: Número de clases del modelo guardado.
+        num_classes: Número de clases actuales.
+        head: Modo de tratar la capa de salida.
+
+    Returns:
+        keras.Model: El mismo modelo si las clases no cambian, o uno nuevo que
+            comparte todas las capas salvo la de salida.
+    """
+
+    if head == "expand" and num_classes == previous_classes:
+        return model
+
+    previous_head = model.layers[-1]
+    new_head = output_layer(num_classes)
+    new_model = keras.Model(model.input, new_head(previous_head.input))
+
+    if head == "expand":
+        kernel, bias = previous_head.get_weights()
+        new_kernel, new_bias = new_head.get_weights()
+        if previous_classes == 2:
+            new_kernel[:, :2] = np.concatenate([np.zeros_like(kernel), kernel], axis=1)
+            new_bias[:2] = [0.0, bias[0]]
+        else:
+            new_kernel[:, :previous_classes] = kernel
+            new_bias[:previous_classes] = bias
+        new_head.set_weights([new_kernel, new_bias])
+
+    return new_model
+
+
+def continue_training(
+    model: keras.Model,
+    train_ds,
+    val_ds,
+    num_classes: int,
+    epochs: int = WARM_START_EPOCHS,
+    learning_rate: float = 0.0001,
+    callbacks: Optional[List[keras.callbacks.Callback]] = None,
+    checkpoint=None,
+    time_budget=None,
+):
+    """Ajusta durante unas pocas épocas un modelo ya entrenado.
+
+    Se entrenan las mismas capas que al final del entrenamiento original (p. ej. la
+    cabeza de ResNet50 o los últimos bloques de EfficientNetB3).
+
+    Args:
+        model: Modelo con la capa de salida ya adaptada.
+        train_ds: Dataset de entrenamiento.
+        val_ds: Dataset de validación.
+        num_classes: Número de clases.
+        epochs: Número máximo de épocas.
+        learning_rate: Tasa de aprendizaje para el optimizador.
+        callbacks: Callbacks adicionales para el entrenamiento (progreso...), o None.
+        checkpoint: Checkpoints del entrenamiento (TrainingCheckpoint) para guardarlo
+            periódicamente y reanudarlo tras una interrupción, o None.
+        time_budget: Tiempo máximo del entrenamiento (TrainingTimeBudget), o None.
+
+    Returns:
+        model: Modelo entrenado.
+        history: Historial del entrenamiento.
+    """
+
+    if num_classes == 2:
+        loss = tf.keras.losses.BinaryCrossentropy(from_logits=False)
+        metrics = [tf.keras.metrics.BinaryAccuracy(name="accuracy")]
+    else:
+        loss = tf.keras.losses.SparseCategoricalCrossentropy(from_logits=False)
+        metrics = [tf.keras.metrics.SparseCategoricalAccuracy(name="accuracy")]
+
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate), loss=loss, metrics=metrics
+    )
+
+    callbacks = [
+        keras.callbacks.EarlyStopping(
+            monitor="val_loss", patience=2, restore_best_weights=True
+        ),
+        *(callbacks or []),
+    ]
+
+    # Reanudar desde el último checkpoint si lo hay.
+    initial_epoch = 0
+    if checkpoint is not None:
+        initial_epoch = checkpoint.restore(model, "warm_start") or 0
+        callbacks.append(checkpoint.callback(model, "warm_start"))
+
+    # Detener el entrenamiento al agotar el tiempo disponible.
+    if time_budget is not None:
+        callbacks.append(time_budget.callback())
+
+    history = model.fit(
+        train_ds,
+        validation_data=val_ds,
+        epochs=epochs,
+        initial_epoch=initial_epoch,
+        callbacks=callbacks,
+    )
+
+    return model, history
+
+
+def warm_start_report(
+    metadata: Dict[str, Any],
+    label_to_index: Dict[str, int],
+    head: str,
+    reused_split: bool = False,
+) -> Dict[str, Any]:
+    """Resume el modelo de partida para guardarlo junto a las nuevas métricas.
+
+    Args:
+        metadata: Metadatos del modelo guardado.
+        label_to_index: Mapeo de etiquetas a índices del entrenamiento continuado.
+        head: Modo de tratar la capa de salida.
+        reused_split: Si se ha mantenido la división del modelo anterior (si no, la
+            validación puede incluir imágenes con las que ya se entrenó).
+
+    Returns:
+        Dict: Métricas y clases del modelo anterior, y clases añadidas.
+    """
+
+    previous_classes = list(metadata["class_mapping"].values())
+    previous_metrics = {
+        key: value
+        for key, value in metadata.get("metrics", {}).items()
+        if key != "warm_start"
+    }
+
+    return {
+        "head": head,
+        "previous_training_date": metadata.get("training_date"),
+        "previous_classes": previous_classes,
+        "new_classes": [
+            label for label in label_to_index if label not in previous_classes
+        ],
+        "previous_metrics": previous_metrics,
+        "reused_split": reused_split,
+    }
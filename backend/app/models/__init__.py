@@ -6,6 +6,7 @@ from app.models.users import User
 from app.models.datasets import Dataset
 from app.models.images import Image
 from app.models.classifiers import Classifier
+from app.models.predictions import PredictionJob, PredictionResult
 
 from app.models.users import (
     UserBase,
@@ -41,6 +42,14 @@ from app.models.classifiers import (
     ClassifierTrainingResult,
     ClassifierTrainingStatus,
     ClassifierPredictionBatchResult,
+    ClassifierTrainingProgress,
+)
+from app.models.predictions import (
+    PredictionJobStatus,
+    PredictionJobCreate,
+    PredictionJobReturn,
+    PredictionResultReturn,
+    PredictionResultsReturn,
 )
 
 # Definir las relaciones.
@@ -89,4 +98,12 @@ __all__ = [
     "ClassifierTrainingResult",
     "ClassifierTrainingStatus",
     "ClassifierPredictionBatchResult",
+    "ClassifierTrainingProgress",
+    "PredictionJob",
+    "PredictionResult",
+    "PredictionJobStatus",
+    "PredictionJobCreate",
+    "PredictionJobReturn",
+    "PredictionResultReturn",
+    "PredictionResultsReturn",
 ]
@@ -18,6 +18,7 @@ class ClassifierTrainingStatus(str, Enum):
     TRAINING = "training"
     TRAINED = "trained"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class ClassifierBase(SQLModel):
@@ -165,6 +166,46 @@ class ClassifierUpdate(SQLModel):
     )
 
 
+class ClassifierRetrain(SQLModel):
+    """Modelo para continuar el entrenamiento de un clasificador con su dataset actualizado."""
+
+    epochs: int | None = Field(
+        default=None, ge=1, description="Número máximo de épocas de ajuste"
+    )
+    learning_rate: float | None = Field(
+        default=None,
+        gt=0,
+        description="Tasa de aprendizaje (por defecto una fracción de la original)",
+    )
+    head: str = Field(
+        default="expand",
+        description="Capa de salida: 'expand' añade las clases nuevas a las aprendidas "
+        "y 'replace' la crea de nuevo con las clases actuales",
+    )
+
+
+class ClassifierDistill(ClassifierBase):
+    """Modelo para destilar un clasificador entrenado en un nuevo Xception Mini."""
+
+    epochs: int | None = Field(
+        default=None, ge=1, description="Número máximo de épocas del alumno"
+    )
+    learning_rate: float | None = Field(
+        default=None, gt=0, description="Tasa de aprendizaje del alumno"
+    )
+    temperature: float | None = Field(
+        default=None,
+        gt=0,
+        description="Temperatura con la que se suavizan las probabilidades del profesor",
+    )
+    alpha: float | None = Field(
+        default=None,
+        ge=0,
+        le=1,
+        description="Peso de las etiquetas reales en la pérdida (el resto es del profesor)",
+    )
+
+
 class ClassifierTrainingResult(SQLModel):
     """Modelo para el resultado del entrenamiento de un clasificador."""
 
@@ -192,3 +233,35 @@ class ClassifierPredictionBatchResult(SQLModel):
     )
     processed_images: int = Field(description="Número de imágenes procesadas")
     classifier_id: str = Field(description="ID del clasificador utilizado")
+
+
+class ClassifierTrainingProgress(SQLModel):
+    """Modelo para el progreso del entrenamiento de un clasificador."""
+
+    classifier_id: uuid.UUID = Field(description="ID del clasificador")
+    status: ClassifierTrainingStatus = Field(
+        description="Estado actual del entrenamiento"
+    )
+    epoch: int | None = Field(default=None, description="Última época completada")
+    epochs: int | None = Field(default=None, description="Número máximo de épocas")
+    metrics: Dict[str, float] = Field(
+        default_factory=dict, description="Métricas de la última época completada"
+    )
+    epoch_seconds: float | None = Field(
+        default=None, description="Duración de la última época en segundos"
+    )
+    images_per_second: float | None = Field(
+        default=None, description="Imágenes de entrenamiento procesadas por segundo"
+    )
+    eta_seconds: float | None = Field(
+        default=None, description="Tiempo restante estimado si se completan las épocas"
+    )
+    error_message: str | None = Field(
+        default=None, description="Mensaje de error si el entrenamiento falló"
+    )
+    started_at: datetime | None = Field(
+        default=None, description="Fecha de inicio del entrenamiento"
+    )
+    updated_at: datetime | None = Field(
+        default=None, description="Fecha de la última actualización del progreso"
+    )
@@ -0,0 +1,174 @@
+import uuid
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, List
+
+from sqlalchemy import Column, DateTime, JSON
+from sqlmodel import Field, SQLModel
+
+
+class PredictionJobStatus(str, Enum):
+    """Estado de un trabajo de inferencia masiva."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+# TABLA: prediction_jobs
+class PredictionJob(SQLModel, table=True):
+    """Trabajo de inferencia de un clasificador sobre todas las imágenes de un dataset."""
+
+    __tablename__ = "prediction_jobs"
+
+    id: uuid.UUID = Field(
+        primary_key=True, default_factory=uuid.uuid4, description="ID del trabajo"
+    )
+    user_id: uuid.UUID = Field(
+        foreign_key="users.id",
+        nullable=False,
+        ondelete="CASCADE",
+        description="ID del usuario que lanzó el trabajo",
+    )
+    classifier_id: uuid.UUID = Field(
+        foreign_key="classifiers.id",
+        nullable=False,
+        ondelete="CASCADE",
+        description="ID del clasificador utilizado",
+    )
+    dataset_id: uuid.UUID = Field(
+        foreign_key="datasets.id",
+        nullable=False,
+        ondelete="CASCADE",
+        description="ID del dataset sobre el que se predice",
+    )
+    status: PredictionJobStatus = Field(
+        default=PredictionJobStatus.PENDING, description="Estado actual del trabajo"
+    )
+    top_k: int = Field(
+        default=3, description="Número de clases más probables a guardar"
+    )
+    total_images: int = Field(default=0, description="Número de imágenes a procesar")
+    processed_images: int = Field(
+        default=0, description="Número de imágenes procesadas"
+    )
+    failed_images: int = Field(
+        default=0, description="Número de imágenes que no se pudieron procesar"
+    )
+    error_message: str | None = Field(
+        default=None, description="Mensaje de error si el trabajo falló"
+    )
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True)),
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="Fecha de creación del trabajo (UTC)",
+    )
+    started_at: datetime | None = Field(
+        sa_column=Column(DateTime(timezone=True)),
+        default=None,
+        description="Fecha de inicio del procesamiento (UTC)",
+    )
+    finished_at: datetime | None = Field(
+        sa_column=Column(DateTime(timezone=True)),
+        default=None,
+        description="Fecha de finalización del procesamiento (UTC)",
+    )
+
+
+# TABLA: prediction_results
+class PredictionResult(SQLModel, table=True):
+    """Predicción de un trabajo de inferencia masiva para una imagen."""
+
+    __tablename__ = "prediction_results"
+
+    id: uuid.UUID = Field(
+        primary_key=True, default_factory=uuid.uuid4, description="ID del resultado"
+    )
+    job_id: uuid.UUID = Field(
+        foreign_key="prediction_jobs.id",
+        nullable=False,
+        ondelete="CASCADE",
+        index=True,
+        description="ID del trabajo al que pertenece",
+    )
+    image_id: uuid.UUID = Field(
+        foreign_key="images.id",
+        nullable=False,
+        ondelete="CASCADE",
+        description="ID de la imagen",
+    )
+    image_name: str = Field(max_length=255, description="Nombre de la imagen")
+    predicted_class: str | None = Field(
+        default=None, max_length=255, description="Clase predicha"
+    )
+    confidence: float | None = Field(
+        default=None, description="Confianza de la clase predicha"
+    )
+    top_k: List[Dict[str, Any]] | None = Field(
+        sa_column=Column(JSON),
+        default=None,
+        description="Clases más probables con su confianza",
+    )
+    error: str | None = Field(
+        default=None, description="Mensaje de error si la imagen no se pudo procesar"
+    )
+
+
+class PredictionJobCreate(SQLModel):
+    """Modelo para lanzar un trabajo de inferencia masiva."""
+
+    classifier_id: uuid.UUID = Field(description="ID del clasificador a utilizar")
+    dataset_id: uuid.UUID = Field(description="ID del dataset sobre el que predecir")
+    top_k: int = Field(
+        default=3, ge=1, le=20, description="Número de clases más probables a guardar"
+    )
+
+
+class PredictionJobReturn(SQLModel):
+    """Modelo de trabajo de inferencia masiva para retornar."""
+
+    id: uuid.UUID = Field(description="ID del trabajo")
+    user_id: uuid.UUID = Field(description="ID del usuario que lanzó el trabajo")
+    classifier_id: uuid.UUID = Field(description="ID del clasificador utilizado")
+    dataset_id: uuid.UUID = Field(description="ID del dataset sobre el que se predice")
+    status: PredictionJobStatus = Field(description="Estado actual del trabajo")
+    top_k: int = Field(description="Número de clases más probables guardadas")
+    total_images: int = Field(description="Número de imágenes a procesar")
+    processed_images: int = Field(description="Número de imágenes procesadas")
+    failed_images: int = Field(description="Número de imágenes fallidas")
+    progress: float = Field(default=0.0, description="Progreso del trabajo (0 a 1)")
+    error_message: str | None = Field(
+        default=None, description="Mensaje de error si el trabajo falló"
+    )
+    created_at: datetime = Field(description="Fecha de creación del trabajo")
+    started_at: datetime | None = Field(
+        default=None, description="Fecha de inicio del procesamiento"
+    )
+    finished_at: datetime | None = Field(
+        default=None, description="Fecha de finalización del procesamiento"
+    )
+
+
+class PredictionResultReturn(SQLModel):
+    """Modelo de resultado de inferencia masiva para retornar."""
+
+    image_id: uuid.UUID = Field(description="ID de la imagen")
+    image_name: str = Field(description="Nombre de la imagen")
+    predicted_class: str | None = Field(default=None, description="Clase predicha")
+    confidence: float | None = Field(
+        default=None, description="Confianza de la clase predicha"
+    )
+    top_k: List[Dict[str, Any]] | None = Field(
+        default=None, description="Clases más probables con su confianza"
+    )
+    error: str | None = Field(
+        default=None, description="Mensaje de error si la imagen no se pudo procesar"
+    )
+
+
+class PredictionResultsReturn(SQLModel):
+    """Modelo de resultados para retornar (lista de resultados con su longitud)."""
+
+    results: List[PredictionResultReturn]
+    count: int
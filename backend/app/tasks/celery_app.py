@@ -1,26 +1,93 @@
 import os
+import copy
+import time
+import shutil
 import uuid
 import logging
 import contextlib
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, Generator
+from typing import Dict, Any, List, Optional, Generator, Tuple
 import numpy as np
-from sklearn.metrics import (
-    confusion_matrix,
-    classification_report,
-    precision_recall_fscore_support,
-)
 import tensorflow as tf
 
-from celery import Celery
-from sqlalchemy import create_engine, select
+from celery import Celery, Task
+from celery.exceptions import Retry
+from celery.signals import worker_process_init
+from sqlalchemy import create_engine, select, func
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.models.classifiers import Classifier, ClassifierTrainingStatus
+from app.models.predictions import (
+    PredictionJob,
+    PredictionJobStatus,
+    PredictionResult,
+)
 
 from app.ml.models import AVAILABLE_MODELS
-from app.ml.data_utils import extract_dataset_from_db, prepare_dataset
-from app.ml.model_utils import save_trained_model
+from app.ml.data_utils import extract_dataset_from_db, prepare_dataset, split_dataset
+from app.ml.feature_cache import FEATURE_CACHE_ARCHITECTURES, prepare_training_features
+from app.ml.evaluation import evaluate_model
+from app.ml.callbacks import (
+    CancellationCallback,
+    TrainingCancelled,
+    TrainingProgressCallback,
+    TrainingTimeBudget,
+)
+from app.ml.checkpoints import (
+    CHECKPOINT_DIR_NAME,
+    TRAINING_CHECKPOINT_INTERVAL,
+    TrainingCheckpoint,
+)
+from app.ml.distributed import train_distributed
+from app.ml.training_slots import (
+    TRAINING_SLOT_RETRY_SECONDS,
+    SlotUnavailable,
+    TrainingSlot,
+    configure_threads,
+    slot_threads,
+)
+from app.ml.hyperparameter_search import (
+    SEARCH_TRIALS_DIR_NAME,
+    record_trial,
+    start_search,
+    trial_parameters,
+    validate_search,
+)
+from app.ml.training_progress import training_progress
+from app.ml.distillation import (
+    DISTILLATION_ALPHA,
+    DISTILLATION_TEMPERATURE,
+    distillation_report,
+    load_teacher_logits,
+    measure_latency,
+    teacher_label_mapping,
+    teacher_version,
+    train_student,
+)
+from app.ml.warm_start import (
+    adapt_head,
+    continue_training,
+    load_previous_model,
+    merge_class_mapping,
+    warm_start_report,
+)
+from app.ml.model_utils import (
+    save_trained_model,
+    load_model_split,
+    get_staging_dir,
+    MODEL_STAGING_DIR_NAME,
+    export_tflite_model,
+    evaluate_classification_accuracy,
+    TFLiteModel,
+)
+from app.ml.model_cache import CachedModel, model_cache
+from app.ml.prediction_cache import prediction_cache
+from app.ml.inference_utils import (
+    decode_image,
+    predict_in_batches,
+    format_predictions,
+    select_top_k,
+)
 
 # Configuración del broker y backend de resultados.
 broker_url = os.environ["BROKER_URL"]
@@ -33,6 +100,9 @@ MEDIA_ROOT = os.environ.get("MEDIA_ROOT", "/app/media")
 MODELS_DIR = os.path.join(MEDIA_ROOT, "models")
 os.makedirs(MODELS_DIR, exist_ok=True)
 
+# Número de imágenes leídas y procesadas por lote en la inferencia masiva.
+BULK_INFERENCE_BATCH_SIZE = int(os.environ.get("BULK_INFERENCE_BATCH_SIZE", "64"))
+
 logger = logging.getLogger(__name__)
 
 app = Celery("entrenia", broker=broker_url)
@@ -55,6 +125,13 @@ sync_engine = create_engine(SYNC_DB_URL)
 sync_session_factory = sessionmaker(sync_engine, expire_on_commit=False)
 
 
+@worker_process_init.connect
+def configure_worker_process(**kwargs) -> None:
+    """Ajusta los hilos de TensorFlow de cada proceso del worker a una plaza."""
+
+    configure_threads(slot_threads())
+
+
 @contextlib.contextmanager
 def get_celery_session() -> Generator[Session, None, None]:
     """Genera una nueva sesión síncrona de la base de datos para uso de Celery."""
@@ -98,7 +175,23 @@ def train_model(
     batch_size = model_parameters.get("batch_size", 32)
     epochs = model_parameters.get("epochs", 20)
     validation_split = model_parameters.get("validation_split", 0.2)
+    feature_cache = model_parameters.get("feature_cache", False)
+    feature_variants = model_parameters.get("feature_variants", 1)
     image_size_raw = model_parameters.get("image_size", [180, 180])
+    checkpoint_interval = model_parameters.get(
+        "checkpoint_interval", TRAINING_CHECKPOINT_INTERVAL
+    )
+    distributed_workers = model_parameters.get("distributed_workers", 1)
+    warm_start = model_parameters.get("warm_start")
+    max_training_seconds = model_parameters.get("max_training_seconds")
+    distillation = model_parameters.get("distillation")
+
+    # Si un entrenamiento continuado falla, se sigue sirviendo el modelo anterior.
+    failed_status = (
+        ClassifierTrainingStatus.TRAINED
+        if warm_start is not None
+        else ClassifierTrainingStatus.FAILED
+    )
 
     # Convertir image_size a tupla si es lista (para compatibilidad con JSON).
     image_size = (
@@ -111,14 +204,33 @@ def train_model(
         logger.error(error_msg)
         update_classifier_status(
             classifier_uuid=classifier_uuid,
-            status=ClassifierTrainingStatus.FAILED,
+            status=failed_status,
             error_message=error_msg,
         )
         return {"status": "error", "classifier_id": classifier_id, "error": error_msg}
 
+    training_progress.start(classifier_id, epochs)
+
+    if self.request.retries:
+        # Un intento anterior pudo marcar el clasificador como fallido antes de reintentar.
+        update_classifier_status(
+            classifier_uuid=classifier_uuid,
+            status=ClassifierTrainingStatus.TRAINING,
+        )
+
+    # Checkpoints para reanudar el entrenamiento si el worker se interrumpe (no se
+    # usan en el entrenamiento distribuido, cuyo modelo vive en otros procesos).
+    checkpoint = None
+    if checkpoint_interval > 0 and distributed_workers <= 1:
+        checkpoint = TrainingCheckpoint(
+            os.path.join(MODELS_DIR, classifier_id), interval=checkpoint_interval
+        )
+
     try:
-        # 1. Obtener imágenes del dataset.
-        with get_celery_session() as session:
+        # 1. Ocupar una plaza de entrenamiento del nodo y obtener imágenes del dataset.
+        with TrainingSlot(
+            should_cancel=lambda: training_progress.cancel_requested(classifier_id)
+        ) as slot, get_celery_session() as session:
             from app.models.images import Image
 
             stmt = select(Image).where(Image.dataset_id == dataset_uuid)
@@ -136,7 +248,7 @@ def train_model(
                 logger.error(error_msg)
                 update_classifier_status(
                     classifier_uuid=classifier_uuid,
-                    status=ClassifierTrainingStatus.FAILED,
+                    status=failed_status,
                     error_message=error_msg,
                 )
                 return {
@@ -145,9 +257,76 @@ def train_model(
                     "error": error_msg,
                 }
 
+            # 2.1 Al continuar un entrenamiento, partir del modelo guardado conservando
+            # los índices de las clases que ya conoce.
+            previous_split = None
+            if warm_start is not None:
+                previous_model, previous_metadata = load_previous_model(
+                    os.path.join(MODELS_DIR, classifier_id)
+                )
+                previous_split = load_model_split(
+                    os.path.join(MODELS_DIR, classifier_id)
+                )
+                label_to_index = merge_class_mapping(
+                    previous_metadata["class_mapping"], labels, warm_start["head"]
+                )
+                index_to_label = {i: label for label, i in label_to_index.items()}
+
+            # 2.2 Al destilar un clasificador, usar su modelo como profesor y los
+            # índices de sus clases.
+            if distillation is not None:
+                teacher, teacher_metadata = load_previous_model(
+                    os.path.join(MODELS_DIR, distillation["teacher_id"])
+                )
+                # Validar con imágenes que el profesor no ha visto al entrenar.
+                previous_split = load_model_split(
+                    os.path.join(MODELS_DIR, distillation["teacher_id"])
+                )
+                label_to_index = teacher_label_mapping(
+                    teacher_metadata["class_mapping"], labels
+                )
+                index_to_label = {i: label for label, i in label_to_index.items()}
+
             # logger.info(f"Preparando entrenamiento con {len(image_paths)} imágenes y {num_classes} clases")
 
             # 3. Preparar datasets de entrenamiento y validación.
+            prepare_start = time.perf_counter()
+
+            # Al reanudar se mantiene la división del entrenamiento interrumpido y, al
+            # continuar un modelo o destilarlo, la de ese modelo, para no validar con
+            # imágenes con las que ya se entrenó.
+            split = None
+            if checkpoint is not None:
+                checkpoint_config = {
+                    "architecture": classifier_architecture,
+                    "model_parameters": model_parameters,
+                }
+                split = checkpoint.load_split(label_to_index, checkpoint_config)
+                if split is not None:
+                    logger.info(f"Resuming training of classifier {classifier_uuid}")
+            if split is None:
+                train_paths, _, val_paths, _ = split_dataset(
+                    image_paths,
+                    [label_to_index[label] for label in labels],
+                    validation_split,
+                    split=previous_split,
+                )
+                split = (train_paths, val_paths)
+                if checkpoint is not None:
+                    checkpoint.save_split(*split, label_to_index, checkpoint_config)
+
+            # La destilación necesita la división para asociar a cada imagen los
+            # logits del profesor.
+            distillation_split = None
+            if distillation is not None:
+                distillation_split = split_dataset(
+                    image_paths,
+                    [label_to_index[label] for label in labels],
+                    validation_split,
+                    split=split,
+                )
+                split = (distillation_split[0], distillation_split[2])
+
             train_ds, val_ds, dataset_info = prepare_dataset(
                 image_paths,
                 labels,
@@ -156,118 +335,226 @@ def train_model(
                 batch_size=batch_size,
                 image_size=image_size,
                 architecture=classifier_architecture,
+                cache_namespace=dataset_id,
+                split=split,
             )
 
+            # 3.1 Entrenar opcionalmente la cabeza sobre características precalculadas.
+            train_kwargs = {
+                "callbacks": [
+                    TrainingProgressCallback(
+                        classifier_id, epochs, dataset_info["train_size"]
+                    ),
+                    CancellationCallback(classifier_id),
+                    *slot.callbacks(),
+                ]
+            }
+            if checkpoint is not None:
+                train_kwargs["checkpoint"] = checkpoint
+            time_budget = None
+            if max_training_seconds:
+                time_budget = TrainingTimeBudget(max_training_seconds)
+                train_kwargs["time_budget"] = time_budget
+            if (
+                feature_cache
+                and distributed_workers <= 1
+                and warm_start is None
+                and classifier_architecture in FEATURE_CACHE_ARCHITECTURES
+            ):
+                train_kwargs["features"] = prepare_training_features(
+                    image_paths,
+                    labels,
+                    label_to_index,
+                    batch_size=batch_size,
+                    image_size=image_size,
+                    architecture=classifier_architecture,
+                    validation_split=validation_split,
+                    variants=feature_variants,
+                    cache_namespace=dataset_id,
+                    split=split,
+                )
+
+            # 3.2 Obtener una sola vez los logits del profesor y añadirlos a los datasets.
+            if distillation is not None:
+                teacher_logits = load_teacher_logits(
+                    teacher,
+                    image_paths,
+                    version=f"{distillation['teacher_id']}_"
+                    f"{teacher_version(teacher_metadata)}",
+                    cache_namespace=dataset_id,
+                )
+                train_paths, _, val_paths, val_labels = distillation_split
+                distillation_train_ds = teacher_logits.attach(
+                    train_ds, train_paths, batch_size
+                )
+                distillation_val_ds = teacher_logits.attach(
+                    val_ds, val_paths, batch_size
+                )
+
+            prepare_seconds = time.perf_counter() - prepare_start
+
             # 4. Obtener el módulo del modelo seleccionado y entrenar.
             model_module = AVAILABLE_MODELS[classifier_architecture]
-            model, history = model_module.train(
-                train_ds,
+            fit_start = time.perf_counter()
+            distributed_info = None
+            if warm_start is not None:
+                # 4.1 Continuar el entrenamiento del modelo guardado.
+                model = adapt_head(
+                    previous_model,
+                    previous_metadata["num_classes"],
+                    num_classes,
+                    warm_start["head"],
+                )
+                model, history = continue_training(
+                    model,
+                    train_ds,
+                    val_ds,
+                    num_classes,
+                    epochs=epochs,
+                    learning_rate=learning_rate,
+                    **train_kwargs,
+                )
+            elif distillation is not None:
+                # 4.2 Entrenar el alumno con las etiquetas y los logits del profesor.
+                model, history = train_student(
+                    distillation_train_ds,
+                    distillation_val_ds,
+                    num_classes,
+                    epochs=epochs,
+                    learning_rate=learning_rate,
+                    temperature=distillation.get(
+                        "temperature", DISTILLATION_TEMPERATURE
+                    ),
+                    alpha=distillation.get("alpha", DISTILLATION_ALPHA),
+                    **train_kwargs,
+                )
+            elif distributed_workers > 1:
+                # 4.3 Entrenar en varios procesos locales con paralelismo de datos.
+                model, history, distributed_info = train_distributed(
+                    model_module,
+                    train_ds,
+                    dataset_spec={
+                        "image_paths": image_paths,
+                        "labels": labels,
+                        "label_to_index": label_to_index,
+                        "split": split,
+                        "validation_split": validation_split,
+                        "batch_size": batch_size,
+                        "image_size": list(image_size),
+                        "cache_namespace": dataset_id,
+                    },
+                    num_classes=num_classes,
+                    epochs=epochs,
+                    learning_rate=learning_rate,
+                    num_workers=distributed_workers,
+                    classifier_id=classifier_id,
+                    threads=slot.threads,
+                    should_cancel=lambda: training_progress.cancel_requested(
+                        classifier_id
+                    ),
+                )
+            else:
+                model, history = model_module.train(
+                    train_ds,
+                    val_ds,
+                    num_classes,
+                    epochs=epochs,
+                    learning_rate=learning_rate,
+                    **train_kwargs,
+                )
+            fit_seconds = time.perf_counter() - fit_start
+
+            # El historial incluye las épocas anteriores a la reanudación.
+            if checkpoint is not None and checkpoint.history:
+                history.history = checkpoint.history
+
+            # 5. Evaluar el modelo con una única pasada sobre el conjunto de validación.
+            eval_results, evaluation_report, evaluation_timings = evaluate_model(
+                model,
                 val_ds,
-                num_classes,
-                epochs=epochs,
-                learning_rate=learning_rate,
+                index_to_label,
+                num_samples=dataset_info["val_size"],
             )
 
-            # 5. Evaluar explícitamente el modelo en el conjunto de validación.
-            eval_metrics = model.evaluate(val_ds, verbose=0)
-            eval_results = dict(zip(model.metrics_names, eval_metrics))
-
             # 5.1 Inicializar diccionario de métricas con las métricas del historial.
             train_metrics = {}
             for k, v in history.history.items():
                 train_metrics[k] = float(v[-1])  # Convertir valores a float para JSON.
 
             # 5.2 Añadir métricas de evaluación explícita pero mantener las originales.
-            eval_metrics = model.evaluate(val_ds, verbose=0)
-            eval_results = dict(zip(model.metrics_names, eval_metrics))
-
-            # Solo actualizar métricas que no existan o que sean específicas de validación.
             for k, v in eval_results.items():
                 if k not in train_metrics or k.startswith("val_"):
                     train_metrics[k] = float(v)
 
-            # 5.3 Calcular matriz de confusión y métricas adicionales.
-            y_true = []
-            y_pred = []
-            y_prob = []  # Para métricas adicionales como AUC, si se necesitan.
-
-            # Recopilar predicciones y etiquetas reales del conjunto de validación.
-            for images, labels in val_ds:
-                predictions = model.predict(images, verbose=0)
-
-                # Guardar las probabilidades/logits originales para posibles métricas adicionales.
-                y_prob.extend(predictions)
-
-                # Convertir predicciones a clases dependiendo de la arquitectura y tipo de salida.
-                if classifier_architecture == "efficientnetb3" and num_classes == 2:
-                    # EfficientNetB3 con 1 neurona de salida y sigmoid.
-                    predicted_classes = (predictions > 0.5).astype(int).flatten()
-                elif classifier_architecture == "xception_mini" and num_classes == 2:
-                    # Xception Mini con 1 neurona de salida y sigmoid.
-                    predicted_classes = (predictions > 0.5).astype(int).flatten()
-                elif classifier_architecture == "resnet50" and num_classes == 2:
-                    # ResNet50 con 1 neurona de salida y sigmoid.
-                    predicted_classes = (predictions > 0.5).astype(int).flatten()
-                else:
-                    # Modelo multiclase.
-                    predicted_classes = np.argmax(predictions, axis=1)
-
-                # Extender listas con las nuevas predicciones y etiquetas.
-                y_true.extend(labels.numpy())
-                y_pred.extend(predicted_classes)
-
-            # Calcular matriz de confusión.
-            cm = confusion_matrix(y_true, y_pred)
-            confusion_matrix_json = cm.tolist()
-
-            # 5.4 Calcular accuracy a partir de la matriz de confusión para validar consistencia.
-            accuracy_from_cm = (
-                np.sum(np.diag(cm)) / np.sum(cm) if np.sum(cm) > 0 else 0.0
-            )
-            train_metrics["accuracy_from_confusion_matrix"] = float(accuracy_from_cm)
-
-            # 5.5 Añadir matriz de confusión a las métricas.
-            train_metrics["confusion_matrix"] = confusion_matrix_json
-
-            # 5.6 Añadir métricas adicionales: precision, recall, f1.
-            class_report = classification_report(
-                y_true,
-                y_pred,
-                target_names=[index_to_label[i] for i in range(num_classes)],
-                output_dict=True,
-            )
-            train_metrics["classification_report"] = class_report
-
-            # Calcular precisión, recall y f1 por clase.
-            precision, recall, f1, support = precision_recall_fscore_support(
-                y_true, y_pred, average=None
-            )
-
-            # Añadir métricas por clase.
-            for i in range(num_classes):
-                class_name = index_to_label[i]
-                train_metrics[f"precision_{class_name}"] = float(precision[i])
-                train_metrics[f"recall_{class_name}"] = float(recall[i])
-                train_metrics[f"f1_{class_name}"] = float(f1[i])
-
-            # Añadir métricas promedio.
-            train_metrics["precision_macro"] = float(np.mean(precision))
-            train_metrics["recall_macro"] = float(np.mean(recall))
-            train_metrics["f1_macro"] = float(np.mean(f1))
-
-            # Calcular promedio ponderado.
-            precision_weighted, recall_weighted, f1_weighted, _ = (
-                precision_recall_fscore_support(y_true, y_pred, average="weighted")
-            )
-            train_metrics["precision_weighted"] = float(precision_weighted)
-            train_metrics["recall_weighted"] = float(recall_weighted)
-            train_metrics["f1_weighted"] = float(f1_weighted)
-
-            # 5.7 Añadir información sobre las clases y la distribución.
-            train_metrics["num_samples_per_class"] = {
-                label: int(np.sum(np.array(y_true) == idx))
-                for idx, label in index_to_label.items()
+            # 5.3 Añadir matriz de confusión, métricas por clase y distribución de clases.
+            train_metrics.update(evaluation_report)
+            accuracy_from_cm = train_metrics["accuracy_from_confusion_matrix"]
+
+            # 5.4 Guardar el tiempo de cada etapa, las épocas completadas y el ritmo.
+            trained_epochs = len(history.history["loss"])
+            train_metrics["timings"] = {
+                "prepare_seconds": round(prepare_seconds, 3),
+                "fit_seconds": round(fit_seconds, 3),
+                **evaluation_timings,
+                "epochs": trained_epochs,
+                "images_per_second": (
+                    round(dataset_info["train_size"] * trained_epochs / fit_seconds, 2)
+                    if fit_seconds > 0
+                    else None
+                ),
+            }
+            if time_budget is not None:
+                train_metrics["time_budget"] = time_budget.report()
+            if distributed_info:
+                train_metrics["distributed"] = distributed_info
+            train_metrics["training_slot"] = {
+                "index": slot.index,
+                "threads": slot.threads,
+                "cores": slot.cores,
             }
+            if warm_start is not None:
+                # Métricas del modelo de partida para compararlas con las nuevas.
+                train_metrics["warm_start"] = warm_start_report(
+                    previous_metadata,
+                    label_to_index,
+                    warm_start["head"],
+                    reused_split=previous_split is not None,
+                )
+            if distillation is not None:
+                # Exactitud y latencia del alumno frente a las del profesor.
+                train_metrics["distillation"] = distillation_report(
+                    distillation["teacher_id"],
+                    teacher_metadata,
+                    teacher_accuracy=teacher_logits.accuracy(val_paths, val_labels),
+                    student_accuracy=accuracy_from_cm,
+                    teacher_latency=measure_latency(teacher),
+                    student_latency=measure_latency(model),
+                    temperature=distillation.get(
+                        "temperature", DISTILLATION_TEMPERATURE
+                    ),
+                    alpha=distillation.get("alpha", DISTILLATION_ALPHA),
+                    teacher_logits_seconds=teacher_logits.seconds,
+                    validation_images=len(val_paths),
+                    teacher_split=previous_split is not None,
+                )
+
+            # 5.5 Exportar opcionalmente un modelo TFLite cuantizado para inferencia en
+            # CPU. Se prepara junto al resto de artefactos y no sustituye al modelo
+            # servido hasta que se guarda el nuevo.
+            staging_dir = get_staging_dir(os.path.join(MODELS_DIR, classifier_id))
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            tflite_quantization = model_parameters.get("tflite_quantization")
+            if tflite_quantization:
+                tflite_info = export_quantized_model(
+                    model,
+                    train_ds,
+                    val_ds,
+                    model_dir=staging_dir,
+                    quantization=tflite_quantization,
+                    float_accuracy=float(accuracy_from_cm),
+                )
+                if tflite_info:
+                    train_metrics["tflite"] = tflite_info
 
             # 6. Preparar metadatos del modelo.
             metadata = {
@@ -279,13 +566,19 @@ def train_model(
                 },
                 "metrics": train_metrics,
                 "train_params": {
-                    "epochs": len(history.history["loss"]),
+                    "epochs": trained_epochs,
                     "batch_size": batch_size,
                     "validation_split": validation_split,
                     "learning_rate": learning_rate,
                     "image_size": image_size_raw,  # Guardar como lista para compatibilidad con JSON.
+                    "feature_variants": (
+                        feature_variants if "features" in train_kwargs else None
+                    ),
+                    "distributed_workers": distributed_workers,
                 },
             }
+            if "tflite" in train_metrics:
+                metadata["tflite"] = train_metrics["tflite"]
 
             # Generar la ruta del modelo.
             model_rel_path = os.path.join("models", classifier_id)
@@ -301,9 +594,12 @@ def train_model(
             # 8. Guardar modelo entrenado.
             if update_successful:
                 model_rel_path = save_trained_model(
-                    model, MODELS_DIR, metadata, classifier_id
+                    model, MODELS_DIR, metadata, classifier_id, split=split
                 )
 
+            if checkpoint is not None:
+                checkpoint.clear()
+
             logger.info(f"Clasificador {classifier_uuid} entrenado exitosamente")
             return {
                 "status": "success",
@@ -312,24 +608,92 @@ def train_model(
                 "file_path": model_rel_path,
             }
 
+    except TrainingCancelled:
+        logger.info(f"Training of classifier {classifier_uuid} was cancelled")
+        finish_cancelled_training(classifier_id, restore_model=warm_start is not None)
+        return {"status": "cancelled", "classifier_id": classifier_id}
+
+    except SlotUnavailable as e:
+        # El entrenamiento sigue en cola sin ocupar el worker ni marcarlo como fallido.
+        logger.info(f"No free training slot for classifier {classifier_uuid}")
+        raise retry_without_slot(self, e)
+
     except Exception as e:
         logger.error(f"Error while training the classifier {classifier_uuid}: {str(e)}")
 
         try:
             update_classifier_status(
                 classifier_uuid=classifier_uuid,
-                status=ClassifierTrainingStatus.FAILED,
+                status=failed_status,
                 error_message=str(e),
             )
         except Exception as inner_e:
             logger.error(f"Error while updating failed state: {str(inner_e)}")
 
+        # Los artefactos sin publicar no deben mezclarse con los de otro intento.
+        shutil.rmtree(
+            get_staging_dir(os.path.join(MODELS_DIR, classifier_id)),
+            ignore_errors=True,
+        )
+
         if isinstance(e, (ConnectionError, TimeoutError)):
+            # El reintento continúa desde el último checkpoint.
             raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
 
+        if checkpoint is not None:
+            checkpoint.clear()
+
         return {"status": "error", "classifier_id": classifier_id, "error": str(e)}
 
 
+def export_quantized_model(
+    model,
+    train_ds: tf.data.Dataset,
+    val_ds: tf.data.Dataset,
+    model_dir: str,
+    quantization: str,
+    float_accuracy: float,
+) -> Optional[Dict[str, Any]]:
+    """Exporta el modelo a TFLite cuantizado y compara su exactitud con el original.
+
+    Un fallo en la exportación no invalida el entrenamiento: se registra y se
+    continúa sirviendo el modelo de Keras.
+
+    Args:
+        model: Modelo entrenado.
+        train_ds: Dataset de entrenamiento (muestra representativa para int8).
+        val_ds: Dataset de validación.
+        model_dir: Directorio del modelo.
+        quantization: Modo de cuantización ("dynamic", "float16" o "int8").
+        float_accuracy: Exactitud del modelo original en validación.
+
+    Returns:
+        Dict: Información del artefacto TFLite o None si la exportación falló.
+    """
+
+    try:
+        tflite_path = export_tflite_model(
+            model, model_dir, quantization=quantization, representative_ds=train_ds
+        )
+        tflite_accuracy = evaluate_classification_accuracy(
+            TFLiteModel(tflite_path), val_ds
+        )
+    except Exception as e:
+        logger.error(f"Error while exporting TFLite model: {str(e)}", exc_info=True)
+        tflite_path = os.path.join(model_dir, "model.tflite")
+        if os.path.exists(tflite_path):
+            os.remove(tflite_path)
+        return None
+
+    return {
+        "quantization": quantization,
+        "size_bytes": os.path.getsize(tflite_path),
+        "float_accuracy": float_accuracy,
+        "tflite_accuracy": float(tflite_accuracy),
+        "accuracy_delta": float(tflite_accuracy - float_accuracy),
+    }
+
+
 def update_classifier_status(
     classifier_uuid: uuid.UUID,
     status: ClassifierTrainingStatus,
@@ -361,8 +725,9 @@ def update_classifier_status(
 
             classifier.status = status
 
-            # Inicializar diccionario de métricas.
-            current_metrics = dict(classifier.metrics or {})
+            # Las métricas de un modelo nuevo sustituyen a las del anterior.
+            new_model = status == ClassifierTrainingStatus.TRAINED and bool(model_path)
+            current_metrics = {} if new_model else dict(classifier.metrics or {})
 
             # Añadir o actualizar métricas si están presentes.
             if metrics:
@@ -372,18 +737,675 @@ def update_classifier_status(
             if error_message:
                 current_metrics["error_message"] = error_message
 
+            # Un nuevo intento de entrenamiento no arrastra el error del anterior.
+            if status == ClassifierTrainingStatus.TRAINING:
+                current_metrics.pop("error_message", None)
+
             # Actualizar las métricas solo si hay algo que actualizar.
-            if current_metrics:
-                classifier.metrics = current_metrics
+            if current_metrics or classifier.metrics:
+                classifier.metrics = current_metrics or None
 
             if model_path:
                 classifier.file_path = model_path
 
-            if status == ClassifierTrainingStatus.TRAINED:
+            if new_model:
                 classifier.trained_at = datetime.now(timezone.utc)
 
             session.add(classifier)
-            return True
+
+        # Publicar el cambio de estado a los clientes que siguen el progreso.
+        training_progress.update(
+            classifier_uuid, status=status.value, error_message=error_message
+        )
+
+        # Descartar el modelo en caché de este proceso y las predicciones guardadas.
+        model_cache.invalidate(classifier_uuid)
+        prediction_cache.invalidate(classifier_uuid)
+        return True
     except Exception as e:
         logger.error(f"Error while updating classifier status: {str(e)}")
         return False
+
+
+@app.task(name="search_hyperparameters", bind=True, max_retries=3)
+def search_hyperparameters(
+    self,
+    classifier_id: str,
+    dataset_id: str,
+    classifier_architecture: str,
+    model_parameters: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Inicia una búsqueda de hiperparámetros con successive halving.
+
+    Elige los parámetros de cada prueba, fija una única división en entrenamiento y
+    validación para todas y lanza la primera ronda de pruebas como tareas
+    independientes que puede ejecutar cualquier worker.
+
+    Args:
+        self: Instancia de la tarea (requerido para bind=True).
+        classifier_id: ID del clasificador en formato string.
+        dataset_id: ID del dataset para entrenar.
+        classifier_architecture: Arquitectura del modelo a entrenar.
+        model_parameters: Parámetros de entrenamiento con la configuración de búsqueda.
+
+    Returns:
+        dict: Resultado de la operación con el número de pruebas lanzadas.
+    """
+
+    classifier_uuid = uuid.UUID(classifier_id)
+    dataset_uuid = uuid.UUID(dataset_id)
+
+    training_progress.start(classifier_id, model_parameters.get("epochs", 20))
+
+    try:
+        with get_celery_session() as session:
+            from app.models.images import Image
+
+            stmt = select(Image).where(Image.dataset_id == dataset_uuid)
+            images = session.execute(stmt).scalars().all()
+
+            image_paths, labels, label_to_index, _ = extract_dataset_from_db(
+                images, MEDIA_ROOT
+            )
+            if len(label_to_index) < 2:
+                raise ValueError(
+                    f"Se necesitan al menos 2 clases distintas para entrenar (encontradas: {len(label_to_index)})"
+                )
+
+            state = start_search(
+                validate_search(model_parameters["search"]),
+                model_parameters.get("epochs", 20),
+            )
+            search_parameters = {**model_parameters, "search": state}
+
+            # Todas las pruebas comparten la división (y las imágenes en caché).
+            train_paths, _, val_paths, _ = split_dataset(
+                image_paths,
+                [label_to_index[label] for label in labels],
+                model_parameters.get("validation_split", 0.2),
+            )
+            for trial in state["trials"]:
+                checkpoint = TrainingCheckpoint(
+                    search_trial_dir(classifier_id, trial["index"]), interval=1
+                )
+                checkpoint.clear()
+                checkpoint.save_split(
+                    train_paths,
+                    val_paths,
+                    label_to_index,
+                    search_trial_config(
+                        classifier_architecture,
+                        trial_parameters(search_parameters, trial["index"]),
+                    ),
+                )
+
+            stmt = select(Classifier).where(Classifier.id == classifier_uuid)
+            classifier = session.execute(stmt).scalar_one_or_none()
+            if not classifier:
+                raise ValueError(f"Classifier not found: {classifier_uuid}")
+            classifier.model_parameters = search_parameters
+            session.add(classifier)
+
+    except Exception as e:
+        logger.error(
+            f"Error while starting the search for classifier {classifier_uuid}: {str(e)}"
+        )
+
+        if isinstance(e, (ConnectionError, TimeoutError)):
+            raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
+
+        update_classifier_status(
+            classifier_uuid=classifier_uuid,
+            status=ClassifierTrainingStatus.FAILED,
+            error_message=str(e),
+        )
+        shutil.rmtree(
+            os.path.join(MODELS_DIR, classifier_id, SEARCH_TRIALS_DIR_NAME),
+            ignore_errors=True,
+        )
+        return {"status": "error", "classifier_id": classifier_id, "error": str(e)}
+
+    for trial in state["trials"]:
+        train_search_trial.delay(
+            classifier_id, dataset_id, classifier_architecture, trial["index"], 0
+        )
+
+    logger.info(
+        f"Hyperparameter search for classifier {classifier_uuid} started with "
+        f"{len(state['trials'])} trials and budgets {state['budgets']}"
+    )
+    return {
+        "status": "success",
+        "classifier_id": classifier_id,
+        "trials": len(state["trials"]),
+    }
+
+
+@app.task(name="train_search_trial", bind=True, max_retries=3)
+def train_search_trial(
+    self,
+    classifier_id: str,
+    dataset_id: str,
+    classifier_architecture: str,
+    trial_index: int,
+    rung: int,
+) -> Dict[str, Any]:
+    """Entrena una prueba de una búsqueda hasta el presupuesto de su ronda.
+
+    La prueba continúa desde su checkpoint de la ronda anterior. Al terminar registra
+    su pérdida de validación y, si es la última de la ronda, lanza la siguiente
+    ronda o el entrenamiento final de la mejor prueba.
+
+    Args:
+        self: Instancia de la tarea (requerido para bind=True).
+        classifier_id: ID del clasificador en formato string.
+        dataset_id: ID del dataset para entrenar.
+        classifier_architecture: Arquitectura del modelo a entrenar.
+        trial_index: Índice de la prueba.
+        rung: Ronda de successive halving.
+
+    Returns:
+        dict: Resultado de la prueba con su pérdida de validación.
+    """
+
+    classifier_uuid = uuid.UUID(classifier_id)
+    dataset_uuid = uuid.UUID(dataset_id)
+    val_loss = None
+
+    try:
+        with get_celery_session() as session:
+            from app.models.images import Image
+
+            stmt = select(Classifier).where(Classifier.id == classifier_uuid)
+            classifier = session.execute(stmt).scalar_one_or_none()
+            if (
+                not classifier
+                or "search" not in (classifier.model_parameters or {})
+                or classifier.status == ClassifierTrainingStatus.CANCELLED
+            ):
+                logger.warning(f"Search of classifier {classifier_uuid} was discarded")
+                return {"status": "error", "classifier_id": classifier_id}
+            model_parameters = classifier.model_parameters
+
+            stmt = select(Image).where(Image.dataset_id == dataset_uuid)
+            images = session.execute(stmt).scalars().all()
+            image_paths, labels, label_to_index, _ = extract_dataset_from_db(
+                images, MEDIA_ROOT
+            )
+
+        parameters = trial_parameters(model_parameters, trial_index)
+        budget = model_parameters["search"]["budgets"][rung]
+
+        checkpoint = TrainingCheckpoint(
+            search_trial_dir(classifier_id, trial_index), interval=1
+        )
+        split = checkpoint.load_split(
+            label_to_index, search_trial_config(classifier_architecture, parameters)
+        )
+        if split is None:
+            raise ValueError("The dataset classes changed during the search")
+
+        with TrainingSlot(
+            should_cancel=lambda: training_progress.cancel_requested(classifier_id)
+        ) as slot:
+            train_ds, val_ds, _ = prepare_dataset(
+                image_paths,
+                labels,
+                label_to_index,
+                validation_split=parameters.get("validation_split", 0.2),
+                batch_size=parameters.get("batch_size", 32),
+                image_size=tuple(parameters["image_size"]),
+                architecture=classifier_architecture,
+                cache_namespace=dataset_id,
+                split=split,
+            )
+
+            AVAILABLE_MODELS[classifier_architecture].train(
+                train_ds,
+                val_ds,
+                len(label_to_index),
+                epochs=budget,
+                learning_rate=parameters.get("learning_rate", 0.001),
+                checkpoint=checkpoint,
+                callbacks=[CancellationCallback(classifier_id), *slot.callbacks()],
+            )
+
+        val_losses = checkpoint.history.get("val_loss")
+        val_loss = float(min(val_losses)) if val_losses else None
+        logger.info(
+            f"Search trial {trial_index} of classifier {classifier_uuid} reached "
+            f"val_loss {val_loss} after {budget} epochs"
+        )
+
+    except TrainingCancelled:
+        # La petición se mantiene para que las demás pruebas en curso también paren.
+        logger.info(f"Hyperparameter search of classifier {classifier_uuid} cancelled")
+        finish_cancelled_training(classifier_id, clear_request=False)
+        return {"status": "cancelled", "classifier_id": classifier_id}
+
+    except SlotUnavailable as e:
+        # La prueba sigue en cola hasta que quede libre una plaza.
+        logger.info(
+            f"No free training slot for search trial {trial_index} of classifier {classifier_uuid}"
+        )
+        raise retry_without_slot(self, e)
+
+    except Exception as e:
+        logger.error(
+            f"Error in search trial {trial_index} of classifier {classifier_uuid}: {str(e)}"
+        )
+        # Al agotar los reintentos la prueba se registra como fallida para que la
+        # ronda pueda cerrarse.
+        if (
+            isinstance(e, (ConnectionError, TimeoutError))
+            and self.request.retries < self.max_retries
+        ):
+            raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
+
+    action, trial_indices, model_parameters = record_search_trial(
+        classifier_uuid, trial_index, rung, val_loss
+    )
+
+    if action == "continue":
+        for index in trial_indices:
+            train_search_trial.delay(
+                classifier_id, dataset_id, classifier_architecture, index, rung + 1
+            )
+    elif action == "finish":
+        promote_search_trial(
+            classifier_id,
+            dataset_id,
+            classifier_architecture,
+            model_parameters,
+            trial_indices[0],
+        )
+    elif action == "fail":
+        update_classifier_status(
+            classifier_uuid=classifier_uuid,
+            status=ClassifierTrainingStatus.FAILED,
+            error_message="All hyperparameter search trials failed",
+        )
+        shutil.rmtree(
+            os.path.join(MODELS_DIR, classifier_id, SEARCH_TRIALS_DIR_NAME),
+            ignore_errors=True,
+        )
+
+    return {
+        "status": "success" if val_loss is not None else "error",
+        "classifier_id": classifier_id,
+        "trial": trial_index,
+        "rung": rung,
+        "val_loss": val_loss,
+    }
+
+
+def record_search_trial(
+    classifier_uuid: uuid.UUID,
+    trial_index: int,
+    rung: int,
+    val_loss: Optional[float],
+) -> Tuple[str, List[int], Optional[Dict[str, Any]]]:
+    """Registra el resultado de una prueba bloqueando la fila del clasificador.
+
+    El bloqueo garantiza que, aunque varias pruebas terminen a la vez en distintos
+    workers, solo una de ellas cierra la ronda.
+
+    Args:
+        classifier_uuid: UUID del clasificador.
+        trial_index: Índice de la prueba.
+        rung: Ronda en la que se ha entrenado.
+        val_loss: Pérdida de validación de la prueba o None si falló.
+
+    Returns:
+        Tuple: Acción a realizar, índices de las pruebas afectadas y parámetros del
+            clasificador actualizados.
+    """
+
+    with get_celery_session() as session:
+        stmt = (
+            select(Classifier).where(Classifier.id == classifier_uuid).with_for_update()
+        )
+        classifier = session.execute(stmt).scalar_one_or_none()
+        if (
+            not classifier
+            or "search" not in (classifier.model_parameters or {})
+            or classifier.status != ClassifierTrainingStatus.TRAINING
+        ):
+            return "wait", [], None
+
+        # Copiar el JSON para que SQLAlchemy detecte el cambio.
+        model_parameters = copy.deepcopy(classifier.model_parameters)
+        action, trial_indices = record_trial(
+            model_parameters["search"], trial_index, rung, val_loss
+        )
+        classifier.model_parameters = model_parameters
+        session.add(classifier)
+
+    return action, trial_indices, model_parameters
+
+
+def promote_search_trial(
+    classifier_id: str,
+    dataset_id: str,
+    classifier_architecture: str,
+    model_parameters: Dict[str, Any],
+    trial_index: int,
+) -> None:
+    """Entrena la mejor prueba de una búsqueda como un clasificador normal.
+
+    El clasificador pasa a usar los parámetros de la prueba y train_model continúa
+    desde su último checkpoint hasta completar todas las épocas.
+
+    Args:
+        classifier_id: ID del clasificador en formato string.
+        dataset_id: ID del dataset para entrenar.
+        classifier_architecture: Arquitectura del modelo a entrenar.
+        model_parameters: Parámetros del clasificador con el estado de la búsqueda.
+        trial_index: Índice de la mejor prueba.
+    """
+
+    parameters = {
+        **trial_parameters(model_parameters, trial_index),
+        "search": model_parameters["search"],
+    }
+
+    TrainingCheckpoint(search_trial_dir(classifier_id, trial_index)).copy_to(
+        os.path.join(MODELS_DIR, classifier_id),
+        {"architecture": classifier_architecture, "model_parameters": parameters},
+    )
+    shutil.rmtree(
+        os.path.join(MODELS_DIR, classifier_id, SEARCH_TRIALS_DIR_NAME),
+        ignore_errors=True,
+    )
+
+    with get_celery_session() as session:
+        stmt = select(Classifier).where(Classifier.id == uuid.UUID(classifier_id))
+        classifier = session.execute(stmt).scalar_one_or_none()
+        if not classifier:
+            return
+        classifier.model_parameters = parameters
+        session.add(classifier)
+
+    logger.info(
+        f"Promoting search trial {trial_index} of classifier {classifier_id}: "
+        f"{model_parameters['search']['trials'][trial_index]['parameters']}"
+    )
+    train_model.delay(
+        classifier_id=classifier_id,
+        dataset_id=dataset_id,
+        classifier_architecture=classifier_architecture,
+        model_parameters=parameters,
+    )
+
+
+def finish_cancelled_training(
+    classifier_id: str, clear_request: bool = True, restore_model: bool = False
+) -> None:
+    """Marca un entrenamiento como cancelado y elimina sus archivos parciales.
+
+    Args:
+        classifier_id: ID del clasificador en formato string.
+        clear_request: Retirar la petición de cancelación (una búsqueda la mantiene
+            hasta que paren todas sus pruebas).
+        restore_model: Volver a servir el modelo anterior (al cancelar un
+            entrenamiento continuado) en lugar de marcar el clasificador como
+            cancelado.
+    """
+
+    model_dir = os.path.join(MODELS_DIR, classifier_id)
+    for name in (CHECKPOINT_DIR_NAME, SEARCH_TRIALS_DIR_NAME, MODEL_STAGING_DIR_NAME):
+        shutil.rmtree(os.path.join(model_dir, name), ignore_errors=True)
+    with contextlib.suppress(OSError):
+        # Solo se elimina si está vacío (no hay un modelo entrenado anterior).
+        os.rmdir(model_dir)
+
+    if restore_model:
+        update_classifier_status(
+            classifier_uuid=uuid.UUID(classifier_id),
+            status=ClassifierTrainingStatus.TRAINED,
+            error_message="Training was cancelled",
+        )
+    else:
+        update_classifier_status(
+            classifier_uuid=uuid.UUID(classifier_id),
+            status=ClassifierTrainingStatus.CANCELLED,
+        )
+    if clear_request:
+        training_progress.clear_cancel(classifier_id)
+
+
+def retry_without_slot(task: Task, exc: SlotUnavailable) -> Retry:
+    """Vuelve a encolar una tarea que no ha encontrado una plaza de entrenamiento libre.
+
+    A diferencia de Task.retry, el intento no cuenta para max_retries: esperar una
+    plaza no es un error, y la tarea no ocupa un proceso del worker mientras tanto.
+
+    Args:
+        task: Tarea en ejecución (requiere bind=True).
+        exc: Error de la plaza no disponible.
+
+    Returns:
+        Retry: Excepción que la tarea debe lanzar para quedar pendiente de reintento.
+    """
+
+    signature = task.signature_from_request(
+        countdown=TRAINING_SLOT_RETRY_SECONDS, retries=task.request.retries
+    )
+    signature.apply_async()
+    return Retry(exc=exc, when=TRAINING_SLOT_RETRY_SECONDS, sig=signature)
+
+
+def search_trial_dir(classifier_id: str, trial_index: int) -> str:
+    return os.path.join(
+        MODELS_DIR, classifier_id, SEARCH_TRIALS_DIR_NAME, str(trial_index)
+    )
+
+
+def search_trial_config(
+    classifier_architecture: str, parameters: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Configuración de una prueba que identifica sus checkpoints entre rondas."""
+
+    return {
+        "architecture": classifier_architecture,
+        "model_parameters": {k: v for k, v in parameters.items() if k != "epochs"},
+    }
+
+
+@app.task(name="predict_dataset", bind=True)
+def predict_dataset(self, job_id: str) -> Dict[str, Any]:
+    """Ejecuta un clasificador sobre todas las imágenes de un dataset.
+
+    Las imágenes se leen directamente de MEDIA_ROOT en lotes de tamaño fijo y las
+    predicciones de cada lote se guardan junto con el progreso del trabajo.
+
+    Args:
+        job_id: ID del trabajo de inferencia masiva.
+
+    Returns:
+        Dict: Estado final del trabajo.
+    """
+
+    from app.models.images import Image
+
+    job_uuid = uuid.UUID(job_id)
+
+    try:
+        with get_celery_session() as session:
+            job = session.get(PredictionJob, job_uuid)
+            if not job:
+                logger.error(f"Prediction job not found: {job_uuid}")
+                return {"status": "error", "job_id": job_id, "error": "Job not found"}
+
+            classifier = session.get(Classifier, job.classifier_id)
+            if (
+                not classifier
+                or not classifier.file_path
+                or classifier.status != ClassifierTrainingStatus.TRAINED
+            ):
+                raise ValueError("Model is not trained or file path is missing")
+
+            cached_model = model_cache.get(
+                classifier.id, os.path.join(MEDIA_ROOT, classifier.file_path)
+            )
+
+            # Registrar el inicio del trabajo y el número total de imágenes.
+            job.status = PredictionJobStatus.RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            job.total_images = session.execute(
+                select(func.count())
+                .select_from(Image)
+                .where(Image.dataset_id == job.dataset_id)
+            ).scalar_one()
+            job.processed_images = 0
+            job.failed_images = 0
+            session.execute(
+                PredictionResult.__table__.delete().where(
+                    PredictionResult.job_id == job_uuid
+                )
+            )
+            session.commit()
+
+            # Recorrer las imágenes por lotes paginando por ID (sin cargar todo el dataset).
+            last_image_id = None
+            while True:
+                stmt = (
+                    select(Image.id, Image.name, Image.file_path)
+                    .where(Image.dataset_id == job.dataset_id)
+                    .order_by(Image.id)
+                    .limit(BULK_INFERENCE_BATCH_SIZE)
+                )
+                if last_image_id is not None:
+                    stmt = stmt.where(Image.id > last_image_id)
+                rows = session.execute(stmt).all()
+                if not rows:
+                    break
+                last_image_id = rows[-1].id
+
+                results = predict_image_batch(
+                    cached_model,
+                    rows,
+                    architecture=classifier.architecture,
+                    top_k=job.top_k,
+                )
+                for result in results:
+                    result.job_id = job_uuid
+                session.add_all(results)
+
+                job.processed_images += len(results)
+                job.failed_images += sum(1 for r in results if r.error is not None)
+                session.commit()
+
+            job.status = PredictionJobStatus.COMPLETED
+            job.finished_at = datetime.now(timezone.utc)
+
+            logger.info(f"Prediction job {job_uuid} completed")
+            return {
+                "status": "success",
+                "job_id": job_id,
+                "processed_images": job.processed_images,
+                "failed_images": job.failed_images,
+            }
+
+    except Exception as e:
+        logger.error(f"Error while running the prediction job {job_uuid}: {str(e)}")
+        update_prediction_job_status(
+            job_uuid, PredictionJobStatus.FAILED, error_message=str(e)
+        )
+        return {"status": "error", "job_id": job_id, "error": str(e)}
+
+
+def predict_image_batch(
+    cached_model: CachedModel,
+    rows,
+    architecture: str,
+    top_k: int,
+) -> List[PredictionResult]:
+    """Decodifica y clasifica un lote de imágenes guardadas en disco.
+
+    Args:
+        cached_model: Modelo cargado y sus metadatos.
+        rows: Filas con el ID, nombre y ruta relativa de cada imagen.
+        architecture: Arquitectura del modelo.
+        top_k: Número de clases más probables a guardar.
+
+    Returns:
+        List[PredictionResult]: Resultado de cada imagen (sin trabajo asignado).
+    """
+
+    image_size = cached_model.metadata.get("train_params", {}).get(
+        "image_size", [180, 180]
+    )
+    class_mapping = cached_model.metadata.get("class_mapping", {})
+
+    results: List[Optional[PredictionResult]] = [None] * len(rows)
+    batch = np.empty((len(rows), image_size[1], image_size[0], 3), dtype=np.uint8)
+    decoded_positions = []
+
+    for i, row in enumerate(rows):
+        try:
+            with open(os.path.join(MEDIA_ROOT, row.file_path), "rb") as f:
+                img_array, _ = decode_image(f.read(), image_size, thumbnail_size=None)
+        except Exception as e:
+            results[i] = PredictionResult(
+                image_id=row.id, image_name=row.name, error=str(e)
+            )
+            continue
+
+        batch[len(decoded_positions)] = img_array
+        decoded_positions.append(i)
+
+    if decoded_positions:
+        predictions = predict_in_batches(
+            cached_model.model,
+            batch[: len(decoded_positions)],
+            architecture=architecture,
+        )
+        for i, prediction in zip(
+            decoded_positions, format_predictions(predictions, class_mapping)
+        ):
+            results[i] = PredictionResult(
+                image_id=rows[i].id,
+                image_name=rows[i].name,
+                predicted_class=prediction["predicted_class"],
+                confidence=prediction["confidence"],
+                top_k=select_top_k(prediction["all_predictions"], top_k),
+            )
+
+    return results
+
+
+def update_prediction_job_status(
+    job_uuid: uuid.UUID,
+    status: PredictionJobStatus,
+    error_message: Optional[str] = None,
+) -> bool:
+    """Actualiza el estado de un trabajo de inferencia masiva.
+
+    Args:
+        job_uuid (uuid.UUID): UUID del trabajo.
+        status (PredictionJobStatus): Nuevo estado del trabajo.
+        error_message (Optional[str]): Mensaje de error si aplica.
+
+    Returns:
+        bool: True si la actualización fue exitosa, False en caso contrario.
+    """
+
+    try:
+        with get_celery_session() as session:
+            job = session.get(PredictionJob, job_uuid)
+            if not job:
+                logger.error(f"Prediction job not found: {job_uuid}")
+                return False
+
+            job.status = status
+            if error_message:
+                job.error_message = error_message
+            if status in (PredictionJobStatus.COMPLETED, PredictionJobStatus.FAILED):
+                job.finished_at = datetime.now(timezone.utc)
+
+            session.add(job)
+        return True
+    except Exception as e:
+        logger.error(f"Error while updating prediction job status: {str(e)}")
+        return False
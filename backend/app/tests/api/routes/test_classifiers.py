@@ -14,14 +14,25 @@ from app.api.routes.classifiers import (
     read_classifier_detail,
     update_classifier,
     delete_classifier,
+    cancel_training,
+    retrain_classifier,
+    distill_classifier,
     download_model,
     predict_images,
+    read_training_progress,
+    stream_training_progress,
+    progress_events,
 )
+from app.ml.training_progress import TrainingProgressStore
 from app.models.classifiers import (
     ClassifierCreate,
     ClassifierUpdate,
+    ClassifierRetrain,
+    ClassifierDistill,
+    ClassifierTrainingStatus,
 )
 from app.ml.models import AVAILABLE_MODELS
+from app.core.inference_pool import InferencePoolSaturatedError
 
 pytestmark = pytest.mark.asyncio
 
@@ -137,6 +148,191 @@ class TestClassifierRoutes:
             assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
             assert "Invalid architecture" in exc_info.value.detail
 
+    async def test_create_classifier_invalid_tflite_quantization(
+        self, mock_session, mock_user
+    ):
+        """Prueba de error al crear un clasificador con cuantización TFLite inválida."""
+
+        # Crear datos de prueba con un modo de cuantización desconocido.
+        classifier_data = {
+            "name": "Test Classifier",
+            "description": "Classifier for testing",
+            "dataset_name": "Test Dataset",
+            "architecture": "valid_arch",
+            "model_parameters": {"epochs": 20, "tflite_quantization": "int4"},
+        }
+
+        # Ejecución y verificación.
+        with patch.dict(
+            "app.api.routes.classifiers.AVAILABLE_MODELS", {"valid_arch": "some_value"}
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await create_classifier(
+                    session=mock_session,
+                    current_user=mock_user,
+                    classifier_in=ClassifierCreate(**classifier_data),
+                )
+
+            assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+            assert "Invalid TFLite quantization" in exc_info.value.detail
+
+    @pytest.mark.parametrize(
+        "architecture, model_parameters, detail",
+        [
+            ("xception_mini", {"feature_cache": True}, "Feature caching"),
+            (
+                "resnet50",
+                {"feature_cache": True, "feature_variants": 0},
+                "Invalid feature variants",
+            ),
+        ],
+    )
+    async def test_create_classifier_invalid_feature_cache(
+        self, mock_session, mock_user, architecture, model_parameters, detail
+    ):
+        """Prueba de error al pedir la caché de características sin poder usarla."""
+
+        # Preparación.
+        classifier_data = {
+            "name": "Test Classifier",
+            "description": "Classifier for testing",
+            "dataset_name": "Test Dataset",
+            "architecture": architecture,
+            "model_parameters": model_parameters,
+        }
+
+        # Ejecución y verificación.
+        with patch.dict(
+            "app.api.routes.classifiers.AVAILABLE_MODELS", {architecture: "some_value"}
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await create_classifier(
+                    session=mock_session,
+                    current_user=mock_user,
+                    classifier_in=ClassifierCreate(**classifier_data),
+                )
+
+            assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+            assert detail in exc_info.value.detail
+
+    @pytest.mark.parametrize(
+        "model_parameters, detail",
+        [
+            ({"distributed_workers": 0}, "Invalid distributed workers"),
+            ({"distributed_workers": "4"}, "Invalid distributed workers"),
+            (
+                {"distributed_workers": 2, "feature_cache": True},
+                "not available for distributed training",
+            ),
+        ],
+    )
+    async def test_create_classifier_invalid_distributed_workers(
+        self, mock_session, mock_user, model_parameters, detail
+    ):
+        """Prueba de error al pedir un entrenamiento distribuido no válido."""
+
+        # Preparación.
+        classifier_data = {
+            "name": "Test Classifier",
+            "description": "Classifier for testing",
+            "dataset_name": "Test Dataset",
+            "architecture": "resnet50",
+            "model_parameters": model_parameters,
+        }
+
+        # Ejecución y verificación.
+        with patch.dict(
+            "app.api.routes.classifiers.AVAILABLE_MODELS", {"resnet50": "some_value"}
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await create_classifier(
+                    session=mock_session,
+                    current_user=mock_user,
+                    classifier_in=ClassifierCreate(**classifier_data),
+                )
+
+            assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+            assert detail in exc_info.value.detail
+
+    @pytest.mark.parametrize(
+        "model_parameters, detail",
+        [
+            ({"max_training_seconds": 0}, "Invalid max training seconds"),
+            ({"max_training_seconds": "600"}, "Invalid max training seconds"),
+            (
+                {"max_training_seconds": 600, "distributed_workers": 2},
+                "not available for distributed training",
+            ),
+        ],
+    )
+    async def test_create_classifier_invalid_max_training_seconds(
+        self, mock_session, mock_user, model_parameters, detail
+    ):
+        """Prueba de error al pedir un tiempo máximo de entrenamiento no válido."""
+
+        # Preparación.
+        classifier_data = {
+            "name": "Test Classifier",
+            "description": "Classifier for testing",
+            "dataset_name": "Test Dataset",
+            "architecture": "efficientnetb3",
+            "model_parameters": model_parameters,
+        }
+
+        # Ejecución y verificación.
+        with patch.dict(
+            "app.api.routes.classifiers.AVAILABLE_MODELS",
+            {"efficientnetb3": "some_value"},
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await create_classifier(
+                    session=mock_session,
+                    current_user=mock_user,
+                    classifier_in=ClassifierCreate(**classifier_data),
+                )
+
+            assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+            assert detail in exc_info.value.detail
+
+    @pytest.mark.parametrize(
+        "search, detail",
+        [
+            ({"space": {"epochs": [5, 10]}}, "Invalid search parameter"),
+            ({"space": {"learning_rate": {"min": 0}}}, "needs numeric min and max"),
+            (
+                {"space": {"batch_size": [16, 32]}, "reduction_factor": 1},
+                "reduction_factor",
+            ),
+        ],
+    )
+    async def test_create_classifier_invalid_search(
+        self, mock_session, mock_user, search, detail
+    ):
+        """Prueba de error al pedir una búsqueda de hiperparámetros no válida."""
+
+        # Preparación.
+        classifier_data = {
+            "name": "Test Classifier",
+            "description": "Classifier for testing",
+            "dataset_name": "Test Dataset",
+            "architecture": "resnet50",
+            "model_parameters": {"search": search},
+        }
+
+        # Ejecución y verificación.
+        with patch.dict(
+            "app.api.routes.classifiers.AVAILABLE_MODELS", {"resnet50": "some_value"}
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await create_classifier(
+                    session=mock_session,
+                    current_user=mock_user,
+                    classifier_in=ClassifierCreate(**classifier_data),
+                )
+
+            assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+            assert detail in exc_info.value.detail
+
     async def test_create_classifier_dataset_not_found(self, mock_session, mock_user):
         """Prueba de error al crear un clasificador con un dataset que no existe."""
 
@@ -686,3 +882,269 @@ class TestClassifierRoutes:
 
         assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
         assert "not trained or not available for inference" in exc_info.value.detail
+
+    async def test_predict_images_pool_saturated(
+        self,
+        mock_session,
+        mock_user,
+        mock_classifier,
+        mock_get_classifier_by_id,
+        mock_perform_inference,
+    ):
+        """Prueba de respuesta 503 cuando el pool de inferencia está saturado."""
+
+        # Preparación.
+        mock_get_classifier_by_id.return_value = mock_classifier
+        mock_classifier.user_id = mock_user.id  # Mismo usuario.
+        mock_classifier.status = "trained"
+        mock_perform_inference.side_effect = InferencePoolSaturatedError("busy")
+
+        mock_file = MagicMock(spec=UploadFile)
+        mock_file.filename = "test.jpg"
+        mock_file.read = AsyncMock(return_value=b"test_image_data")
+
+        # Ejecución y verificación.
+        with pytest.raises(HTTPException) as exc_info:
+            await predict_images(
+                session=mock_session,
+                current_user=mock_user,
+                classifier_id=mock_classifier.id,
+                files=[mock_file],
+            )
+
+        assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert exc_info.value.headers["Retry-After"] == "5"
+
+
+class TestTrainingProgressRoutes:
+
+    async def test_read_training_progress(
+        self, mock_session, mock_user, mock_classifier, mock_get_classifier_by_id
+    ):
+        """Prueba de obtener el progreso publicado por el worker."""
+
+        # Preparación.
+        mock_get_classifier_by_id.return_value = mock_classifier
+        mock_classifier.user_id = mock_user.id
+        mock_classifier.status = "training"
+        store = MagicMock()
+        store.read.return_value = {
+            "status": "training",
+            "epoch": 3,
+            "epochs": 10,
+            "metrics": {"loss": 0.3},
+            "eta_seconds": 70.0,
+        }
+
+        # Ejecución.
+        with patch("app.api.routes.classifiers.training_progress", store):
+            result = await read_training_progress(
+                session=mock_session,
+                current_user=mock_user,
+                classifier_id=mock_classifier.id,
+            )
+
+        # Verificación.
+        assert result.classifier_id == mock_classifier.id
+        assert result.status == "training"
+        assert result.epoch == 3
+        assert result.metrics == {"loss": 0.3}
+
+    async def test_read_training_progress_prefers_database_status(
+        self, mock_session, mock_user, mock_classifier, mock_get_classifier_by_id
+    ):
+        """Prueba que un progreso desactualizado no oculta el estado final."""
+
+        # Preparación.
+        mock_get_classifier_by_id.return_value = mock_classifier
+        mock_classifier.user_id = mock_user.id
+        mock_classifier.status = "failed"
+        store = MagicMock()
+        store.read.return_value = {"status": "training", "epoch": 3}
+
+        # Ejecución.
+        with patch("app.api.routes.classifiers.training_progress", store):
+            result = await read_training_progress(
+                session=mock_session,
+                current_user=mock_user,
+                classifier_id=mock_classifier.id,
+            )
+
+        # Verificación.
+        assert result.status == "failed"
+
+    async def test_stream_training_progress_forbidden(
+        self, mock_session, mock_user, mock_classifier, mock_get_classifier_by_id
+    ):
+        """Prueba de error al seguir el progreso de un clasificador ajeno."""
+
+        # Preparación.
+        mock_get_classifier_by_id.return_value = mock_classifier
+
+        # Ejecución y verificación.
+        with pytest.raises(HTTPException) as exc_info:
+            await stream_training_progress(
+                request=MagicMock(),
+                session=mock_session,
+                current_user=mock_user,
+                classifier_id=mock_classifier.id,
+            )
+
+        assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
+
+    async def test_cancel_training(
+        self, mock_session, mock_user, mock_classifier, mock_get_classifier_by_id
+    ):
+        """Prueba que se pide al worker detener un entrenamiento en curso."""
+
+        # Preparación.
+        mock_get_classifier_by_id.return_value = mock_classifier
+        mock_classifier.user_id = mock_user.id
+        mock_classifier.status = "training"
+        store = MagicMock()
+
+        # Ejecución.
+        with patch("app.crud.classifiers.training_progress", store):
+            result = await cancel_training(
+                session=mock_session,
+                current_user=mock_user,
+                classifier_id=mock_classifier.id,
+            )
+
+        # Verificación.
+        store.request_cancel.assert_called_once_with(mock_classifier.id)
+        assert result.message == "Training cancellation requested"
+
+    async def test_cancel_training_not_training(
+        self, mock_session, mock_user, mock_classifier, mock_get_classifier_by_id
+    ):
+        """Prueba de error al cancelar un clasificador que no se está entrenando."""
+
+        # Preparación.
+        mock_get_classifier_by_id.return_value = mock_classifier
+        mock_classifier.user_id = mock_user.id
+        store = MagicMock()
+
+        # Ejecución y verificación.
+        with patch("app.crud.classifiers.training_progress", store):
+            with pytest.raises(HTTPException) as exc_info:
+                await cancel_training(
+                    session=mock_session,
+                    current_user=mock_user,
+                    classifier_id=mock_classifier.id,
+                )
+
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+        assert exc_info.value.detail == "Classifier is not training"
+        store.request_cancel.assert_not_called()
+
+    async def test_retrain_classifier_in_training(
+        self, mock_session, mock_user, mock_classifier, mock_get_classifier_by_id
+    ):
+        """Prueba de error al continuar el entrenamiento de un clasificador en curso."""
+
+        # Preparación.
+        mock_get_classifier_by_id.return_value = mock_classifier
+        mock_classifier.user_id = mock_user.id
+        mock_classifier.status = ClassifierTrainingStatus.TRAINING
+
+        # Ejecución y verificación.
+        with patch("app.crud.classifiers.start_training_task") as mock_train:
+            with pytest.raises(HTTPException) as exc_info:
+                await retrain_classifier(
+                    session=mock_session,
+                    current_user=mock_user,
+                    classifier_id=mock_classifier.id,
+                    retrain_in=ClassifierRetrain(),
+                )
+
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+        assert exc_info.value.detail == "Classifier is already training"
+        mock_train.assert_not_called()
+
+    async def test_distill_classifier_name_exists(
+        self, mock_session, mock_user, mock_classifier, mock_get_classifier_by_id
+    ):
+        """Prueba de error al destilar un clasificador con un nombre que ya existe."""
+
+        # Preparación.
+        mock_get_classifier_by_id.return_value = mock_classifier
+        mock_classifier.user_id = mock_user.id
+
+        # Ejecución y verificación.
+        with patch(
+            "app.api.routes.classifiers.crud_classifiers.get_classifier_by_userid_and_name",
+            return_value=MagicMock(),
+        ), patch("app.crud.classifiers.start_training_task") as mock_train:
+            with pytest.raises(HTTPException) as exc_info:
+                await distill_classifier(
+                    session=mock_session,
+                    current_user=mock_user,
+                    classifier_id=mock_classifier.id,
+                    distill_in=ClassifierDistill(name="Test Classifier"),
+                )
+
+        assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+        assert (
+            exc_info.value.detail == "The user already has a classifier with that name"
+        )
+        mock_train.assert_not_called()
+
+    async def test_progress_events_until_training_ends(self, tmp_path):
+        """Prueba que se envía cada actualización y se cierra al terminar."""
+
+        # Preparación.
+        store = TrainingProgressStore(str(tmp_path))
+        classifier_id = uuid.uuid4()
+        store.start(classifier_id, epochs=2)
+        request = MagicMock()
+        request.is_disconnected = AsyncMock(return_value=False)
+        updates = iter(
+            [
+                {"epoch": 1},
+                {"epoch": 2},
+                {"status": "trained"},
+            ]
+        )
+
+        async def fake_sleep(_):
+            store.update(classifier_id, **next(updates))
+            # Forzar un cambio de versión aunque el sistema de archivos sea rápido.
+            os.utime(
+                store.path(classifier_id), ns=(0, store.version(classifier_id) + 1)
+            )
+
+        # Ejecución.
+        with patch("app.api.routes.classifiers.training_progress", store), patch(
+            "app.api.routes.classifiers.asyncio.sleep", fake_sleep
+        ):
+            events = [
+                event
+                async for event in progress_events(
+                    request, classifier_id, {"status": "training", "epoch": 0}
+                )
+            ]
+
+        # Verificación.
+        assert len(events) == 4
+        assert all(event.startswith("event: progress\ndata: ") for event in events)
+        assert '"epoch": 2' in events[2]
+        assert '"status": "trained"' in events[3]
+
+    async def test_progress_events_finished_training(self):
+        """Prueba que un entrenamiento terminado envía un único evento."""
+
+        # Preparación.
+        request = MagicMock()
+        request.is_disconnected = AsyncMock(return_value=False)
+
+        # Ejecución.
+        events = [
+            event
+            async for event in progress_events(
+                request, uuid.uuid4(), {"status": "trained"}
+            )
+        ]
+
+        # Verificación.
+        assert len(events) == 1
@@ -0,0 +1,207 @@
+import pytest
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch, MagicMock
+
+from fastapi import HTTPException, status
+
+from app.api.routes.predictions import (
+    create_prediction_job,
+    read_prediction_job,
+    read_prediction_results,
+)
+from app.models.classifiers import ClassifierTrainingStatus
+from app.models.predictions import (
+    PredictionJob,
+    PredictionJobCreate,
+    PredictionJobStatus,
+    PredictionResult,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def trained_classifier(mock_user):
+    """Clasificador entrenado perteneciente al usuario de prueba."""
+
+    classifier = MagicMock()
+    classifier.id = uuid.uuid4()
+    classifier.user_id = mock_user.id
+    classifier.status = ClassifierTrainingStatus.TRAINED
+    classifier.file_path = "models/test"
+    return classifier
+
+
+def _make_job(user_id, **kwargs):
+    return PredictionJob(
+        user_id=user_id,
+        classifier_id=uuid.uuid4(),
+        dataset_id=uuid.uuid4(),
+        created_at=datetime.now(timezone.utc),
+        **kwargs,
+    )
+
+
+class TestPredictionRoutes:
+
+    async def test_create_prediction_job_success(
+        self, mock_session, mock_user, mock_dataset, trained_classifier
+    ):
+        """Prueba lanzar un trabajo de inferencia masiva."""
+
+        # Preparación.
+        mock_dataset.user_id = mock_user.id
+        job = _make_job(mock_user.id)
+
+        with patch(
+            "app.api.routes.predictions.get_classifier_by_id",
+            return_value=trained_classifier,
+        ), patch(
+            "app.api.routes.predictions.get_dataset_by_id", return_value=mock_dataset
+        ), patch(
+            "app.api.routes.predictions.crud_predictions.create_prediction_job",
+            return_value=job,
+        ) as mock_create:
+
+            # Ejecución.
+            result = await create_prediction_job(
+                session=mock_session,
+                current_user=mock_user,
+                job_in=PredictionJobCreate(
+                    classifier_id=trained_classifier.id,
+                    dataset_id=mock_dataset.id,
+                    top_k=2,
+                ),
+            )
+
+        # Verificación.
+        assert result.id == job.id
+        assert result.status == PredictionJobStatus.PENDING
+        assert mock_create.call_args.kwargs["top_k"] == 2
+
+    async def test_create_prediction_job_untrained_classifier(
+        self, mock_session, mock_user, trained_classifier
+    ):
+        """Prueba de error al lanzar un trabajo con un clasificador sin entrenar."""
+
+        # Preparación.
+        trained_classifier.status = ClassifierTrainingStatus.TRAINING
+
+        # Ejecución y verificación.
+        with patch(
+            "app.api.routes.predictions.get_classifier_by_id",
+            return_value=trained_classifier,
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await create_prediction_job(
+                    session=mock_session,
+                    current_user=mock_user,
+                    job_in=PredictionJobCreate(
+                        classifier_id=trained_classifier.id, dataset_id=uuid.uuid4()
+                    ),
+                )
+
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_create_prediction_job_private_dataset(
+        self, mock_session, mock_user, mock_dataset, trained_classifier
+    ):
+        """Prueba de error al predecir sobre un dataset privado de otro usuario."""
+
+        # Ejecución y verificación.
+        with patch(
+            "app.api.routes.predictions.get_classifier_by_id",
+            return_value=trained_classifier,
+        ), patch(
+            "app.api.routes.predictions.get_dataset_by_id", return_value=mock_dataset
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await create_prediction_job(
+                    session=mock_session,
+                    current_user=mock_user,
+                    job_in=PredictionJobCreate(
+                        classifier_id=trained_classifier.id, dataset_id=mock_dataset.id
+                    ),
+                )
+
+        assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
+
+    async def test_read_prediction_job_progress(self, mock_session, mock_user):
+        """Prueba obtener el progreso de un trabajo en curso."""
+
+        # Preparación.
+        job = _make_job(
+            mock_user.id,
+            status=PredictionJobStatus.RUNNING,
+            total_images=400,
+            processed_images=100,
+        )
+
+        with patch(
+            "app.api.routes.predictions.crud_predictions.get_prediction_job_by_id",
+            return_value=job,
+        ):
+            # Ejecución.
+            result = await read_prediction_job(
+                session=mock_session, current_user=mock_user, job_id=job.id
+            )
+
+        # Verificación.
+        assert result.progress == 0.25
+        assert result.processed_images == 100
+
+    async def test_read_prediction_job_forbidden(self, mock_session, mock_user):
+        """Prueba de error al consultar el trabajo de otro usuario."""
+
+        # Preparación.
+        job = _make_job(uuid.uuid4())
+
+        # Ejecución y verificación.
+        with patch(
+            "app.api.routes.predictions.crud_predictions.get_prediction_job_by_id",
+            return_value=job,
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await read_prediction_job(
+                    session=mock_session, current_user=mock_user, job_id=job.id
+                )
+
+        assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
+
+    async def test_read_prediction_results(self, mock_session, mock_user):
+        """Prueba obtener una página de resultados de un trabajo."""
+
+        # Preparación.
+        job = _make_job(mock_user.id, status=PredictionJobStatus.COMPLETED)
+        results = [
+            PredictionResult(
+                job_id=job.id,
+                image_id=uuid.uuid4(),
+                image_name="a.jpg",
+                predicted_class="cat",
+                confidence=0.9,
+                top_k=[{"class": "cat", "confidence": 0.9}],
+            )
+        ]
+
+        with patch(
+            "app.api.routes.predictions.crud_predictions.get_prediction_job_by_id",
+            return_value=job,
+        ), patch(
+            "app.api.routes.predictions.crud_predictions.get_prediction_results",
+            return_value=(results, 1),
+        ) as mock_results:
+            # Ejecución.
+            page = await read_prediction_results(
+                session=mock_session,
+                current_user=mock_user,
+                job_id=job.id,
+                skip=0,
+                limit=10,
+            )
+
+        # Verificación.
+        assert page.count == 1
+        assert page.results[0].predicted_class == "cat"
+        assert mock_results.call_args.kwargs["limit"] == 10
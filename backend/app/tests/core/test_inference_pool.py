@@ -0,0 +1,67 @@
+import time
+import asyncio
+import threading
+import pytest
+
+from app.core.inference_pool import (
+    InferencePool,
+    InferencePoolSaturatedError,
+    InferenceTimeoutError,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestInferencePool:
+
+    async def test_run_returns_result(self):
+        """Prueba que el pool ejecuta la función fuera del hilo principal."""
+
+        # Preparación.
+        pool = InferencePool(max_workers=1, max_pending=2, timeout=5)
+        main_thread = threading.get_ident()
+
+        # Ejecución.
+        result = await pool.run(lambda x, y=0: (x + y, threading.get_ident()), 1, y=2)
+
+        # Verificación.
+        assert result[0] == 3
+        assert result[1] != main_thread
+        stats = pool.stats()
+        assert stats["completed"] == 1
+        assert stats["pending"] == 0
+        pool.shutdown()
+
+    async def test_run_rejects_when_saturated(self):
+        """Prueba que se rechazan trabajos cuando se alcanza el límite de pendientes."""
+
+        # Preparación.
+        pool = InferencePool(max_workers=1, max_pending=1, timeout=5)
+        release = threading.Event()
+        running = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+
+        # Ejecución y verificación.
+        with pytest.raises(InferencePoolSaturatedError):
+            await pool.run(lambda: None)
+
+        release.set()
+        await running
+        assert pool.stats()["rejected"] == 1
+        pool.shutdown()
+
+    async def test_run_timeout_keeps_slot_until_finished(self):
+        """Prueba que un trabajo expirado mantiene su plaza hasta terminar."""
+
+        # Preparación.
+        pool = InferencePool(max_workers=1, max_pending=1, timeout=5)
+
+        # Ejecución y verificación.
+        with pytest.raises(InferenceTimeoutError):
+            await pool.run(time.sleep, 0.3, timeout=0.05)
+
+        assert pool.stats()["pending"] == 1
+        await asyncio.sleep(0.4)
+        assert pool.stats()["pending"] == 0
+        assert pool.stats()["timed_out"] == 1
+        pool.shutdown()
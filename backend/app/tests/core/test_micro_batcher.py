@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+
+from app.core.inference_pool import InferencePool
+from app.core.micro_batcher import MicroBatcher
+
+pytestmark = pytest.mark.asyncio
+
+
+def _images(values):
+    """Genera un lote de imágenes 1x1 con el valor indicado en cada una."""
+
+    return np.array(values, dtype=np.uint8).reshape(-1, 1, 1, 1)
+
+
+class TestMicroBatcher:
+
+    async def test_concurrent_requests_share_forward_pass(self):
+        """Prueba que peticiones concurrentes se agrupan en una sola pasada."""
+
+        # Preparación.
+        pool = InferencePool(max_workers=1, max_pending=4, timeout=5)
+        batcher = MicroBatcher(pool=pool, max_batch_size=8, max_wait_ms=50)
+        predict_fn = MagicMock(side_effect=lambda batch: batch.reshape(-1, 1) * 2)
+
+        # Ejecución.
+        results = await asyncio.gather(
+            batcher.predict("c1", "v1", predict_fn, _images([1])),
+            batcher.predict("c1", "v1", predict_fn, _images([2, 3])),
+            batcher.predict("c1", "v1", predict_fn, _images([4])),
+        )
+
+        # Verificación.
+        assert predict_fn.call_count == 1
+        assert [r.ravel().tolist() for r in results] == [[2], [4, 6], [8]]
+        stats = batcher.stats()["totals"]
+        assert stats["batches"] == 1
+        assert stats["requests"] == 3
+        assert stats["images"] == 4
+        pool.shutdown()
+
+    async def test_idle_queues_are_removed(self):
+        """Prueba que las colas se eliminan al vaciarse y se recrean al volver a usarse."""
+
+        # Preparación.
+        pool = InferencePool(max_workers=1, max_pending=4, timeout=5)
+        batcher = MicroBatcher(pool=pool, max_batch_size=8, max_wait_ms=5)
+        predict_fn = MagicMock(side_effect=lambda batch: batch.reshape(-1, 1))
+
+        # Ejecución.
+        pending = asyncio.ensure_future(
+            batcher.predict("c1", "v1", predict_fn, _images([1]))
+        )
+        await asyncio.sleep(0)
+        active = batcher.stats()["models"]
+        await pending
+        await asyncio.sleep(0)
+        idle = batcher.stats()["models"]
+        result = await batcher.predict("c1", "v2", predict_fn, _images([2]))
+        await asyncio.sleep(0)
+
+        # Verificación.
+        assert active["c1"]["queued_requests"] == 1
+        assert idle == {}
+        assert result.ravel().tolist() == [2]
+        assert batcher.stats()["models"] == {}
+        assert batcher.stats()["totals"]["batches"] == 2
+        pool.shutdown()
+
+    async def test_different_versions_are_not_mixed(self):
+        """Prueba que no se mezclan imágenes de distintas versiones del modelo."""
+
+        # Preparación.
+        pool = InferencePool(max_workers=1, max_pending=4, timeout=5)
+        batcher = MicroBatcher(pool=pool, max_batch_size=8, max_wait_ms=20)
+        predict_fn = MagicMock(side_effect=lambda batch: batch.reshape(-1, 1))
+
+        # Ejecución.
+        await asyncio.gather(
+            batcher.predict("c1", "v1", predict_fn, _images([1])),
+            batcher.predict("c1", "v2", predict_fn, _images([2])),
+        )
+
+        # Verificación.
+        assert predict_fn.call_count == 2
+        pool.shutdown()
+
+    async def test_large_request_bypasses_queue(self):
+        """Prueba que una petición que ya llena un lote se ejecuta directamente."""
+
+        # Preparación.
+        pool = InferencePool(max_workers=1, max_pending=4, timeout=5)
+        batcher = MicroBatcher(pool=pool, max_batch_size=2, max_wait_ms=1000)
+        predict_fn = MagicMock(side_effect=lambda batch: batch.reshape(-1, 1))
+
+        # Ejecución.
+        result = await batcher.predict("c1", "v1", predict_fn, _images([1, 2, 3]))
+
+        # Verificación.
+        assert result.ravel().tolist() == [1, 2, 3]
+        assert batcher.stats()["models"] == {}
+        pool.shutdown()
+
+    async def test_errors_propagate_to_all_requests(self):
+        """Prueba que un error en la pasada del modelo llega a todas las peticiones."""
+
+        # Preparación.
+        pool = InferencePool(max_workers=1, max_pending=4, timeout=5)
+        batcher = MicroBatcher(pool=pool, max_batch_size=8, max_wait_ms=20)
+        predict_fn = MagicMock(side_effect=RuntimeError("model failure"))
+
+        # Ejecución.
+        results = await asyncio.gather(
+            batcher.predict("c1", "v1", predict_fn, _images([1])),
+            batcher.predict("c1", "v1", predict_fn, _images([2])),
+            return_exceptions=True,
+        )
+
+        # Verificación.
+        assert all(isinstance(r, RuntimeError) for r in results)
+        pool.shutdown()
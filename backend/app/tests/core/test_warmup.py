@@ -0,0 +1,220 @@
+import uuid
+import pytest
+import threading
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.classifiers import Classifier, ClassifierTrainingStatus
+from app.core.warmup import (
+    ClassifierUsage,
+    WarmupState,
+    select_warmup_classifiers,
+    warm_up_classifier,
+    warm_up_models,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+def _make_classifier(trained_days_ago=0):
+    return Classifier(
+        id=uuid.uuid4(),
+        name="Test",
+        user_id=uuid.uuid4(),
+        status=ClassifierTrainingStatus.TRAINED,
+        architecture="resnet50",
+        file_path="models/test",
+        trained_at=datetime.now(timezone.utc) - timedelta(days=trained_days_ago),
+    )
+
+
+def _session_returning(classifiers):
+    session = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = classifiers
+    session.execute = AsyncMock(return_value=result)
+    return session
+
+
+class TestWarmup:
+
+    async def test_usage_is_persisted_and_merged(self, tmp_path):
+        """Prueba que el uso de varios procesos se acumula en el registro."""
+
+        # Preparación.
+        path = str(tmp_path / "cache" / "usage.json")
+        first, second = ClassifierUsage(path), ClassifierUsage(path)
+
+        # Ejecución.
+        first.record("a")
+        first.record("a")
+        first.save()
+        second.record("a")
+        second.record("b")
+        second.save()
+
+        # Verificación.
+        usage = ClassifierUsage(path).load()
+        assert usage["a"]["count"] == 3
+        assert usage["b"]["count"] == 1
+
+    async def test_concurrent_saves_keep_every_count(self, tmp_path):
+        """Prueba que los procesos que guardan a la vez no pisan el uso de los demás."""
+
+        # Preparación.
+        path = str(tmp_path / "cache" / "usage.json")
+        workers = [ClassifierUsage(path) for _ in range(4)]
+
+        def record_and_save(usage):
+            for _ in range(20):
+                usage.record("a")
+                usage.save()
+
+        # Ejecución.
+        threads = [
+            threading.Thread(target=record_and_save, args=(usage,)) for usage in workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Verificación.
+        assert ClassifierUsage(path).load()["a"]["count"] == 80
+
+    async def test_failed_save_keeps_pending_usage(self, tmp_path):
+        """Prueba que el uso no guardado se conserva para la siguiente escritura."""
+
+        # Preparación.
+        path = str(tmp_path / "cache" / "usage.json")
+        usage = ClassifierUsage(path)
+        usage.record("a")
+
+        # Ejecución.
+        with patch("app.core.warmup.os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                usage.save()
+        usage.record("a")
+        usage.save()
+
+        # Verificación.
+        assert ClassifierUsage(path).load()["a"]["count"] == 2
+
+    async def test_select_frequent_classifiers(self):
+        """Prueba que se priorizan los clasificadores más usados."""
+
+        # Preparación.
+        newest, popular, old = (
+            _make_classifier(0),
+            _make_classifier(5),
+            _make_classifier(9),
+        )
+        usage = ClassifierUsage("/nonexistent/usage.json")
+        for _ in range(3):
+            usage.record(popular.id)
+
+        # Ejecución.
+        with patch("app.core.warmup.classifier_usage", usage):
+            selected = await select_warmup_classifiers(
+                _session_returning([old, newest, popular]), "frequent", limit=2
+            )
+
+        # Verificación.
+        assert selected == [popular, newest]
+
+    async def test_select_recent_queries_only_candidates(self):
+        """Prueba que se ordena y limita en SQL sin leer las métricas."""
+
+        # Preparación.
+        used, newest = _make_classifier(9), _make_classifier(0)
+        usage = ClassifierUsage("/nonexistent/usage.json")
+        usage.record(used.id)
+        session = _session_returning([used, newest])
+
+        # Ejecución.
+        with patch("app.core.warmup.classifier_usage", usage):
+            selected = await select_warmup_classifiers(session, "recent", limit=1)
+
+        # Verificación.
+        statements = [str(call.args[0]) for call in session.execute.call_args_list]
+        assert selected == [used]
+        assert "classifiers.id IN" in statements[0]
+        assert "ORDER BY classifiers.trained_at DESC" in statements[1]
+        assert "LIMIT" in statements[1]
+        assert all("metrics" not in statement for statement in statements)
+
+    async def test_select_explicit_ids(self):
+        """Prueba que se respeta el orden de una lista explícita de IDs."""
+
+        # Preparación.
+        first, second = _make_classifier(), _make_classifier()
+        strategy = f"{second.id}, not-a-uuid, {first.id}"
+
+        # Ejecución.
+        selected = await select_warmup_classifiers(
+            _session_returning([first, second]), strategy, limit=5
+        )
+
+        # Verificación.
+        assert selected == [second, first]
+
+    async def test_warm_up_classifier_runs_dummy_batch(self):
+        """Prueba que se ejecuta una pasada con el tamaño de entrada del modelo."""
+
+        # Preparación.
+        classifier = _make_classifier()
+        cached_model = MagicMock()
+        cached_model.metadata = {"train_params": {"image_size": [20, 10]}}
+        cached_model.model.predict_on_batch.return_value = np.zeros((1, 1))
+
+        # Ejecución.
+        with patch("app.core.warmup.model_cache") as mock_cache:
+            mock_cache.get.return_value = cached_model
+            warm_up_classifier(classifier)
+
+        # Verificación.
+        batch = cached_model.model.predict_on_batch.call_args.args[0]
+        assert batch.shape == (1, 10, 20, 3)
+
+    async def test_warm_up_models_reports_progress(self):
+        """Prueba que el estado de la precarga refleja cada modelo."""
+
+        # Preparación.
+        ok, broken = _make_classifier(), _make_classifier()
+        state = WarmupState()
+
+        async def session_factory():
+            yield MagicMock()
+
+        def fake_warm_up(classifier):
+            if classifier is broken:
+                raise FileNotFoundError("missing")
+
+        async def run_inline(func, *args, **kwargs):
+            return func(*args, **kwargs)
+
+        # Ejecución.
+        with patch("app.core.warmup.warmup_state", state), patch(
+            "app.core.warmup.WARMUP_CLASSIFIERS", "recent"
+        ), patch(
+            "app.core.warmup.select_warmup_classifiers",
+            AsyncMock(return_value=[ok, broken]),
+        ), patch(
+            "app.core.warmup.warm_up_classifier", fake_warm_up
+        ), patch(
+            "app.core.warmup.inference_pool.run", run_inline
+        ):
+            await warm_up_models(session_factory)
+
+        # Verificación.
+        snapshot = state.snapshot()
+        assert snapshot["status"] == "completed"
+        assert snapshot["warmed"] == 1
+        assert snapshot["failed"] == 1
+        assert snapshot["finished_at"] is not None
+        assert "models" not in snapshot
+        assert [m["status"] for m in state.snapshot(include_models=True)["models"]] == [
+            "warmed",
+            "failed",
+        ]
@@ -1,14 +1,21 @@
+import io
 import pytest
 import uuid
+import threading
+import numpy as np
+from PIL import Image as PILImage
 from unittest.mock import patch, MagicMock, AsyncMock
 
 from app.models.classifiers import (
     Classifier,
     ClassifierCreate,
     ClassifierUpdate,
+    ClassifierRetrain,
+    ClassifierDistill,
     ClassifierTrainingStatus,
 )
 
+from app.ml.prediction_cache import PredictionCache
 from app.crud.classifiers import (
     get_classifier_by_id,
     get_classifier_by_userid_and_name,
@@ -17,6 +24,9 @@ from app.crud.classifiers import (
     delete_classifier,
     update_classifier_training_status,
     get_classifiers_sorted,
+    perform_inference,
+    retrain_classifier,
+    distill_classifier,
 )
 
 pytestmark = pytest.mark.asyncio
@@ -203,6 +213,55 @@ class TestClassifiersCrud:
         mock_session.delete.assert_called_once_with(mock_classifier)
         mock_session.commit.assert_called_once()
 
+    async def test_delete_classifier_invalidates_model_cache(self, mock_session):
+        """Prueba que eliminar un clasificador descarta su modelo de la caché."""
+
+        # Preparación.
+        mock_classifier = MagicMock()
+        mock_classifier.file_path = None
+
+        with patch("app.crud.classifiers.model_cache") as mock_cache:
+            # Ejecución.
+            await delete_classifier(session=mock_session, classifier=mock_classifier)
+
+            # Verificación.
+            mock_cache.invalidate.assert_called_once_with(mock_classifier.id)
+
+    async def test_delete_classifier_cancels_training(self, mock_session):
+        """Prueba que eliminar un clasificador en entrenamiento detiene el worker."""
+
+        # Preparación.
+        mock_classifier = MagicMock()
+        mock_classifier.file_path = None
+        mock_classifier.status = "training"
+
+        with patch("app.crud.classifiers.training_progress") as mock_progress:
+            # Ejecución.
+            await delete_classifier(session=mock_session, classifier=mock_classifier)
+
+            # Verificación.
+            mock_progress.request_cancel.assert_called_once_with(mock_classifier.id)
+
+    async def test_delete_classifier_removes_unpublished_artifacts(
+        self, mock_session, tmp_path
+    ):
+        """Prueba que se elimina el directorio con artefactos sin publicar."""
+
+        # Preparación.
+        mock_classifier = MagicMock()
+        mock_classifier.id = uuid.uuid4()
+        mock_classifier.file_path = None
+        staging_dir = tmp_path / str(mock_classifier.id) / "staging"
+        staging_dir.mkdir(parents=True)
+        (staging_dir / "model.tflite").write_bytes(b"model")
+
+        with patch("app.crud.classifiers.MODELS_DIR", str(tmp_path)):
+            # Ejecución.
+            await delete_classifier(session=mock_session, classifier=mock_classifier)
+
+        # Verificación.
+        assert not (tmp_path / str(mock_classifier.id)).exists()
+
     async def test_delete_classifier_with_files(self, mock_session):
         """Prueba eliminar un clasificador con archivos asociados."""
 
@@ -232,6 +291,167 @@ class TestClassifiersCrud:
             mock_session.delete.assert_called_once_with(mock_classifier)
             mock_session.commit.assert_called_once()
 
+    async def test_retrain_classifier(self, mock_session, tmp_path):
+        """Prueba que se continúa el entrenamiento desde el modelo guardado."""
+
+        # Preparación.
+        (tmp_path / "models" / "test_model").mkdir(parents=True)
+        (tmp_path / "models" / "test_model" / "model.keras").write_bytes(b"model")
+        classifier = Classifier(
+            name="Test Classifier",
+            user_id=uuid.uuid4(),
+            dataset_id=uuid.uuid4(),
+            architecture="resnet50",
+            status=ClassifierTrainingStatus.FAILED,
+            file_path="models/test_model",
+            metrics={"accuracy": 0.9, "error_message": "Worker lost"},
+            model_parameters={
+                "learning_rate": 0.001,
+                "epochs": 20,
+                "image_size": [224, 224],
+                "search": {"max_trials": 4},
+                "distributed_workers": 2,
+            },
+        )
+
+        with patch("app.crud.classifiers.MEDIA_ROOT", str(tmp_path)), patch(
+            "app.crud.classifiers.start_training_task", return_value=True
+        ) as mock_train:
+            # Ejecución.
+            result = await retrain_classifier(
+                session=mock_session,
+                classifier=classifier,
+                retrain_in=ClassifierRetrain(epochs=3),
+            )
+
+            # Verificación.
+            mock_session.commit.assert_called_once()
+            parameters = mock_train.call_args.kwargs["model_parameters"]
+            assert parameters["warm_start"] == {"head": "expand"}
+            assert parameters["epochs"] == 3
+            assert parameters["learning_rate"] == pytest.approx(0.0001)
+            assert parameters["image_size"] == [224, 224]
+            assert "search" not in parameters
+            assert "distributed_workers" not in parameters
+            assert result.status == ClassifierTrainingStatus.TRAINING
+            assert result.metrics == {"accuracy": 0.9}
+            assert classifier.model_parameters["epochs"] == 20
+
+    async def test_retrain_classifier_without_model(self, mock_session, tmp_path):
+        """Prueba de error al continuar el entrenamiento sin un modelo guardado."""
+
+        # Preparación.
+        classifier = Classifier(
+            name="Test Classifier",
+            user_id=uuid.uuid4(),
+            dataset_id=uuid.uuid4(),
+            architecture="resnet50",
+            status=ClassifierTrainingStatus.CANCELLED,
+        )
+
+        with patch("app.crud.classifiers.MEDIA_ROOT", str(tmp_path)), patch(
+            "app.crud.classifiers.start_training_task", return_value=True
+        ) as mock_train:
+            # Ejecución y verificación.
+            with pytest.raises(ValueError, match="no trained model"):
+                await retrain_classifier(
+                    session=mock_session,
+                    classifier=classifier,
+                    retrain_in=ClassifierRetrain(),
+                )
+            with pytest.raises(ValueError, match="Invalid head mode"):
+                await retrain_classifier(
+                    session=mock_session,
+                    classifier=classifier,
+                    retrain_in=ClassifierRetrain(head="keep"),
+                )
+            mock_train.assert_not_called()
+
+    async def test_distill_classifier(self, mock_session, tmp_path):
+        """Prueba que se crea un alumno Xception Mini que aprende del profesor."""
+
+        # Preparación.
+        (tmp_path / "models" / "teacher").mkdir(parents=True)
+        (tmp_path / "models" / "teacher" / "model.keras").write_bytes(b"model")
+        teacher = Classifier(
+            name="Teacher",
+            user_id=uuid.uuid4(),
+            dataset_id=uuid.uuid4(),
+            architecture="efficientnetb3",
+            status=ClassifierTrainingStatus.TRAINED,
+            file_path="models/teacher",
+            model_parameters={
+                "batch_size": 16,
+                "validation_split": 0.3,
+                "image_size": [300, 300],
+            },
+        )
+        user_id = uuid.uuid4()
+
+        with patch("app.crud.classifiers.MEDIA_ROOT", str(tmp_path)), patch(
+            "app.crud.classifiers.start_training_task", return_value=True
+        ) as mock_train:
+            # Ejecución.
+            result = await distill_classifier(
+                session=mock_session,
+                teacher=teacher,
+                user_id=user_id,
+                distill_in=ClassifierDistill(name="Student", alpha=0.0),
+            )
+
+            # Verificación.
+            mock_session.add.assert_called_once_with(result)
+            mock_session.commit.assert_called_once()
+            parameters = mock_train.call_args.kwargs["model_parameters"]
+            assert mock_train.call_args.kwargs["classifier_architecture"] == (
+                "xception_mini"
+            )
+            assert parameters["distillation"] == {
+                "teacher_id": str(teacher.id),
+                "temperature": 4.0,
+                "alpha": 0.0,
+            }
+            assert parameters["image_size"] == [180, 180]
+            assert parameters["batch_size"] == 16
+            assert parameters["validation_split"] == 0.3
+            assert result.user_id == user_id
+            assert result.dataset_id == teacher.dataset_id
+            assert result.status == ClassifierTrainingStatus.TRAINING
+
+    async def test_distill_untrained_classifier(self, mock_session, tmp_path):
+        """Prueba de error al destilar un clasificador sin entrenar o sin modelo."""
+
+        # Preparación.
+        teacher = Classifier(
+            name="Teacher",
+            user_id=uuid.uuid4(),
+            dataset_id=uuid.uuid4(),
+            architecture="resnet50",
+            status=ClassifierTrainingStatus.FAILED,
+        )
+
+        with patch("app.crud.classifiers.MEDIA_ROOT", str(tmp_path)), patch(
+            "app.crud.classifiers.start_training_task", return_value=True
+        ) as mock_train:
+            # Ejecución y verificación.
+            with pytest.raises(ValueError, match="Only a trained classifier"):
+                await distill_classifier(
+                    session=mock_session,
+                    teacher=teacher,
+                    user_id=teacher.user_id,
+                    distill_in=ClassifierDistill(name="Student"),
+                )
+            teacher.status = ClassifierTrainingStatus.TRAINED
+            with pytest.raises(ValueError, match="no trained model"):
+                await distill_classifier(
+                    session=mock_session,
+                    teacher=teacher,
+                    user_id=teacher.user_id,
+                    distill_in=ClassifierDistill(name="Student"),
+                )
+            mock_train.assert_not_called()
+            mock_session.commit.assert_not_called()
+
     async def test_get_classifiers_sorted_user_view(self, mock_session):
         """Prueba obtener clasificadores ordenados (vista de usuario)."""
 
@@ -310,3 +530,134 @@ class TestClassifiersCrud:
         assert len(classifiers) == 2
         assert classifiers[0][0] == mock_classifier1
         assert classifiers[1][0] == mock_classifier2
+
+    async def test_perform_inference_batches_valid_images(self):
+        """Prueba que la inferencia predice en lote y reporta las imágenes inválidas."""
+
+        # Preparación.
+        buffered = io.BytesIO()
+        PILImage.new("RGB", (40, 40), (0, 128, 255)).save(buffered, format="JPEG")
+        valid_image = buffered.getvalue()
+
+        mock_classifier = MagicMock()
+        mock_classifier.file_path = "models/test_model"
+        mock_classifier.status = ClassifierTrainingStatus.TRAINED
+        mock_classifier.architecture = "xception_mini"
+        mock_classifier.name = "Test Classifier"
+
+        cached_model = MagicMock()
+        cached_model.metadata = {
+            "class_mapping": {"0": "cat", "1": "dog"},
+            "train_params": {"image_size": [32, 32]},
+        }
+        cached_model.model.predict_on_batch.side_effect = lambda batch: np.full(
+            (len(batch), 1), 0.75
+        )
+
+        with patch("app.crud.classifiers.model_cache") as mock_cache:
+            mock_cache.get.return_value = cached_model
+
+            # Ejecución.
+            result = await perform_inference(
+                classifier=mock_classifier,
+                image_files=[valid_image, b"corrupt", valid_image],
+                filenames=["a.jpg", "b.jpg", "c.jpg"],
+            )
+
+        # Verificación.
+        cached_model.model.predict_on_batch.assert_called_once()
+        statuses = [r["status"] for r in result["results"]]
+        assert statuses == ["success", "failed", "success"]
+        assert result["results"][0]["predicted_class"] == "dog"
+        assert result["results"][1]["filename"] == "b.jpg"
+        assert result["processed_images"] == 3
+
+    async def test_perform_inference_without_thumbnails(self):
+        """Prueba que la inferencia puede omitir las miniaturas de los resultados."""
+
+        # Preparación.
+        buffered = io.BytesIO()
+        PILImage.new("RGB", (40, 40), (0, 128, 255)).save(buffered, format="JPEG")
+
+        mock_classifier = MagicMock()
+        mock_classifier.file_path = "models/test_model"
+        mock_classifier.status = ClassifierTrainingStatus.TRAINED
+        mock_classifier.architecture = "xception_mini"
+
+        cached_model = MagicMock()
+        cached_model.metadata = {
+            "class_mapping": {"0": "cat", "1": "bird", "2": "dog"},
+            "train_params": {"image_size": [32, 32]},
+        }
+        cached_model.model.predict_on_batch.side_effect = lambda batch: np.tile(
+            [0.1, 0.2, 0.7], (len(batch), 1)
+        )
+
+        with patch("app.crud.classifiers.model_cache") as mock_cache:
+            mock_cache.get.return_value = cached_model
+
+            # Ejecución.
+            result = await perform_inference(
+                classifier=mock_classifier,
+                image_files=[buffered.getvalue()],
+                filenames=["a.jpg"],
+                include_thumbnails=False,
+            )
+
+        # Verificación.
+        assert result["results"][0]["predicted_class"] == "dog"
+        assert "thumbnail" not in result["results"][0]
+
+    async def test_perform_inference_uses_prediction_cache(self):
+        """Prueba que una imagen repetida se sirve desde la caché sin ejecutar el modelo."""
+
+        # Preparación.
+        buffered = io.BytesIO()
+        PILImage.new("RGB", (40, 40), (0, 128, 255)).save(buffered, format="JPEG")
+        image = buffered.getvalue()
+
+        mock_classifier = MagicMock()
+        mock_classifier.id = uuid.uuid4()
+        mock_classifier.file_path = "models/test_model"
+        mock_classifier.status = ClassifierTrainingStatus.TRAINED
+        mock_classifier.architecture = "xception_mini"
+
+        cached_model = MagicMock()
+        cached_model.version = "v1"
+        cached_model.metadata = {
+            "class_mapping": {"0": "cat", "1": "dog"},
+            "train_params": {"image_size": [32, 32]},
+        }
+        cached_model.model.predict_on_batch.side_effect = lambda batch: np.full(
+            (len(batch), 1), 0.75
+        )
+        cache = PredictionCache(max_entries=10, ttl_seconds=60)
+        put_threads = []
+        put_many = cache.put_many
+        cache.put_many = lambda *args: put_threads.append(
+            threading.get_ident()
+        ) or put_many(*args)
+
+        with patch("app.crud.classifiers.model_cache") as mock_cache, patch(
+            "app.crud.classifiers.prediction_cache", cache
+        ), patch("app.crud.classifiers.get_model_version", return_value="v1"):
+            mock_cache.get.return_value = cached_model
+
+            # Ejecución.
+            first = await perform_inference(
+                classifier=mock_classifier, image_files=[image], filenames=["a.jpg"]
+            )
+            second = await perform_inference(
+                classifier=mock_classifier,
+                image_files=[image, image],
+                filenames=["b.jpg", "c.jpg"],
+            )
+
+        # Verificación.
+        assert cached_model.model.predict_on_batch.call_count == 1
+        assert mock_cache.get.call_count == 1
+        assert second["results"][0]["predicted_class"] == "dog"
+        assert second["results"][1]["filename"] == "c.jpg"
+        assert second["results"][0]["thumbnail"] == first["results"][0]["thumbnail"]
+        assert cache.stats()["hits"] == 2
+        assert put_threads and threading.get_ident() not in put_threads
@@ -0,0 +1,100 @@
+import pytest
+import uuid
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from app.models.predictions import PredictionJob, PredictionJobStatus
+from app.crud.predictions import (
+    create_prediction_job,
+    get_prediction_results,
+    get_job_progress,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestPredictionsCrud:
+
+    async def test_create_prediction_job(self, mock_session):
+        """Prueba crear un trabajo de inferencia masiva y lanzar su tarea."""
+
+        # Preparación.
+        mock_session.add = MagicMock()
+
+        # Ejecución.
+        with patch("app.crud.predictions.predict_dataset") as mock_task:
+            job = await create_prediction_job(
+                session=mock_session,
+                user_id=uuid.uuid4(),
+                classifier_id=uuid.uuid4(),
+                dataset_id=uuid.uuid4(),
+                top_k=5,
+            )
+
+        # Verificación.
+        assert job.status == PredictionJobStatus.PENDING
+        assert job.top_k == 5
+        mock_session.commit.assert_called_once()
+        mock_task.delay.assert_called_once_with(job_id=str(job.id))
+
+    async def test_create_prediction_job_task_error(self, mock_session):
+        """Prueba que el trabajo queda fallido si no se puede lanzar la tarea."""
+
+        # Preparación.
+        mock_session.add = MagicMock()
+
+        # Ejecución y verificación.
+        with patch("app.crud.predictions.predict_dataset") as mock_task:
+            mock_task.delay.side_effect = Exception("Broker down")
+            with pytest.raises(ValueError):
+                await create_prediction_job(
+                    session=mock_session,
+                    user_id=uuid.uuid4(),
+                    classifier_id=uuid.uuid4(),
+                    dataset_id=uuid.uuid4(),
+                    top_k=3,
+                )
+
+        job = mock_session.add.call_args.args[0]
+        assert job.status == PredictionJobStatus.FAILED
+        assert mock_session.commit.call_count == 2
+
+    async def test_get_prediction_results(self, mock_session):
+        """Prueba obtener una página de resultados con su conteo total."""
+
+        # Preparación.
+        count_result = MagicMock()
+        count_result.scalar_one.return_value = 250
+        page = [MagicMock(), MagicMock()]
+        page_result = MagicMock()
+        page_result.scalars.return_value.all.return_value = page
+        mock_session.execute = AsyncMock(side_effect=[count_result, page_result])
+
+        # Ejecución.
+        results, count = await get_prediction_results(
+            session=mock_session, job_id=uuid.uuid4(), skip=100, limit=2
+        )
+
+        # Verificación.
+        assert results == page
+        assert count == 250
+        assert mock_session.execute.call_count == 2
+
+    async def test_get_job_progress(self):
+        """Prueba el cálculo del progreso de un trabajo."""
+
+        # Preparación.
+        job = PredictionJob(
+            user_id=uuid.uuid4(),
+            classifier_id=uuid.uuid4(),
+            dataset_id=uuid.uuid4(),
+            status=PredictionJobStatus.RUNNING,
+            total_images=200,
+            processed_images=50,
+        )
+        empty_job = PredictionJob(
+            user_id=uuid.uuid4(), classifier_id=uuid.uuid4(), dataset_id=uuid.uuid4()
+        )
+
+        # Verificación.
+        assert get_job_progress(job) == 0.25
+        assert get_job_progress(empty_job) == 0.0
@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+import pytest
+from tensorflow import keras
+
+from app.ml.callbacks import TrainingTimeBudget
+from app.tests.ml.utils import build_dataset, build_model
+
+
+class SlowBatches(keras.callbacks.Callback):
+    """Alarga cada lote y guarda los pesos y la pérdida de validación de cada época."""
+
+    def __init__(self):
+        super().__init__()
+        self.weights = []
+        self.val_losses = []
+
+    def on_train_batch_end(self, batch, logs=None):
+        time.sleep(0.05)
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.weights.append(self.model.get_weights())
+        self.val_losses.append(logs["val_loss"])
+
+
+class TestTrainingTimeBudget:
+
+    def test_budget_stops_training_with_best_weights(self):
+        """Prueba que el entrenamiento se detiene a tiempo con los pesos de la mejor época."""
+
+        # Preparación.
+        model = build_model(learning_rate=0.5)
+        dataset = build_dataset(12)
+        slow = SlowBatches()
+        budget = TrainingTimeBudget(0.6)
+
+        # Ejecución.
+        history = model.fit(
+            dataset,
+            validation_data=dataset,
+            epochs=50,
+            callbacks=[slow, budget.callback()],
+            verbose=0,
+        )
+
+        # Verificación.
+        best = int(np.argmin(slow.val_losses))
+        assert 1 <= len(history.history["loss"]) < 50
+        assert budget.stopped
+        assert budget.report()["stopped_early"]
+        for restored, saved in zip(model.get_weights(), slow.weights[best]):
+            np.testing.assert_allclose(restored, saved)
+
+    def test_budget_is_shared_between_phases(self):
+        """Prueba que cada fase recibe su parte del tiempo que queda."""
+
+        # Preparación.
+        budget = TrainingTimeBudget(10)
+        budget.started_at = time.monotonic() - 4
+        callback = budget.callback(share=0.5)
+
+        # Ejecución.
+        callback.on_train_begin()
+
+        # Verificación.
+        assert callback.deadline - time.monotonic() == pytest.approx(3, abs=0.5)
+        assert budget.remaining == pytest.approx(6, abs=0.5)
+
+    def test_training_within_budget_is_not_stopped(self):
+        """Prueba que un entrenamiento que cabe en el presupuesto completa sus épocas."""
+
+        # Preparación.
+        model = build_model(learning_rate=0.5)
+        budget = TrainingTimeBudget(600)
+
+        # Ejecución.
+        history = model.fit(
+            build_dataset(12), epochs=3, callbacks=[budget.callback()], verbose=0
+        )
+
+        # Verificación.
+        assert len(history.history["loss"]) == 3
+        assert not budget.stopped
@@ -0,0 +1,180 @@
+import numpy as np
+
+from app.ml.checkpoints import TrainingCheckpoint
+from app.ml.data_utils import split_dataset
+from app.tests.ml.utils import build_dataset, build_model
+
+
+class TestTrainingCheckpoint:
+
+    def test_resume_restores_weights_optimizer_and_history(self, tmp_path):
+        """Prueba que un entrenamiento reanudado continúa donde se quedó."""
+
+        # Preparación.
+        dataset = build_dataset()
+        checkpoint = TrainingCheckpoint(str(tmp_path), interval=1)
+        model = build_model(seed=0)
+        model.fit(
+            dataset,
+            epochs=2,
+            callbacks=[checkpoint.callback(model, "train")],
+            verbose=0,
+        )
+        saved_weights = [w.copy() for w in model.get_weights()]
+        saved_iterations = int(model.optimizer.iterations.numpy())
+
+        # Ejecución.
+        resumed = TrainingCheckpoint(str(tmp_path), interval=1)
+        new_model = build_model(seed=1)
+        initial_epoch = resumed.restore(new_model, "train")
+        restored_weights = new_model.get_weights()
+        new_model.fit(
+            dataset,
+            epochs=3,
+            initial_epoch=initial_epoch,
+            callbacks=[resumed.callback(new_model, "train")],
+            verbose=0,
+        )
+
+        # Verificación.
+        assert resumed.resumed
+        assert initial_epoch == 2
+        for saved, restored in zip(saved_weights, restored_weights):
+            np.testing.assert_allclose(saved, restored)
+        # El optimizador continúa su cuenta de pasos (4 lotes por época).
+        assert int(new_model.optimizer.iterations.numpy()) == saved_iterations + 4
+        assert len(resumed.history["loss"]) == 3
+        assert resumed.state["epoch"] == 3
+
+    def test_skip_phase_and_restore_other_phase(self, tmp_path):
+        """Prueba que las fases ya terminadas se omiten al reanudar."""
+
+        # Preparación.
+        model = build_model()
+        checkpoint = TrainingCheckpoint(str(tmp_path))
+        checkpoint.save(
+            model, model.optimizer, epoch=5, phase="fine_tune", head_epoch=4
+        )
+
+        # Ejecución.
+        resumed = TrainingCheckpoint(str(tmp_path))
+
+        # Verificación.
+        assert resumed.skip_phase("head")
+        assert not resumed.skip_phase("fine_tune")
+        assert resumed.restore(build_model(), "head") is None
+        assert resumed.restore(build_model(), "fine_tune") == 5
+        assert resumed.state["head_epoch"] == 4
+
+    def test_interval_limits_saves(self, tmp_path):
+        """Prueba que solo se guarda un checkpoint cada cierto número de épocas."""
+
+        # Preparación.
+        model = build_model()
+        checkpoint = TrainingCheckpoint(str(tmp_path), interval=2)
+
+        # Ejecución.
+        model.fit(
+            build_dataset(),
+            epochs=3,
+            callbacks=[checkpoint.callback(model, "train")],
+            verbose=0,
+        )
+
+        # Verificación.
+        assert checkpoint.state["epoch"] == 2
+        assert len(checkpoint.history["loss"]) == 3
+
+    def test_split_is_discarded_when_training_changes(self, tmp_path):
+        """Prueba que el checkpoint se descarta si cambian las clases o los parámetros."""
+
+        # Preparación.
+        config = {"architecture": "resnet50", "model_parameters": {"epochs": 10}}
+        checkpoint = TrainingCheckpoint(str(tmp_path))
+        checkpoint.save_split(
+            ["a.jpg", "b.jpg"], ["c.jpg"], {"cat": 0, "dog": 1}, config
+        )
+        model = build_model()
+        checkpoint.save(model, model.optimizer, epoch=1, phase="train")
+
+        # Ejecución.
+        same = TrainingCheckpoint(str(tmp_path)).load_split(
+            {"cat": 0, "dog": 1}, config
+        )
+        changed = TrainingCheckpoint(str(tmp_path))
+        discarded = changed.load_split({"cat": 0, "dog": 1, "fox": 2}, config)
+
+        # Verificación.
+        assert same == (["a.jpg", "b.jpg"], ["c.jpg"])
+        assert discarded is None
+        assert not changed.resumed
+        assert not TrainingCheckpoint(str(tmp_path)).resumed
+
+    def test_copy_to_resumes_with_new_configuration(self, tmp_path):
+        """Prueba que un checkpoint copiado se reanuda con otra configuración."""
+
+        # Preparación.
+        labels = {"cat": 0, "dog": 1}
+        checkpoint = TrainingCheckpoint(str(tmp_path / "trial"))
+        checkpoint.save_split(["a.jpg"], ["b.jpg"], labels, {"trial": 0})
+        model = build_model()
+        checkpoint.save(model, model.optimizer, epoch=3, phase="train")
+
+        # Ejecución.
+        copied = checkpoint.copy_to(str(tmp_path / "final"), {"final": True})
+
+        # Verificación.
+        assert copied.state["epoch"] == 3
+        assert copied.load_split(labels, {"final": True}) == (["a.jpg"], ["b.jpg"])
+        assert checkpoint.load_split(labels, {"trial": 0}) == (["a.jpg"], ["b.jpg"])
+
+
+class TestSplitDataset:
+
+    def test_fixed_split_keeps_previous_division(self):
+        """Prueba que una división guardada se respeta y las imágenes nuevas se entrenan."""
+
+        # Preparación.
+        image_paths = ["a.jpg", "b.jpg", "c.jpg", "new.jpg"]
+        labels = [0, 1, 0, 1]
+        split = (["a.jpg", "gone.jpg"], ["b.jpg", "c.jpg"])
+
+        # Ejecución.
+        train_paths, train_labels, val_paths, val_labels = split_dataset(
+            image_paths, labels, split=split
+        )
+
+        # Verificación.
+        assert train_paths == ["a.jpg", "new.jpg"]
+        assert train_labels == [0, 1]
+        assert val_paths == ["b.jpg", "c.jpg"]
+        assert val_labels == [1, 0]
+
+    def test_fixed_split_divides_new_images_by_class(self):
+        """Prueba que las imágenes nuevas se reparten por clase de forma reproducible."""
+
+        # Preparación.
+        old_paths = ["a.jpg", "b.jpg"]
+        new_paths = [f"fox_{i}.jpg" for i in range(10)] + ["cat_new.jpg"]
+        image_paths = old_paths + new_paths
+        labels = [0, 1] + [2] * 10 + [0]
+        split = (["a.jpg"], ["b.jpg"])
+
+        # Ejecución.
+        train_paths, _, val_paths, val_labels = split_dataset(
+            image_paths, labels, validation_split=0.2, split=split
+        )
+        repeated = split_dataset(
+            list(reversed(image_paths)),
+            list(reversed(labels)),
+            validation_split=0.2,
+            split=split,
+        )
+
+        # Verificación.
+        assert val_paths[0] == "b.jpg"
+        assert val_labels.count(2) == 2
+        assert "cat_new.jpg" in train_paths
+        assert sorted(train_paths + val_paths) == sorted(image_paths)
+        assert repeated[0] == train_paths
+        assert repeated[2] == val_paths
@@ -0,0 +1,109 @@
+import io
+
+import numpy as np
+import pytest
+import tensorflow as tf
+from PIL import Image
+
+from app.ml.benchmark import benchmark_augmentation
+from app.ml.data_utils import (
+    apply_data_augmentation,
+    decode_image_scaled,
+    load_and_preprocess_image,
+)
+
+
+def encode_image(width: int, height: int, image_format: str = "JPEG") -> bytes:
+    image = np.random.default_rng(0).integers(0, 256, (height, width, 3), np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+class TestImageDecoding:
+
+    @pytest.mark.parametrize(
+        "size, image_format, decoded_shape",
+        [
+            ((1600, 1200), "JPEG", (150, 200, 3)),
+            ((800, 600), "JPEG", (150, 200, 3)),
+            ((400, 300), "JPEG", (150, 200, 3)),
+            ((200, 150), "JPEG", (150, 200, 3)),
+            ((100, 80), "JPEG", (80, 100, 3)),
+            ((800, 600), "PNG", (600, 800, 3)),
+        ],
+    )
+    def test_decode_uses_largest_dct_ratio(self, size, image_format, decoded_shape):
+        """Prueba que los JPEG se decodifican reducidos sin quedar por debajo del destino."""
+
+        # Ejecución.
+        image = decode_image_scaled(
+            tf.constant(encode_image(*size, image_format)), (128, 128)
+        )
+
+        # Verificación.
+        assert tuple(image.shape) == decoded_shape
+        assert image.dtype == tf.uint8
+
+    def test_decode_non_square_target(self):
+        """Prueba que con un destino no cuadrado se compara cada eje con el suyo."""
+
+        # Ejecución.
+        image = decode_image_scaled(
+            tf.constant(encode_image(1600, 400)), image_size=(100, 400)
+        )
+
+        # Verificación.
+        assert tuple(image.shape) == (400, 1600, 3)
+
+    def test_load_returns_uint8_image(self, tmp_path):
+        """Prueba que la imagen cargada se entrega en uint8 con el tamaño pedido."""
+
+        # Preparación.
+        path = tmp_path / "image.jpg"
+        path.write_bytes(encode_image(640, 480))
+
+        # Ejecución.
+        image = load_and_preprocess_image(str(path), (32, 32))
+        wide = load_and_preprocess_image(str(path), (48, 32))
+
+        # Verificación.
+        assert tuple(image.shape) == (32, 32, 3)
+        assert tuple(wide.shape) == (32, 48, 3)
+        assert image.dtype == tf.uint8
+
+
+class TestDataAugmentation:
+
+    def test_batches_are_augmented_per_image(self):
+        """Prueba que la aumentación por lotes transforma cada imagen por separado."""
+
+        # Preparación.
+        image = np.random.default_rng(0).uniform(0, 255, (1, 16, 16, 3))
+        images = np.repeat(image, 6, axis=0).astype(np.float32)
+        labels = np.arange(6)
+        dataset = tf.data.Dataset.from_tensor_slices((images, labels)).batch(4)
+
+        # Ejecución.
+        batches = list(apply_data_augmentation(dataset, "resnet50"))
+
+        # Verificación.
+        assert [tuple(b[0].shape) for b in batches] == [(4, 16, 16, 3), (2, 16, 16, 3)]
+        assert np.concatenate([b[1].numpy() for b in batches]).tolist() == list(
+            range(6)
+        )
+        assert batches[0][0].dtype == tf.uint8
+        augmented = batches[0][0].numpy()
+        assert len({augmented[i].round(3).tobytes() for i in range(4)}) == 4
+
+    def test_benchmark_augmentation(self):
+        """Prueba que el benchmark mide la aumentación imagen a imagen y por lotes."""
+
+        # Ejecución.
+        results = benchmark_augmentation(
+            image_size=(8, 8), batch_size=4, num_images=8, repeats=1
+        )
+
+        # Verificación.
+        assert [r["method"] for r in results] == ["per_example", "batched"]
+        assert all(r["images_per_sec"] > 0 for r in results)
@@ -0,0 +1,168 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+from tensorflow import keras
+from PIL import Image as PILImage
+
+from app.ml import distillation
+from app.ml.shard_cache import ShardCache
+from app.ml.distillation import (
+    distillation_loss,
+    load_teacher_logits,
+    teacher_label_mapping,
+    train_student,
+)
+from app.tests.ml.utils import write_images
+
+
+def teacher_model(num_classes: int) -> keras.Model:
+    """Profesor mínimo cuya última capa es la de salida, como los del proyecto."""
+
+    keras.utils.set_random_seed(0)
+    inputs = keras.Input(shape=(8, 8, 3))
+    x = keras.layers.Rescaling(1.0 / 255)(inputs)
+    x = keras.layers.GlobalAveragePooling2D()(x)
+    x = keras.layers.Dense(4, activation="relu")(x)
+    if num_classes == 2:
+        outputs = keras.layers.Dense(1, activation="sigmoid")(x)
+    else:
+        outputs = keras.layers.Dense(num_classes, activation="softmax")(x)
+    return keras.Model(inputs, outputs)
+
+
+class TestTeacherLogits:
+
+    def test_teacher_classes_must_match_dataset(self):
+        """Prueba que el alumno usa los índices del profesor si las clases coinciden."""
+
+        # Ejecución y verificación.
+        assert teacher_label_mapping({"0": "dog", "1": "cat"}, ["cat", "dog"]) == {
+            "dog": 0,
+            "cat": 1,
+        }
+        with pytest.raises(ValueError, match="dataset classes changed"):
+            teacher_label_mapping({"0": "dog", "1": "cat"}, ["cat", "dog", "fox"])
+
+    def test_logits_are_computed_once(self, tmp_path, monkeypatch):
+        """Prueba que los logits se guardan en caché y reproducen al profesor binario."""
+
+        # Preparación.
+        paths = write_images(tmp_path / "images", 5, extension="png")
+        cache = ShardCache(str(tmp_path / "shards"), max_bytes=10**6)
+        monkeypatch.setattr("app.ml.distillation.shard_cache", cache)
+        teacher = teacher_model(2)
+        calls = []
+        compute = distillation.compute_teacher_logits
+        monkeypatch.setattr(
+            "app.ml.distillation.compute_teacher_logits",
+            lambda *args: calls.append(args) or compute(*args),
+        )
+
+        # Ejecución.
+        first = load_teacher_logits(teacher, paths, "v1", cache_namespace="dataset")
+        second = load_teacher_logits(teacher, paths, "v1", cache_namespace="dataset")
+
+        # Verificación.
+        images = np.stack([np.asarray(PILImage.open(p)) for p in paths])
+        probabilities = teacher.predict(images.astype(np.float32), verbose=0)[:, 0]
+        logits = second.for_paths(paths)
+        assert len(calls) == 1
+        assert logits.shape == (5, 2)
+        np.testing.assert_allclose(logits[:, 0], 0.0)
+        np.testing.assert_allclose(
+            tf.sigmoid(logits[:, 1]).numpy(), probabilities, rtol=1e-5
+        )
+        np.testing.assert_allclose(first.for_paths(paths), logits)
+
+    def test_logits_follow_dataset_order(self, tmp_path):
+        """Prueba que cada lote recibe los logits de sus imágenes tras la etiqueta."""
+
+        # Preparación.
+        paths = write_images(tmp_path / "images", 5, extension="png")
+        teacher_logits = load_teacher_logits(teacher_model(3), paths, "v1")
+        order = [paths[i] for i in (3, 0, 4, 1, 2)]
+        labels = np.array([2, 0, 1, 1, 0])
+        dataset = tf.data.Dataset.from_tensor_slices(
+            (np.zeros((5, 8, 8, 3), np.uint8), labels)
+        ).batch(2)
+
+        # Ejecución.
+        targets = np.concatenate(
+            [t.numpy() for _, t in teacher_logits.attach(dataset, order, 2)]
+        )
+
+        # Verificación.
+        np.testing.assert_allclose(targets[:, 0], labels)
+        np.testing.assert_allclose(targets[:, 1:], teacher_logits.for_paths(order))
+        assert teacher_logits.accuracy(order, labels) == pytest.approx(
+            np.mean(np.argmax(targets[:, 1:], axis=1) == labels)
+        )
+
+
+class TestDistillationLoss:
+
+    def test_loss_combines_labels_and_teacher(self):
+        """Prueba la contribución de las etiquetas reales y de los logits del profesor."""
+
+        # Preparación.
+        teacher_logits = np.array([[2.0, 0.5, -1.0], [0.0, 1.0, 3.0]], np.float32)
+        labels = np.array([[1.0], [2.0]], np.float32)
+        y_true = np.concatenate([labels, teacher_logits], axis=1)
+        student = tf.nn.softmax(teacher_logits).numpy()
+        uniform = np.full((2, 3), 1 / 3, np.float32)
+
+        # Ejecución.
+        hard = distillation_loss(temperature=4.0, alpha=1.0)(y_true, student)
+        matched = distillation_loss(temperature=4.0, alpha=0.0)(y_true, student)
+        mismatched = distillation_loss(temperature=4.0, alpha=0.0)(y_true, uniform)
+
+        # Verificación.
+        expected = keras.losses.sparse_categorical_crossentropy(labels[:, 0], student)
+        np.testing.assert_allclose(hard, expected, rtol=1e-5)
+        np.testing.assert_allclose(matched, 0.0, atol=1e-5)
+        assert np.all(mismatched.numpy() > 0)
+
+    def test_binary_student_uses_two_logits(self):
+        """Prueba que una salida sigmoide equivale a la softmax de logits [0, z]."""
+
+        # Preparación.
+        z = np.array([1.5, -0.5], np.float32)
+        y_true = np.stack([np.array([1.0, 0.0]), np.zeros(2), z], axis=1).astype(
+            np.float32
+        )
+        student = tf.sigmoid(z).numpy()[:, None]
+
+        # Ejecución.
+        loss = distillation_loss(temperature=2.0, alpha=0.0)(y_true, student)
+
+        # Verificación.
+        np.testing.assert_allclose(loss, 0.0, atol=1e-5)
+
+
+class TestTrainStudent:
+
+    def test_student_is_saved_without_custom_objects(self, tmp_path):
+        """Prueba que el alumno se entrena con los logits y se guarda como un modelo normal."""
+
+        # Preparación.
+        keras.utils.set_random_seed(0)
+        images = np.random.default_rng(0).integers(0, 255, (8, 16, 16, 3))
+        labels = np.arange(8) % 3
+        logits = np.eye(3, dtype=np.float32)[labels] * 4
+        targets = np.concatenate([labels[:, None], logits], axis=1).astype(np.float32)
+        dataset = tf.data.Dataset.from_tensor_slices(
+            (images.astype(np.uint8), targets)
+        ).batch(4)
+
+        # Ejecución.
+        model, history = train_student(
+            dataset, dataset, num_classes=3, epochs=2, temperature=2.0, alpha=0.5
+        )
+        model.save(str(tmp_path / "model.keras"))
+        loaded = keras.models.load_model(str(tmp_path / "model.keras"))
+
+        # Verificación.
+        assert len(history.history["loss"]) == 2
+        assert "val_accuracy" in history.history
+        assert loaded.output_shape == (None, 3)
+        assert loaded.loss.__class__.__name__ == "SparseCategoricalCrossentropy"
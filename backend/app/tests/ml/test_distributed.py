@@ -0,0 +1,99 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.ml.distributed import (
+    DISTRIBUTED_CALIBRATION_STEPS,
+    find_free_ports,
+    measure_single_process_throughput,
+    summarize_distributed_run,
+    worker_environment,
+)
+
+
+class TestWorkerEnvironment:
+
+    def test_cluster_configuration_and_thread_limits(self):
+        """Prueba que cada proceso conoce el clúster, su índice y sus hilos."""
+
+        # Preparación.
+        ports = find_free_ports(3)
+
+        # Ejecución.
+        env = worker_environment(ports, 1, threads=8, base_env={"PATH": "/bin"})
+
+        # Verificación.
+        tf_config = json.loads(env["TF_CONFIG"])
+        assert len(set(ports)) == 3
+        assert tf_config["cluster"]["worker"] == [f"localhost:{p}" for p in ports]
+        assert tf_config["task"] == {"type": "worker", "index": 1}
+        assert env["TF_NUM_INTRAOP_THREADS"] == "8"
+        assert env["OMP_NUM_THREADS"] == "8"
+        assert env["CUDA_VISIBLE_DEVICES"] == ""
+        assert env["PATH"] == "/bin"
+        assert env["PYTHONPATH"]
+
+
+class TestSummarizeDistributedRun:
+
+    def test_speedup_and_sync_cost(self):
+        """Prueba el cálculo de la aceleración y del coste de sincronización."""
+
+        # Preparación.
+        result = {
+            "history": {"loss": [0.9, 0.7, 0.5]},
+            "fit_seconds": 40.0,
+            "epoch_seconds": [20.0, 10.0, 10.0],
+            "sync_seconds_per_step": 0.05,
+            "steps_per_epoch": 40,
+            "train_size": 1000,
+            "threads": 8,
+        }
+
+        # Ejecución.
+        summary = summarize_distributed_run(result, num_workers=4, single_ips=40.0)
+
+        # Verificación.
+        assert summary["images_per_second"] == pytest.approx(100.0)
+        assert summary["speedup"] == pytest.approx(2.5)
+        assert summary["efficiency"] == pytest.approx(0.625)
+        assert summary["sync_seconds"] == pytest.approx(6.0)
+        assert summary["sync_fraction"] == pytest.approx(0.2)
+
+    def test_without_calibration(self):
+        """Prueba que sin calibración no se informa de la aceleración."""
+
+        # Preparación.
+        result = {
+            "history": {"loss": [0.9]},
+            "fit_seconds": 5.0,
+            "epoch_seconds": [5.0],
+            "sync_seconds_per_step": 0.01,
+            "steps_per_epoch": 10,
+            "train_size": 100,
+            "threads": 2,
+        }
+
+        # Ejecución.
+        summary = summarize_distributed_run(result, num_workers=2, single_ips=None)
+
+        # Verificación.
+        assert summary["images_per_second"] == pytest.approx(20.0)
+        assert summary["speedup"] is None
+        assert summary["efficiency"] is None
+
+    def test_calibration_is_disabled_by_default(self):
+        """Prueba que por defecto no se crea una segunda copia del modelo."""
+
+        # Preparación.
+        model_module = MagicMock()
+
+        # Ejecución.
+        single_ips = measure_single_process_throughput(
+            model_module, MagicMock(), 2, DISTRIBUTED_CALIBRATION_STEPS
+        )
+
+        # Verificación.
+        assert single_ips is None
+        model_module.create_model.assert_not_called()
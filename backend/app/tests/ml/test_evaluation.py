@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+from tensorflow import keras
+
+from app.ml.evaluation import (
+    collect_predictions,
+    classification_metrics,
+    evaluate_model,
+    predicted_classes,
+)
+
+
+def compiled_model(num_outputs):
+    """Modelo denso mínimo compilado como los de las arquitecturas disponibles."""
+
+    inputs = keras.Input(shape=(4,))
+    activation = "sigmoid" if num_outputs == 1 else "softmax"
+    outputs = keras.layers.Dense(num_outputs, activation=activation)(inputs)
+    model = keras.Model(inputs, outputs)
+
+    if num_outputs == 1:
+        loss = keras.losses.BinaryCrossentropy()
+        metrics = [
+            keras.metrics.BinaryAccuracy(name="accuracy"),
+            keras.metrics.AUC(name="auc"),
+        ]
+    else:
+        loss = keras.losses.SparseCategoricalCrossentropy()
+        metrics = [
+            keras.metrics.SparseCategoricalAccuracy(name="accuracy"),
+            keras.metrics.SparseTopKCategoricalAccuracy(k=2, name="top_2_accuracy"),
+        ]
+    model.compile(optimizer="adam", loss=loss, metrics=metrics)
+
+    return model
+
+
+class TestEvaluateModel:
+
+    @pytest.mark.parametrize("num_outputs, num_classes", [(1, 2), (3, 3)])
+    def test_matches_keras_evaluate(self, num_outputs, num_classes):
+        """Prueba que una única pasada da las mismas métricas que model.evaluate."""
+
+        # Preparación.
+        rng = np.random.default_rng(0)
+        x = rng.random((11, 4), dtype=np.float32)
+        y = np.arange(11) % num_classes
+        dataset = tf.data.Dataset.from_tensor_slices((x, y)).batch(4)
+        model = compiled_model(num_outputs)
+        index_to_label = {i: f"class_{i}" for i in range(num_classes)}
+        expected = model.evaluate(dataset, verbose=0, return_dict=True)
+
+        # Ejecución.
+        eval_results, report, timings = evaluate_model(
+            model, dataset, index_to_label, num_samples=11
+        )
+
+        # Verificación.
+        assert eval_results == pytest.approx(expected, rel=1e-5)
+        assert np.sum(report["confusion_matrix"]) == 11
+        assert report["num_samples_per_class"]["class_0"] == int(np.sum(y == 0))
+        assert set(timings) == {
+            "evaluation_predict_seconds",
+            "evaluation_metrics_seconds",
+        }
+
+    def test_collect_predictions_grows_without_known_size(self):
+        """Prueba que los arrays se amplían si no se conoce el tamaño del dataset."""
+
+        # Preparación.
+        x = np.ones((5, 4), dtype=np.float32)
+        y = np.array([0, 1, 2, 0, 1])
+        dataset = tf.data.Dataset.from_tensor_slices((x, y)).batch(2)
+        model = compiled_model(3)
+
+        # Ejecución.
+        y_prob, y_true = collect_predictions(model, dataset)
+
+        # Verificación.
+        assert y_prob.shape == (5, 3)
+        np.testing.assert_array_equal(y_true, y)
+
+
+class TestClassificationMetrics:
+
+    def test_missing_class_in_validation(self):
+        """Prueba que una clase sin imágenes de validación no rompe las métricas."""
+
+        # Preparación.
+        y_true = np.array([0, 0, 1])
+        y_pred = predicted_classes(np.array([[0.9, 0.1, 0], [0.2, 0.8, 0], [0, 1, 0]]))
+
+        # Ejecución.
+        metrics = classification_metrics(y_true, y_pred, {0: "a", 1: "b", 2: "c"})
+
+        # Verificación.
+        assert metrics["confusion_matrix"] == [[1, 1, 0], [0, 1, 0], [0, 0, 0]]
+        assert metrics["accuracy_from_confusion_matrix"] == pytest.approx(2 / 3)
+        assert metrics["recall_c"] == 0.0
+        assert metrics["num_samples_per_class"] == {"a": 2, "b": 1, "c": 0}
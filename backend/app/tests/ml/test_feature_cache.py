@@ -0,0 +1,99 @@
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+from app.ml.shard_cache import ShardCache
+from app.ml.feature_cache import (
+    split_frozen_backbone,
+    prepare_training_features,
+    fit_head_on_features,
+)
+from app.tests.ml.utils import write_images
+
+
+def transfer_model(image_size=(8, 8), num_classes=3):
+    """Modelo mínimo con un modelo base congelado anidado, como ResNet50."""
+
+    backbone = keras.Sequential(
+        [
+            keras.Input(shape=(image_size[1], image_size[0], 3)),
+            keras.layers.Conv2D(4, 3),
+        ]
+    )
+    backbone.trainable = False
+
+    inputs = keras.Input(shape=(image_size[1], image_size[0], 3))
+    x = backbone(inputs, training=False)
+    x = keras.layers.GlobalAveragePooling2D()(x)
+    x = keras.layers.Dropout(0.2)(x)
+    outputs = keras.layers.Dense(num_classes, activation="softmax")(x)
+    return keras.Model(inputs, outputs)
+
+
+class TestSplitFrozenBackbone:
+
+    def test_extractor_and_head_reproduce_model(self):
+        """Prueba que extractor y cabeza juntos dan la misma salida que el modelo."""
+
+        # Preparación.
+        model = transfer_model()
+        images = np.random.default_rng(0).random((2, 8, 8, 3), dtype=np.float32)
+
+        # Ejecución.
+        extractor, head = split_frozen_backbone(model)
+        outputs = head(extractor(images, training=False), training=False)
+
+        # Verificación.
+        assert extractor.output_shape == (None, 4)
+        np.testing.assert_allclose(outputs, model(images, training=False), atol=1e-6)
+
+
+class TestTrainingFeatures:
+
+    def test_features_are_cached_and_head_is_trained(self, tmp_path, monkeypatch):
+        """Prueba que las características se calculan una vez y solo cambia la cabeza."""
+
+        # Preparación.
+        paths = write_images(tmp_path / "images", 6)
+        labels = ["a", "b", "c"] * 2
+        cache = ShardCache(str(tmp_path / "shards"), max_bytes=10**6)
+        monkeypatch.setattr("app.ml.feature_cache.shard_cache", cache)
+        model = transfer_model()
+        backbone_weights = [w.numpy().copy() for w in model.layers[1].weights]
+        head_weights = model.layers[-1].kernel.numpy().copy()
+        features = prepare_training_features(
+            paths,
+            labels,
+            {"a": 0, "b": 1, "c": 2},
+            batch_size=2,
+            image_size=(8, 8),
+            architecture="resnet50",
+            validation_split=0.5,
+            variants=2,
+            cache_namespace="d1",
+        )
+
+        # Ejecución.
+        history = fit_head_on_features(
+            model,
+            features,
+            optimizer=keras.optimizers.Adam(0.1),
+            loss=keras.losses.SparseCategoricalCrossentropy(),
+            metrics=[keras.metrics.SparseCategoricalAccuracy(name="accuracy")],
+            epochs=2,
+            verbose=0,
+        )
+        entries = cache.entries()
+        train_ds, val_ds = features.datasets(split_frozen_backbone(model)[0])
+
+        # Verificación.
+        assert len(history.history["loss"]) == 2
+        assert len(entries) == 1
+        assert "features_resnet50_8x8_v2" in entries[0]["key"]
+        assert [e["path"] for e in cache.entries()] == [entries[0]["path"]]
+        batch, batch_labels = next(iter(val_ds))
+        assert batch.shape == (2, 4)
+        assert batch_labels.dtype == tf.int64
+        for before, after in zip(backbone_weights, model.layers[1].weights):
+            np.testing.assert_array_equal(before, after.numpy())
+        assert not np.array_equal(head_weights, model.layers[-1].kernel.numpy())
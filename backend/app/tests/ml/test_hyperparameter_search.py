@@ -0,0 +1,135 @@
+import pytest
+
+from app.ml.hyperparameter_search import (
+    record_trial,
+    rung_budgets,
+    sample_trials,
+    start_search,
+    trial_parameters,
+    validate_search,
+)
+
+
+class TestSearchConfiguration:
+
+    def test_small_grid_is_fully_explored(self):
+        """Prueba que una rejilla que cabe en las pruebas se explora entera."""
+
+        # Preparación.
+        search = validate_search(
+            {
+                "space": {"learning_rate": [0.01, 0.001], "batch_size": [16, 32]},
+                "num_trials": 9,
+            }
+        )
+
+        # Ejecución.
+        trials = sample_trials(search)
+
+        # Verificación.
+        assert len(trials) == 4
+        assert {(t["learning_rate"], t["batch_size"]) for t in trials} == {
+            (0.01, 16),
+            (0.01, 32),
+            (0.001, 16),
+            (0.001, 32),
+        }
+
+    def test_ranges_are_sampled_reproducibly(self):
+        """Prueba que los rangos se muestrean dentro de sus límites y con la semilla."""
+
+        # Preparación.
+        search = validate_search(
+            {
+                "space": {
+                    "learning_rate": {"min": 1e-4, "max": 1e-2},
+                    "batch_size": {"min": 8, "max": 64},
+                },
+                "num_trials": 6,
+            }
+        )
+
+        # Ejecución.
+        trials = sample_trials(search)
+
+        # Verificación.
+        assert len(trials) == 6
+        assert all(1e-4 <= t["learning_rate"] <= 1e-2 for t in trials)
+        assert all(isinstance(t["batch_size"], int) for t in trials)
+        assert trials == sample_trials(search)
+
+    def test_rung_budgets(self):
+        """Prueba que el presupuesto crece por el factor de reducción hasta el total."""
+
+        assert rung_budgets(2, 20, 3) == [2, 6, 18]
+        assert rung_budgets(5, 5, 3) == [5]
+
+    def test_invalid_search(self):
+        """Prueba que se rechazan configuraciones de búsqueda no válidas."""
+
+        with pytest.raises(ValueError):
+            validate_search({"space": {}})
+        with pytest.raises(ValueError):
+            validate_search({"space": {"image_size": [180]}})
+        with pytest.raises(ValueError):
+            validate_search({"space": {"batch_size": [16]}, "num_trials": 0})
+
+
+class TestSuccessiveHalving:
+
+    def test_rounds_promote_best_trials_until_one_wins(self):
+        """Prueba que cada ronda continúa con las mejores pruebas y elige la mejor."""
+
+        # Preparación.
+        search = validate_search(
+            {
+                "space": {"learning_rate": [0.1, 0.05, 0.01, 0.005, 0.001, 0.0005]},
+                "min_epochs": 2,
+                "reduction_factor": 3,
+            }
+        )
+        state = start_search(search, max_epochs=10)
+        losses = {0: 0.9, 1: 0.5, 2: 0.3, 3: 0.4, 4: None, 5: 0.8}
+
+        # Ejecución.
+        actions = [record_trial(state, i, 0, losses[i]) for i in range(6)]
+        repeated = record_trial(state, 5, 0, 0.1)
+        final = [record_trial(state, 2, 1, 0.35), record_trial(state, 3, 1, 0.2)]
+
+        # Verificación.
+        assert state["budgets"] == [2, 6]
+        assert actions[:5] == [("wait", [])] * 5
+        assert actions[5] == ("continue", [2, 3])
+        assert repeated == ("wait", [])
+        assert final == [("wait", []), ("finish", [3])]
+        assert state["best_trial"] == 3
+
+    def test_all_trials_failed(self):
+        """Prueba que la búsqueda falla si ninguna prueba termina."""
+
+        # Preparación.
+        state = start_search(
+            validate_search({"space": {"batch_size": [16, 32]}}), max_epochs=10
+        )
+
+        # Ejecución.
+        record_trial(state, 0, 0, None)
+        action = record_trial(state, 1, 0, None)
+
+        # Verificación.
+        assert action == ("fail", [])
+
+    def test_trial_parameters_override_base_parameters(self):
+        """Prueba que una prueba combina los parámetros base con los suyos."""
+
+        # Preparación.
+        state = start_search(
+            validate_search({"space": {"image_size": [[224, 224]]}}), max_epochs=10
+        )
+        model_parameters = {"epochs": 10, "image_size": [180, 180], "search": state}
+
+        # Ejecución.
+        parameters = trial_parameters(model_parameters, 0)
+
+        # Verificación.
+        assert parameters == {"epochs": 10, "image_size": [224, 224]}
@@ -0,0 +1,132 @@
+import io
+import base64
+import pytest
+import numpy as np
+from unittest.mock import MagicMock, patch
+from PIL import Image as PILImage
+
+from app.ml.inference_utils import (
+    decode_image,
+    predict_in_batches,
+    format_predictions,
+    select_top_k,
+)
+
+
+def _make_image_bytes(size=(64, 48), color=(255, 0, 0), format="JPEG"):
+    """Genera los bytes de una imagen de prueba."""
+
+    buffered = io.BytesIO()
+    PILImage.new("RGB", size, color).save(buffered, format=format)
+    return buffered.getvalue()
+
+
+class TestInferenceUtils:
+
+    def test_decode_image(self):
+        """Prueba que una sola decodificación produce la entrada y la miniatura."""
+
+        # Ejecución.
+        result, thumbnail = decode_image(_make_image_bytes(), (32, 16))
+
+        # Verificación.
+        assert result.shape == (16, 32, 3)
+        assert result.dtype == np.uint8
+        thumb = PILImage.open(io.BytesIO(base64.b64decode(thumbnail)))
+        assert max(thumb.size) <= 100
+
+    def test_decode_image_uses_draft_for_large_jpeg(self):
+        """Prueba que los JPEG grandes se decodifican a resolución reducida."""
+
+        # Preparación.
+        img_data = _make_image_bytes(size=(1600, 1200))
+
+        # Ejecución.
+        with patch.object(
+            PILImage.Image, "draft", autospec=True, side_effect=PILImage.Image.draft
+        ) as mock_draft:
+            result, _ = decode_image(img_data, (180, 180))
+
+        # Verificación.
+        mock_draft.assert_called_once()
+        assert result.shape == (180, 180, 3)
+
+    def test_decode_image_without_thumbnail(self):
+        """Prueba que se puede omitir la generación de la miniatura."""
+
+        # Ejecución.
+        result, thumbnail = decode_image(
+            _make_image_bytes(format="PNG"), (8, 8), thumbnail_size=None
+        )
+
+        # Verificación.
+        assert result.shape == (8, 8, 3)
+        assert thumbnail is None
+
+    def test_decode_image_invalid(self):
+        """Prueba que una imagen corrupta produce un ValueError."""
+
+        with pytest.raises(ValueError):
+            decode_image(b"not an image", (32, 32))
+
+    def test_predict_in_batches_uses_chunks(self):
+        """Prueba que las imágenes se envían al modelo en bloques."""
+
+        # Preparación.
+        model = MagicMock()
+        model.predict_on_batch.side_effect = lambda batch: np.full(
+            (len(batch), 1), batch[:, 0, 0, 0].mean() / 255.0
+        )
+        images = np.zeros((5, 4, 4, 3), dtype=np.uint8)
+        images[3:] = 255
+
+        # Ejecución.
+        predictions = predict_in_batches(model, images, "resnet50", batch_size=3)
+
+        # Verificación.
+        assert model.predict_on_batch.call_count == 2
+        first_chunk = model.predict_on_batch.call_args_list[0].args[0]
+        assert first_chunk.dtype == np.float32
+        assert first_chunk.shape == (3, 4, 4, 3)
+        assert predictions.shape == (5, 1)
+
+    def test_format_predictions_binary(self):
+        """Prueba el formateo de predicciones de un modelo binario."""
+
+        # Ejecución.
+        results = format_predictions(
+            np.array([[0.9], [0.2]], dtype=np.float32), {"0": "cat", "1": "dog"}
+        )
+
+        # Verificación.
+        assert [r["predicted_class"] for r in results] == ["dog", "cat"]
+        assert results[0]["confidence"] == pytest.approx(0.9)
+        assert results[1]["confidence"] == pytest.approx(0.8)
+        assert results[1]["all_predictions"]["cat"] == pytest.approx(0.8)
+        assert results[1]["all_predictions"]["dog"] == pytest.approx(0.2)
+
+    def test_format_predictions_multiclass(self):
+        """Prueba el formateo de predicciones de un modelo multiclase."""
+
+        # Ejecución.
+        results = format_predictions(
+            np.array([[0.1, 0.7, 0.2], [0.5, 0.2, 0.3]], dtype=np.float32),
+            {"0": "cat", "1": "dog", "2": "bird"},
+        )
+
+        # Verificación.
+        assert [r["predicted_class"] for r in results] == ["dog", "cat"]
+        assert results[0]["confidence"] == pytest.approx(0.7)
+        assert set(results[0]["all_predictions"]) == {"cat", "dog", "bird"}
+
+    def test_select_top_k(self):
+        """Prueba la selección de las clases más probables en orden."""
+
+        # Ejecución.
+        top = select_top_k({"cat": 0.1, "dog": 0.7, "bird": 0.2}, 2)
+
+        # Verificación.
+        assert top == [
+            {"class": "dog", "confidence": 0.7},
+            {"class": "bird", "confidence": 0.2},
+        ]
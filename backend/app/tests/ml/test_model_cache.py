@@ -0,0 +1,174 @@
+import os
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from app.ml.model_cache import ModelCache, get_model_version
+
+
+def _write_model_files(model_dir, content=b"model"):
+    """Crea archivos de modelo y metadatos falsos en un directorio."""
+
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, "model.keras"), "wb") as f:
+        f.write(content)
+    with open(os.path.join(model_dir, "metadata.json"), "w") as f:
+        f.write('{"class_mapping": {"0": "cat", "1": "dog"}}')
+
+
+@pytest.fixture
+def mock_loaders():
+    """Mock de las funciones de carga de modelos y metadatos."""
+
+    with patch("app.ml.model_cache.load_model") as mock_load, patch(
+        "app.ml.model_cache.load_model_metadata"
+    ) as mock_metadata, patch(
+        "app.ml.model_cache.estimate_model_size", return_value=100
+    ):
+        mock_load.side_effect = lambda path: MagicMock(name=path)
+        mock_metadata.return_value = {"class_mapping": {"0": "cat", "1": "dog"}}
+        yield mock_load
+
+
+class TestModelCache:
+
+    def test_get_caches_loaded_model(self, tmp_path, mock_loaders):
+        """Prueba que un segundo acceso no vuelve a cargar el modelo."""
+
+        # Preparación.
+        model_dir = str(tmp_path / "model_a")
+        _write_model_files(model_dir)
+        cache = ModelCache(max_bytes=1000, max_entries=4)
+
+        # Ejecución.
+        first = cache.get("a", model_dir)
+        second = cache.get("a", model_dir)
+
+        # Verificación.
+        assert first is second
+        assert mock_loaders.call_count == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+    def test_get_reloads_when_version_changes(self, tmp_path, mock_loaders):
+        """Prueba que se recarga el modelo cuando cambian sus artefactos."""
+
+        # Preparación.
+        model_dir = str(tmp_path / "model_a")
+        _write_model_files(model_dir)
+        cache = ModelCache(max_bytes=1000, max_entries=4)
+        first = cache.get("a", model_dir)
+
+        # Ejecución.
+        _write_model_files(model_dir, content=b"retrained model")
+        second = cache.get("a", model_dir)
+
+        # Verificación.
+        assert first is not second
+        assert mock_loaders.call_count == 2
+        assert cache.stats()["invalidations"] == 1
+
+    def test_lru_eviction_by_memory_budget(self, tmp_path, mock_loaders):
+        """Prueba que se expulsa el modelo menos usado al superar el límite de memoria."""
+
+        # Preparación.
+        cache = ModelCache(max_bytes=250, max_entries=10)
+        for name in ["a", "b", "c"]:
+            _write_model_files(str(tmp_path / name))
+
+        # Ejecución.
+        cache.get("a", str(tmp_path / "a"))
+        cache.get("b", str(tmp_path / "b"))
+        cache.get("a", str(tmp_path / "a"))  # "a" pasa a ser el más reciente.
+        cache.get("c", str(tmp_path / "c"))
+
+        # Verificación.
+        stats = cache.stats()
+        cached_ids = [entry["classifier_id"] for entry in stats["models"]]
+        assert cached_ids == ["a", "c"]
+        assert stats["evictions"] == 1
+        assert stats["size_bytes"] == 200
+
+    def test_invalidate(self, tmp_path, mock_loaders):
+        """Prueba la invalidación explícita de un modelo."""
+
+        # Preparación.
+        model_dir = str(tmp_path / "model_a")
+        _write_model_files(model_dir)
+        cache = ModelCache(max_bytes=1000, max_entries=4)
+        cache.get("a", model_dir)
+
+        # Ejecución.
+        removed = cache.invalidate("a")
+        removed_again = cache.invalidate("a")
+        cache.get("a", model_dir)
+
+        # Verificación.
+        assert removed is True
+        assert removed_again is False
+        assert mock_loaders.call_count == 2
+
+    def test_loading_locks_are_released(self, tmp_path, mock_loaders):
+        """Prueba que no se acumulan locks de carga de modelos expulsados o invalidados."""
+
+        # Preparación.
+        cache = ModelCache(max_bytes=1000, max_entries=1)
+        for name in ("a", "b"):
+            _write_model_files(str(tmp_path / name))
+
+        # Ejecución.
+        cache.get("a", str(tmp_path / "a"))
+        cache.get("b", str(tmp_path / "b"))
+        cache.invalidate("b")
+
+        # Verificación.
+        assert cache._loading_locks == {}
+        assert not cache._loading_users
+
+    def test_concurrent_gets_load_once(self, tmp_path, mock_loaders):
+        """Prueba que varios hilos que piden el mismo modelo lo cargan una sola vez."""
+
+        # Preparación.
+        model_dir = str(tmp_path / "model_a")
+        _write_model_files(model_dir)
+        cache = ModelCache(max_bytes=1000, max_entries=4)
+        load = mock_loaders.side_effect
+        mock_loaders.side_effect = lambda path: time.sleep(0.05) or load(path)
+
+        # Ejecución.
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            models = list(executor.map(lambda _: cache.get("a", model_dir), range(4)))
+
+        # Verificación.
+        assert mock_loaders.call_count == 1
+        assert all(model is models[0] for model in models)
+        assert cache._loading_locks == {}
+
+    def test_get_model_version_missing_model(self, tmp_path):
+        """Prueba que falla si no existe el archivo del modelo."""
+
+        with pytest.raises(FileNotFoundError):
+            get_model_version(str(tmp_path))
+
+    def test_get_prefers_tflite_artifact(self, tmp_path, mock_loaders):
+        """Prueba que se sirve el modelo TFLite cuando existe y está habilitado."""
+
+        # Preparación.
+        model_dir = str(tmp_path / "model_a")
+        _write_model_files(model_dir)
+        with open(os.path.join(model_dir, "model.tflite"), "wb") as f:
+            f.write(b"tflite")
+        cache = ModelCache(max_bytes=1000, max_entries=4, use_tflite=True)
+
+        # Ejecución.
+        with patch("app.ml.model_cache.TFLiteModel") as mock_tflite:
+            entry = cache.get("a", model_dir)
+
+        # Verificación.
+        assert entry.backend == "tflite"
+        assert entry.model is mock_tflite.return_value
+        assert mock_loaders.call_count == 0
+        assert cache.stats()["models"][0]["backend"] == "tflite"
@@ -0,0 +1,241 @@
+import os
+import json
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+import tensorflow as tf
+from tensorflow import keras
+
+from app.ml.model_utils import (
+    save_trained_model,
+    load_model_split,
+    get_staging_dir,
+    export_tflite_model,
+    evaluate_classification_accuracy,
+    TFLiteModel,
+    CompiledPredictor,
+)
+from app.ml.benchmark import benchmark_model
+
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    """Modelo convolucional mínimo con salida softmax de 3 clases."""
+
+    inputs = keras.Input(shape=(8, 8, 3))
+    x = keras.layers.Conv2D(4, 3, activation="relu")(inputs)
+    x = keras.layers.GlobalAveragePooling2D()(x)
+    outputs = keras.layers.Dense(3, activation="softmax")(x)
+    return keras.Model(inputs, outputs)
+
+
+def _dataset(num_images=6, batch_size=4):
+    """Dataset por lotes de imágenes aleatorias y etiquetas enteras."""
+
+    rng = np.random.default_rng(0)
+    images = rng.random((num_images, 8, 8, 3), dtype=np.float32)
+    labels = rng.integers(0, 3, size=num_images)
+    return tf.data.Dataset.from_tensor_slices((images, labels)).batch(batch_size)
+
+
+class TestSaveTrainedModel:
+
+    def write_model(self, model_dir, content, tflite=True):
+        """Crea los artefactos de un modelo con el contenido indicado."""
+
+        os.makedirs(model_dir, exist_ok=True)
+        names = ["model.keras", "metadata.json"] + (["model.tflite"] if tflite else [])
+        for name in names:
+            with open(os.path.join(model_dir, name), "w") as f:
+                f.write(content)
+
+    def saving_model(self, content):
+        """Modelo simulado que guarda el contenido indicado."""
+
+        model = MagicMock()
+
+        def save(path):
+            with open(path, "w") as f:
+                f.write(content)
+
+        model.save.side_effect = save
+        return model
+
+    def test_publishes_staged_artifacts(self, tmp_path):
+        """Prueba que se publican a la vez el modelo, los metadatos y el TFLite preparado."""
+
+        # Preparación.
+        model_dir = str(tmp_path / "c")
+        self.write_model(model_dir, "old")
+        self.write_model(get_staging_dir(model_dir), "new")
+
+        # Ejecución.
+        path = save_trained_model(
+            self.saving_model("new"), str(tmp_path), {"num_classes": 2}, "c"
+        )
+
+        # Verificación.
+        assert path == os.path.join("models", "c")
+        assert sorted(os.listdir(model_dir)) == [
+            "metadata.json",
+            "model.keras",
+            "model.tflite",
+        ]
+        with open(os.path.join(model_dir, "model.tflite")) as f:
+            assert f.read() == "new"
+        with open(os.path.join(model_dir, "metadata.json")) as f:
+            assert json.load(f) == {"num_classes": 2}
+
+    def test_removes_tflite_of_previous_training(self, tmp_path):
+        """Prueba que no se conserva el TFLite de un entrenamiento anterior."""
+
+        # Preparación.
+        model_dir = str(tmp_path / "c")
+        self.write_model(model_dir, "old")
+
+        # Ejecución.
+        save_trained_model(self.saving_model("new"), str(tmp_path), {}, "c")
+
+        # Verificación.
+        assert sorted(os.listdir(model_dir)) == ["metadata.json", "model.keras"]
+
+    def test_saves_split_with_model(self, tmp_path):
+        """Prueba que la división del entrenamiento se guarda junto al modelo."""
+
+        # Ejecución.
+        save_trained_model(
+            self.saving_model("new"),
+            str(tmp_path),
+            {},
+            "c",
+            split=(["a.jpg", "b.jpg"], ["c.jpg"]),
+        )
+
+        # Verificación.
+        assert load_model_split(str(tmp_path / "c")) == (["a.jpg", "b.jpg"], ["c.jpg"])
+        assert load_model_split(str(tmp_path / "missing")) is None
+
+    def test_failed_save_keeps_previous_model(self, tmp_path):
+        """Prueba que un fallo al guardar no modifica los artefactos servidos."""
+
+        # Preparación.
+        model_dir = str(tmp_path / "c")
+        self.write_model(model_dir, "old")
+        model = MagicMock()
+        model.save.side_effect = OSError("Disk full")
+
+        # Ejecución.
+        with pytest.raises(OSError):
+            save_trained_model(model, str(tmp_path), {}, "c")
+
+        # Verificación.
+        for name in ("model.keras", "metadata.json", "model.tflite"):
+            with open(os.path.join(model_dir, name)) as f:
+                assert f.read() == "old"
+
+
+class TestTFLiteExport:
+
+    @pytest.mark.parametrize("quantization", ["dynamic", "float16", "int8"])
+    def test_export_and_predict(self, tmp_path, tiny_model, quantization):
+        """Prueba que el modelo exportado predice lotes de distinto tamaño."""
+
+        # Preparación.
+        images = np.random.default_rng(1).random((5, 8, 8, 3), dtype=np.float32)
+
+        # Ejecución.
+        path = export_tflite_model(
+            tiny_model,
+            str(tmp_path),
+            quantization=quantization,
+            representative_ds=_dataset(),
+        )
+        model = TFLiteModel(path, num_threads=1)
+        outputs = model.predict_on_batch(images)
+        outputs_small = model.predict_on_batch(images[:2])
+
+        # Verificación.
+        assert os.path.basename(path) == "model.tflite"
+        assert model.size_bytes == os.path.getsize(path)
+        assert outputs.shape == (5, 3)
+        assert outputs_small.shape == (2, 3)
+        expected = tiny_model.predict_on_batch(images)
+        np.testing.assert_allclose(outputs, expected, atol=0.05)
+
+    def test_export_invalid_quantization(self, tmp_path, tiny_model):
+        """Prueba que se rechaza un modo de cuantización desconocido."""
+
+        with pytest.raises(ValueError):
+            export_tflite_model(tiny_model, str(tmp_path), quantization="int4")
+
+    def test_export_int8_requires_dataset(self, tmp_path, tiny_model):
+        """Prueba que la cuantización int8 requiere un dataset representativo."""
+
+        with pytest.raises(ValueError):
+            export_tflite_model(tiny_model, str(tmp_path), quantization="int8")
+
+    def test_evaluate_classification_accuracy_matches_keras(self, tmp_path, tiny_model):
+        """Prueba que la exactitud del modelo TFLite coincide con la del original."""
+
+        # Preparación.
+        dataset = _dataset()
+        path = export_tflite_model(tiny_model, str(tmp_path), quantization="float16")
+
+        # Ejecución.
+        keras_accuracy = evaluate_classification_accuracy(tiny_model, dataset)
+        tflite_accuracy = evaluate_classification_accuracy(TFLiteModel(path), dataset)
+
+        # Verificación.
+        assert 0.0 <= keras_accuracy <= 1.0
+        assert abs(keras_accuracy - tflite_accuracy) <= 1 / 3
+
+
+class TestCompiledPredictor:
+
+    def test_bucket_size(self, tiny_model):
+        """Prueba el redondeo de los lotes a los buckets configurados."""
+
+        # Preparación.
+        predictor = CompiledPredictor(tiny_model, buckets=(1, 4, 8))
+
+        # Verificación.
+        assert predictor.bucket_size(1) == 1
+        assert predictor.bucket_size(3) == 4
+        assert predictor.bucket_size(8) == 8
+        assert predictor.bucket_size(9) == 16
+
+    def test_predict_matches_keras_without_retracing(self, tiny_model):
+        """Prueba que las salidas coinciden y no se retraza al cambiar el lote."""
+
+        # Preparación.
+        predictor = CompiledPredictor(tiny_model, buckets=(1, 4, 8))
+        images = np.random.default_rng(2).random((11, 8, 8, 3), dtype=np.float32)
+
+        # Ejecución.
+        outputs = [predictor.predict_on_batch(images[:n]) for n in (1, 3, 11)]
+
+        # Verificación.
+        for n, output in zip((1, 3, 11), outputs):
+            assert output.shape == (n, 3)
+            np.testing.assert_allclose(
+                output, tiny_model.predict_on_batch(images[:n]), atol=1e-5
+            )
+        assert predictor._predict.experimental_get_tracing_count() == 1
+
+    def test_benchmark_model(self, tiny_model):
+        """Prueba que el benchmark mide cada método y tamaño de lote."""
+
+        # Ejecución.
+        results = benchmark_model(
+            tiny_model, image_size=(8, 8), batch_sizes=(1, 2), repeats=1
+        )
+
+        # Verificación.
+        assert len(results) == 8
+        assert {r["method"] for r in results} == {
+            "predict",
+            "predict_on_batch",
+            "compiled",
+            "compiled_xla",
+        }
+        assert all(r["mean_ms"] >= 0 for r in results)
@@ -0,0 +1,134 @@
+import pytest
+from unittest.mock import patch
+
+from app.ml.prediction_cache import (
+    PredictionCache,
+    SharedPredictionStore,
+    hash_image,
+)
+
+PREDICTION = {
+    "predicted_class": "dog",
+    "confidence": 0.9,
+    "all_predictions": {"cat": 0.1, "dog": 0.9},
+    "thumbnail": None,
+}
+
+
+class TestPredictionCache:
+
+    def test_get_many_hits_and_misses(self):
+        """Prueba que solo se devuelven las imágenes guardadas para la misma versión."""
+
+        # Preparación.
+        cache = PredictionCache(max_entries=10, ttl_seconds=60)
+        known, unknown = hash_image(b"a"), hash_image(b"b")
+        cache.put_many("c1", "v1", [(known, PREDICTION)])
+
+        # Ejecución.
+        found = cache.get_many("c1", "v1", [known, unknown])
+        other_version = cache.get_many("c1", "v2", [known])
+
+        # Verificación.
+        assert found == {known: PREDICTION}
+        assert other_version == {}
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+
+    def test_lru_eviction(self):
+        """Prueba que se expulsan las entradas menos usadas al superar el límite."""
+
+        # Preparación.
+        cache = PredictionCache(max_entries=2, ttl_seconds=60)
+        cache.put_many("c1", "v1", [("h1", PREDICTION), ("h2", PREDICTION)])
+        cache.get_many("c1", "v1", ["h1"])
+
+        # Ejecución.
+        cache.put_many("c1", "v1", [("h3", PREDICTION)])
+
+        # Verificación.
+        assert set(cache.get_many("c1", "v1", ["h1", "h2", "h3"])) == {"h1", "h3"}
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiration(self):
+        """Prueba que las entradas caducadas no se devuelven."""
+
+        # Preparación.
+        cache = PredictionCache(max_entries=10, ttl_seconds=5)
+        with patch("app.ml.prediction_cache.time.monotonic", return_value=100.0):
+            cache.put_many("c1", "v1", [("h1", PREDICTION)])
+
+        # Ejecución.
+        with patch("app.ml.prediction_cache.time.monotonic", return_value=106.0):
+            found = cache.get_many("c1", "v1", ["h1"])
+
+        # Verificación.
+        assert found == {}
+        assert cache.stats()["entries"] == 0
+
+    def test_require_thumbnail(self):
+        """Prueba que una entrada sin miniatura no sirve si se pide la miniatura."""
+
+        # Preparación.
+        cache = PredictionCache(max_entries=10, ttl_seconds=60)
+        cache.put_many("c1", "v1", [("h1", PREDICTION)])
+
+        # Ejecución y verificación.
+        assert cache.get_many("c1", "v1", ["h1"], require_thumbnail=True) == {}
+        assert "h1" in cache.get_many("c1", "v1", ["h1"])
+
+    def test_invalidate(self):
+        """Prueba que se eliminan solo las entradas del clasificador indicado."""
+
+        # Preparación.
+        cache = PredictionCache(max_entries=10, ttl_seconds=60)
+        cache.put_many("c1", "v1", [("h1", PREDICTION)])
+        cache.put_many("c2", "v1", [("h1", PREDICTION)])
+
+        # Ejecución.
+        removed = cache.invalidate("c1")
+
+        # Verificación.
+        assert removed == 1
+        assert cache.get_many("c1", "v1", ["h1"]) == {}
+        assert "h1" in cache.get_many("c2", "v1", ["h1"])
+
+    def test_disabled_cache(self):
+        """Prueba que la caché desactivada no guarda nada."""
+
+        # Preparación.
+        cache = PredictionCache(max_entries=10, ttl_seconds=60, enabled=False)
+
+        # Ejecución.
+        cache.put_many("c1", "v1", [("h1", PREDICTION)])
+
+        # Verificación.
+        assert cache.get_many("c1", "v1", ["h1"]) == {}
+
+    def test_shared_store_between_caches(self, tmp_path):
+        """Prueba que dos procesos comparten predicciones a través del almacén."""
+
+        # Preparación.
+        path = str(tmp_path / "cache" / "predictions.sqlite3")
+        first = PredictionCache(
+            max_entries=10,
+            ttl_seconds=60,
+            shared_store=SharedPredictionStore(path, max_entries=10, ttl_seconds=60),
+        )
+        second = PredictionCache(
+            max_entries=10,
+            ttl_seconds=60,
+            shared_store=SharedPredictionStore(path, max_entries=10, ttl_seconds=60),
+        )
+        first.put_many("c1", "v1", [("h1", PREDICTION)])
+
+        # Ejecución.
+        found = second.get_many("c1", "v1", ["h1"])
+        first.invalidate("c1")
+        second.clear()
+        after_invalidation = second.get_many("c1", "v1", ["h1"])
+
+        # Verificación.
+        assert found == {"h1": PREDICTION}
+        assert after_invalidation == {}
@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pytest
+from tensorflow import keras
+
+from app.ml import pretrained_weights
+from app.ml.pretrained_weights import (
+    BACKBONES,
+    BackboneWeights,
+    create_base_model,
+    file_md5,
+    install_weights,
+    weights_path,
+)
+
+
+def build_backbone(include_top=False, weights=None, input_shape=None, pooling=None):
+    """Modelo base mínimo con una capa de normalización, como EfficientNetB3."""
+
+    inputs = keras.Input(shape=input_shape)
+    x = keras.layers.Normalization(axis=-1)(inputs)
+    x = keras.layers.Dense(2)(x)
+    if pooling == "avg":
+        x = keras.layers.GlobalAveragePooling2D()(x)
+    return keras.Model(inputs, x)
+
+
+@pytest.fixture
+def backbone(tmp_path, monkeypatch):
+    """Registra un modelo base mínimo con sus pesos en un directorio de origen."""
+
+    model = build_backbone(input_shape=(4, 4, 3))
+    rng = np.random.default_rng(0)
+    model.set_weights(
+        [
+            np.array([10.0, 20.0, 30.0]),
+            np.array([4.0, 9.0, 16.0]),
+            np.array(1),
+            rng.normal(size=(3, 2)),
+            rng.normal(size=(2,)),
+        ]
+    )
+    source = tmp_path / "source"
+    source.mkdir()
+    model.save_weights(str(source / "tiny.weights.h5"))
+
+    monkeypatch.setitem(
+        BACKBONES,
+        "tiny",
+        BackboneWeights(
+            builder=build_backbone,
+            file_name="tiny.weights.h5",
+            origin="https://example.com/tiny.weights.h5",
+            md5=file_md5(str(source / "tiny.weights.h5")),
+        ),
+    )
+    pretrained_weights.clear_memory_cache()
+    yield str(source)
+    pretrained_weights.clear_memory_cache()
+
+
+class TestWeightsRegistry:
+
+    def test_missing_weights_are_not_downloaded_offline(self, backbone, tmp_path):
+        """Prueba que sin descargas se indica cómo poblar el registro."""
+
+        # Ejecución y verificación.
+        with pytest.raises(FileNotFoundError, match="Populate the registry"):
+            weights_path("tiny", directory=str(tmp_path / "registry"), download=False)
+
+    def test_install_verifies_checksum(self, backbone, tmp_path):
+        """Prueba que solo se instalan y usan archivos con la suma esperada."""
+
+        # Preparación.
+        registry = str(tmp_path / "registry")
+        corrupted = tmp_path / "corrupted"
+        corrupted.mkdir()
+        (corrupted / "tiny.weights.h5").write_bytes(b"not weights")
+
+        # Ejecución.
+        with pytest.raises(ValueError):
+            install_weights("tiny", source=str(corrupted), directory=registry)
+        rejected = os.listdir(registry)
+        path = install_weights("tiny", source=backbone, directory=registry)
+        verified = weights_path("tiny", directory=registry, download=False)
+        with open(path, "ab") as f:
+            f.write(b"\0")
+
+        # Verificación.
+        assert rejected == []
+        assert verified == path
+        with pytest.raises(ValueError, match="checksum"):
+            weights_path("tiny", directory=registry, download=False)
+
+
+class TestCreateBaseModel:
+
+    def test_models_reuse_weights_read_once(self, backbone, tmp_path):
+        """Prueba que el h5 se lee una vez y cada modelo recibe su propia copia."""
+
+        # Preparación.
+        registry = str(tmp_path / "registry")
+        path = install_weights("tiny", source=backbone, directory=registry)
+        images = np.full((1, 4, 4, 3), 40.0, dtype=np.float32)
+
+        # Ejecución.
+        first = create_base_model("tiny", (4, 4, 3), directory=registry)
+        os.remove(path)
+        second = create_base_model("tiny", (8, 8, 3), directory=registry, pooling="avg")
+        first.layers[-1].kernel.assign(np.zeros((3, 2)))
+
+        # Verificación.
+        normalized = first.layers[1](images).numpy()[0, 0, 0]
+        np.testing.assert_allclose(normalized, [15.0, 20 / 3, 2.5], rtol=1e-6)
+        assert tuple(second.output.shape) == (None, 2)
+        assert np.any(second.layers[-2].kernel.numpy() != 0)
+
+    def test_input_stddev_is_folded_into_normalization(self, backbone, monkeypatch):
+        """Prueba que la desviación típica de ImageNet se aplica al normalizar."""
+
+        # Preparación.
+        monkeypatch.setattr(BACKBONES["tiny"], "input_stddev", (0.25, 1.0, 4.0))
+        images = np.full((1, 4, 4, 3), 40.0, dtype=np.float32)
+
+        # Ejecución.
+        model = create_base_model("tiny", (4, 4, 3), directory=backbone)
+
+        # Verificación.
+        normalized = model.layers[1](images).numpy()[0, 0, 0]
+        np.testing.assert_allclose(normalized, [30.0, 20 / 3, 1.25], rtol=1e-6)
@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+
+from app.ml.shard_cache import ShardCache, compute_content_key
+from app.ml.data_utils import decode_image_batches, prepare_dataset
+from app.tests.ml.utils import write_images
+
+
+def fake_decoder(image_size, calls):
+    """Devuelve un decodificador que rellena cada imagen con su posición."""
+
+    def decode(paths):
+        calls.append(list(paths))
+        batch = np.zeros((len(paths), image_size[1], image_size[0], 3), np.uint8)
+        for i in range(len(paths)):
+            batch[i] = i
+        yield batch
+
+    return decode
+
+
+class TestShardCache:
+
+    def test_builds_once_and_reuses(self, tmp_path):
+        """Prueba que las imágenes solo se decodifican la primera vez."""
+
+        # Preparación.
+        paths = write_images(tmp_path / "images", 3)
+        cache = ShardCache(str(tmp_path / "shards"), max_bytes=10**6)
+        calls = []
+
+        # Ejecución.
+        first = cache.get_or_build("d1", paths, (4, 4), fake_decoder((4, 4), calls))
+        second = cache.get_or_build("d1", paths, (4, 4), fake_decoder((4, 4), calls))
+
+        # Verificación.
+        assert len(calls) == 1
+        assert first.directory == second.directory
+        assert second.array.shape == (3, 4, 4, 3)
+        rows = second.rows_for([paths[2], paths[0]])
+        assert second.array[rows[0]][0, 0, 0] == sorted(paths).index(paths[2])
+
+    def test_content_change_drops_stale_version(self, tmp_path):
+        """Prueba que añadir una imagen crea una versión nueva y borra la anterior."""
+
+        # Preparación.
+        paths = write_images(tmp_path / "images", 3)
+        cache = ShardCache(str(tmp_path / "shards"), max_bytes=10**6)
+        old = cache.get_or_build("d1", paths[:2], (4, 4), fake_decoder((4, 4), []))
+
+        # Ejecución.
+        new = cache.get_or_build("d1", paths, (4, 4), fake_decoder((4, 4), []))
+
+        # Verificación.
+        assert compute_content_key(paths[:2], "4x4") != compute_content_key(
+            paths, "4x4"
+        )
+        assert not os.path.exists(old.directory)
+        assert [e["key"] for e in cache.entries()] == [os.path.basename(new.directory)]
+
+    def test_lru_eviction_under_budget(self, tmp_path):
+        """Prueba que se expulsa la entrada menos usada para respetar el espacio."""
+
+        # Preparación.
+        paths = write_images(tmp_path / "images", 2)
+        one_shard = 2 * 4 * 4 * 3
+        cache = ShardCache(str(tmp_path / "shards"), max_bytes=2 * one_shard)
+        cache.get_or_build("d1", paths, (4, 4), fake_decoder((4, 4), []))
+        os.utime(cache.entries()[0]["path"] + "/index.json", (1, 1))
+        cache.get_or_build("d2", paths, (4, 4), fake_decoder((4, 4), []))
+
+        # Ejecución.
+        cache.get_or_build("d3", paths, (4, 4), fake_decoder((4, 4), []))
+
+        # Verificación.
+        assert sorted(e["namespace"] for e in cache.entries()) == ["d2", "d3"]
+
+    def test_shard_larger_than_budget_is_not_cached(self, tmp_path):
+        """Prueba que un dataset que no cabe en la caché no se empaqueta."""
+
+        # Preparación.
+        paths = write_images(tmp_path / "images", 2)
+        cache = ShardCache(str(tmp_path / "shards"), max_bytes=10)
+
+        # Ejecución.
+        shard = cache.get_or_build("d1", paths, (4, 4), fake_decoder((4, 4), []))
+
+        # Verificación.
+        assert shard is None
+        assert cache.entries() == []
+
+    def test_invalidate(self, tmp_path):
+        """Prueba que invalidar un dataset elimina todas sus versiones."""
+
+        # Preparación.
+        paths = write_images(tmp_path / "images", 2)
+        cache = ShardCache(str(tmp_path / "shards"), max_bytes=10**6)
+        cache.get_or_build("d1", paths, (4, 4), fake_decoder((4, 4), []))
+        cache.get_or_build("d2", paths, (4, 4), fake_decoder((4, 4), []))
+
+        # Ejecución.
+        cache.invalidate("d1")
+
+        # Verificación.
+        assert [e["namespace"] for e in cache.entries()] == ["d2"]
+
+
+class TestPrepareDatasetWithShards:
+
+    def test_shard_matches_decoded_images(self, tmp_path, monkeypatch):
+        """Prueba que el dataset en caché contiene las mismas imágenes que sin ella."""
+
+        # Preparación.
+        paths = write_images(tmp_path / "images", 4, size=(16, 12))
+        labels = ["a", "b", "a", "b"]
+        cache = ShardCache(str(tmp_path / "shards"), max_bytes=10**6)
+        monkeypatch.setattr("app.ml.data_utils.shard_cache", cache)
+
+        # Ejecución.
+        decoded = np.concatenate(list(decode_image_batches(paths, (8, 8))))
+        train_ds, val_ds, _ = prepare_dataset(
+            paths,
+            labels,
+            {"a": 0, "b": 1},
+            batch_size=2,
+            image_size=(8, 8),
+            validation_split=0.5,
+            cache_namespace="d1",
+        )
+        val_images = np.concatenate([x.numpy() for x, _ in val_ds])
+
+        # Verificación.
+        assert len(cache.entries()) == 1
+        assert val_images.dtype == np.uint8
+        assert val_images.shape == (2, 8, 8, 3)
+        for image in val_images:
+            assert any(np.array_equal(image, d) for d in decoded)
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+from tensorflow import keras
+
+from app.ml.training_progress import TrainingProgressStore
+from app.ml.callbacks import (
+    CancellationCallback,
+    TrainingCancelled,
+    TrainingProgressCallback,
+)
+
+
+class TestTrainingProgressStore:
+
+    def test_start_update_and_clear(self, tmp_path):
+        """Prueba el ciclo de vida del progreso de un entrenamiento."""
+
+        # Preparación.
+        store = TrainingProgressStore(str(tmp_path))
+
+        # Ejecución.
+        store.start("c1", epochs=10)
+        first_version = store.version("c1")
+        store.update("c1", epoch=1, metrics={"loss": 0.5})
+        progress = store.read("c1")
+
+        # Verificación.
+        assert progress["status"] == "training"
+        assert progress["epoch"] == 1
+        assert progress["epochs"] == 10
+        assert progress["metrics"] == {"loss": 0.5}
+        assert store.version("c1") is not None
+        assert first_version is not None
+        store.clear("c1")
+        assert store.read("c1") is None
+        assert store.version("c1") is None
+
+    def test_start_discards_previous_training(self, tmp_path):
+        """Prueba que un nuevo entrenamiento no muestra el progreso del anterior."""
+
+        # Preparación.
+        store = TrainingProgressStore(str(tmp_path))
+        store.start("c1", epochs=10)
+        store.update("c1", status="failed", error_message="boom", epoch=4)
+
+        # Ejecución.
+        progress = store.start("c1", epochs=5)
+
+        # Verificación.
+        assert progress["epoch"] == 0
+        assert progress["error_message"] is None
+        assert store.read("c1")["epochs"] == 5
+
+    def test_cancel_request(self, tmp_path):
+        """Prueba que la petición de cancelación se guarda hasta retirarla."""
+
+        # Preparación.
+        store = TrainingProgressStore(str(tmp_path))
+
+        # Ejecución.
+        store.request_cancel("c1")
+        requested = store.cancel_requested("c1")
+        store.clear("c1")
+        kept = store.cancel_requested("c1")
+        store.clear_cancel("c1")
+
+        # Verificación.
+        assert requested and kept
+        assert not store.cancel_requested("c1")
+        assert not store.cancel_requested("c2")
+
+
+class TestTrainingProgressCallback:
+
+    def test_on_epoch_end_publishes_progress(self, tmp_path):
+        """Prueba que cada época publica métricas, velocidad y tiempo estimado."""
+
+        # Preparación.
+        store = TrainingProgressStore(str(tmp_path))
+        store.start("c1", epochs=4)
+        callback = TrainingProgressCallback("c1", epochs=4, train_size=100, store=store)
+
+        # Ejecución.
+        for epoch in range(2):
+            callback.on_epoch_begin(epoch)
+            callback.on_epoch_end(epoch, {"loss": 0.4, "val_accuracy": 0.8})
+        progress = store.read("c1")
+
+        # Verificación.
+        assert progress["epoch"] == 2
+        assert progress["metrics"] == {
+            "loss": pytest.approx(0.4),
+            "val_accuracy": pytest.approx(0.8),
+        }
+        assert progress["images_per_second"] > 0
+        mean_seconds = sum(callback.epoch_seconds) / 2
+        assert progress["eta_seconds"] == pytest.approx(2 * mean_seconds, abs=0.1)
+
+
+class TestCancellationCallback:
+
+    def test_fit_stops_at_the_next_batch(self, tmp_path):
+        """Prueba que el entrenamiento se detiene en el lote siguiente a la petición."""
+
+        # Preparación.
+        store = TrainingProgressStore(str(tmp_path))
+        model = keras.Sequential([keras.Input(shape=(4,)), keras.layers.Dense(1)])
+        model.compile(optimizer="sgd", loss="mse")
+        batches = []
+
+        def on_batch_end(batch, logs):
+            batches.append(batch)
+            if batch == 1:
+                store.request_cancel("c1")
+
+        callbacks = [
+            keras.callbacks.LambdaCallback(on_train_batch_end=on_batch_end),
+            CancellationCallback("c1", store=store, check_seconds=0),
+        ]
+
+        # Ejecución y verificación.
+        with pytest.raises(TrainingCancelled):
+            model.fit(
+                np.zeros((40, 4)),
+                np.zeros(40),
+                batch_size=4,
+                epochs=5,
+                callbacks=callbacks,
+                verbose=0,
+            )
+        assert batches == [0, 1]
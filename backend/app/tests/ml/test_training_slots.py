@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from app.ml.callbacks import TrainingCancelled
+from app.ml.training_slots import (
+    MemoryLimitCallback,
+    SlotUnavailable,
+    TrainingSlot,
+    available_cpus,
+    slot_cores,
+    slot_threads,
+)
+
+
+class TestSlotBudget:
+
+    def test_slot_threads(self):
+        """Prueba que los núcleos se reparten entre las plazas salvo que se fijen."""
+
+        assert slot_threads(slots=4, threads=0, cpu_count=16) == 4
+        assert slot_threads(slots=3, threads=0, cpu_count=2) == 1
+        assert slot_threads(slots=4, threads=6, cpu_count=16) == 6
+
+    def test_slot_cores_do_not_overlap(self):
+        """Prueba que cada plaza recibe su propio bloque de núcleos."""
+
+        cpus = list(range(8))
+
+        assert slot_cores(0, 4, cpus) == [0, 1, 2, 3]
+        assert slot_cores(1, 4, cpus) == [4, 5, 6, 7]
+        assert slot_cores(2, 4, cpus) == [0, 1, 2, 3]
+        assert slot_cores(0, 16, cpus) == cpus
+
+
+class TestTrainingSlot:
+
+    def test_slots_are_exclusive_until_released(self, tmp_path):
+        """Prueba que no se ocupan más plazas de las configuradas."""
+
+        # Preparación.
+        def new_slot():
+            return TrainingSlot(slots=2, wait_seconds=0, directory=str(tmp_path))
+
+        # Ejecución.
+        with new_slot() as first, new_slot() as second:
+            indices = (first.index, second.index)
+            with pytest.raises(SlotUnavailable):
+                with new_slot():
+                    pass
+        with new_slot() as reused:
+            reused_index = reused.index
+
+        # Verificación.
+        assert indices == (0, 1)
+        assert reused_index == 0
+        assert first.index is None
+
+    def test_cancelled_training_stops_waiting(self, tmp_path):
+        """Prueba que un entrenamiento cancelado no espera ni ocupa una plaza."""
+
+        # Ejecución y verificación.
+        with pytest.raises(TrainingCancelled):
+            with TrainingSlot(
+                slots=1,
+                wait_seconds=60,
+                directory=str(tmp_path),
+                should_cancel=lambda: True,
+            ):
+                pass
+        with TrainingSlot(slots=1, wait_seconds=0, directory=str(tmp_path)) as slot:
+            assert slot.index == 0
+
+    @pytest.mark.skipif(
+        not hasattr(os, "sched_setaffinity"), reason="Requires CPU affinity"
+    )
+    def test_pinned_slot_restores_affinity(self, tmp_path):
+        """Prueba que el proceso vuelve a sus núcleos al liberar la plaza."""
+
+        # Preparación.
+        cpus = available_cpus()
+
+        # Ejecución.
+        with TrainingSlot(
+            slots=1, pin_cores=True, wait_seconds=0, directory=str(tmp_path)
+        ) as slot:
+            pinned = available_cpus()
+
+        # Verificación.
+        assert pinned == slot.cores
+        assert available_cpus() == cpus
+
+    def test_memory_limit(self, tmp_path):
+        """Prueba que el entrenamiento se detiene al superar la memoria de la plaza."""
+
+        # Preparación.
+        slot = TrainingSlot(memory_mb=1, directory=str(tmp_path))
+
+        # Ejecución.
+        callbacks = slot.callbacks()
+
+        # Verificación.
+        assert TrainingSlot(directory=str(tmp_path)).callbacks() == []
+        assert isinstance(callbacks[0], MemoryLimitCallback)
+        with pytest.raises(MemoryError):
+            callbacks[0].on_train_batch_end(0)
@@ -0,0 +1,132 @@
+import json
+
+import numpy as np
+import pytest
+from tensorflow import keras
+
+from app.ml.warm_start import (
+    adapt_head,
+    continue_training,
+    load_previous_model,
+    merge_class_mapping,
+    output_layer,
+    warm_start_report,
+)
+from app.tests.ml.utils import build_dataset
+
+
+def build_model(num_classes: int, seed: int = 0) -> keras.Model:
+    keras.utils.set_random_seed(seed)
+    inputs = keras.Input(shape=(4,))
+    x = keras.layers.Dense(8, activation="relu")(inputs)
+    x = keras.layers.Dropout(0.2)(x)
+    return keras.Model(inputs, output_layer(num_classes)(x))
+
+
+class TestClassMapping:
+
+    def test_expand_keeps_learned_indices(self):
+        """Prueba que las clases aprendidas conservan su índice y las nuevas van al final."""
+
+        # Ejecución.
+        mapping = merge_class_mapping(
+            {"0": "dog", "1": "cat"}, ["ant", "cat", "dog", "cat"]
+        )
+
+        # Verificación.
+        assert mapping == {"dog": 0, "cat": 1, "ant": 2}
+
+    def test_expand_requires_learned_classes(self):
+        """Prueba que no se puede ampliar la capa de salida si falta una clase aprendida."""
+
+        # Ejecución y verificación.
+        with pytest.raises(ValueError, match="Classes no longer in the dataset: cat"):
+            merge_class_mapping({"0": "cat", "1": "dog"}, ["dog", "fox"])
+        assert merge_class_mapping(
+            {"0": "cat", "1": "dog"}, ["fox", "dog"], head="replace"
+        ) == {"dog": 0, "fox": 1}
+
+
+class TestAdaptHead:
+
+    def test_binary_head_expands_to_softmax(self):
+        """Prueba que un modelo binario pasa a varias clases sin cambiar sus predicciones."""
+
+        # Preparación.
+        model = build_model(2)
+        x = np.random.RandomState(1).rand(5, 4).astype("float32")
+        binary = model.predict(x, verbose=0)[:, 0]
+
+        # Ejecución.
+        expanded = adapt_head(model, previous_classes=2, num_classes=3)
+        probabilities = expanded.predict(x, verbose=0)
+
+        # Verificación.
+        assert probabilities.shape == (5, 3)
+        old = probabilities[:, :2] / probabilities[:, :2].sum(axis=1, keepdims=True)
+        np.testing.assert_allclose(old[:, 1], binary, rtol=1e-5)
+
+    def test_multiclass_head_keeps_learned_weights(self):
+        """Prueba que al ampliar la salida se copian los pesos de las clases aprendidas."""
+
+        # Preparación.
+        model = build_model(3)
+        kernel, bias = model.layers[-1].get_weights()
+
+        # Ejecución.
+        unchanged = adapt_head(model, previous_classes=3, num_classes=3)
+        expanded = adapt_head(model, previous_classes=3, num_classes=5)
+        replaced = adapt_head(model, previous_classes=3, num_classes=3, head="replace")
+
+        # Verificación.
+        assert unchanged is model
+        new_kernel, new_bias = expanded.layers[-1].get_weights()
+        np.testing.assert_allclose(new_kernel[:, :3], kernel)
+        np.testing.assert_allclose(new_bias[:3], bias)
+        assert new_kernel.shape == (8, 5)
+        assert replaced.layers[-1] is not model.layers[-1]
+        assert replaced.layers[1] is model.layers[1]
+
+
+class TestContinueTraining:
+
+    def test_continue_from_saved_model(self, tmp_path):
+        """Prueba que se continúa el entrenamiento de un modelo guardado con una clase nueva."""
+
+        # Preparación.
+        model = build_model(2)
+        model.compile(optimizer="adam", loss="binary_crossentropy")
+        model.save(str(tmp_path / "model.keras"))
+        metadata = {
+            "num_classes": 2,
+            "class_mapping": {"0": "cat", "1": "dog"},
+            "training_date": "2025-01-01T00:00:00+00:00",
+            "metrics": {"val_accuracy": 0.9, "warm_start": {"head": "expand"}},
+        }
+        (tmp_path / "metadata.json").write_text(json.dumps(metadata))
+
+        # Ejecución.
+        previous_model, previous_metadata = load_previous_model(str(tmp_path))
+        label_to_index = merge_class_mapping(
+            previous_metadata["class_mapping"], ["cat", "dog", "fox"]
+        )
+        model = adapt_head(previous_model, 2, len(label_to_index))
+        model, history = continue_training(
+            model,
+            build_dataset(24, num_classes=3, batch_size=8),
+            build_dataset(24, num_classes=3, batch_size=8),
+            num_classes=3,
+            epochs=2,
+            learning_rate=0.01,
+        )
+        report = warm_start_report(
+            previous_metadata, label_to_index, "expand", reused_split=True
+        )
+
+        # Verificación.
+        assert model.output_shape == (None, 3)
+        assert len(history.history["loss"]) == 2
+        assert report["previous_metrics"] == {"val_accuracy": 0.9}
+        assert report["previous_classes"] == ["cat", "dog"]
+        assert report["new_classes"] == ["fox"]
+        assert report["reused_split"] is True
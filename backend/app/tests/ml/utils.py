@@ -0,0 +1,42 @@
+"""Utilidades compartidas por las pruebas de aprendizaje automático."""
+
+import os
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from PIL import Image as PILImage
+
+
+def write_images(directory, count, size=(8, 8), extension="jpg"):
+    """Crea imágenes de colores distintos y devuelve sus rutas."""
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(str(directory), f"img_{i}.{extension}")
+        PILImage.new("RGB", size, color=(i * 30, 255 - i * 30, 100)).save(path)
+        paths.append(path)
+    return paths
+
+
+def build_model(seed: int = 0, learning_rate: float = 0.01) -> keras.Model:
+    """Modelo lineal mínimo que clasifica vectores de 4 valores en dos clases."""
+
+    keras.utils.set_random_seed(seed)
+    model = keras.Sequential([keras.Input(shape=(4,)), keras.layers.Dense(2)])
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate),
+        loss=keras.losses.SparseCategoricalCrossentropy(from_logits=True),
+    )
+    return model
+
+
+def build_dataset(
+    size: int = 16, num_classes: int = 2, batch_size: int = 4
+) -> tf.data.Dataset:
+    """Dataset reproducible de vectores de 4 valores con las clases alternadas."""
+
+    x = np.random.RandomState(0).rand(size, 4).astype("float32")
+    y = np.arange(size) % num_classes
+    return tf.data.Dataset.from_tensor_slices((x, y)).batch(batch_size)
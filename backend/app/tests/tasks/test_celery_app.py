@@ -0,0 +1,544 @@
+import io
+import os
+import json
+import uuid
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from celery.exceptions import Retry
+from PIL import Image as PILImage
+
+from app.ml.callbacks import TrainingCancelled
+from app.ml.model_cache import CachedModel
+from app.ml.training_slots import TRAINING_SLOT_RETRY_SECONDS, SlotUnavailable
+from app.models.classifiers import ClassifierTrainingStatus
+from app.tasks.celery_app import (
+    predict_image_batch,
+    train_model,
+    train_search_trial,
+    update_classifier_status,
+)
+
+
+class TestPredictImageBatch:
+
+    def test_predict_image_batch_reads_files_and_records_failures(self, tmp_path):
+        """Prueba que se clasifican las imágenes de disco y se registran las fallidas."""
+
+        # Preparación.
+        buffer = io.BytesIO()
+        PILImage.new("RGB", (20, 20), (0, 255, 0)).save(buffer, format="JPEG")
+        (tmp_path / "ok.jpg").write_bytes(buffer.getvalue())
+        (tmp_path / "broken.jpg").write_bytes(b"not an image")
+
+        rows = [
+            SimpleNamespace(id=uuid.uuid4(), name="ok.jpg", file_path="ok.jpg"),
+            SimpleNamespace(id=uuid.uuid4(), name="broken.jpg", file_path="broken.jpg"),
+            SimpleNamespace(id=uuid.uuid4(), name="missing.jpg", file_path="none.jpg"),
+        ]
+        model = MagicMock()
+        model.predict_on_batch.side_effect = lambda batch: np.tile(
+            np.array([[0.1, 0.6, 0.3]], dtype=np.float32), (len(batch), 1)
+        )
+        cached_model = CachedModel(
+            classifier_id="c",
+            version="v",
+            model=model,
+            metadata={
+                "class_mapping": {"0": "cat", "1": "dog", "2": "bird"},
+                "train_params": {"image_size": [8, 8]},
+            },
+            size_bytes=0,
+        )
+
+        # Ejecución.
+        with patch("app.tasks.celery_app.MEDIA_ROOT", str(tmp_path)):
+            results = predict_image_batch(
+                cached_model, rows, architecture="resnet50", top_k=2
+            )
+
+        # Verificación.
+        assert model.predict_on_batch.call_count == 1
+        assert [r.image_id for r in results] == [row.id for row in rows]
+        assert results[0].predicted_class == "dog"
+        assert [t["class"] for t in results[0].top_k] == ["dog", "bird"]
+        assert results[0].error is None
+        assert results[1].error is not None
+        assert results[2].error is not None
+        assert results[1].predicted_class is None
+
+
+class TestTrainModel:
+
+    def run_train_model(
+        self, tmp_path, slot_error, retries=0, classifier_id=None, model_parameters=None
+    ):
+        """Ejecuta train_model en el intento indicado con una plaza que lanza slot_error.
+
+        Returns:
+            SimpleNamespace: Resultado de la tarea (None si queda pendiente de
+                reintento), mocks de retry y de la firma con la que se vuelve a
+                encolar y argumentos de cada actualización del estado.
+        """
+
+        slot = MagicMock()
+        slot.__enter__.side_effect = slot_error
+        update_status = MagicMock()
+        retry = MagicMock(side_effect=Retry())
+        requeue = MagicMock()
+
+        train_model.push_request(retries=retries)
+        try:
+            with patch("app.tasks.celery_app.TrainingSlot", return_value=slot), patch(
+                "app.tasks.celery_app.update_classifier_status", update_status
+            ), patch("app.tasks.celery_app.training_progress"), patch(
+                "app.tasks.celery_app.MODELS_DIR", str(tmp_path)
+            ), patch.object(
+                train_model, "retry", retry
+            ), patch.object(
+                train_model, "signature_from_request", requeue
+            ):
+                try:
+                    result = train_model(
+                        classifier_id or str(uuid.uuid4()),
+                        str(uuid.uuid4()),
+                        "xception_mini",
+                        model_parameters or {},
+                    )
+                except Retry:
+                    result = None
+        finally:
+            train_model.pop_request()
+
+        updates = [c.kwargs for c in update_status.call_args_list]
+        return SimpleNamespace(
+            result=result,
+            retry=retry,
+            requeue=requeue,
+            updates=updates,
+            statuses=[update["status"] for update in updates],
+        )
+
+    def test_slot_unavailable_requeues_without_failing(self, tmp_path):
+        """Prueba que sin plaza libre la tarea se vuelve a encolar sin límite de intentos."""
+
+        # Ejecución.
+        first = self.run_train_model(tmp_path, SlotUnavailable("No free slot"))
+        retried = self.run_train_model(
+            tmp_path, SlotUnavailable("No free slot"), retries=train_model.max_retries
+        )
+
+        # Verificación.
+        assert first.result is None
+        assert first.retry.call_count == 0
+        first.requeue.assert_called_once_with(
+            countdown=TRAINING_SLOT_RETRY_SECONDS, retries=0
+        )
+        first.requeue.return_value.apply_async.assert_called_once_with()
+        assert first.statuses == []
+        assert retried.result is None
+        retried.requeue.assert_called_once_with(
+            countdown=TRAINING_SLOT_RETRY_SECONDS, retries=train_model.max_retries
+        )
+        assert retried.statuses == [ClassifierTrainingStatus.TRAINING]
+
+    def test_failed_warm_start_keeps_previous_model(self, tmp_path):
+        """Prueba que un entrenamiento continuado fallido sigue sirviendo el modelo anterior."""
+
+        # Preparación.
+        classifier_id = str(uuid.uuid4())
+        (tmp_path / classifier_id).mkdir()
+        (tmp_path / classifier_id / "model.keras").write_bytes(b"model")
+        model_parameters = {"warm_start": {"head": "expand"}}
+
+        # Ejecución.
+        failed = self.run_train_model(
+            tmp_path,
+            ValueError("Disk full"),
+            classifier_id=classifier_id,
+            model_parameters=model_parameters,
+        )
+        cancelled = self.run_train_model(
+            tmp_path,
+            TrainingCancelled("Training was cancelled before it started"),
+            classifier_id=classifier_id,
+            model_parameters=model_parameters,
+        )
+
+        # Verificación.
+        assert failed.result["status"] == "error"
+        assert failed.updates == [
+            {
+                "classifier_uuid": uuid.UUID(classifier_id),
+                "status": ClassifierTrainingStatus.TRAINED,
+                "error_message": "Disk full",
+            }
+        ]
+        assert cancelled.result["status"] == "cancelled"
+        assert cancelled.updates == [
+            {
+                "classifier_uuid": uuid.UUID(classifier_id),
+                "status": ClassifierTrainingStatus.TRAINED,
+                "error_message": "Training was cancelled",
+            }
+        ]
+        assert (tmp_path / classifier_id / "model.keras").read_bytes() == b"model"
+
+    def test_cancel_during_fine_tuning_marks_cancelled(self, tmp_path):
+        """Prueba que cancelar en la segunda fase de EfficientNetB3 no guarda el modelo."""
+
+        # Preparación.
+        images = tf.zeros((2, 8, 8, 3))
+        dataset = tf.data.Dataset.from_tensor_slices((images, [0, 1])).batch(2)
+        base_model = MagicMock(spec=keras.Model)
+        base_model.layers = []
+        model = MagicMock()
+        model.output_shape = (None, 1)
+        model.layers = [base_model]
+        model.fit.side_effect = [
+            SimpleNamespace(epoch=[0], history={"loss": [1.0]}),
+            TrainingCancelled("Training was cancelled"),
+        ]
+        slot = MagicMock()
+        slot.__enter__.return_value.callbacks.return_value = []
+        update_status = MagicMock()
+        classifier_id = str(uuid.uuid4())
+
+        # Ejecución.
+        with patch("app.tasks.celery_app.TrainingSlot", return_value=slot), patch(
+            "app.tasks.celery_app.get_celery_session"
+        ), patch(
+            "app.tasks.celery_app.extract_dataset_from_db",
+            return_value=(
+                ["a.jpg", "b.jpg"],
+                ["cat", "dog"],
+                {"cat": 0, "dog": 1},
+                {0: "cat", 1: "dog"},
+            ),
+        ), patch(
+            "app.tasks.celery_app.prepare_dataset",
+            return_value=(dataset, dataset, {"train_size": 2, "val_size": 2}),
+        ), patch(
+            "app.ml.models.efficientnetb3.create_model", return_value=model
+        ), patch(
+            "app.tasks.celery_app.update_classifier_status", update_status
+        ), patch(
+            "app.tasks.celery_app.save_trained_model"
+        ) as save_model, patch(
+            "app.tasks.celery_app.training_progress"
+        ), patch(
+            "app.tasks.celery_app.MODELS_DIR", str(tmp_path)
+        ):
+            result = train_model(
+                classifier_id,
+                str(uuid.uuid4()),
+                "efficientnetb3",
+                {"epochs": 4, "checkpoint_interval": 0},
+            )
+
+        # Verificación.
+        assert model.fit.call_count == 2
+        assert result["status"] == "cancelled"
+        assert [c.kwargs["status"] for c in update_status.call_args_list] == [
+            ClassifierTrainingStatus.CANCELLED
+        ]
+        save_model.assert_not_called()
+
+    def run_warm_start(
+        self, tmp_path, classifier_id, model, image_paths, labels, model_parameters
+    ):
+        """Ejecuta un entrenamiento continuado sin entrenar ni evaluar el modelo.
+
+        Returns:
+            SimpleNamespace: Resultado de la tarea, mock de update_classifier_status
+                y mock de prepare_dataset.
+        """
+
+        slot = MagicMock()
+        slot.__enter__.return_value.callbacks.return_value = []
+        update_status = MagicMock()
+        label_to_index = {label: i for i, label in enumerate(sorted(set(labels)))}
+        prepare_dataset = MagicMock(
+            return_value=(MagicMock(), MagicMock(), {"train_size": 2, "val_size": 2})
+        )
+
+        def export_tflite(model, directory, **kwargs):
+            path = os.path.join(directory, "model.tflite")
+            os.makedirs(directory, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(b"new")
+            return path
+
+        with patch("app.tasks.celery_app.TrainingSlot", return_value=slot), patch(
+            "app.tasks.celery_app.get_celery_session"
+        ), patch(
+            "app.tasks.celery_app.extract_dataset_from_db",
+            return_value=(
+                image_paths,
+                labels,
+                label_to_index,
+                {i: label for label, i in label_to_index.items()},
+            ),
+        ), patch(
+            "app.tasks.celery_app.load_previous_model",
+            return_value=(
+                MagicMock(),
+                {"num_classes": 2, "class_mapping": {"0": "cat", "1": "dog"}},
+            ),
+        ), patch(
+            "app.tasks.celery_app.prepare_dataset", prepare_dataset
+        ), patch(
+            "app.tasks.celery_app.adapt_head"
+        ), patch(
+            "app.tasks.celery_app.continue_training",
+            return_value=(model, SimpleNamespace(history={"loss": [1.0]})),
+        ), patch(
+            "app.tasks.celery_app.evaluate_model",
+            return_value=({}, {"accuracy_from_confusion_matrix": 0.5}, {}),
+        ), patch(
+            "app.tasks.celery_app.warm_start_report", return_value={}
+        ), patch(
+            "app.tasks.celery_app.export_tflite_model", side_effect=export_tflite
+        ), patch(
+            "app.tasks.celery_app.evaluate_classification_accuracy", return_value=0.5
+        ), patch(
+            "app.tasks.celery_app.TFLiteModel"
+        ), patch(
+            "app.tasks.celery_app.update_classifier_status", update_status
+        ), patch(
+            "app.tasks.celery_app.training_progress"
+        ), patch(
+            "app.tasks.celery_app.MODELS_DIR", str(tmp_path)
+        ):
+            result = train_model(
+                classifier_id,
+                str(uuid.uuid4()),
+                "xception_mini",
+                {
+                    "warm_start": {"head": "expand"},
+                    "checkpoint_interval": 0,
+                    **model_parameters,
+                },
+            )
+
+        return SimpleNamespace(
+            result=result, update_status=update_status, prepare_dataset=prepare_dataset
+        )
+
+    def test_failed_warm_start_keeps_previous_tflite(self, tmp_path):
+        """Prueba que un reentrenamiento que falla tras exportar no sustituye el TFLite."""
+
+        # Preparación.
+        classifier_id = str(uuid.uuid4())
+        model_dir = tmp_path / classifier_id
+        model_dir.mkdir()
+        for name in ("model.keras", "metadata.json", "model.tflite"):
+            (model_dir / name).write_bytes(b"old")
+        model = MagicMock()
+        model.save.side_effect = OSError("Disk full")
+
+        # Ejecución.
+        run = self.run_warm_start(
+            tmp_path,
+            classifier_id,
+            model,
+            ["a.jpg", "b.jpg"],
+            ["cat", "dog"],
+            {"tflite_quantization": "dynamic"},
+        )
+
+        # Verificación.
+        assert run.result["status"] == "error"
+        assert run.update_status.call_args.kwargs["status"] == (
+            ClassifierTrainingStatus.TRAINED
+        )
+        assert sorted(os.listdir(model_dir)) == [
+            "metadata.json",
+            "model.keras",
+            "model.tflite",
+        ]
+        for name in ("model.keras", "metadata.json", "model.tflite"):
+            assert (model_dir / name).read_bytes() == b"old"
+
+    def test_warm_start_keeps_previous_validation_images(self, tmp_path):
+        """Prueba que un entrenamiento continuado no entrena con la validación anterior."""
+
+        # Preparación.
+        classifier_id = str(uuid.uuid4())
+        model_dir = tmp_path / classifier_id
+        model_dir.mkdir()
+        previous_train = [f"cat_{i}.jpg" for i in range(4)] + [
+            f"dog_{i}.jpg" for i in range(4)
+        ]
+        previous_val = ["cat_4.jpg", "dog_4.jpg"]
+        (model_dir / "split.json").write_text(
+            json.dumps({"train": previous_train, "val": previous_val})
+        )
+        new_images = [f"fox_{i}.jpg" for i in range(5)]
+        image_paths = previous_val + new_images + previous_train
+        labels = [path.split("_")[0] for path in image_paths]
+
+        def save(path):
+            with open(path, "wb") as f:
+                f.write(b"new")
+
+        model = MagicMock()
+        model.save.side_effect = save
+
+        # Ejecución.
+        run = self.run_warm_start(
+            tmp_path, classifier_id, model, image_paths, labels, {}
+        )
+
+        # Verificación.
+        assert run.result["status"] == "success"
+        train_paths, val_paths = run.prepare_dataset.call_args.kwargs["split"]
+        assert not set(previous_val) & set(train_paths)
+        assert set(previous_val) <= set(val_paths)
+        assert set(previous_train) <= set(train_paths)
+        assert len([path for path in val_paths if path.startswith("fox")]) == 1
+        saved_split = json.loads((model_dir / "split.json").read_text())
+        assert saved_split == {"train": train_paths, "val": val_paths}
+
+
+    def test_distillation_validates_on_teacher_split(self, tmp_path):
+        """Prueba que el alumno se compara con el profesor en la validación de este."""
+
+        # Preparación.
+        classifier_id = str(uuid.uuid4())
+        teacher_id = str(uuid.uuid4())
+        teacher_dir = tmp_path / teacher_id
+        teacher_dir.mkdir()
+        teacher_train = [f"cat_{i}.jpg" for i in range(4)] + [
+            f"dog_{i}.jpg" for i in range(4)
+        ]
+        teacher_val = ["cat_4.jpg", "dog_4.jpg"]
+        (teacher_dir / "split.json").write_text(
+            json.dumps({"train": teacher_train, "val": teacher_val})
+        )
+        image_paths = teacher_val + teacher_train
+        labels = [path.split("_")[0] for path in image_paths]
+        teacher_logits = MagicMock()
+        teacher_logits.accuracy.return_value = 0.9
+        teacher_logits.seconds = 0.1
+        slot = MagicMock()
+        slot.__enter__.return_value.callbacks.return_value = []
+
+        # Ejecución.
+        with patch("app.tasks.celery_app.TrainingSlot", return_value=slot), patch(
+            "app.tasks.celery_app.get_celery_session"
+        ), patch(
+            "app.tasks.celery_app.extract_dataset_from_db",
+            return_value=(
+                image_paths,
+                labels,
+                {"cat": 0, "dog": 1},
+                {0: "cat", 1: "dog"},
+            ),
+        ), patch(
+            "app.tasks.celery_app.load_previous_model",
+            return_value=(MagicMock(), {"class_mapping": {"0": "cat", "1": "dog"}}),
+        ), patch(
+            "app.tasks.celery_app.prepare_dataset",
+            return_value=(MagicMock(), MagicMock(), {"train_size": 8, "val_size": 2}),
+        ), patch(
+            "app.tasks.celery_app.load_teacher_logits", return_value=teacher_logits
+        ), patch(
+            "app.tasks.celery_app.train_student",
+            return_value=(MagicMock(), SimpleNamespace(history={"loss": [1.0]})),
+        ), patch(
+            "app.tasks.celery_app.evaluate_model",
+            return_value=({}, {"accuracy_from_confusion_matrix": 0.8}, {}),
+        ), patch(
+            "app.tasks.celery_app.measure_latency"
+        ), patch(
+            "app.tasks.celery_app.distillation_report", return_value={}
+        ) as report, patch(
+            "app.tasks.celery_app.update_classifier_status", return_value=False
+        ), patch(
+            "app.tasks.celery_app.training_progress"
+        ), patch(
+            "app.tasks.celery_app.MODELS_DIR", str(tmp_path)
+        ):
+            result = train_model(
+                classifier_id,
+                str(uuid.uuid4()),
+                "xception_mini",
+                {"distillation": {"teacher_id": teacher_id}, "checkpoint_interval": 0},
+            )
+
+        # Verificación.
+        assert result["status"] == "success"
+        val_paths, val_labels = teacher_logits.accuracy.call_args.args
+        assert val_paths == teacher_val
+        assert val_labels == [0, 1]
+        assert report.call_args.kwargs["validation_images"] == 2
+        assert report.call_args.kwargs["teacher_split"] is True
+
+
+class TestTrainSearchTrial:
+
+    def test_trial_is_recorded_after_last_retry(self):
+        """Prueba que una prueba sin reintentos se registra como fallida."""
+
+        # Preparación.
+        classifier_id = str(uuid.uuid4())
+        record = MagicMock(return_value=("wait", [], None))
+        retry = MagicMock(side_effect=Retry())
+
+        # Ejecución.
+        train_search_trial.push_request(retries=train_search_trial.max_retries)
+        try:
+            with patch(
+                "app.tasks.celery_app.get_celery_session",
+                side_effect=ConnectionError("Database unavailable"),
+            ), patch("app.tasks.celery_app.record_search_trial", record), patch.object(
+                train_search_trial, "retry", retry
+            ):
+                result = train_search_trial(
+                    classifier_id, str(uuid.uuid4()), "xception_mini", 2, 1
+                )
+        finally:
+            train_search_trial.pop_request()
+
+        # Verificación.
+        assert retry.call_count == 0
+        record.assert_called_once_with(uuid.UUID(classifier_id), 2, 1, None)
+        assert result["status"] == "error"
+
+
+class TestUpdateClassifierStatus:
+
+    def test_new_model_replaces_previous_metrics(self):
+        """Prueba que un modelo nuevo no hereda las métricas del anterior."""
+
+        # Preparación.
+        classifier = SimpleNamespace(
+            status=ClassifierTrainingStatus.TRAINING,
+            metrics={"accuracy": 0.9, "tflite": {"size_bytes": 10}},
+            file_path="models/c",
+            trained_at=None,
+        )
+        session = MagicMock()
+        session.execute.return_value.scalar_one_or_none.return_value = classifier
+        session_context = MagicMock()
+        session_context.__enter__.return_value = session
+
+        # Ejecución.
+        with patch(
+            "app.tasks.celery_app.get_celery_session", return_value=session_context
+        ), patch("app.tasks.celery_app.training_progress"):
+            updated = update_classifier_status(
+                classifier_uuid=uuid.uuid4(),
+                status=ClassifierTrainingStatus.TRAINED,
+                metrics={"accuracy": 0.95},
+                model_path="models/c",
+            )
+
+        # Verificación.
+        assert updated is True
+        assert classifier.status == ClassifierTrainingStatus.TRAINED
+        assert classifier.metrics == {"accuracy": 0.95}
+        assert classifier.trained_at is not None